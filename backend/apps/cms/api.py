@@ -8,18 +8,146 @@ Endpoints created:
 - /api/v2/pages/ - List/retrieve CMS pages (HomePage, BlogPage, TeamPage)
 - /api/v2/images/ - List/retrieve uploaded images
 - /api/v2/documents/ - List/retrieve uploaded documents
+
+Each endpoint caches its serialized responses (see apps/cms/cache.py) and
+sends an ETag, so clients revalidating with If-None-Match get a 304. Cached
+entries are invalidated by the publish/unpublish signals in apps/cms/signals.py.
 """
 
+import json
+
+from django.core.cache import cache
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 from wagtail.api.v2.router import WagtailAPIRouter
 from wagtail.api.v2.views import PagesAPIViewSet
 from wagtail.images.api.v2.views import ImagesAPIViewSet
 from wagtail.documents.api.v2.views import DocumentsAPIViewSet
 
+from apps.cms.cache import (
+    PAGE_LISTING_SCOPE,
+    get_timeout,
+    make_etag,
+    page_scope,
+    response_key,
+)
+
+
+class CachedAPIViewSetMixin:
+    """
+    Cache listing and detail responses per URL and query string.
+
+    Only anonymous requests are cached, because page view restrictions make
+    responses depend on the user or session.
+    """
+
+    # Version scope shared by every response of the endpoint
+    cache_scope = None
+
+    def get_listing_cache_scopes(self):
+        return [self.cache_scope]
+
+    def get_detail_cache_scopes(self, pk):
+        return [self.cache_scope]
+
+    def is_cacheable(self, request):
+        if request.user.is_authenticated:
+            return False
+        # Visitors who unlocked a password-protected page see extra content
+        return "passed_page_view_restrictions" not in request.session
+
+    def listing_view(self, request):
+        return self.cached_response(
+            request, self.get_listing_cache_scopes(), super().listing_view, request
+        )
+
+    def detail_view(self, request, pk):
+        return self.cached_response(
+            request, self.get_detail_cache_scopes(pk), super().detail_view, request, pk
+        )
+
+    def cached_response(self, request, scopes, view, *args):
+        """Serve from cache, or run the view and cache a successful result."""
+        if not self.is_cacheable(request):
+            return view(*args)
+
+        key = response_key(request, *scopes)
+        cached = cache.get(key)
+
+        if cached is None:
+            response = view(*args)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+
+            content = json.dumps(response.data, cls=JSONEncoder, sort_keys=True)
+            cached = (response.data, make_etag(content.encode()))
+            cache.set(key, cached, get_timeout())
+
+        data, etag = cached
+        headers = {"ETag": etag}
+
+        if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+        if if_none_match:
+            etags = parse_etags(if_none_match)
+            if "*" in etags or etag in etags:
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        return Response(data, headers=headers)
+
+
+class CachedPagesAPIViewSet(CachedAPIViewSetMixin, PagesAPIViewSet):
+    """
+    Pages endpoint; detail entries are invalidated per page.
+
+    Page models can define a `get_api_queryset(queryset)` classmethod to add
+    select_related/prefetch_related for the fields their API serializes.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        get_api_queryset = getattr(queryset.model, "get_api_queryset", None)
+        if get_api_queryset:
+            queryset = get_api_queryset(queryset)
+        return queryset
+
+    def get_object(self):
+        # get_serializer_class() also calls get_object(), so load it only once
+        if not hasattr(self, "_object"):
+            self._object = self._get_specific_object()
+        return self._object
+
+    def _get_specific_object(self):
+        # Load the specific page through its optimised queryset instead of
+        # PagesAPIViewSet's plain `.specific` lookup
+        page = super(PagesAPIViewSet, self).get_object()
+        model = page.specific_class
+        if model is None or not hasattr(model, "get_api_queryset"):
+            return page.specific
+        if isinstance(page, model):
+            return page
+        return model.get_api_queryset(model.objects.filter(pk=page.pk)).get()
+
+    def get_listing_cache_scopes(self):
+        return [PAGE_LISTING_SCOPE]
+
+    def get_detail_cache_scopes(self, pk):
+        return [page_scope(pk)]
+
+
+class CachedImagesAPIViewSet(CachedAPIViewSetMixin, ImagesAPIViewSet):
+    cache_scope = "images"
+
+
+class CachedDocumentsAPIViewSet(CachedAPIViewSetMixin, DocumentsAPIViewSet):
+    cache_scope = "documents"
+
 
 # Create the router instance
 api_router = WagtailAPIRouter("wagtailapi")
 
-# Register the standard Wagtail API endpoints
-api_router.register_endpoint("pages", PagesAPIViewSet)
-api_router.register_endpoint("images", ImagesAPIViewSet)
-api_router.register_endpoint("documents", DocumentsAPIViewSet)
+# Register the cached Wagtail API endpoints
+api_router.register_endpoint("pages", CachedPagesAPIViewSet)
+api_router.register_endpoint("images", CachedImagesAPIViewSet)
+api_router.register_endpoint("documents", CachedDocumentsAPIViewSet)
@@ -5,3 +5,6 @@ class CmsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     # Use full dotted path so Django can discover the app correctly
     name = "apps.cms"
+
+    def ready(self):
+        import apps.cms.signals  # noqa
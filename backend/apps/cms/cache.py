@@ -0,0 +1,74 @@
+"""
+Response cache for the Wagtail API v2 endpoints.
+
+Serialized API responses are cached per host, path and query string. Rather
+than deleting keys (which the default cache backends cannot do by prefix),
+every key embeds a version token. Publishing or unpublishing a page swaps the
+token for that page and for the listing, so old entries are simply never read
+again and expire on their own.
+
+Use a shared cache backend (see CACHES in settings) when running more than one
+worker process, otherwise invalidation only reaches the process that handled
+the publish.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+KEY_PREFIX = "wagtailapi"
+
+
+def get_timeout():
+    """Seconds a cached API response is kept (WAGTAIL_API_CACHE_TIMEOUT)."""
+    return getattr(settings, "WAGTAIL_API_CACHE_TIMEOUT", 300)
+
+
+def _version_key(scope):
+    return f"{KEY_PREFIX}:version:{scope}"
+
+
+def get_version(scope):
+    """
+    Return the current version token for a cache scope.
+
+    A missing token (never set, or evicted) is replaced with a fresh one so a
+    stale entry can never be picked up again after eviction.
+    """
+    key = _version_key(scope)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(*scopes):
+    """Invalidate every response cached under the given scopes."""
+    token = time.time_ns()
+    cache.set_many({_version_key(scope): token for scope in scopes}, timeout=None)
+
+
+# Scope shared by every page listing (any publish can change a listing)
+PAGE_LISTING_SCOPE = "pages:listing"
+
+
+def page_scope(page_id):
+    """Scope for the detail responses of a single page."""
+    return f"pages:{page_id}"
+
+
+def response_key(request, *scopes):
+    """Build the cache key for a request under the given version scopes."""
+    versions = ":".join(str(get_version(scope)) for scope in scopes)
+    url = f"{request.get_host()}{request.get_full_path()}"
+    digest = hashlib.md5(url.encode()).hexdigest()
+    return f"{KEY_PREFIX}:response:{digest}:{versions}"
+
+
+def make_etag(content):
+    """Strong ETag for a rendered response body."""
+    return '"%s"' % hashlib.md5(content).hexdigest()
@@ -0,0 +1,68 @@
+"""
+Management command to pre-generate image renditions for CMS pages.
+
+Generates every rendition declared through ImageRenditionField in the pages'
+`api_fields` (hero images, featured images, player headshots) so the first
+API request after a deploy or bulk import does not pay for image processing.
+Renditions that already exist are skipped.
+
+Usage:
+    # Warm renditions for all live pages
+    python manage.py warm_renditions
+
+    # Use 4 worker threads
+    python manage.py warm_renditions --workers=4
+
+    # Warm a single page
+    python manage.py warm_renditions --page=12
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from wagtail.models import Page
+
+from apps.cms.renditions import collect_missing_renditions, warm_renditions
+
+
+class Command(BaseCommand):
+    help = 'Pre-generate image renditions used by the Wagtail API'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=2,
+            help='Number of worker threads (default: 2, use 1 to run in the main thread)',
+        )
+        parser.add_argument(
+            '--page',
+            type=int,
+            help='Warm renditions for a single page ID',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='List missing renditions without generating them',
+        )
+
+    def handle(self, *args, **options):
+        pages = Page.objects.live().specific()
+
+        if options['page']:
+            pages = pages.filter(pk=options['page'])
+            if not pages:
+                raise CommandError(f"Live page with ID {options['page']} not found")
+
+        if options['dry_run']:
+            missing = collect_missing_renditions(pages)
+            total = sum(len(specs) for specs in missing.values())
+            for image_id, specs in missing.items():
+                self.stdout.write(f"  Image {image_id}: {', '.join(sorted(specs))}")
+            self.stdout.write(f'{total} missing renditions across {len(missing)} images.')
+            return
+
+        created, failed = warm_renditions(pages, workers=options['workers'])
+
+        if failed:
+            self.stdout.write(self.style.WARNING(f'{failed} images failed (see logs).'))
+
+        self.stdout.write(self.style.SUCCESS(f'Generated {created} renditions.'))
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.1 on 2026-10-19 02:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms', '0004_homepage_huddle_limit_homepage_merch_limit_and_more'),
+        ('wagtailcore', '0096_referenceindex_referenceindex_source_object_and_more'),
+        ('wagtailimages', '0027_image_description'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='homepage',
+            name='huddle_limit',
+            field=models.IntegerField(default=4, help_text='Number of posts to show (1-12)'),
+        ),
+        migrations.AlterField(
+            model_name='homepage',
+            name='merch_limit',
+            field=models.IntegerField(default=6, help_text='Number of products to show (1-12)'),
+        ),
+        migrations.AddIndex(
+            model_name='blogpage',
+            index=models.Index(fields=['-date'], name='cms_blogpage_date_idx'),
+        ),
+    ]
@@ -1,16 +1,40 @@
+from django.core.paginator import Paginator
 from django.db import models
+from django.db.models import Prefetch
 from django.contrib.auth import get_user_model
 from modelcluster.fields import ParentalKey
 from wagtail import blocks
 from wagtail.admin.panels import FieldPanel, InlinePanel, MultiFieldPanel
 from wagtail.api import APIField
 from wagtail.fields import RichTextField, StreamField
+from wagtail.images import get_image_model
 from wagtail.images.api.fields import ImageRenditionField
 from wagtail.images.blocks import ImageChooserBlock
 from wagtail.models import Orderable, Page
 
 User = get_user_model()
 
+# Rendition specs served by the API
+HERO_IMAGE_SPEC = "fill-800x600"
+FEATURED_IMAGE_SPEC = "fill-1200x800"
+HEADSHOT_SPEC = "fill-300x300"
+
+BLOG_POSTS_PER_PAGE = 12
+
+
+def prefetch_renditions(image_field, *filter_specs):
+	"""
+	Prefetch the renditions of an image foreign key for the given specs.
+
+	Pair with select_related(image_field) so each image and its renditions
+	are loaded without a query per row.
+	"""
+	Rendition = get_image_model().get_rendition_model()
+	return Prefetch(
+		f"{image_field}__renditions",
+		queryset=Rendition.objects.filter(filter_spec__in=filter_specs),
+	)
+
 
 class HomePage(Page):
 	"""Homepage with hero and flexible content blocks."""
@@ -115,7 +139,7 @@ class HomePage(Page):
 		APIField("hero_heading"),
 		APIField("hero_tagline"),
 		APIField("hero_subheading"),
-		APIField("hero_image", serializer=ImageRenditionField("fill-800x600")),
+		APIField("hero_image", serializer=ImageRenditionField(HERO_IMAGE_SPEC)),
 		APIField("cta_label"),
 		APIField("cta_url"),
 		APIField("show_huddle_section"),
@@ -131,6 +155,13 @@ class HomePage(Page):
 	# Only allow one HomePage
 	max_count = 1
 
+	@classmethod
+	def get_api_queryset(cls, queryset):
+		"""Load the hero image and its rendition with the page."""
+		return queryset.select_related("hero_image").prefetch_related(
+			prefetch_renditions("hero_image", HERO_IMAGE_SPEC)
+		)
+
 
 class BlogIndexPage(Page):
 	"""List page for blog posts."""
@@ -149,8 +180,13 @@ class BlogIndexPage(Page):
 	]
 
 	def get_blog_posts(self):
-		"""Return published blog posts."""
-		return BlogPage.objects.live().descendant_of(self).order_by("-date")
+		"""Return published blog posts, newest first, with images prefetched."""
+		posts = BlogPage.objects.live().descendant_of(self)
+		return BlogPage.get_api_queryset(posts).order_by("-date", "-pk")
+
+	def paginate_blog_posts(self, page_number, per_page=BLOG_POSTS_PER_PAGE):
+		"""Return one page of blog posts (a django Page object)."""
+		return Paginator(self.get_blog_posts(), per_page).get_page(page_number)
 
 
 class BlogPage(Page):
@@ -214,10 +250,22 @@ class BlogPage(Page):
 		APIField("category"),
 		APIField("author"),
 		APIField("intro"),
-		APIField("featured_image", serializer=ImageRenditionField("fill-1200x800")),
+		APIField("featured_image", serializer=ImageRenditionField(FEATURED_IMAGE_SPEC)),
 		APIField("body"),
 	]
 
+	class Meta:
+		indexes = [
+			models.Index(fields=["-date"], name="cms_blogpage_date_idx"),
+		]
+
+	@classmethod
+	def get_api_queryset(cls, queryset):
+		"""Load the author, featured image and its rendition with the posts."""
+		return queryset.select_related("author", "featured_image").prefetch_related(
+			prefetch_renditions("featured_image", FEATURED_IMAGE_SPEC)
+		)
+
 
 class TeamPage(Page):
 	"""Team roster page."""
@@ -238,6 +286,17 @@ class TeamPage(Page):
 	# Only allow one TeamPage
 	max_count = 1
 
+	def get_players(self):
+		"""Return the roster with headshots and their renditions prefetched."""
+		return PlayerProfile.get_roster_queryset().filter(page=self)
+
+	@classmethod
+	def get_api_queryset(cls, queryset):
+		"""Load the whole roster with the page."""
+		return queryset.prefetch_related(
+			Prefetch("players", queryset=PlayerProfile.get_roster_queryset())
+		)
+
 
 class PlayerProfile(Orderable):
 	"""Player profile attached to TeamPage."""
@@ -283,5 +342,11 @@ class PlayerProfile(Orderable):
 		APIField("grade"),
 		APIField("height"),
 		APIField("bio"),
-		APIField("headshot", serializer=ImageRenditionField("fill-300x300")),
+		APIField("headshot", serializer=ImageRenditionField(HEADSHOT_SPEC)),
 	]
+
+	@classmethod
+	def get_roster_queryset(cls):
+		return cls.objects.select_related("headshot").prefetch_related(
+			prefetch_renditions("headshot", HEADSHOT_SPEC)
+		).order_by("sort_order")
@@ -0,0 +1,158 @@
+"""
+Image rendition warm-up for CMS pages.
+
+The Wagtail API serializes images through ImageRenditionField, which generates
+the rendition (Pillow resize + storage upload) the first time it is requested.
+This module generates every rendition declared in a page's `api_fields` ahead
+of time so API requests only ever read existing renditions.
+
+Used by:
+- the page_published signal (apps/cms/signals.py), for the published page
+- `python manage.py warm_renditions`, for every live page
+"""
+
+import logging
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.db import connection, connections, transaction
+from wagtail.images import get_image_model
+from wagtail.images.api.fields import ImageRenditionField
+from wagtail.models import Page
+
+logger = logging.getLogger(__name__)
+
+
+def get_rendition_specs(obj):
+    """
+    Yield (image_id, filter_spec) pairs for an object's API image fields.
+
+    Child relations listed in `api_fields` (e.g. TeamPage.players) are followed
+    so orderables like PlayerProfile.headshot are included.
+    """
+    for api_field in getattr(obj, "api_fields", []):
+        serializer = api_field.serializer
+
+        if isinstance(serializer, ImageRenditionField):
+            image_id = getattr(obj, f"{api_field.name}_id", None)
+            if image_id:
+                yield image_id, serializer.filter_spec
+
+        elif serializer is None:
+            related = getattr(obj, api_field.name, None)
+            if hasattr(related, "all") and hasattr(related.model, "api_fields"):
+                for child in related.all():
+                    yield from get_rendition_specs(child)
+
+
+def collect_missing_renditions(pages):
+    """
+    Map image_id -> set of filter specs that have no rendition yet.
+
+    Existing renditions are looked up with a single query for all images.
+    """
+    wanted = defaultdict(set)
+    for page in pages:
+        for image_id, filter_spec in get_rendition_specs(page.specific):
+            wanted[image_id].add(filter_spec)
+
+    if not wanted:
+        return {}
+
+    Rendition = get_image_model().get_rendition_model()
+    existing = Rendition.objects.filter(
+        image_id__in=wanted.keys(),
+    ).values_list("image_id", "filter_spec")
+
+    for image_id, filter_spec in existing:
+        wanted[image_id].discard(filter_spec)
+
+    return {image_id: specs for image_id, specs in wanted.items() if specs}
+
+
+def generate_renditions(image_id, filter_specs):
+    """Generate the given renditions for one image. Returns the number created."""
+    Image = get_image_model()
+    try:
+        image = Image.objects.get(pk=image_id)
+    except Image.DoesNotExist:
+        return 0
+
+    image.get_renditions(*sorted(filter_specs))
+    return len(filter_specs)
+
+
+def _generate_in_thread(image_id, filter_specs):
+    """generate_renditions for a pool thread, closing the thread's connection after."""
+    try:
+        return generate_renditions(image_id, filter_specs)
+    finally:
+        connection.close()
+
+
+def warm_renditions(pages, workers=1):
+    """
+    Generate missing renditions for the given pages.
+
+    With more than one worker, images are processed in a thread pool. Pillow
+    releases the GIL while it decodes, resizes and encodes, so the image work
+    runs in parallel, and threads need no fork or per-process Django setup.
+    Returns (renditions created, images failed).
+    """
+    missing = collect_missing_renditions(pages)
+    if not missing:
+        return 0, 0
+
+    created = 0
+    failed = 0
+
+    if workers <= 1:
+        for image_id, specs in missing.items():
+            try:
+                created += generate_renditions(image_id, specs)
+            except Exception as e:
+                failed += 1
+                logger.warning(f"Rendition warm-up failed for image {image_id}: {e}")
+        return created, failed
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="renditions") as executor:
+        futures = {
+            executor.submit(_generate_in_thread, image_id, specs): image_id
+            for image_id, specs in missing.items()
+        }
+        for future in as_completed(futures):
+            try:
+                created += future.result()
+            except Exception as e:
+                failed += 1
+                logger.warning(f"Rendition warm-up failed for image {futures[future]}: {e}")
+
+    return created, failed
+
+
+def warm_page_renditions(page_id):
+    """Warm renditions for a single page (run in a background thread)."""
+    try:
+        page = Page.objects.get(pk=page_id)
+        created, failed = warm_renditions([page])
+        if created:
+            logger.info(f"Generated {created} renditions for page {page_id}")
+    except Exception as e:
+        logger.error(f"Rendition warm-up failed for page {page_id}: {e}")
+    finally:
+        connections.close_all()
+
+
+def schedule_page_renditions(page):
+    """
+    Warm a page's renditions once the publish transaction commits.
+
+    Runs in a daemon thread so the editor's publish request is not held up by
+    image processing.
+    """
+    transaction.on_commit(
+        lambda: threading.Thread(
+            target=warm_page_renditions, args=(page.pk,), daemon=True
+        ).start()
+    )
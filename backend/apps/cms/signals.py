@@ -0,0 +1,42 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from wagtail.documents import get_document_model
+from wagtail.images import get_image_model
+from wagtail.models import Page
+from wagtail.signals import page_published, page_unpublished
+
+from .cache import PAGE_LISTING_SCOPE, bump_version, page_scope
+from .renditions import schedule_page_renditions
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+def invalidate_page_api_cache(sender, instance, **kwargs):
+    """Drop cached API responses for the page and every page listing"""
+    bump_version(page_scope(instance.pk), PAGE_LISTING_SCOPE)
+
+
+@receiver(page_published)
+def warm_published_page_renditions(sender, instance, **kwargs):
+    """Generate the page's API image renditions before the first request does"""
+    schedule_page_renditions(instance)
+
+
+@receiver(post_delete, sender=Page)
+def invalidate_deleted_page_api_cache(sender, instance, **kwargs):
+    """Deleted pages disappear from listings and detail lookups"""
+    bump_version(page_scope(instance.pk), PAGE_LISTING_SCOPE)
+
+
+@receiver(post_save, sender=get_image_model())
+@receiver(post_delete, sender=get_image_model())
+def invalidate_image_api_cache(sender, instance, **kwargs):
+    """Drop cached image API responses when an image changes"""
+    bump_version("images")
+
+
+@receiver(post_save, sender=get_document_model())
+@receiver(post_delete, sender=get_document_model())
+def invalidate_document_api_cache(sender, instance, **kwargs):
+    """Drop cached document API responses when a document changes"""
+    bump_version("documents")
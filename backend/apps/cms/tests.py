@@ -1,3 +1,285 @@
-from django.test import TestCase
+import shutil
+import tempfile
+import threading
+from datetime import date
+from io import BytesIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.images import ImageFile
+from django.test import TestCase, override_settings
+from PIL import Image as PILImage
+from wagtail.images import get_image_model
+from wagtail.models import Site
+
+from apps.core.testing import QueryBudgetMixin
+
+from .models import (
+    FEATURED_IMAGE_SPEC, HEADSHOT_SPEC, BlogIndexPage, BlogPage, HomePage, PlayerProfile, TeamPage,
+)
+from .renditions import collect_missing_renditions, warm_renditions
+
+
+def make_image(title):
+    buffer = BytesIO()
+    PILImage.new('RGB', (640, 480), 'navy').save(buffer, 'PNG')
+    return get_image_model().objects.create(title=title, file=ImageFile(buffer, name=f'{title}.png'))
+
+
+class TemporaryMediaMixin:
+    """Write uploaded images and renditions to a temporary MEDIA_ROOT."""
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+
+
+def build_site(posts=2, players=2):
+    """A blog index with posts and a team page, each with their API images."""
+    root = Site.objects.get(is_default_site=True).root_page
+    blog = root.add_child(instance=BlogIndexPage(title='The Huddle', slug='huddle'))
+    for index in range(posts):
+        blog.add_child(instance=BlogPage(
+            title=f'Post {index}', slug=f'post-{index}', date=date(2025, 1, index + 1), body=[],
+            featured_image=make_image(f'featured-{index}'),
+        ))
+    team = root.add_child(instance=TeamPage(title='Roster', slug='roster'))
+    for index in range(players):
+        PlayerProfile.objects.create(page=team, name=f'Player {index}', headshot=make_image(f'headshot-{index}'))
+    return blog, team
+
+
+class WarmRenditionsTests(TemporaryMediaMixin, TestCase):
+    def test_generates_each_missing_rendition_once(self):
+        blog, team = build_site()
+        pages = [*BlogPage.objects.all(), team]
+
+        self.assertEqual(warm_renditions(pages), (4, 0))
+
+        Rendition = get_image_model().get_rendition_model()
+        self.assertEqual(
+            sorted(Rendition.objects.values_list('filter_spec', flat=True)),
+            sorted([FEATURED_IMAGE_SPEC] * 2 + [HEADSHOT_SPEC] * 2),
+        )
+        self.assertEqual(collect_missing_renditions(pages), {})
+        self.assertEqual(warm_renditions(pages), (0, 0))
+
+    def test_missing_images_are_skipped(self):
+        blog, team = build_site(posts=1, players=0)
+        post = BlogPage.objects.get()
+        # Deleted after the page was loaded
+        get_image_model().objects.filter(pk=post.featured_image_id).delete()
+
+        self.assertEqual(warm_renditions([post]), (0, 0))
+
+    def test_workers_run_in_a_thread_pool(self):
+        build_site(posts=3, players=0)
+        posts = list(BlogPage.objects.order_by('pk'))
+        broken = posts[0].featured_image_id
+        threads = set()
+
+        def generate(image_id, filter_specs):
+            threads.add(threading.current_thread().name)
+            if image_id == broken:
+                raise OSError('Truncated image')
+            return len(filter_specs)
+
+        with mock.patch('apps.cms.renditions.generate_renditions', side_effect=generate):
+            created, failed = warm_renditions(posts, workers=3)
+
+        self.assertEqual((created, failed), (2, 1))
+        self.assertTrue(threads)
+        self.assertTrue(all(name.startswith('renditions') for name in threads))
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class PagesAPICacheTests(TestCase):
+    listing_url = '/api/v2/pages/?type=cms.BlogPage&fields=title'
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        root = Site.objects.get(is_default_site=True).root_page
+        self.blog = root.add_child(instance=BlogIndexPage(title='The Huddle', slug='huddle'))
+        self.post = self.blog.add_child(instance=BlogPage(
+            title='Opening Night', slug='opening-night', date=date(2025, 1, 1), body=[],
+        ))
+        self.detail_url = f'/api/v2/pages/{self.post.pk}/'
+
+    def rename_quietly(self, title):
+        """Change the stored title without sending any signal"""
+        BlogPage.objects.filter(pk=self.post.pk).update(title=title)
+
+    def listed_titles(self, response):
+        return [item['title'] for item in response.json()['items']]
+
+    def test_publish_invalidates_the_listing_and_detail(self):
+        self.assertEqual(self.listed_titles(self.client.get(self.listing_url)), ['Opening Night'])
+        self.assertEqual(self.client.get(self.detail_url).json()['title'], 'Opening Night')
+
+        self.rename_quietly('Renamed')
+        # Still served from the cache
+        self.assertEqual(self.listed_titles(self.client.get(self.listing_url)), ['Opening Night'])
+        self.assertEqual(self.client.get(self.detail_url).json()['title'], 'Opening Night')
+
+        post = BlogPage.objects.get(pk=self.post.pk)
+        post.title = 'Season Opener'
+        post.save_revision().publish()
+
+        self.assertEqual(self.listed_titles(self.client.get(self.listing_url)), ['Season Opener'])
+        self.assertEqual(self.client.get(self.detail_url).json()['title'], 'Season Opener')
+
+    def test_unpublish_invalidates_the_listing_and_detail(self):
+        self.assertEqual(self.listed_titles(self.client.get(self.listing_url)), ['Opening Night'])
+        self.assertEqual(self.client.get(self.detail_url).status_code, 200)
+
+        BlogPage.objects.get(pk=self.post.pk).unpublish()
+
+        self.assertEqual(self.listed_titles(self.client.get(self.listing_url)), [])
+        self.assertEqual(self.client.get(self.detail_url).status_code, 404)
+
+    def test_matching_etag_gets_not_modified(self):
+        response = self.client.get(self.detail_url)
+        etag = response['ETag']
+
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertFalse(response.content)
+
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_etag_changes_after_publish(self):
+        etag = self.client.get(self.detail_url)['ETag']
+
+        post = BlogPage.objects.get(pk=self.post.pk)
+        post.title = 'Season Opener'
+        post.save_revision().publish()
+
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_authenticated_requests_bypass_the_cache(self):
+        self.client.get(self.listing_url)
+        self.client.get(self.detail_url)
+        self.rename_quietly('Renamed')
+
+        user = get_user_model().objects.create_user(username='editor', email='editor@example.com', password='x')
+        self.client.force_login(user)
+
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.json()['title'], 'Renamed')
+        self.assertNotIn('ETag', response)
+        self.assertEqual(self.listed_titles(self.client.get(self.listing_url)), ['Renamed'])
+
+        # Their responses aren't cached for anyone else either
+        self.client.logout()
+        self.assertEqual(self.client.get(self.detail_url).json()['title'], 'Opening Night')
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class PagesAPIQueryTests(QueryBudgetMixin, TemporaryMediaMixin, TestCase):
+    """
+    Page queries stay the same size however many posts or players there are,
+    once their renditions exist. Each request starts with an empty cache.
+    """
+
+    # Site and view restriction lookups, the count, pages, renditions
+    LISTING_BUDGET = 8
+    # The same for one page, plus loading it through get_api_queryset
+    DETAIL_BUDGET = 9
+    # The page plus its roster, headshots and their renditions
+    TEAM_BUDGET = 10
+    # Count, posts with authors and images, renditions
+    PAGINATE_BUDGET = 3
+
+    def setUp(self):
+        super().setUp()
+        # Renditions cached by other tests can share these images' ids
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.blog, self.team = build_site(posts=2, players=2)
+        self.author = get_user_model().objects.create_user('coach', 'coach@example.com', 'pw')
+        self.add_content(posts=0, players=0)
+
+    def add_content(self, posts, players):
+        start = BlogPage.objects.count()
+        for index in range(start, start + posts):
+            self.blog.add_child(instance=BlogPage(
+                title=f'Post {index}', slug=f'post-{index}', date=date(2025, 2, index + 1), body=[],
+                featured_image=make_image(f'featured-{index}'),
+            ))
+        start = PlayerProfile.objects.count()
+        for index in range(start, start + players):
+            PlayerProfile.objects.create(page=self.team, name=f'Player {index}', headshot=make_image(f'headshot-{index}'))
+        BlogPage.objects.update(author=self.author)
+        warm_renditions([*BlogPage.objects.all(), self.team])
+
+    def count_queries(self, budget, label, func):
+        # Start cold: no cached responses or site root paths
+        cache.clear()
+        with self.assertQueryBudget(budget, label) as recorder:
+            func()
+        return recorder.count
+
+    def test_blog_listing(self):
+        url = '/api/v2/pages/?type=cms.BlogPage&fields=date,author,featured_image'
+
+        def fetch():
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(all(item['featured_image']['url'] for item in response.json()['items']))
+
+        queries = self.count_queries(self.LISTING_BUDGET, 'blog listing', fetch)
+        self.add_content(posts=4, players=0)
+        self.assertEqual(self.count_queries(self.LISTING_BUDGET, 'blog listing', fetch), queries)
+
+    def test_blog_detail(self):
+        post = BlogPage.objects.first()
+
+        def fetch():
+            response = self.client.get(f'/api/v2/pages/{post.pk}/')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['author']['id'], self.author.pk)
+            self.assertTrue(response.json()['featured_image']['url'])
+
+        self.count_queries(self.DETAIL_BUDGET, 'blog detail', fetch)
+
+    def test_team_detail(self):
+        def fetch():
+            response = self.client.get(f'/api/v2/pages/{self.team.pk}/')
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(all(player['headshot']['url'] for player in response.json()['players']))
+
+        queries = self.count_queries(self.TEAM_BUDGET, 'team detail', fetch)
+        self.add_content(posts=0, players=4)
+        self.assertEqual(self.count_queries(self.TEAM_BUDGET, 'team detail', fetch), queries)
+
+    def test_home_detail(self):
+        root = Site.objects.get(is_default_site=True).root_page
+        home = root.add_child(instance=HomePage(title='Home', slug='home', hero_image=make_image('hero')))
+        warm_renditions([home])
+
+        def fetch():
+            response = self.client.get(f'/api/v2/pages/{home.pk}/')
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.json()['hero_image']['url'])
+
+        self.count_queries(self.DETAIL_BUDGET, 'home detail', fetch)
+
+    def test_paginate_blog_posts(self):
+        def paginate():
+            page = self.blog.paginate_blog_posts(1)
+            for post in page:
+                self.assertEqual(post.author, self.author)
+                self.assertTrue(post.featured_image.get_rendition(FEATURED_IMAGE_SPEC).url)
+
+        queries = self.count_queries(self.PAGINATE_BUDGET, 'paginate_blog_posts', paginate)
+        self.add_content(posts=4, players=0)
+        self.assertEqual(self.count_queries(self.PAGINATE_BUDGET, 'paginate_blog_posts', paginate), queries)
@@ -1,5 +1,12 @@
 from django.contrib import admin
-from .models import Coach, InstagramPost, NewsletterSubscriber
+from django.http import HttpResponseRedirect
+from django.shortcuts import get_object_or_404
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils import timezone
+from django.utils.html import format_html
+from .jobs import enqueue
+from .models import Coach, InstagramPost, Job, NewsletterCampaign, NewsletterDelivery, NewsletterSubscriber
 
 
 @admin.register(Coach)
@@ -63,3 +70,111 @@ class NewsletterSubscriberAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+
+@admin.register(NewsletterCampaign)
+class NewsletterCampaignAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'audience', 'status', 'sent_count', 'failed_count', 'created_at', 'finished_at']
+    list_filter = ['status', 'audience']
+    search_fields = ['subject']
+    readonly_fields = [
+        'status', 'last_subscriber_id', 'sent_count', 'failed_count',
+        'created_by', 'created_at', 'started_at', 'finished_at',
+    ]
+    fieldsets = (
+        ('Message', {
+            'fields': ('subject', 'audience', 'body_text', 'body_html')
+        }),
+        ('Sending', {
+            'fields': ('status', 'sent_count', 'failed_count', 'last_subscriber_id', 'started_at', 'finished_at')
+        }),
+        ('Metadata', {
+            'fields': ('created_by', 'created_at'),
+            'classes': ('collapse',)
+        }),
+    )
+    actions = ['send_campaigns']
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            obj.created_by = request.user
+        super().save_model(request, obj, form, change)
+
+    @admin.action(description="Send selected campaigns (or resume them)")
+    def send_campaigns(self, request, queryset):
+        in_progress = set(
+            Job.objects.filter(name='core.send_newsletter', status__in=['queued', 'running'])
+            .values_list('params__campaign_id', flat=True)
+        )
+        jobs = [
+            enqueue('core.send_newsletter', {'campaign_id': campaign.pk}, created_by=request.user)
+            for campaign in queryset.exclude(status='sent')
+            if campaign.pk not in in_progress
+        ]
+        if len(jobs) == 1:
+            return HttpResponseRedirect(reverse('admin:core_job_progress', args=[jobs[0].pk]))
+        self.message_user(request, f"Queued {len(jobs)} campaign(s) for sending.")
+
+
+@admin.register(NewsletterDelivery)
+class NewsletterDeliveryAdmin(admin.ModelAdmin):
+    list_display = ['email', 'campaign', 'status', 'error', 'sent_at']
+    list_filter = ['status', 'campaign']
+    search_fields = ['email']
+    list_select_related = ['campaign']
+    readonly_fields = ['campaign', 'subscriber', 'email', 'status', 'error', 'sent_at']
+
+    def has_add_permission(self, request):
+        # Deliveries are recorded by the sender
+        return False
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['__str__', 'status', 'progress_display', 'attempts', 'created_by', 'created_at', 'finished_at']
+    list_filter = ['status', 'name']
+    search_fields = ['name', 'message']
+    list_select_related = ['created_by']
+    date_hierarchy = 'created_at'
+    readonly_fields = [
+        'name', 'params', 'status', 'progress_done', 'progress_total', 'message', 'result', 'error',
+        'attempts', 'max_attempts', 'run_after', 'worker', 'heartbeat_at', 'created_by',
+        'created_at', 'started_at', 'finished_at',
+    ]
+    actions = ['retry_jobs']
+
+    def has_add_permission(self, request):
+        # Jobs are enqueued by admin actions
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                '<int:job_id>/progress/',
+                self.admin_site.admin_view(self.progress_view),
+                name='core_job_progress',
+            ),
+        ] + super().get_urls()
+
+    def progress_view(self, request, job_id):
+        """Progress page an admin action lands on; refreshes until the job finishes"""
+        job = get_object_or_404(Job, pk=job_id)
+        context = {
+            **self.admin_site.each_context(request),
+            'title': f"{job.name} #{job.pk}",
+            'opts': self.model._meta,
+            'job': job,
+        }
+        return TemplateResponse(request, 'admin/core/job/progress.html', context)
+
+    def progress_display(self, obj):
+        label = f"{obj.progress_done}/{obj.progress_total}" if obj.progress_total else obj.get_status_display()
+        return format_html('<a href="{}">{}</a>', reverse('admin:core_job_progress', args=[obj.pk]), label)
+    progress_display.short_description = "Progress"
+
+    @admin.action(description="Retry selected failed jobs")
+    def retry_jobs(self, request, queryset):
+        retried = queryset.filter(status='failed').update(
+            status='queued', attempts=0, run_after=timezone.now(), finished_at=None, message='',
+        )
+        self.message_user(request, f"Queued {retried} job(s) again.")
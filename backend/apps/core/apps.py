@@ -1,7 +1,13 @@
 from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
 
 
 class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     # Use full dotted path so Django can discover the app correctly
     name = "apps.core"
+
+    def ready(self):
+        # Register background jobs defined in each app's jobs.py
+        autodiscover_modules('jobs')
+        from . import newsletter  # noqa: F401 (registers core.send_newsletter)
@@ -0,0 +1,506 @@
+"""
+Deterministic bulk data generator.
+
+Builds realistic volumes of families, players, dues ledgers, events,
+registrations, check-ins, products, orders and bags for benchmarks, load
+testing and `seed_data --scale`. Rows
+are written with chunked bulk_create, bypassing model save() and signals
+(no Stripe syncs, no per-row queries), so a million registrations load in
+minutes.
+
+On an empty database the same seed and volumes produce the same rows. The
+generator expects no earlier generated rows (see has_generated_data), so a
+second run into the same database is refused rather than appended. Dates are
+laid out relative to the day the data is generated, so "upcoming" and "today"
+queries always have something to find.
+"""
+
+import random
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from itertools import islice
+from typing import Callable, Iterable, Optional
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from apps.events.models import Event, EventType
+from apps.payments.models import Bag, BagItem, Order, OrderItem, Product, ProductImage, ProductVariant
+from apps.portal.models import (
+    DuesAccount, DuesTransaction, EventCheckIn, GuardianRelationship, Player, UserProfile,
+)
+from apps.registrations.models import EventRegistration
+
+User = get_user_model()
+
+FIRST_NAMES = [
+    'Aiden', 'Ava', 'Bryce', 'Chloe', 'Darius', 'Emma', 'Elijah', 'Grace', 'Isaiah', 'Jada',
+    'Jalen', 'Kayla', 'Liam', 'Maya', 'Marcus', 'Nia', 'Noah', 'Olivia', 'Sofia', 'Tyler',
+]
+LAST_NAMES = [
+    'Adams', 'Brown', 'Carter', 'Davis', 'Evans', 'Garcia', 'Harris', 'Jackson', 'Johnson', 'Lee',
+    'Lopez', 'Martin', 'Miller', 'Moore', 'Nguyen', 'Patel', 'Robinson', 'Smith', 'Thomas', 'Walker',
+]
+TEAMS = ['U10 Stars', 'U12 Stars', 'U14 Elite', 'U16 Elite', 'U17 Elite']
+LOCATIONS = [
+    ('Hoboken High School Gym', Decimal('40.744900'), Decimal('-74.032400')),
+    ('Jersey City Armory', Decimal('40.728200'), Decimal('-74.077600')),
+    ('Bayonne Community Center', Decimal('40.668700'), Decimal('-74.114300')),
+    ('Newark Rec Center', Decimal('40.735700'), Decimal('-74.172400')),
+    ('Union City Sports Complex', Decimal('40.779500'), Decimal('-74.023800')),
+]
+PRODUCT_CATEGORIES = ['tee', 'hoodie', 'shorts', 'hat', 'bag', 'accessories']
+SIZES = ['YS', 'YM', 'YL', 'S', 'M', 'L', 'XL']
+COLORS = [('Black', '#000000'), ('White', '#FFFFFF'), ('Royal', '#1D4ED8'), ('Gold', '#EAB308')]
+ORDER_STATUSES = ['paid'] * 3 + ['processing', 'shipped', 'delivered', 'delivered', 'canceled']
+MONTHLY_DUES = Decimal('175.00')
+
+# Shared by every generated account; log in with username + this password
+PASSWORD = 'njstars-bench'
+
+
+@dataclass
+class Volumes:
+    """Row counts to generate (players, variants and images scale from these)"""
+
+    families: int = 1000
+    players_per_family: int = 2
+    dues_months: int = 3
+    events: int = 1000
+    registrations: int = 10000
+    check_in_rate: float = 0.05
+    products: int = 200
+    variants_per_product: int = 6
+    images_per_product: int = 2
+    orders: int = 2000
+    bags: int = 500
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def scaled(cls, factor: int) -> 'Volumes':
+        """
+        `factor` times a unit dataset of 100 families, 100 events, 1,000
+        registrations, 20 products, 200 orders and 50 bags.
+        """
+        return cls(
+            families=100 * factor,
+            events=100 * factor,
+            registrations=1000 * factor,
+            products=20 * factor,
+            orders=200 * factor,
+            bags=50 * factor,
+        )
+
+
+class DataGenerator:
+    """
+    Writes a dataset of the given Volumes.
+
+    Args:
+        seed: Random seed; on an empty database the same seed and volumes
+            give the same data
+        chunk_size: Rows per bulk_create
+        log: Called with progress messages
+    """
+
+    def __init__(self, volumes: Volumes, seed: int = 0, chunk_size: int = 5000,
+                 log: Optional[Callable[[str], None]] = None):
+        self.volumes = volumes
+        self.random = random.Random(seed)
+        self.chunk_size = chunk_size
+        self.log = log or (lambda message: None)
+        self.now = timezone.now()
+        self.counts = {}
+
+    @staticmethod
+    def has_generated_data() -> bool:
+        """
+        Whether an earlier run's rows are still in the database. Generated
+        usernames, slugs and order numbers are numbered from zero, so a second
+        run into the same database would clash with the first.
+        """
+        return (
+            User.objects.filter(username__regex=r'^family[0-9]+$').exists()
+            or Event.objects.filter(slug__startswith='bench-').exists()
+            or Product.objects.filter(slug__startswith='bench-').exists()
+            or Order.objects.filter(order_number__startswith='NJS-G').exists()
+        )
+
+    def generate(self) -> dict:
+        """Create everything. Returns model label -> rows created."""
+        self.create_staff()
+        family_ids = self.create_families()
+        players = self.create_players(family_ids)
+        event_ids = self.create_events()
+        self.create_registrations(players, event_ids)
+        self.create_check_ins(event_ids)
+        product_ids = self.create_products()
+        self.create_orders(family_ids, product_ids)
+        self.create_bags(family_ids, product_ids)
+        return self.counts
+
+    # ---------------------------------------------------------------- helpers
+
+    def bulk_create(self, model, rows: Iterable) -> list:
+        """
+        Insert rows in chunks. Returns the new primary keys in insert order.
+
+        Backends that cannot return keys from a bulk insert have them read
+        back with one query per chunk.
+        """
+        ids = []
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            with transaction.atomic():
+                last_id = model.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+                created = model.objects.bulk_create(chunk)
+                if created[0].pk is not None:
+                    ids.extend(obj.pk for obj in created)
+                else:
+                    ids.extend(
+                        model.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)
+                    )
+            self.log(f'  {model._meta.label}: {len(ids):,}')
+
+        self.counts[model._meta.label] = self.counts.get(model._meta.label, 0) + len(ids)
+        return ids
+
+    def aware(self, day: date, hour: int, minute: int = 0) -> datetime:
+        return timezone.make_aware(datetime.combine(day, time(hour, minute)))
+
+    # ------------------------------------------------------------------ people
+
+    def create_staff(self) -> None:
+        if not User.objects.filter(username='bench-staff').exists():
+            staff = User.objects.create_user(
+                'bench-staff', 'bench-staff@example.com', PASSWORD,
+                first_name='Bench', last_name='Staff', is_staff=True,
+            )
+            # A profile is created by signal when the user is saved
+            UserProfile.objects.update_or_create(user=staff, defaults={'role': 'staff'})
+
+    def create_families(self) -> list:
+        """Guardian accounts, each with a profile."""
+        self.log('Creating families...')
+        password = make_password(PASSWORD)  # hashed once for every account
+
+        def users():
+            for index in range(self.volumes.families):
+                first = self.random.choice(FIRST_NAMES)
+                last = self.random.choice(LAST_NAMES)
+                yield User(
+                    username=f'family{index}',
+                    email=f'family{index}@example.com',
+                    first_name=first,
+                    last_name=last,
+                    password=password,
+                )
+
+        user_ids = self.bulk_create(User, users())
+        self.bulk_create(UserProfile, (
+            UserProfile(user_id=user_id, role='parent', auto_pay_enabled=self.random.random() < 0.3)
+            for user_id in user_ids
+        ))
+        return user_ids
+
+    def create_players(self, family_ids: list) -> list:
+        """
+        Players with guardian links and dues accounts with their ledgers.
+
+        Returns (player_id, guardian_id, first_name, last_name, email) tuples.
+        """
+        self.log('Creating players...')
+        today = self.now.date()
+        players = []
+
+        def rows():
+            for family_id in family_ids:
+                last = LAST_NAMES[family_id % len(LAST_NAMES)]
+                # Siblings get distinct first names and the family id keeps
+                # last names unique, since registrations match players by name
+                first_names = self.random.sample(FIRST_NAMES, min(len(FIRST_NAMES), self.volumes.players_per_family))
+                for child, first in enumerate(first_names):
+                    last_name = f'{last}-{family_id}'
+                    email = f'player{family_id}.{child}@example.com'
+                    age = self.random.randint(8, 17)
+                    players.append((family_id, first, last_name, email))
+                    yield Player(
+                        first_name=first,
+                        last_name=last_name,
+                        date_of_birth=today.replace(year=today.year - age, day=1),
+                        email=email,
+                        team_name=TEAMS[min(len(TEAMS) - 1, max(0, (age - 9) // 2))],
+                        jersey_number=str(self.random.randint(0, 99)),
+                        emergency_contact_name='Parent',
+                        emergency_contact_phone='555-0100',
+                    )
+
+        player_ids = self.bulk_create(Player, rows())
+        self.bulk_create(GuardianRelationship, (
+            GuardianRelationship(guardian_id=family_id, player_id=player_id, is_primary=True)
+            for player_id, (family_id, *_) in zip(player_ids, players)
+        ))
+        balances = [Decimal(self.random.choice([0, 0, 0, 25, 50, 150])) for _ in player_ids]
+        account_ids = self.bulk_create(DuesAccount, (
+            DuesAccount(
+                player_id=player_id,
+                balance=balance,
+                is_good_standing=balance <= 0,
+                last_payment_date=self.now if balance < MONTHLY_DUES * self.volumes.dues_months else None,
+            )
+            for player_id, balance in zip(player_ids, balances)
+        ))
+        self.create_dues_transactions(account_ids, balances)
+        return [(player_id, *player) for player_id, player in zip(player_ids, players)]
+
+    def create_dues_transactions(self, account_ids: list, balances: list) -> None:
+        """
+        Monthly dues charges and a payment per account, adding up to the
+        account's balance.
+        """
+        def rows():
+            for account_id, balance in zip(account_ids, balances):
+                running = Decimal('0.00')
+                for month in range(self.volumes.dues_months):
+                    running += MONTHLY_DUES
+                    yield DuesTransaction(
+                        account_id=account_id,
+                        transaction_type='charge',
+                        amount=MONTHLY_DUES,
+                        description=f'Monthly dues ({month + 1} of {self.volumes.dues_months})',
+                        balance_after=running,
+                    )
+                paid = running - balance
+                if paid > 0:
+                    yield DuesTransaction(
+                        account_id=account_id,
+                        transaction_type='payment',
+                        amount=paid,
+                        description='Dues payment',
+                        balance_after=balance,
+                    )
+
+        self.bulk_create(DuesTransaction, rows())
+
+    # ------------------------------------------------------------------ events
+
+    def create_events(self) -> list:
+        """Events from 90 days ago to 270 days ahead, some of them today."""
+        self.log('Creating events...')
+        today = self.now.date()
+        event_types = [choice for choice, _ in EventType.choices]
+
+        def rows():
+            for index in range(self.volumes.events):
+                # Every 50th event is today, so day-of dashboards have data
+                day = today if index % 50 == 0 else today + timedelta(days=self.random.randint(-90, 270))
+                start = self.aware(day, self.random.choice([9, 12, 17, 18, 19]))
+                event_type = event_types[index % len(event_types)]
+                location, latitude, longitude = self.random.choice(LOCATIONS)
+                paid = event_type in ('tryout', 'camp', 'tournament')
+                yield Event(
+                    title=f'{event_type.replace("_", " ").title()} #{index}',
+                    slug=f'bench-{event_type.replace("_", "-")}-{index}',
+                    description='Generated event',
+                    event_type=event_type,
+                    start_datetime=start,
+                    end_datetime=start + timedelta(hours=2),
+                    location=location,
+                    latitude=latitude + Decimal(self.random.randint(-500, 500)) / 10000,
+                    longitude=longitude + Decimal(self.random.randint(-500, 500)) / 10000,
+                    requires_payment=paid,
+                    price=Decimal('40.00') if paid else None,
+                    max_participants=self.random.choice([None, 30, 60, 120]),
+                    is_public=index % 20 != 0,
+                )
+
+        return self.bulk_create(Event, rows())
+
+    def create_registrations(self, players: list, event_ids: list) -> None:
+        """
+        Registrations spread evenly over players, each player registered at
+        most once per event.
+        """
+        self.log('Creating registrations...')
+        if not players or not event_ids:
+            return
+        total = min(self.volumes.registrations, len(players) * len(event_ids))
+        statuses = ['completed'] * 6 + ['pending'] * 3 + ['refunded']
+
+        def rows():
+            for number in range(total):
+                player_id, family_id, first, last, email = players[number % len(players)]
+                # The player's n-th registration: a distinct event per n
+                event_id = event_ids[(player_id * 7919 + number // len(players)) % len(event_ids)]
+                yield EventRegistration(
+                    event_id=event_id,
+                    user_id=family_id,
+                    participant_first_name=first,
+                    participant_last_name=last,
+                    participant_age=12,
+                    participant_email=email,
+                    emergency_contact_name='Parent',
+                    emergency_contact_phone='555-0100',
+                    payment_status=statuses[number % len(statuses)],
+                )
+
+        self.bulk_create(EventRegistration, rows())
+
+    def create_check_ins(self, event_ids: list) -> None:
+        """Check-ins for a share of the registrations to past and today's events."""
+        self.log('Creating check-ins...')
+        registrations = EventRegistration.objects.filter(
+            event_id__in=event_ids,
+            event__start_datetime__date__lte=self.now.date(),
+            check_in__isnull=True,
+        ).values_list('pk', 'event__start_datetime').order_by('pk')
+
+        def rows():
+            for registration_id, start in registrations.iterator(chunk_size=self.chunk_size):
+                if self.random.random() >= self.volumes.check_in_rate:
+                    continue
+                checked_in = start - timedelta(minutes=self.random.randint(0, 20))
+                # Today's check-ins are still open (checked in, not out)
+                checked_out = checked_in + timedelta(hours=2) if start.date() < self.now.date() else None
+                yield EventCheckIn(
+                    event_registration_id=registration_id,
+                    checked_in_at=checked_in,
+                    checked_out_at=checked_out,
+                )
+
+        self.bulk_create(EventCheckIn, rows())
+
+    # ------------------------------------------------------------------- store
+
+    def create_products(self) -> list:
+        """Products (60% POD) with variants and images."""
+        self.log('Creating products...')
+        products = []
+
+        def rows():
+            for index in range(self.volumes.products):
+                category = PRODUCT_CATEGORIES[index % len(PRODUCT_CATEGORIES)]
+                pod = self.random.random() < 0.6
+                price = Decimal(self.random.choice([20, 25, 30, 35, 45, 55]))
+                products.append(price)
+                yield Product(
+                    name=f'Stars {category.title()} {index}',
+                    slug=f'bench-{category}-{index}',
+                    description='Generated product',
+                    price=price,
+                    category=category,
+                    fulfillment_type='pod' if pod else 'local',
+                    printify_product_id=f'bench{index:020d}' if pod else '',
+                    printify_variant_id=str(10000 + index) if pod else '',
+                    manage_inventory=not pod,
+                    stock_quantity=0 if pod else self.random.randint(0, 100),
+                    featured=index % 25 == 0,
+                    best_selling=index % 40 == 0,
+                )
+
+        product_ids = self.bulk_create(Product, rows())
+
+        def variants():
+            for product_id, price in zip(product_ids, products):
+                combos = [(size, color) for color in COLORS for size in SIZES]
+                for sort_order, (size, (color, color_hex)) in enumerate(combos[:self.volumes.variants_per_product]):
+                    yield ProductVariant(
+                        product_id=product_id,
+                        title=f'{size} / {color}',
+                        size=size,
+                        color=color,
+                        color_hex=color_hex,
+                        price=price,
+                        sort_order=sort_order,
+                        is_available=self.random.random() > 0.1,
+                    )
+
+        def images():
+            for product_id in product_ids:
+                for number in range(self.volumes.images_per_product):
+                    yield ProductImage(
+                        product_id=product_id,
+                        image_url=f'https://images.example.com/products/{product_id}/{number}.jpg',
+                        is_primary=number == 0,
+                        sort_order=number,
+                    )
+
+        self.bulk_create(ProductVariant, variants())
+        self.bulk_create(ProductImage, images())
+        return product_ids
+
+    def create_orders(self, family_ids: list, product_ids: list) -> None:
+        """Orders of 1-4 items each; local items get a mix of handoff states."""
+        self.log('Creating orders...')
+        if not family_ids or not product_ids:
+            return
+        products = dict(Product.objects.filter(pk__in=product_ids).values_list('pk', 'fulfillment_type'))
+        prices = dict(Product.objects.filter(pk__in=product_ids).values_list('pk', 'price'))
+        names = dict(Product.objects.filter(pk__in=product_ids).values_list('pk', 'name'))
+        baskets = []
+
+        def rows():
+            for index in range(self.volumes.orders):
+                basket = self.random.sample(product_ids, min(len(product_ids), self.random.randint(1, 4)))
+                baskets.append(basket)
+                subtotal = sum(prices[product_id] for product_id in basket)
+                # NJS-G...: 'G' is not hex, so never clashes with real order numbers
+                yield Order(
+                    user_id=self.random.choice(family_ids),
+                    order_number=f'NJS-G{index:07d}',
+                    status=self.random.choice(ORDER_STATUSES),
+                    subtotal=subtotal,
+                    total=subtotal,
+                    shipping_name='Bench Family',
+                    shipping_email='family@example.com',
+                    shipping_address_line1='1 Main St',
+                    shipping_city='Hoboken',
+                    shipping_state='NJ',
+                    shipping_zip='07030',
+                )
+
+        order_ids = self.bulk_create(Order, rows())
+
+        def items():
+            for order_id, basket in zip(order_ids, baskets):
+                for product_id in basket:
+                    yield OrderItem(
+                        order_id=order_id,
+                        product_id=product_id,
+                        product_name=names[product_id],
+                        product_price=prices[product_id],
+                        selected_size='M',
+                        selected_color='Black',
+                        quantity=self.random.randint(1, 3),
+                        fulfillment_type=products[product_id],
+                        handoff_status=self.random.choice(['pending', 'pending', 'ready', 'delivered']),
+                    )
+
+        self.bulk_create(OrderItem, items())
+
+    def create_bags(self, family_ids: list, product_ids: list) -> None:
+        """Shopping bags with 1-5 distinct products for the first families."""
+        self.log('Creating bags...')
+        bag_ids = self.bulk_create(Bag, (Bag(user_id=family_id) for family_id in family_ids[:self.volumes.bags]))
+
+        def items():
+            for bag_id in bag_ids:
+                for product_id in self.random.sample(product_ids, min(len(product_ids), self.random.randint(1, 5))):
+                    yield BagItem(
+                        bag_id=bag_id,
+                        product_id=product_id,
+                        quantity=self.random.randint(1, 2),
+                        selected_size='M',
+                        selected_color='Black',
+                    )
+
+        if product_ids:
+            self.bulk_create(BagItem, items())
@@ -0,0 +1,278 @@
+"""
+Database-backed background jobs.
+
+Work that is too slow for a request (syncing dozens of products with
+Stripe or Printify) is enqueued as a Job row and run by the worker:
+
+    python manage.py run_jobs --concurrency 4
+
+Jobs are plain functions registered under a name, usually in an app's
+`jobs.py` (discovered at startup):
+
+    @register('payments.sync_to_stripe')
+    def sync_to_stripe(job, product_ids):
+        for done, product in enumerate(products, 1):
+            ...
+            job.progress(done, len(products), product.name)
+        return {'synced': synced}
+
+    enqueue('payments.sync_to_stripe', {'product_ids': [1, 2]}, created_by=request.user)
+
+The function receives a JobContext and the job's params as keyword
+arguments; its return value is stored as the job's result. An exception
+fails the attempt, and the job is retried with exponential backoff until
+max_attempts, so jobs should be safe to run again.
+
+Claiming is a conditional UPDATE (`status = 'queued'` -> `'running'`), so
+any number of workers can share the table without an external broker or
+row-locking support. While a job runs, a thread in its worker updates
+the heartbeat every JOBS_HEARTBEAT_SECONDS, however long a single step
+takes. A running job whose heartbeat is older than JOBS_STALE_SECONDS (its
+worker died) is requeued; that counts as an attempt, so a job that keeps
+killing its worker ends up failed rather than looping.
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+from datetime import timedelta
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+# Seconds between the worker's housekeeping runs (pruning live updates)
+HOUSEKEEPING_SECONDS = 60
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+def register(name: str) -> Callable:
+    """Register a function as the job `name`."""
+    def decorator(func):
+        _registry[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name: str, params: Optional[dict] = None, created_by=None, total: int = 0,
+            max_attempts: Optional[int] = None) -> Job:
+    """Queue a registered job; returns the Job row to follow its progress."""
+    if name not in _registry:
+        raise ValueError(f"Unknown job: {name}")
+    job = Job.objects.create(
+        name=name,
+        params=params or {},
+        progress_total=total,
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+        created_by=created_by,
+    )
+    logger.info(f"Queued job {name} #{job.pk}")
+    return job
+
+
+class JobContext:
+    """Passed to a running job for reporting progress"""
+
+    def __init__(self, job: Job):
+        self.job = job
+
+    def progress(self, done: int, total: Optional[int] = None, message: str = '') -> None:
+        """Record progress (also a heartbeat)."""
+        fields = {'progress_done': done, 'message': message[:255], 'heartbeat_at': timezone.now()}
+        if total is not None:
+            fields['progress_total'] = total
+        Job.objects.filter(pk=self.job.pk).update(**fields)
+
+
+def claim_next(worker: str) -> Optional[Job]:
+    """Take the oldest runnable job, or None when the queue is empty."""
+    now = timezone.now()
+    candidates = (
+        Job.objects.filter(status='queued', run_after__lte=now)
+        .order_by('run_after', 'pk')
+        .values_list('pk', flat=True)[:10]
+    )
+    for pk in candidates:
+        claimed = Job.objects.filter(pk=pk, status='queued').update(
+            status='running', worker=worker, started_at=now, heartbeat_at=now,
+        )
+        if claimed:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+class Heartbeat:
+    """Updates a running job's heartbeat from a thread until stopped"""
+
+    def __init__(self, job: Job, interval: Optional[float] = None):
+        self.job = job
+        self.interval = interval or settings.JOBS_HEARTBEAT_SECONDS
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._beat, name=f"job-heartbeat-{job.pk}", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stopped.set()
+        self._thread.join()
+
+    def _beat(self):
+        try:
+            while not self._stopped.wait(self.interval):
+                Job.objects.filter(pk=self.job.pk, status='running').update(heartbeat_at=timezone.now())
+        except Exception:
+            # The job goes on; at worst it is requeued as stale
+            logger.exception(f"Heartbeat for job #{self.job.pk} failed")
+        finally:
+            connection.close()
+
+
+def _record_outcome(job: Job, **fields) -> bool:
+    """
+    Save a run's outcome if the job is still held by this run's claim.
+
+    A job that stopped heartbeating may have been requeued by requeue_stale
+    (and claimed by another worker) while this run carried on; its status,
+    attempts and result then belong to the newer attempt and are left alone.
+    """
+    recorded = Job.objects.filter(
+        pk=job.pk, status='running', worker=job.worker, started_at=job.started_at,
+    ).update(**fields)
+    if not recorded:
+        logger.warning(f"Job {job.name} #{job.pk} was requeued while it ran on {job.worker}; outcome discarded")
+    return bool(recorded)
+
+
+def run_job(job: Job) -> None:
+    """Run a claimed job and record its outcome."""
+    attempt = job.attempts + 1
+    func = _registry.get(job.name)
+    try:
+        if func is None:
+            raise LookupError(f"No job registered as {job.name}")
+        with Heartbeat(job):
+            result = func(JobContext(job), **job.params)
+    except Exception as e:
+        logger.exception(f"Job {job.name} #{job.pk} failed (attempt {attempt}/{job.max_attempts})")
+        fields = {'attempts': attempt, 'error': traceback.format_exc()[-4000:], 'heartbeat_at': None}
+        if func is not None and attempt < job.max_attempts:
+            delay = settings.JOBS_RETRY_DELAY_SECONDS * 2 ** (attempt - 1)
+            fields.update(status='queued', run_after=timezone.now() + timedelta(seconds=delay),
+                          message=f"Retrying in {delay}s: {e}"[:255])
+        else:
+            fields.update(status='failed', finished_at=timezone.now(), message=str(e)[:255])
+        _record_outcome(job, **fields)
+        return
+
+    job.refresh_from_db(fields=['progress_total'])
+    recorded = _record_outcome(
+        job,
+        status='succeeded',
+        attempts=attempt,
+        result=result or {},
+        error='',
+        progress_done=job.progress_total,
+        finished_at=timezone.now(),
+        heartbeat_at=None,
+    )
+    if recorded:
+        logger.info(f"Job {job.name} #{job.pk} succeeded")
+
+
+def requeue_stale(now=None) -> int:
+    """
+    Requeue running jobs whose worker stopped heartbeating, counting it as
+    an attempt; jobs out of attempts are failed. Returns the number handled.
+    """
+    now = now or timezone.now()
+    cutoff = now - timedelta(seconds=settings.JOBS_STALE_SECONDS)
+    stale = Job.objects.filter(status='running', heartbeat_at__lt=cutoff)
+    message = 'The worker stopped responding'
+    failed = stale.filter(attempts__gte=F('max_attempts') - 1).update(
+        status='failed', attempts=F('attempts') + 1, finished_at=now, heartbeat_at=None, message=message,
+    )
+    requeued = stale.update(
+        status='queued', attempts=F('attempts') + 1, run_after=now, worker='', heartbeat_at=None,
+        message=f'Requeued: {message.lower()}',
+    )
+    if failed or requeued:
+        logger.warning(f"Stale jobs: {requeued} requeued, {failed} failed")
+    return requeued + failed
+
+
+def run_pending(worker: str, limit: Optional[int] = None) -> int:
+    """Run queued jobs in this thread until the queue is empty; returns the number run."""
+    count = 0
+    while limit is None or count < limit:
+        job = claim_next(worker)
+        if job is None:
+            break
+        run_job(job)
+        count += 1
+    return count
+
+
+class Worker:
+    """Runs jobs in `concurrency` threads until stopped"""
+
+    def __init__(self, concurrency: int = 1, poll_seconds: float = 2):
+        self.concurrency = concurrency
+        self.poll_seconds = poll_seconds
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self.stopping = threading.Event()
+
+    def stop(self):
+        """Finish the running jobs, then exit."""
+        self.stopping.set()
+
+    def run(self):
+        threads = [
+            threading.Thread(target=self._loop, args=(f"{self.name}:{index}",), name=f"job-worker-{index}")
+            for index in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+
+        # Stale jobs are checked by the main thread, once per poll
+        housekeeping_at = 0
+        while not self.stopping.wait(self.poll_seconds):
+            close_old_connections()
+            requeue_stale()
+            if time.monotonic() >= housekeeping_at:
+                housekeeping_at = time.monotonic() + HOUSEKEEPING_SECONDS
+                self._housekeeping()
+        for thread in threads:
+            thread.join()
+        connection.close()
+
+    def _housekeeping(self):
+        # Imported here: live.py isn't needed by jobs run with --once
+        from .live import prune_live_updates
+        try:
+            prune_live_updates()
+        except Exception:
+            logger.exception("Pruning live updates failed")
+
+    def _loop(self, name: str):
+        try:
+            while not self.stopping.is_set():
+                close_old_connections()
+                job = claim_next(name)
+                if job is None:
+                    self.stopping.wait(self.poll_seconds)
+                    continue
+                run_job(job)
+        finally:
+            connection.close()
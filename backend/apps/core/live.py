@@ -0,0 +1,395 @@
+"""
+Live updates pushed to browsers over Server-Sent Events.
+
+Writers call publish(event, topics, data) when something a screen shows has
+changed (a player checked in, a handoff was marked delivered). The message
+goes to the broker once the surrounding transaction commits, so
+subscribers never see a change that was rolled back.
+
+Each process serving streams runs one LiveHub per event loop. The hub has a
+single listener on the broker and fans new messages out to its
+subscribers' queues by topic, so a thousand open streams cost one broker
+read per batch of messages rather than a round of polling per client.
+
+Brokers (LIVE_UPDATES_BROKER):
+    InMemoryBroker  messages stay in this process; for tests and a
+                    single-process server
+    DatabaseBroker  messages go through the LiveUpdate table, so changes
+                    made by any worker process reach the one serving a
+                    stream; one poll per process every
+                    LIVE_UPDATES_POLL_SECONDS. Old rows are deleted by
+                    `python manage.py prune_live_updates` (also run by the
+                    run_jobs worker)
+
+Message ids only increase. A reconnecting client sends Last-Event-ID and
+first receives what it missed from the broker's backlog, or a `reset`
+event when the backlog no longer reaches back that far and the client
+should reload its state.
+
+Streams stay open indefinitely, so they need the ASGI server (uvicorn, see
+the Dockerfile); under WSGI the endpoint refuses them rather than tie up a
+worker per client.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import threading
+import time
+import weakref
+from collections import deque
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Iterable, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import LiveUpdate
+
+logger = logging.getLogger(__name__)
+
+# Topic of staff screens listing local-delivery handoffs
+HANDOFFS_TOPIC = 'handoffs'
+
+# Milliseconds EventSource waits before reconnecting
+RECONNECT_MS = 3000
+
+
+def event_topic(event_id: int) -> str:
+    """Topic of changes for one event (staff check-in screens)"""
+    return f'event:{event_id}'
+
+
+def guardian_topic(user_id: int) -> str:
+    """Topic of changes concerning one family (parent dashboards)"""
+    return f'guardian:{user_id}'
+
+
+@dataclass(frozen=True)
+class LiveMessage:
+    id: int
+    event: str
+    topics: tuple
+    data: dict
+
+    def encode(self) -> str:
+        """The message as an SSE frame"""
+        return f"id: {self.id}\nevent: {self.event}\ndata: {json.dumps(self.data)}\n\n"
+
+
+class InMemoryBroker:
+    """Broker keeping the last `backlog` messages in this process"""
+
+    def __init__(self, backlog: int = 1000):
+        self._messages = deque(maxlen=backlog)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._waiters = set()
+
+    def publish(self, event: str, topics: tuple, data: dict) -> LiveMessage:
+        with self._lock:
+            message = LiveMessage(next(self._ids), event, topics, data)
+            self._messages.append(message)
+            waiters = list(self._waiters)
+
+        # Publishers may run in any thread; wake listeners in their own loops
+        for loop, ready in waiters:
+            try:
+                loop.call_soon_threadsafe(ready.set)
+            except RuntimeError:
+                # The listener's loop has closed
+                with self._lock:
+                    self._waiters.discard((loop, ready))
+        return message
+
+    def _after(self, last_id: int) -> tuple:
+        with self._lock:
+            messages = [message for message in self._messages if message.id > last_id]
+            complete = not messages or messages[0].id == last_id + 1
+        return messages, complete
+
+    async def latest_id(self) -> int:
+        with self._lock:
+            return self._messages[-1].id if self._messages else 0
+
+    async def backlog(self, last_id: int) -> tuple:
+        """(messages after last_id, whether none were dropped since)"""
+        return self._after(last_id)
+
+    async def wait(self, last_id: int, timeout: float) -> list:
+        """Messages after last_id, waiting up to timeout for the first."""
+        ready = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), ready)
+        with self._lock:
+            self._waiters.add(waiter)
+        try:
+            messages, _ = self._after(last_id)
+            if not messages:
+                try:
+                    await asyncio.wait_for(ready.wait(), timeout)
+                except asyncio.TimeoutError:
+                    return []
+                messages, _ = self._after(last_id)
+            return messages
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
+
+
+class DatabaseBroker:
+    """Broker relaying messages between processes through the LiveUpdate table"""
+
+    # Rows read per poll; a listener that falls behind catches up over several
+    batch_size = 500
+
+    def __init__(self, poll_seconds: Optional[float] = None, settle_seconds: Optional[float] = None):
+        self.poll_seconds = poll_seconds or settings.LIVE_UPDATES_POLL_SECONDS
+        self.settle_seconds = settings.LIVE_UPDATES_SETTLE_SECONDS if settle_seconds is None else settle_seconds
+
+    def publish(self, event: str, topics: tuple, data: dict) -> LiveMessage:
+        row = LiveUpdate.objects.create(event=event, topics=list(topics), data=data)
+        return LiveMessage(row.pk, event, topics, data)
+
+    def _settled(self, rows: list, last_id: int) -> list:
+        """
+        The rows up to the first gap in ids that may still be filled.
+
+        Ids are allocated when a row is inserted, not when it commits, so
+        id 11 can become visible after id 12. Reading past the gap would
+        skip 11 for good; instead the gap holds back later rows until it
+        fills or is LIVE_UPDATES_SETTLE_SECONDS old (a rolled-back insert).
+        """
+        cutoff = timezone.now() - timedelta(seconds=self.settle_seconds)
+        settled = []
+        expected = last_id + 1
+        for row in rows:
+            pk, created_at = row[0], row[-1]
+            if pk != expected and created_at > cutoff:
+                break
+            settled.append(row)
+            expected = pk + 1
+        return settled
+
+    def _latest_id(self) -> int:
+        # The last settled id, so a listener starting from it misses nothing
+        cutoff = timezone.now() - timedelta(seconds=self.settle_seconds)
+        base = (
+            LiveUpdate.objects.filter(created_at__lte=cutoff)
+            .order_by('-pk').values_list('pk', flat=True).first() or 0
+        )
+        recent = list(LiveUpdate.objects.filter(pk__gt=base).order_by('pk').values_list('pk', 'created_at'))
+        settled = self._settled(recent, base)
+        return settled[-1][0] if settled else base
+
+    def _after(self, last_id: int) -> list:
+        rows = list(
+            LiveUpdate.objects.filter(pk__gt=last_id)
+            .order_by('pk')
+            .values_list('pk', 'event', 'topics', 'data', 'created_at')[:self.batch_size]
+        )
+        return [
+            LiveMessage(pk, event, tuple(topics), data)
+            for pk, event, topics, data, _ in self._settled(rows, last_id)
+        ]
+
+    def _backlog(self, last_id: int) -> tuple:
+        messages = self._after(last_id)
+        oldest = LiveUpdate.objects.order_by('pk').values_list('pk', flat=True).first()
+        return messages, oldest is None or oldest <= last_id + 1
+
+    async def latest_id(self) -> int:
+        return await sync_to_async(self._latest_id)()
+
+    async def backlog(self, last_id: int) -> tuple:
+        return await sync_to_async(self._backlog)(last_id)
+
+    async def wait(self, last_id: int, timeout: float) -> list:
+        deadline = time.monotonic() + timeout
+        while True:
+            messages = await sync_to_async(self._after)(last_id)
+            remaining = deadline - time.monotonic()
+            if messages or remaining <= 0:
+                return messages
+            await asyncio.sleep(min(self.poll_seconds, remaining))
+
+
+def prune_live_updates(retention_seconds: Optional[int] = None) -> int:
+    """Delete LiveUpdate rows older than LIVE_UPDATES_RETENTION_SECONDS."""
+    retention_seconds = retention_seconds or settings.LIVE_UPDATES_RETENTION_SECONDS
+    cutoff = timezone.now() - timedelta(seconds=retention_seconds)
+    deleted, _ = LiveUpdate.objects.filter(created_at__lt=cutoff).delete()
+    if deleted:
+        logger.info(f"Pruned {deleted} live updates")
+    return deleted
+
+
+class Subscription:
+    """One client's stream: the topics it follows and its pending messages"""
+
+    def __init__(self, topics: Iterable[str], queue_size: int):
+        self.topics = frozenset(topics)
+        self.closed = False
+        self._queue = asyncio.Queue(maxsize=queue_size)
+        self._pending = deque()
+        self._last_id = 0
+
+    def deliver(self, message: LiveMessage) -> bool:
+        """Queue a message; False when the client has fallen too far behind."""
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.closed = True
+            return False
+        return True
+
+    def replay(self, messages: list, after_id: int) -> None:
+        """Send these backlog messages first, then live ones newer than them."""
+        self._pending.extend(message for message in messages if self.topics & set(message.topics))
+        self._last_id = after_id
+
+    async def get(self, timeout: float) -> Optional[LiveMessage]:
+        """The next message, or None after `timeout` seconds without one."""
+        if self._pending:
+            message = self._pending.popleft()
+            self._last_id = max(self._last_id, message.id)
+            return message
+
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                message = await asyncio.wait_for(self._queue.get(), max(0, deadline - time.monotonic()))
+            except asyncio.TimeoutError:
+                return None
+            # Skip live messages already sent from the backlog
+            if message.id > self._last_id:
+                self._last_id = message.id
+                return message
+
+
+class LiveHub:
+    """Fans messages from the broker out to this event loop's subscribers"""
+
+    def __init__(self, broker, queue_size: int = 100, listen_seconds: float = 5):
+        self.broker = broker
+        self.queue_size = queue_size
+        self.listen_seconds = listen_seconds
+        self.subscriptions = set()
+        self.last_id = 0
+        self._listener = None
+
+    async def subscribe(self, topics: Iterable[str], last_event_id: Optional[int] = None) -> Subscription:
+        """
+        Start receiving messages for any of the topics.
+
+        With last_event_id, messages published after it are replayed first.
+        """
+        subscription = Subscription(topics, self.queue_size)
+        if self._listener is None or self._listener.done():
+            self.last_id = await self.broker.latest_id()
+            self._listener = asyncio.create_task(self._listen())
+        self.subscriptions.add(subscription)
+
+        if last_event_id is not None:
+            messages, complete = await self.broker.backlog(last_event_id)
+            if not complete:
+                # Too far behind: have the client reload instead
+                latest = max([self.last_id, *(message.id for message in messages)])
+                messages = [LiveMessage(latest, 'reset', tuple(subscription.topics), {})]
+            subscription.replay(messages, last_event_id)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self.subscriptions.discard(subscription)
+
+    def dispatch(self, message: LiveMessage) -> None:
+        self.last_id = max(self.last_id, message.id)
+        topics = set(message.topics)
+        for subscription in list(self.subscriptions):
+            if subscription.topics & topics and not subscription.deliver(message):
+                logger.warning("Dropping a live-update subscriber that stopped reading")
+                self.unsubscribe(subscription)
+
+    async def _listen(self):
+        # Stops once the last subscriber leaves; the next subscribe restarts it
+        while self.subscriptions:
+            try:
+                messages = await self.broker.wait(self.last_id, self.listen_seconds)
+            except Exception:
+                logger.exception("Live updates broker failed; retrying")
+                await asyncio.sleep(self.listen_seconds)
+                continue
+            for message in messages:
+                self.dispatch(message)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+_hubs = weakref.WeakKeyDictionary()
+
+
+def get_broker():
+    """The configured broker, shared by every thread of this process"""
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = import_string(settings.LIVE_UPDATES_BROKER)()
+        return _broker
+
+
+def get_hub() -> LiveHub:
+    """The hub for the running event loop"""
+    loop = asyncio.get_running_loop()
+    hub = _hubs.get(loop)
+    if hub is None:
+        hub = _hubs[loop] = LiveHub(get_broker(), queue_size=settings.LIVE_UPDATES_QUEUE_SIZE)
+    return hub
+
+
+@receiver(setting_changed)
+def reset_broker(setting, **kwargs):
+    global _broker
+    if setting.startswith('LIVE_UPDATES_'):
+        with _broker_lock:
+            _broker = None
+        _hubs.clear()
+
+
+def publish(event: str, topics: Iterable[str], data: dict) -> None:
+    """
+    Send a message to subscribers of any of the topics once the current
+    transaction commits. Live updates are best effort: a broker failure is
+    logged, never raised into the write that triggered it.
+    """
+    topics = tuple(topics)
+    data = json.loads(json.dumps(data, cls=DjangoJSONEncoder))
+
+    def send():
+        try:
+            get_broker().publish(event, topics, data)
+        except Exception:
+            logger.exception(f"Failed to publish live update {event}")
+
+    transaction.on_commit(send)
+
+
+async def stream(subscription: Subscription, hub: LiveHub, heartbeat_seconds: float):
+    """SSE body for a subscription; unsubscribes when the client goes away."""
+    try:
+        yield f"retry: {RECONNECT_MS}\n\n"
+        while not subscription.closed:
+            message = await subscription.get(heartbeat_seconds)
+            if message is None:
+                # No id, so the client's Last-Event-ID is unchanged
+                yield f"event: heartbeat\ndata: {json.dumps({'time': timezone.now().isoformat()})}\n\n"
+            else:
+                yield message.encode()
+    finally:
+        hub.unsubscribe(subscription)
@@ -0,0 +1,34 @@
+"""
+Management command deleting old live updates (see apps/core/live.py).
+
+The database broker keeps every published change in the LiveUpdate table
+so reconnecting clients can catch up; rows older than
+LIVE_UPDATES_RETENTION_SECONDS are no longer needed. The run_jobs worker
+prunes them every minute, so this is only needed where no worker runs.
+
+Usage:
+    # Delete updates older than LIVE_UPDATES_RETENTION_SECONDS
+    python manage.py prune_live_updates
+
+    # Keep only the last 10 minutes
+    python manage.py prune_live_updates --retention 600
+"""
+
+from django.core.management.base import BaseCommand
+from apps.core.live import prune_live_updates
+
+
+class Command(BaseCommand):
+    help = 'Delete live updates older than the retention period'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retention',
+            type=int,
+            default=None,
+            help='Seconds of updates to keep (default: LIVE_UPDATES_RETENTION_SECONDS)',
+        )
+
+    def handle(self, *args, **options):
+        deleted = prune_live_updates(options['retention'])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} live update(s)."))
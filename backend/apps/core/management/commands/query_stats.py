@@ -0,0 +1,115 @@
+"""
+Management command to dump the per-route query histograms.
+
+Histograms are collected by QueryStatsMiddleware while QUERY_STATS_ENABLED is
+on. With several worker processes, CACHE_BACKEND must be a shared backend
+(database, Redis) for the command to see their numbers.
+
+Usage:
+    # Table of routes, most queries per request first
+    python manage.py query_stats
+
+    # Sort by total SQL time, show the 20 worst routes
+    python manage.py query_stats --sort sql --limit 20
+
+    # Raw histograms as JSON
+    python manage.py query_stats --json
+
+    # Clear the collected statistics
+    python manage.py query_stats --reset
+"""
+
+import json
+from django.core.management.base import BaseCommand
+from apps.core.query_stats import (
+    QUERY_BUCKETS,
+    SQL_MS_BUCKETS,
+    bucket_percentile,
+    get_route_stats,
+    histogram,
+    reset_route_stats,
+)
+
+SORT_KEYS = {
+    'queries': lambda stats: stats['queries'] / stats['requests'],
+    'sql': lambda stats: stats['sql_ms'],
+    'requests': lambda stats: stats['requests'],
+}
+
+
+class Command(BaseCommand):
+    help = 'Dump per-route query count and SQL time histograms'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sort',
+            choices=sorted(SORT_KEYS),
+            default='queries',
+            help='Order routes by mean queries per request, total SQL time or requests (default: queries)',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=0,
+            help='Only show this many routes',
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Print the raw histograms as JSON',
+        )
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Delete the collected statistics',
+        )
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            reset_route_stats()
+            self.stdout.write(self.style.SUCCESS('Query statistics cleared.'))
+            return
+
+        # Include anything this process has not merged yet
+        histogram.flush()
+        stats = get_route_stats()
+
+        routes = sorted(stats, key=lambda route: SORT_KEYS[options['sort']](stats[route]), reverse=True)
+        if options['limit']:
+            routes = routes[:options['limit']]
+
+        if options['json']:
+            self.stdout.write(json.dumps({
+                'query_buckets': QUERY_BUCKETS,
+                'sql_ms_buckets': SQL_MS_BUCKETS,
+                'routes': {route: stats[route] for route in routes},
+            }, indent=2))
+            return
+
+        if not routes:
+            self.stdout.write(self.style.WARNING(
+                'No query statistics collected. Set QUERY_STATS_ENABLED=True and send some requests.'
+            ))
+            return
+
+        self.stdout.write(
+            f"{'route':<60} {'view':<36} {'reqs':>6} {'q/req':>6} {'q p50':>6} {'q p95':>6} "
+            f"{'q max':>6} {'ms/req':>7} {'ms p95':>7} {'dup%':>5}"
+        )
+        for route in routes:
+            route_stats = stats[route]
+            requests = route_stats['requests']
+            self.stdout.write(
+                f"{route[:60]:<60} {route_stats['view'][:36]:<36} {requests:>6} "
+                f"{route_stats['queries'] / requests:>6.1f} "
+                f"{bucket_percentile(route_stats['query_buckets'], QUERY_BUCKETS, 50):>6} "
+                f"{bucket_percentile(route_stats['query_buckets'], QUERY_BUCKETS, 95):>6} "
+                f"{route_stats['max_queries']:>6} "
+                f"{route_stats['sql_ms'] / requests:>7.1f} "
+                f"{bucket_percentile(route_stats['sql_ms_buckets'], SQL_MS_BUCKETS, 95):>7} "
+                f"{100 * route_stats['with_duplicates'] / requests:>5.0f}"
+            )
+            if route_stats['slowest_sql']:
+                self.stdout.write(
+                    f"    slowest ({route_stats['slowest_ms']:.1f}ms): {route_stats['slowest_sql'][:200]}"
+                )
@@ -0,0 +1,69 @@
+"""
+Management command running queued background jobs (see apps/core/jobs.py).
+
+Admin actions such as "Sync selected products to Stripe" enqueue a job
+and return immediately; this worker picks them up. Several workers may run
+against the same database.
+
+Usage:
+    # Run continuously with the configured concurrency (JOBS_WORKER_CONCURRENCY)
+    python manage.py run_jobs
+
+    # Four jobs at a time, checking the queue every 5 seconds when idle
+    python manage.py run_jobs --concurrency 4 --poll 5
+
+    # Run everything queued and exit (e.g. from cron)
+    python manage.py run_jobs --once
+"""
+
+import signal
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from apps.core.jobs import Worker, requeue_stale, run_pending
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=None,
+            help='Jobs to run at once (default: JOBS_WORKER_CONCURRENCY)',
+        )
+        parser.add_argument(
+            '--poll',
+            type=float,
+            default=None,
+            help='Seconds between queue checks when idle (default: JOBS_POLL_SECONDS)',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Run the jobs that are due now, one at a time, and exit',
+        )
+
+    def handle(self, *args, **options):
+        if options['once']:
+            requeue_stale()
+            count = run_pending(worker='run_jobs --once')
+            self.stdout.write(self.style.SUCCESS(f"Ran {count} job(s)."))
+            return
+
+        worker = Worker(
+            concurrency=options['concurrency'] or settings.JOBS_WORKER_CONCURRENCY,
+            poll_seconds=options['poll'] or settings.JOBS_POLL_SECONDS,
+        )
+
+        # Let running jobs finish on Ctrl+C or a deploy's SIGTERM
+        def stop(signum, frame):
+            self.stdout.write('Stopping after the running jobs finish...')
+            worker.stop()
+
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGTERM, stop)
+
+        self.stdout.write(f"Running jobs with concurrency {worker.concurrency} (Ctrl+C to stop)...")
+        worker.run()
+        self.stdout.write('Stopped.')
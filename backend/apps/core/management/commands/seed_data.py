@@ -1,7 +1,35 @@
-from django.core.management.base import BaseCommand
+"""
+Management command to seed the database with sample data.
+
+Without options, creates a handful of hand-written plans, events, products,
+coaches and Instagram posts. With --scale, also generates a large
+dataset (see apps.core.datagen) for reproducing production data volumes.
+--scale needs a database without generated rows; it refuses to run twice
+rather than appending a second, different dataset. Flush first to
+regenerate.
+
+Usage:
+    # Sample data only
+    python manage.py seed_data
+
+    # Plus 10x the unit dataset: 1,000 families, 1,000 events, 10,000 registrations...
+    python manage.py seed_data --scale 10
+
+    # One million registrations; on an empty database the same seed
+    # gives the same data
+    python manage.py seed_data --scale 1000 --seed 42
+
+    # Regenerate: clear the database, then seed again
+    python manage.py flush
+    python manage.py seed_data --scale 1000 --seed 42
+"""
+
+import time
+from django.core.management.base import BaseCommand, CommandError
 from django.utils import timezone
 from datetime import timedelta
 from decimal import Decimal
+from apps.core.datagen import PASSWORD, DataGenerator, Volumes
 from apps.events.models import Event, EventType
 from apps.payments.models import SubscriptionPlan, Product
 from apps.core.models import Coach, InstagramPost
@@ -10,7 +38,37 @@ from apps.core.models import Coach, InstagramPost
 class Command(BaseCommand):
     help = 'Seed database with sample data for NJ Stars Elite Basketball'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale',
+            type=int,
+            default=0,
+            help='Also generate N times the unit dataset (100 families, 100 events, '
+                 '1,000 registrations, 20 products, 200 orders, 50 bags)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Random seed for --scale; on an empty database the same seed gives the same data',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5000,
+            help='Rows per bulk insert for --scale (default: 5000)',
+        )
+
     def handle(self, *args, **kwargs):
+        scale = kwargs['scale']
+        if scale < 0:
+            raise CommandError('--scale must be a positive number')
+        if scale and DataGenerator.has_generated_data():
+            raise CommandError(
+                'The database already has a generated dataset; --scale would add a second one. '
+                'Run "python manage.py flush" first to regenerate it.'
+            )
+
         self.stdout.write('Seeding database...')
 
         # Create Subscription Plans
@@ -28,8 +86,26 @@ class Command(BaseCommand):
         # Create Instagram Posts
         self.create_instagram_posts()
 
+        if scale:
+            self.generate(scale, kwargs['seed'], kwargs['chunk_size'])
+
         self.stdout.write(self.style.SUCCESS('Database seeded successfully!'))
 
+    def generate(self, scale, seed, chunk_size):
+        volumes = Volumes.scaled(scale)
+        self.stdout.write(f'Generating {scale}x dataset (seed {seed})...')
+        started = time.perf_counter()
+
+        counts = DataGenerator(volumes, seed=seed, chunk_size=chunk_size, log=self.stdout.write).generate()
+
+        elapsed = time.perf_counter() - started
+        for label, count in counts.items():
+            self.stdout.write(f'  {label}: {count:,}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {sum(counts.values()):,} rows in {elapsed:.1f}s. '
+            f'Generated accounts (family0, family1, ..., bench-staff) use the password "{PASSWORD}".'
+        ))
+
     def create_subscription_plans(self):
         self.stdout.write('Creating subscription plans...')
 
@@ -0,0 +1,84 @@
+"""
+Management command sending a newsletter campaign (see apps/core/newsletter.py).
+
+Campaigns are written in the admin (Core > Newsletter Campaigns). Sending
+one that was interrupted (Ctrl+C, a deploy, a crash) resumes after the
+last subscriber it recorded.
+
+Usage:
+    # Send campaign 12, or resume it
+    python manage.py send_newsletter 12
+
+    # How many subscribers it would go to, without sending
+    python manage.py send_newsletter 12 --dry-run
+
+    # Smaller batches at 5 messages/second
+    python manage.py send_newsletter 12 --batch-size 50 --rate 5
+
+In development, mail goes to MailHog (http://localhost:8025); locally,
+`python -m smtpd -n -c DebuggingServer localhost:1025` prints each message.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from apps.core.models import NewsletterCampaign
+from apps.core.newsletter import send_campaign
+
+
+class Command(BaseCommand):
+    help = 'Send (or resume) a newsletter campaign'
+
+    def add_arguments(self, parser):
+        parser.add_argument('campaign_id', type=int)
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Recipients per SMTP connection (default: NEWSLETTER_BATCH_SIZE)',
+        )
+        parser.add_argument(
+            '--rate',
+            type=float,
+            default=None,
+            help='Messages per second, 0 for no limit (default: NEWSLETTER_SEND_RATE)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Count the remaining recipients without sending',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            campaign = NewsletterCampaign.objects.get(pk=options['campaign_id'])
+        except NewsletterCampaign.DoesNotExist:
+            raise CommandError(f"No newsletter campaign {options['campaign_id']}")
+
+        if campaign.status == 'sent':
+            self.stdout.write(f"Campaign already sent to {campaign.sent_count} subscriber(s).")
+            return
+
+        remaining = campaign.recipients().filter(pk__gt=campaign.last_subscriber_id).count()
+        if options['dry_run']:
+            self.stdout.write(f"Would send \"{campaign.subject}\" to {remaining} subscriber(s).")
+            return
+
+        resuming = ' (resuming)' if campaign.status == 'sending' else ''
+        rate = settings.NEWSLETTER_SEND_RATE if options['rate'] is None else options['rate']
+        self.stdout.write(
+            f"Sending \"{campaign.subject}\" to {remaining} subscriber(s){resuming}"
+            f"{f' at {rate:g}/s' if rate else ''}..."
+        )
+
+        def report(campaign):
+            self.stdout.write(f"  {campaign.sent_count} sent, {campaign.failed_count} failed")
+
+        try:
+            send_campaign(campaign, batch_size=options['batch_size'], rate=rate, progress=report)
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING("Interrupted; run the command again to resume."))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {campaign.sent_count} sent, {campaign.failed_count} failed."
+        ))
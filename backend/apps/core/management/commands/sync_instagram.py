@@ -4,9 +4,16 @@ Instagram Graph API sync command.
 Fetches posts from the NJ Stars Instagram Business account and stores them
 in the InstagramPost model for display in the news feed.
 
+Syncs are incremental: the newest stored post timestamp is used as a cursor,
+and the command follows `paging.next` only until it reaches posts that are
+already in the database. Each page is written with a single bulk upsert, and
+rows whose content has not changed are skipped. Posts the API returns without
+a timestamp are skipped too, so they can never move the cursor.
+
 Usage:
     python manage.py sync_instagram
     python manage.py sync_instagram --limit 10
+    python manage.py sync_instagram --backfill
     python manage.py sync_instagram --verbose
 
 Setup:
@@ -20,7 +27,7 @@ import requests
 from datetime import datetime
 from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
-from django.utils import timezone
+from django.db.models import Max
 from apps.core.models import InstagramPost
 
 
@@ -41,12 +48,32 @@ class Command(BaseCommand):
         'thumbnail_url',  # For video posts
     ]
 
+    # Model fields refreshed when a post already exists
+    UPDATE_FIELDS = [
+        'caption',
+        'media_type',
+        'media_url',
+        'permalink',
+        'timestamp',
+    ]
+
     def add_arguments(self, parser):
         parser.add_argument(
             '--limit',
             type=int,
             default=25,
-            help='Maximum number of posts to fetch (default: 25)',
+            help='Maximum number of new posts to fetch (default: 25, ignored with --backfill)',
+        )
+        parser.add_argument(
+            '--page-size',
+            type=int,
+            default=25,
+            help='Number of posts requested per Graph API page (default: 25)',
+        )
+        parser.add_argument(
+            '--backfill',
+            action='store_true',
+            help='Walk the full post history page by page instead of stopping at known posts',
         )
         parser.add_argument(
             '--verbose',
@@ -77,63 +104,119 @@ class Command(BaseCommand):
             )
 
         limit = options['limit']
+        backfill = options['backfill']
+        page_size = options['page_size'] if backfill else min(options['page_size'], limit)
         verbose = options['verbose']
         dry_run = options['dry_run']
 
-        self.stdout.write(f'Fetching up to {limit} posts from Instagram...')
-
-        # Fetch posts from the Graph API
-        posts = self.fetch_posts(access_token, account_id, limit)
-
-        if not posts:
-            self.stdout.write(self.style.WARNING('No posts found.'))
-            return
+        # The newest stored timestamp is the sync cursor. Backfill ignores it
+        # and walks the whole history.
+        since = None
+        if not backfill:
+            since = InstagramPost.objects.aggregate(latest=Max('timestamp'))['latest']
 
-        self.stdout.write(f'Found {len(posts)} posts.')
+        if backfill:
+            self.stdout.write('Backfilling full Instagram history...')
+        elif since:
+            self.stdout.write(f'Fetching up to {limit} posts newer than {since.isoformat()}...')
+        else:
+            self.stdout.write(f'Fetching up to {limit} posts from Instagram...')
 
         if dry_run:
             self.stdout.write(self.style.WARNING('Dry run - not saving to database.'))
-            for post in posts:
-                self.stdout.write(f"  - {post.get('id')}: {post.get('media_type')}")
-            return
 
-        # Save posts to database
+        fetched_count = 0
         created_count = 0
         updated_count = 0
+        unchanged_count = 0
+        skipped_count = 0
+
+        with requests.Session() as session:
+            for page in self.iter_pages(session, access_token, account_id, page_size):
+                posts = []
+                for post_data in page:
+                    post = self.build_post(post_data)
+                    if post is None:
+                        skipped_count += 1
+                        if verbose:
+                            self.stdout.write(f'  Skipped {post_data.get("id")}: no timestamp')
+                        continue
+                    posts.append(post)
+
+                # Pages arrive newest first, so the first post at or before the
+                # cursor means everything after it is already stored.
+                reached_known = False
+                if since is not None:
+                    fresh = [post for post in posts if post.timestamp >= since]
+                    reached_known = len(fresh) < len(posts)
+                    posts = fresh
+
+                if not backfill:
+                    posts = posts[:limit - fetched_count]
+
+                fetched_count += len(posts)
+
+                if dry_run:
+                    for post in posts:
+                        self.stdout.write(f'  - {post.instagram_id}: {post.media_type}')
+                else:
+                    created, updated, unchanged = self.upsert_posts(posts, verbose)
+                    created_count += created
+                    updated_count += updated
+                    unchanged_count += unchanged
+
+                if reached_known or (not backfill and fetched_count >= limit):
+                    break
+
+        if skipped_count:
+            self.stdout.write(self.style.WARNING(f'Skipped {skipped_count} posts without a timestamp.'))
+
+        if not fetched_count:
+            self.stdout.write(self.style.WARNING('No new posts found.'))
+            return
 
-        for post_data in posts:
-            post, created = self.save_post(post_data)
-
-            if verbose:
-                status = 'Created' if created else 'Updated'
-                caption_preview = (post_data.get('caption') or '')[:50]
-                self.stdout.write(f"  {status}: {post.instagram_id} - {caption_preview}...")
+        self.stdout.write(f'Found {fetched_count} posts.')
 
-            if created:
-                created_count += 1
-            else:
-                updated_count += 1
+        if dry_run:
+            return
 
         self.stdout.write(
             self.style.SUCCESS(
-                f'Sync complete! Created: {created_count}, Updated: {updated_count}'
+                f'Sync complete! Created: {created_count}, Updated: {updated_count}, '
+                f'Unchanged: {unchanged_count}'
             )
         )
 
-    def fetch_posts(self, access_token: str, account_id: str, limit: int) -> list:
-        """Fetch posts from the Instagram Graph API."""
+    def iter_pages(self, session, access_token: str, account_id: str, page_size: int):
+        """
+        Yield pages of post data from the Instagram Graph API.
+
+        Follows `paging.next` until the API stops returning a next link, so
+        only one page is held in memory at a time.
+        """
         url = f'{self.GRAPH_API_BASE}/{account_id}/media'
         params = {
             'fields': ','.join(self.MEDIA_FIELDS),
-            'limit': limit,
+            'limit': page_size,
             'access_token': access_token,
         }
 
+        while url:
+            data = self.fetch_page(session, url, params)
+            posts = data.get('data', [])
+            if posts:
+                yield posts
+
+            # The next link already carries fields, limit and access token
+            url = data.get('paging', {}).get('next')
+            params = None
+
+    def fetch_page(self, session, url: str, params: dict = None) -> dict:
+        """Fetch a single page from the Instagram Graph API."""
         try:
-            response = requests.get(url, params=params, timeout=30)
+            response = session.get(url, params=params, timeout=30)
             response.raise_for_status()
-            data = response.json()
-            return data.get('data', [])
+            return response.json()
         except requests.exceptions.HTTPError as e:
             error_data = e.response.json() if e.response else {}
             error_msg = error_data.get('error', {}).get('message', str(e))
@@ -149,22 +232,19 @@ class Command(BaseCommand):
         except requests.exceptions.RequestException as e:
             raise CommandError(f'Network error fetching Instagram posts: {e}')
 
-    def save_post(self, post_data: dict) -> tuple:
+    def build_post(self, post_data: dict):
         """
-        Save or update a post in the database.
+        Build an unsaved InstagramPost from Graph API data.
 
-        Returns:
-            tuple: (InstagramPost instance, created boolean)
+        Returns None for a post without a timestamp: stamping it with the sync
+        time would advance the cursor past newer posts not yet fetched.
         """
-        instagram_id = post_data['id']
-
         # Parse timestamp (Instagram uses ISO 8601 format)
         timestamp_str = post_data.get('timestamp')
-        if timestamp_str:
-            # Parse ISO format: 2025-12-09T15:30:00+0000
-            timestamp = datetime.fromisoformat(timestamp_str.replace('+0000', '+00:00'))
-        else:
-            timestamp = timezone.now()
+        if not timestamp_str:
+            return None
+        # Parse ISO format: 2025-12-09T15:30:00+0000
+        timestamp = datetime.fromisoformat(timestamp_str.replace('+0000', '+00:00'))
 
         # For videos, use thumbnail_url as the display image
         media_url = post_data.get('media_url', '')
@@ -172,16 +252,56 @@ class Command(BaseCommand):
             # Store thumbnail for display, but keep original media_url
             media_url = post_data.get('thumbnail_url')
 
-        # Create or update the post
-        post, created = InstagramPost.objects.update_or_create(
-            instagram_id=instagram_id,
-            defaults={
-                'caption': post_data.get('caption', ''),
-                'media_type': post_data.get('media_type', 'IMAGE'),
-                'media_url': media_url,
-                'permalink': post_data.get('permalink', ''),
-                'timestamp': timestamp,
-            }
+        return InstagramPost(
+            instagram_id=post_data['id'],
+            caption=post_data.get('caption') or '',
+            media_type=post_data.get('media_type', 'IMAGE'),
+            media_url=media_url,
+            permalink=post_data.get('permalink', ''),
+            timestamp=timestamp,
         )
 
-        return post, created
+    def upsert_posts(self, posts: list, verbose: bool = False) -> tuple:
+        """
+        Write new and changed posts with a single bulk upsert.
+
+        Returns:
+            tuple: (created count, updated count, unchanged count)
+        """
+        if not posts:
+            return 0, 0, 0
+
+        existing = {
+            row['instagram_id']: row
+            for row in InstagramPost.objects.filter(
+                instagram_id__in=[post.instagram_id for post in posts]
+            ).values('instagram_id', *self.UPDATE_FIELDS)
+        }
+
+        to_write = []
+        created = updated = 0
+        for post in posts:
+            current = existing.get(post.instagram_id)
+            if current is None:
+                status = 'Created'
+                created += 1
+            elif any(current[field] != getattr(post, field) for field in self.UPDATE_FIELDS):
+                status = 'Updated'
+                updated += 1
+            else:
+                continue
+
+            to_write.append(post)
+            if verbose:
+                caption_preview = post.caption[:50]
+                self.stdout.write(f'  {status}: {post.instagram_id} - {caption_preview}...')
+
+        if to_write:
+            InstagramPost.objects.bulk_create(
+                to_write,
+                update_conflicts=True,
+                unique_fields=['instagram_id'],
+                update_fields=[*self.UPDATE_FIELDS, 'updated_at'],
+            )
+
+        return created, updated, len(posts) - len(to_write)
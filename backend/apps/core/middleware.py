@@ -0,0 +1,104 @@
+"""
+Core middleware.
+
+AsyncStreamingMiddleware lets streaming responses built on a synchronous
+iterator stream under ASGI.
+
+QueryStatsMiddleware instruments queries. It is enabled by QUERY_STATS_ENABLED (per-route histograms, dumped with
+`python manage.py query_stats`) and/or QUERY_STATS_SERVER_TIMING (adds a
+Server-Timing header with the query count, SQL time, slowest statement and
+repeated statements, visible in the browser's network panel). When both are
+off the middleware does nothing.
+
+Queries run while a streaming response is being consumed are not counted.
+"""
+
+import logging
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+
+from .query_stats import QueryRecorder, histogram
+from .streaming import iterate_in_thread
+
+logger = logging.getLogger(__name__)
+
+
+def route_label(request) -> tuple:
+    """
+    (route, view name) identifying the endpoint that handled a request.
+
+    The route is the method and URL pattern, so /api/events/a/ and
+    /api/events/b/ share one histogram. DRF viewsets are named with their
+    action, e.g. EventViewSet.retrieve.
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return f'{request.method} <unresolved>', ''
+
+    func = match.func
+    view_class = getattr(func, 'cls', None) or getattr(func, 'view_class', None)
+    if view_class is not None:
+        view_name = view_class.__name__
+        actions = getattr(func, 'actions', None) or {}
+        action = actions.get(request.method.lower())
+        if action:
+            view_name = f'{view_name}.{action}'
+    else:
+        view_name = f'{func.__module__}.{getattr(func, "__name__", type(func).__name__)}'
+
+    # Router patterns are regexes; drop their anchors for readability
+    route = match.route.replace('^', '').replace('$', '')
+    return f'{request.method} /{route}', view_name
+
+
+class QueryStatsMiddleware:
+    """Record each request's SQL statements and report them"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        aggregate = getattr(settings, 'QUERY_STATS_ENABLED', False)
+        server_timing = getattr(settings, 'QUERY_STATS_SERVER_TIMING', False)
+        if not (aggregate or server_timing):
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        with recorder.record():
+            response = self.get_response(request)
+        request.query_stats = recorder
+
+        if server_timing:
+            response['Server-Timing'] = recorder.server_timing()
+
+        route, view_name = route_label(request)
+        if aggregate:
+            histogram.add(route, view_name, recorder)
+
+        warn_at = getattr(settings, 'QUERY_STATS_WARN_QUERIES', 50)
+        if warn_at and recorder.count > warn_at:
+            logger.warning(f"{route} ({view_name}) ran {recorder.describe(limit=3)}")
+
+        return response
+
+
+class AsyncStreamingMiddleware:
+    """
+    Under ASGI, stream responses built on a synchronous iterator (exports,
+    statements, WhiteNoise's static files) chunk by chunk.
+
+    Django 5.0's ASGI handler reads such an iterator into a list before
+    sending the first byte. This swaps in an async iterator that fetches
+    one chunk at a time. Place it above WhiteNoiseMiddleware so it sees the
+    static file responses.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if isinstance(request, ASGIRequest) and response.streaming and not response.is_async:
+            response.streaming_content = iterate_in_thread(iter(response.streaming_content))
+        return response
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-19 05:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_newsletter_campaign'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='newslettercampaign',
+            name='body_text',
+            field=models.TextField(default="Hi {{ first_name|default:'there' }},\n\n\n\n{{ site_name }}\n{{ site_url }}\n\nUnsubscribe: {{ unsubscribe_url }}\n", help_text='Plain text body; Django template syntax, with {{ first_name }}, {{ site_url }} and {{ unsubscribe_url }}'),
+        ),
+    ]
@@ -1,4 +1,6 @@
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 
 class Coach(models.Model):
@@ -161,3 +163,203 @@ class NewsletterSubscriber(models.Model):
         self.status = 'unsubscribed'
         self.unsubscribed_at = timezone.now()
         self.save()
+
+
+class NewsletterCampaign(models.Model):
+    """
+    A newsletter sent to active subscribers by the `send_newsletter` command
+    (see apps/core/newsletter.py).
+
+    Subscribers are sent to in id order, and `last_subscriber_id` records
+    how far the send has got, so an interrupted campaign resumes where it
+    stopped.
+    """
+
+    AUDIENCE_CHOICES = [
+        ('all', 'All active subscribers'),
+        ('events', 'Event announcements'),
+        ('news', 'Team news and updates'),
+        ('promotions', 'Merch promotions'),
+    ]
+
+    STATUS_CHOICES = [
+        ('draft', 'Draft'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+    ]
+
+    # Starting point for a new campaign's text, with the unsubscribe link
+    # every newsletter should carry
+    DEFAULT_BODY_TEXT = (
+        "Hi {{ first_name|default:'there' }},\n"
+        "\n"
+        "\n"
+        "\n"
+        "{{ site_name }}\n"
+        "{{ site_url }}\n"
+        "\n"
+        "Unsubscribe: {{ unsubscribe_url }}\n"
+    )
+
+    subject = models.CharField(max_length=200)
+    body_text = models.TextField(
+        default=DEFAULT_BODY_TEXT,
+        help_text=(
+            "Plain text body; Django template syntax, with {{ first_name }}, {{ site_url }} "
+            "and {{ unsubscribe_url }}"
+        ),
+    )
+    body_html = models.TextField(blank=True, help_text="Optional HTML version, same template syntax")
+    audience = models.CharField(max_length=20, choices=AUDIENCE_CHOICES, default='all')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft')
+
+    # Progress
+    last_subscriber_id = models.PositiveBigIntegerField(
+        default=0,
+        help_text="Subscribers up to this id have been sent to"
+    )
+    sent_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='newsletter_campaigns',
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Newsletter Campaign'
+        verbose_name_plural = 'Newsletter Campaigns'
+
+    def __str__(self):
+        return f"{self.subject} ({self.status})"
+
+    def recipients(self):
+        """Active subscribers who opted in to this campaign's audience"""
+        subscribers = NewsletterSubscriber.objects.filter(status='active')
+        if self.audience != 'all':
+            subscribers = subscribers.filter(**{f'subscribe_{self.audience}': True})
+        return subscribers
+
+
+class NewsletterDelivery(models.Model):
+    """Outcome of sending a campaign to one subscriber"""
+
+    STATUS_CHOICES = [
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    campaign = models.ForeignKey(NewsletterCampaign, on_delete=models.CASCADE, related_name='deliveries')
+    subscriber = models.ForeignKey(NewsletterSubscriber, on_delete=models.CASCADE, related_name='deliveries')
+    email = models.EmailField(help_text="Address the campaign was sent to")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    error = models.CharField(max_length=255, blank=True)
+    sent_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['campaign', 'subscriber']
+        verbose_name = 'Newsletter Delivery'
+        verbose_name_plural = 'Newsletter Deliveries'
+        constraints = [
+            models.UniqueConstraint(fields=['campaign', 'subscriber'], name='newsletter_delivery_once'),
+        ]
+
+    def __str__(self):
+        return f"{self.email}: {self.status}"
+
+
+class LiveUpdate(models.Model):
+    """
+    A change published to live-update subscribers (see apps/core/live.py).
+
+    Only written when LIVE_UPDATES_BROKER is the database broker, which
+    relays changes between processes; rows older than
+    LIVE_UPDATES_RETENTION_SECONDS are deleted by `prune_live_updates`.
+    """
+
+    event = models.CharField(max_length=50)
+    topics = models.JSONField(default=list)
+    data = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.event} #{self.pk}"
+
+
+class Job(models.Model):
+    """
+    A background job run by the `run_jobs` worker (see apps/core/jobs.py).
+
+    Long admin actions enqueue a job and return immediately; the worker
+    records progress here so the admin can show it.
+    """
+
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    name = models.CharField(max_length=100, help_text="Registered job name, e.g. payments.sync_to_stripe")
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+
+    # Progress, updated by the job as it runs
+    progress_done = models.PositiveIntegerField(default=0)
+    progress_total = models.PositiveIntegerField(default=0)
+    message = models.CharField(max_length=255, blank=True)
+    result = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+
+    # Retries
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now, help_text="Not started before this time")
+
+    # Worker bookkeeping
+    worker = models.CharField(max_length=100, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='jobs',
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # The worker's queue: runnable jobs, oldest first
+            models.Index(fields=['status', 'run_after'], name='job_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in ('succeeded', 'failed')
+
+    @property
+    def progress_percent(self):
+        if self.status == 'succeeded':
+            return 100
+        if not self.progress_total:
+            return 0
+        return min(100, round(self.progress_done * 100 / self.progress_total))
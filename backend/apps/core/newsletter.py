@@ -0,0 +1,247 @@
+"""
+Newsletter sending.
+
+A campaign is sent to its recipients in batches of NEWSLETTER_BATCH_SIZE
+subscribers:
+
+    send_campaign(campaign)
+
+Subscribers are read in id order with a keyset query per batch
+(`pk > last id`), so a send of any size holds one batch in memory and
+never pays for a growing OFFSET. Each batch opens one SMTP connection and
+sends every message over it, paced to NEWSLETTER_SEND_RATE messages per
+second so the provider doesn't throttle or block us.
+
+Per-recipient outcomes are saved with one bulk insert per batch, together
+with the campaign's cursor (`last_subscriber_id`). Running the send again
+after an interruption resumes after the last recorded subscriber; at most
+the message in flight when the process died can go out twice.
+
+Every message carries a signed one-click unsubscribe link for its
+subscriber: in the template context as `unsubscribe_url`, and in the
+List-Unsubscribe header so mail clients can offer it too.
+
+Campaigns are sent from the admin as a background job (`core.send_newsletter`,
+run by `python manage.py run_jobs`; a retry resumes) or directly with
+`python manage.py send_newsletter`. Run one sender per campaign.
+"""
+
+import logging
+import smtplib
+import time
+from typing import Callable, Iterator, Optional
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core import signing
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.template import engines
+from django.urls import reverse
+from django.utils import timezone
+
+from .jobs import register
+from .models import NewsletterCampaign, NewsletterDelivery
+
+logger = logging.getLogger(__name__)
+
+UNSUBSCRIBE_SALT = 'core.newsletter-unsubscribe'
+
+
+class Throttle:
+    """Paces calls to `rate` per second; a rate of 0 doesn't wait."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate else 0
+        self._next = time.monotonic()
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        now = time.monotonic()
+        if self._next > now:
+            time.sleep(self._next - now)
+        # Don't bank time spent idle between batches as a burst
+        self._next = max(self._next, now) + self.interval
+
+
+def unsubscribe_token(subscriber_id: int) -> str:
+    """Signed token identifying a subscriber in unsubscribe links"""
+    return signing.Signer(salt=UNSUBSCRIBE_SALT).sign(str(subscriber_id))
+
+
+def read_unsubscribe_token(token: str) -> Optional[int]:
+    """Subscriber id from an unsubscribe token, or None if it isn't one of ours."""
+    try:
+        return int(signing.Signer(salt=UNSUBSCRIBE_SALT).unsign(token))
+    except (signing.BadSignature, ValueError):
+        return None
+
+
+def unsubscribe_url(subscriber_id: int) -> str:
+    """Unsubscribe link for a subscriber: GET confirms, POST unsubscribes (one-click)"""
+    query = urlencode({'token': unsubscribe_token(subscriber_id)})
+    return f"{settings.BACKEND_URL}{reverse('newsletter-unsubscribe')}?{query}"
+
+
+def iter_recipient_batches(campaign: NewsletterCampaign, batch_size: int) -> Iterator[list]:
+    """Yield lists of (id, email, first_name) after the campaign's cursor."""
+    recipients = campaign.recipients().order_by('pk').values_list('pk', 'email', 'first_name')
+    last_id = campaign.last_subscriber_id
+    while True:
+        batch = list(recipients.filter(pk__gt=last_id)[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1][0]
+
+
+class CampaignMessages:
+    """Builds each recipient's message from the campaign's templates"""
+
+    def __init__(self, campaign: NewsletterCampaign):
+        engine = engines['django']
+        self.campaign = campaign
+        self.text = engine.from_string(campaign.body_text)
+        self.html = engine.from_string(campaign.body_html) if campaign.body_html else None
+        self.from_email = settings.NEWSLETTER_FROM_EMAIL or settings.DEFAULT_FROM_EMAIL
+        support_email = settings.EMAIL_CONTEXT['support_email']
+        self.mailto = f'<mailto:{support_email}?subject=unsubscribe>'
+
+    def build(self, subscriber_id: int, email: str, first_name: str, connection) -> EmailMultiAlternatives:
+        url = unsubscribe_url(subscriber_id)
+        context = {**settings.EMAIL_CONTEXT, 'first_name': first_name, 'email': email, 'unsubscribe_url': url}
+        message = EmailMultiAlternatives(
+            subject=self.campaign.subject,
+            body=self.text.render(context),
+            from_email=self.from_email,
+            to=[email],
+            headers={
+                'List-Unsubscribe': f'<{url}>, {self.mailto}',
+                # RFC 8058: clients POST to the link instead of opening it
+                'List-Unsubscribe-Post': 'List-Unsubscribe=One-Click',
+            },
+            connection=connection,
+        )
+        if self.html is not None:
+            message.attach_alternative(self.html.render(context), 'text/html')
+        return message
+
+
+def _send_batch(messages: CampaignMessages, recipients: list, throttle: Throttle, deliveries: list) -> None:
+    """
+    Send a batch over one SMTP connection, appending a delivery per
+    recipient as it is handled (so a batch cut short still records what
+    went out).
+    """
+    connection = get_connection(fail_silently=False)
+    connection.open()
+    try:
+        for subscriber_id, email, first_name in recipients:
+            throttle.wait()
+            status, error = 'sent', ''
+            try:
+                # The connection is already open, so send_messages leaves it open
+                connection.send_messages([messages.build(subscriber_id, email, first_name, connection)])
+            except OSError as e:
+                # SMTP errors are OSErrors too
+                status, error = 'failed', str(e)[:255]
+                logger.warning(f"Newsletter to {email} failed: {e}")
+                if isinstance(e, smtplib.SMTPServerDisconnected) or not isinstance(e, smtplib.SMTPException):
+                    # The connection is gone (a refused recipient leaves it
+                    # usable); reconnect for the rest of the batch
+                    connection.close()
+                    connection.open()
+            deliveries.append(NewsletterDelivery(
+                campaign=messages.campaign,
+                subscriber_id=subscriber_id,
+                email=email,
+                status=status,
+                error=error,
+                sent_at=timezone.now(),
+            ))
+    finally:
+        connection.close()
+
+
+def _record(campaign: NewsletterCampaign, deliveries: list, last_id: int) -> None:
+    sent = sum(1 for delivery in deliveries if delivery.status == 'sent')
+    failed = len(deliveries) - sent
+    with transaction.atomic():
+        NewsletterDelivery.objects.bulk_create(deliveries, ignore_conflicts=True)
+        NewsletterCampaign.objects.filter(pk=campaign.pk).update(
+            last_subscriber_id=last_id,
+            sent_count=F('sent_count') + sent,
+            failed_count=F('failed_count') + failed,
+        )
+    campaign.last_subscriber_id = last_id
+    campaign.sent_count += sent
+    campaign.failed_count += failed
+
+
+def send_campaign(campaign: NewsletterCampaign, batch_size: Optional[int] = None, rate: Optional[float] = None,
+                  max_batches: Optional[int] = None,
+                  progress: Optional[Callable[[NewsletterCampaign], None]] = None) -> NewsletterCampaign:
+    """
+    Send a campaign, or resume one that was interrupted.
+
+    Args:
+        batch_size: Recipients per SMTP connection (default NEWSLETTER_BATCH_SIZE)
+        rate: Messages per second, 0 for no limit (default NEWSLETTER_SEND_RATE)
+        max_batches: Stop after this many batches, leaving the campaign sending
+        progress: Called with the campaign after each batch is recorded
+
+    Returns:
+        The campaign, with its counts and status updated
+    """
+    if campaign.status == 'sent':
+        return campaign
+
+    batch_size = batch_size or settings.NEWSLETTER_BATCH_SIZE
+    rate = settings.NEWSLETTER_SEND_RATE if rate is None else rate
+
+    if campaign.status == 'draft':
+        campaign.status = 'sending'
+        campaign.started_at = timezone.now()
+        campaign.save(update_fields=['status', 'started_at'])
+    logger.info(f"Sending newsletter campaign #{campaign.pk} after subscriber {campaign.last_subscriber_id}")
+
+    messages = CampaignMessages(campaign)
+    throttle = Throttle(rate)
+    for batch_number, recipients in enumerate(iter_recipient_batches(campaign, batch_size), 1):
+        deliveries = []
+        try:
+            _send_batch(messages, recipients, throttle, deliveries)
+        finally:
+            if deliveries:
+                _record(campaign, deliveries, last_id=deliveries[-1].subscriber_id)
+
+        if progress:
+            progress(campaign)
+        if max_batches and batch_number >= max_batches:
+            return campaign
+
+    campaign.status = 'sent'
+    campaign.finished_at = timezone.now()
+    campaign.save(update_fields=['status', 'finished_at'])
+    logger.info(
+        f"Newsletter campaign #{campaign.pk} sent: {campaign.sent_count} delivered, {campaign.failed_count} failed"
+    )
+    return campaign
+
+
+@register('core.send_newsletter')
+def send_newsletter_job(job, campaign_id):
+    """Send a campaign from the job worker, reporting progress per batch"""
+    campaign = NewsletterCampaign.objects.get(pk=campaign_id)
+    total = campaign.sent_count + campaign.failed_count + (
+        campaign.recipients().filter(pk__gt=campaign.last_subscriber_id).count()
+    )
+
+    def report(campaign):
+        done = campaign.sent_count + campaign.failed_count
+        job.progress(done, total, f"{campaign.sent_count} sent, {campaign.failed_count} failed")
+
+    send_campaign(campaign, progress=report)
+    return {'sent': campaign.sent_count, 'failed': campaign.failed_count}
@@ -0,0 +1,226 @@
+"""
+Per-request SQL instrumentation.
+
+QueryRecorder wraps every database connection with an execute wrapper and
+records each statement's SQL, parameters and duration. From that it reports
+the query count, total SQL time, the slowest statement and groups of
+duplicate statements (the same SQL run more than once - usually an N+1).
+
+QueryStatsMiddleware (see apps/core/middleware.py) records every request and
+adds the results to a per-route histogram. Each process keeps its own
+counts and periodically merges them into the Django cache, where the
+`query_stats` management command reads them. Use a shared cache backend
+(see CACHES in settings) to combine several worker processes; merges are
+read-modify-write, so the numbers are approximate under heavy concurrency.
+"""
+
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+
+KEY_PREFIX = "querystats"
+ROUTES_KEY = f"{KEY_PREFIX}:routes"
+
+# Histogram bucket upper bounds; the last bucket is open-ended
+QUERY_BUCKETS = [1, 2, 5, 10, 20, 50, 100]
+SQL_MS_BUCKETS = [1, 5, 10, 25, 50, 100, 250, 500, 1000]
+
+# Cached histograms outlive any realistic gap between dumps
+CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+
+class QueryRecorder:
+    """Execute wrapper collecting (sql, params, seconds) for each statement"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, params, time.perf_counter() - start))
+
+    @contextmanager
+    def record(self):
+        """Record statements run on any connection inside the block."""
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    @property
+    def total_ms(self) -> float:
+        return sum(seconds for _, _, seconds in self.queries) * 1000
+
+    @property
+    def slowest(self):
+        """(milliseconds, sql) of the slowest statement, or None."""
+        if not self.queries:
+            return None
+        sql, _, seconds = max(self.queries, key=lambda query: query[2])
+        return seconds * 1000, sql
+
+    def duplicates(self) -> list:
+        """
+        (sql, count) for statements run more than once, most repeated first.
+
+        Statements are grouped by SQL text regardless of parameters, so
+        `SELECT ... WHERE product_id = %s` run once per row is one group.
+        """
+        counts = Counter(sql for sql, _, _ in self.queries)
+        return [(sql, count) for sql, count in counts.most_common() if count > 1]
+
+    def exact_duplicates(self) -> list:
+        """(sql, count) for identical statements (same SQL and parameters)."""
+        counts = Counter((sql, repr(params)) for sql, params, _ in self.queries)
+        return [(sql, count) for (sql, _), count in counts.most_common() if count > 1]
+
+    def server_timing(self) -> str:
+        """Server-Timing header value for the recorded statements."""
+        metrics = [f'db;dur={self.total_ms:.1f};desc="{self.count} queries"']
+        slowest = self.slowest
+        if slowest:
+            metrics.append(f'db-slowest;dur={slowest[0]:.1f}')
+        repeated = sum(count - 1 for _, count in self.duplicates())
+        if repeated:
+            metrics.append(f'db-dup;desc="{repeated} repeated"')
+        return ', '.join(metrics)
+
+    def describe(self, limit: int = 10) -> str:
+        """Readable listing of the statements, for logs and test failures."""
+        lines = [f"{self.count} queries in {self.total_ms:.1f}ms"]
+        for sql, count in self.duplicates()[:limit]:
+            lines.append(f"  {count}x {sql}")
+        for index, (sql, _, seconds) in enumerate(self.queries[:limit * 5], start=1):
+            lines.append(f"  {index}. [{seconds * 1000:.1f}ms] {sql}")
+        return '\n'.join(lines)
+
+
+def _bucket(value, bounds) -> int:
+    for index, bound in enumerate(bounds):
+        if value <= bound:
+            return index
+    return len(bounds)
+
+
+def _empty_route(view_name: str) -> dict:
+    return {
+        'view': view_name,
+        'requests': 0,
+        'queries': 0,
+        'sql_ms': 0.0,
+        'max_queries': 0,
+        'with_duplicates': 0,
+        'query_buckets': [0] * (len(QUERY_BUCKETS) + 1),
+        'sql_ms_buckets': [0] * (len(SQL_MS_BUCKETS) + 1),
+        'slowest_ms': 0.0,
+        'slowest_sql': '',
+    }
+
+
+def _merge(into: dict, stats: dict) -> dict:
+    for field in ('requests', 'queries', 'sql_ms', 'with_duplicates'):
+        into[field] += stats[field]
+    into['max_queries'] = max(into['max_queries'], stats['max_queries'])
+    for field in ('query_buckets', 'sql_ms_buckets'):
+        into[field] = [a + b for a, b in zip(into[field], stats[field])]
+    if stats['slowest_ms'] > into['slowest_ms']:
+        into['slowest_ms'] = stats['slowest_ms']
+        into['slowest_sql'] = stats['slowest_sql']
+    into['view'] = stats['view'] or into['view']
+    return into
+
+
+class RouteHistogram:
+    """Per-route query statistics, buffered in-process and merged into the cache"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._last_flush = time.monotonic()
+
+    def add(self, route: str, view_name: str, recorder: QueryRecorder) -> None:
+        slowest_ms, slowest_sql = recorder.slowest or (0.0, '')
+        with self._lock:
+            stats = self._pending.setdefault(route, _empty_route(view_name))
+            stats['requests'] += 1
+            stats['queries'] += recorder.count
+            stats['sql_ms'] += recorder.total_ms
+            stats['max_queries'] = max(stats['max_queries'], recorder.count)
+            stats['with_duplicates'] += 1 if recorder.duplicates() else 0
+            stats['query_buckets'][_bucket(recorder.count, QUERY_BUCKETS)] += 1
+            stats['sql_ms_buckets'][_bucket(recorder.total_ms, SQL_MS_BUCKETS)] += 1
+            if slowest_ms > stats['slowest_ms']:
+                stats['slowest_ms'] = slowest_ms
+                stats['slowest_sql'] = slowest_sql
+
+            interval = getattr(settings, 'QUERY_STATS_FLUSH_SECONDS', 10)
+            due = time.monotonic() - self._last_flush >= interval
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        """Merge buffered statistics into the cache."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+
+        routes = set(cache.get(ROUTES_KEY) or ())
+        for route, stats in pending.items():
+            key = _route_key(route)
+            cached = cache.get(key) or _empty_route(stats['view'])
+            cache.set(key, _merge(cached, stats), CACHE_TIMEOUT)
+            routes.add(route)
+        cache.set(ROUTES_KEY, sorted(routes), CACHE_TIMEOUT)
+
+
+def _route_key(route: str) -> str:
+    # Cache keys may not contain spaces on every backend (e.g. memcached)
+    return f"{KEY_PREFIX}:route:{route.replace(' ', '_')}"
+
+
+histogram = RouteHistogram()
+
+
+def get_route_stats() -> dict:
+    """Route -> merged statistics, as stored in the cache."""
+    stats = {}
+    for route in cache.get(ROUTES_KEY) or ():
+        route_stats = cache.get(_route_key(route))
+        if route_stats:
+            stats[route] = route_stats
+    return stats
+
+
+def reset_route_stats() -> None:
+    """Delete every stored route histogram."""
+    routes = cache.get(ROUTES_KEY) or ()
+    cache.delete_many([_route_key(route) for route in routes] + [ROUTES_KEY])
+
+
+def bucket_percentile(buckets: list, bounds: list, percentile: float) -> str:
+    """Upper bound of the bucket holding the given percentile, e.g. '<=10'."""
+    total = sum(buckets)
+    if not total:
+        return '-'
+    threshold = total * percentile / 100
+    seen = 0
+    for index, count in enumerate(buckets):
+        seen += count
+        if seen >= threshold:
+            return f'<={bounds[index]}' if index < len(bounds) else f'>{bounds[-1]}'
+    return f'>{bounds[-1]}'
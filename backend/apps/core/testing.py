@@ -0,0 +1,191 @@
+"""
+Test helpers shared across apps.
+"""
+
+import asyncio
+import email
+import socketserver
+import threading
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from asgiref.sync import async_to_sync
+from django.core.handlers.asgi import ASGIHandler
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections
+
+from .query_stats import QueryRecorder
+
+
+class QueryBudgetMixin:
+    """
+    TestCase mixin asserting that code stays within a query budget.
+
+    Unlike assertNumQueries, a budget is a ceiling: a view may get cheaper
+    without breaking its test, but any new query over the budget (typically
+    an N+1 in a serializer) fails with the statements that ran, repeated
+    ones first.
+
+        with self.assertQueryBudget(4):
+            self.client.get('/api/events/')
+    """
+
+    @contextmanager
+    def assertQueryBudget(self, budget: int, label: str = ''):
+        recorder = QueryRecorder()
+        with recorder.record():
+            yield recorder
+
+        if recorder.count > budget:
+            name = f'{label}: ' if label else ''
+            self.fail(f"{name}query budget of {budget} exceeded, {recorder.describe()}")
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for Django's SMTP backend, one session per connection"""
+
+    def reply(self, line: str):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        server = self.server.smtp
+        with server.lock:
+            server.connections += 1
+        self.reply('220 localhost test SMTP server')
+        sender, recipients = None, []
+        while line := self.rfile.readline():
+            command = line.decode().strip()
+            verb = command[:4].upper()
+            if verb in ('HELO', 'EHLO'):
+                self.reply('250 localhost')
+            elif verb == 'MAIL':
+                sender, recipients = command.split(':', 1)[1].strip().strip('<>'), []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                address = command.split(':', 1)[1].strip().strip('<>')
+                if address in server.reject:
+                    self.reply('550 No such user here')
+                else:
+                    recipients.append(address)
+                    self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                data = []
+                while (line := self.rfile.readline()) not in (b'.\r\n', b''):
+                    data.append(line[1:] if line.startswith(b'..') else line)
+                with server.lock:
+                    server.messages.append((sender, recipients, email.message_from_bytes(b''.join(data))))
+                self.reply('250 OK')
+            elif verb in ('RSET', 'NOOP'):
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+class LocalSMTPServer:
+    """
+    SMTP server on localhost recording what it receives, for tests that
+    exercise the real SMTP backend (connections, refusals) rather than
+    locmem:
+
+        with LocalSMTPServer(reject={'bounce@example.com'}) as smtp:
+            with override_settings(**smtp.settings):
+                send_campaign(campaign)
+        smtp.connections, smtp.messages  # [(sender, recipients, Message)]
+    """
+
+    def __init__(self, reject=()):
+        self.reject = set(reject)
+        self.connections = 0
+        self.messages = []
+        self.lock = threading.Lock()
+        self._server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), _SMTPHandler)
+        self._server.daemon_threads = True
+        self._server.smtp = self
+
+    @property
+    def settings(self) -> dict:
+        return {
+            'EMAIL_BACKEND': 'django.core.mail.backends.smtp.EmailBackend',
+            'EMAIL_HOST': '127.0.0.1',
+            'EMAIL_PORT': self._server.server_address[1],
+            'EMAIL_HOST_USER': '',
+            'EMAIL_HOST_PASSWORD': '',
+            'EMAIL_USE_TLS': False,
+            'EMAIL_USE_SSL': False,
+        }
+
+    @property
+    def recipients(self) -> list:
+        return [address for _, recipients, _ in self.messages for address in recipients]
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def asgi_get(path: str, headers: Optional[dict] = None, on_chunk: Optional[Callable[[bytes], None]] = None) -> dict:
+    """
+    GET a path through Django's ASGI handler, the way uvicorn serves it.
+
+    Unlike AsyncClient, the body goes out through the handler's own send
+    loop, so a streaming response is consumed exactly as in production.
+    Body chunks are passed to `on_chunk` as they are sent, or collected in
+    the result's 'body' when there is no callback:
+
+        response = asgi_get('/api/portal/exports/orders.csv', {'Authorization': f'Token {key}'})
+        response['status'], response['headers']['content-type'], response['body']
+    """
+    path, _, query = path.partition('?')
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'root_path': '',
+        'headers': [
+            (b'host', b'localhost'),
+            *((name.lower().encode(), value.encode()) for name, value in (headers or {}).items()),
+        ],
+        'client': ('127.0.0.1', 50000),
+        'server': ('localhost', 80),
+    }
+    response = {'body': []}
+    chunk = on_chunk or response['body'].append
+    received = False
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # The client stays connected until the handler is done with it
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+            response['headers'] = {name.decode().lower(): value.decode() for name, value in message['headers']}
+        elif message.get('body'):
+            chunk(message['body'])
+
+    # Like the test client: closing connections would end the test's transaction
+    request_started.disconnect(close_old_connections)
+    request_finished.disconnect(close_old_connections)
+    try:
+        async_to_sync(ASGIHandler())(scope, receive, send)
+    finally:
+        request_started.connect(close_old_connections)
+        request_finished.connect(close_old_connections)
+    return response
@@ -1,3 +1,672 @@
-from django.test import TestCase
+import asyncio
+import time
+import warnings
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from urllib.parse import urlsplit
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+
+from django.contrib.auth import get_user_model
+from django.contrib.staticfiles import finders
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.events.models import Event
+from apps.payments.models import Product
+from apps.registrations.models import EventRegistration
+from . import jobs
+from .live import DatabaseBroker, InMemoryBroker, LiveHub
+from .management.commands.sync_instagram import Command as SyncInstagramCommand
+from .models import InstagramPost, Job, LiveUpdate, NewsletterCampaign, NewsletterDelivery, NewsletterSubscriber
+from .newsletter import send_campaign
+from .query_stats import QueryRecorder, histogram, reset_route_stats
+from .testing import LocalSMTPServer, QueryBudgetMixin, asgi_get
+
+
+@override_settings(STRIPE_SECRET_KEY='')
+class QueryStatsMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient(HTTP_HOST='localhost')
+        for index in range(3):
+            Product.objects.create(name=f'Tee {index}', description='', price=30, fulfillment_type='pod')
+
+    def tearDown(self):
+        reset_route_stats()
+
+    def test_recorder_groups_repeated_statements(self):
+        recorder = QueryRecorder()
+        with recorder.record():
+            for product in Product.objects.all():
+                list(product.variants.all())
+
+        self.assertEqual(recorder.count, 4)
+        self.assertEqual(recorder.duplicates()[0][1], 3)
+        self.assertIn('db-dup;desc="2 repeated"', recorder.server_timing())
+
+    @override_settings(QUERY_STATS_ENABLED=False, QUERY_STATS_SERVER_TIMING=True)
+    def test_server_timing_header(self):
+        response = self.client.get('/api/payments/products/')
+
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries", db-slowest;dur=')
+
+    @override_settings(QUERY_STATS_ENABLED=False, QUERY_STATS_SERVER_TIMING=False)
+    def test_disabled_by_default(self):
+        response = self.client.get('/api/payments/products/')
+
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    @override_settings(QUERY_STATS_ENABLED=True, QUERY_STATS_SERVER_TIMING=False, QUERY_STATS_FLUSH_SECONDS=0)
+    def test_route_histogram_dump(self):
+        for _ in range(3):
+            self.client.get('/api/payments/products/')
+        self.client.get('/api/payments/products/tee-0/')
+        histogram.flush()
+
+        out = StringIO()
+        call_command('query_stats', '--json', stdout=out)
+        self.assertIn('"ProductViewSet.list"', out.getvalue())
+        self.assertIn('"ProductViewSet.retrieve"', out.getvalue())
+
+        out = StringIO()
+        call_command('query_stats', stdout=out)
+        list_line = next(line for line in out.getvalue().splitlines() if 'ProductViewSet.list' in line)
+        self.assertEqual(list_line.split()[3], '3')  # requests
+
+
+class LiveHubTests(SimpleTestCase):
+    """Fan-out, resume and backpressure of the live-update hub."""
+
+    def setUp(self):
+        self.broker = InMemoryBroker(backlog=10)
+
+    def run_hub(self, scenario, queue_size=5):
+        async def main():
+            hub = LiveHub(self.broker, queue_size=queue_size, listen_seconds=0.05)
+            try:
+                return await scenario(hub)
+            finally:
+                hub.subscriptions.clear()
+                await asyncio.sleep(0.1)
+        return asyncio.run(main())
+
+    def test_messages_reach_matching_topics_only(self):
+        async def scenario(hub):
+            staff = await hub.subscribe(['event:1'])
+            family = await hub.subscribe(['guardian:7'])
+            await asyncio.sleep(0)
+            self.broker.publish('check_in', ('event:1', 'guardian:7'), {'id': 1})
+            self.broker.publish('check_in', ('event:2', 'guardian:8'), {'id': 2})
+            return await staff.get(1), await family.get(1), await family.get(0.1)
+
+        staff_message, family_message, nothing = self.run_hub(scenario)
+        self.assertEqual(staff_message.data, {'id': 1})
+        self.assertEqual(family_message.id, staff_message.id)
+        self.assertIsNone(nothing)
+        self.assertEqual(staff_message.encode(), 'id: 1\nevent: check_in\ndata: {"id": 1}\n\n')
+
+    def test_resume_replays_missed_messages(self):
+        for index in range(4):
+            self.broker.publish('check_in', ('event:1',), {'index': index})
+
+        async def scenario(hub):
+            subscription = await hub.subscribe(['event:1'], last_event_id=2)
+            self.broker.publish('check_in', ('event:1',), {'index': 4})
+            return [(await subscription.get(1)).data['index'] for _ in range(3)]
+
+        self.assertEqual(self.run_hub(scenario), [2, 3, 4])
+
+    def test_resume_past_the_backlog_resets(self):
+        for index in range(15):
+            self.broker.publish('check_in', ('event:1',), {'index': index})
+
+        async def scenario(hub):
+            subscription = await hub.subscribe(['event:1'], last_event_id=1)
+            return await subscription.get(1)
+
+        message = self.run_hub(scenario)
+        self.assertEqual((message.event, message.id), ('reset', 15))
+
+    def test_slow_subscriber_is_dropped(self):
+        async def scenario(hub):
+            slow = await hub.subscribe(['handoffs'])
+            await asyncio.sleep(0)
+            for index in range(6):
+                self.broker.publish('handoff', ('handoffs',), {'id': index})
+            await asyncio.sleep(0.1)
+            return slow, hub.subscriptions
+
+        slow, subscriptions = self.run_hub(scenario)
+        self.assertTrue(slow.closed)
+        self.assertNotIn(slow, subscriptions)
+
+    def test_thousand_concurrent_subscribers(self):
+        subscribers, messages = 1000, 20
+        self.broker = InMemoryBroker()
+
+        async def scenario(hub):
+            subscriptions = [await hub.subscribe([f'event:{index % 10}', 'handoffs']) for index in range(subscribers)]
+
+            async def receive(subscription):
+                return [await subscription.get(5) for _ in range(messages)]
+
+            readers = [asyncio.create_task(receive(subscription)) for subscription in subscriptions]
+            await asyncio.sleep(0)
+            started = time.perf_counter()
+            for index in range(messages):
+                self.broker.publish('handoff', ('handoffs',), {'id': index})
+            received = await asyncio.gather(*readers)
+            return received, time.perf_counter() - started
+
+        received, elapsed = self.run_hub(scenario, queue_size=100)
+        self.assertTrue(all(
+            [message.data['id'] for message in messages_received] == list(range(messages))
+            for messages_received in received
+        ))
+        # 20,000 deliveries; generous bound for slow CI machines
+        self.assertLess(elapsed, 5)
+
+
+class DatabaseBrokerTests(TestCase):
+    def test_relays_messages_through_the_table(self):
+        broker = DatabaseBroker(poll_seconds=0.01)
+        first = broker.publish('check_in', ('event:1',), {'id': 1})
+        broker.publish('handoff', ('handoffs',), {'id': 2})
+
+        messages = async_to_sync(broker.wait)(first.id - 1, 0.1)
+        backlog, complete = async_to_sync(broker.backlog)(first.id)
+
+        self.assertEqual([(message.event, message.topics) for message in messages],
+                         [('check_in', ('event:1',)), ('handoff', ('handoffs',))])
+        self.assertEqual([message.data for message in backlog], [{'id': 2}])
+        self.assertTrue(complete)
+        self.assertEqual(async_to_sync(broker.latest_id)(), first.id + 1)
+
+    def test_a_gap_holds_back_later_updates_until_it_commits(self):
+        broker = DatabaseBroker(poll_seconds=0.01, settle_seconds=2)
+        first = broker.publish('check_in', ('event:1',), {'id': 1})
+        # The update with the next id is still in an open transaction
+        LiveUpdate.objects.create(pk=first.id + 2, event='check_out', topics=['event:1'])
+
+        self.assertEqual(async_to_sync(broker.wait)(first.id, 0.05), [])
+        self.assertEqual(async_to_sync(broker.latest_id)(), first.id)
+
+        LiveUpdate.objects.create(pk=first.id + 1, event='check_in', topics=['event:1'])
+        messages = async_to_sync(broker.wait)(first.id, 0.05)
+        self.assertEqual([message.id for message in messages], [first.id + 1, first.id + 2])
+
+    def test_an_old_gap_is_a_rolled_back_update(self):
+        broker = DatabaseBroker(poll_seconds=0.01, settle_seconds=2)
+        first = broker.publish('check_in', ('event:1',), {'id': 1})
+        LiveUpdate.objects.create(pk=first.id + 2, event='check_out', topics=['event:1'])
+        LiveUpdate.objects.filter(pk=first.id + 2).update(created_at=timezone.now() - timedelta(seconds=3))
+
+        messages = async_to_sync(broker.wait)(first.id, 0.05)
+
+        self.assertEqual([message.id for message in messages], [first.id + 2])
+
+    @override_settings(LIVE_UPDATES_RETENTION_SECONDS=3600)
+    def test_prune_live_updates_command(self):
+        broker = DatabaseBroker()
+        old = broker.publish('check_in', ('event:1',), {'id': 1})
+        recent = broker.publish('check_in', ('event:1',), {'id': 2})
+        LiveUpdate.objects.filter(pk=old.id).update(created_at=timezone.now() - timedelta(hours=2))
+        out = StringIO()
+
+        call_command('prune_live_updates', stdout=out)
+
+        self.assertIn('Deleted 1 live update(s).', out.getvalue())
+        self.assertEqual(list(LiveUpdate.objects.values_list('pk', flat=True)), [recent.id])
+
+
+@jobs.register('tests.count_to')
+def count_to(job, total, fail_times=0):
+    attempts = Job.objects.get(pk=job.job.pk).attempts
+    if attempts < fail_times:
+        raise ConnectionError('Upstream unavailable')
+    for done in range(1, total + 1):
+        job.progress(done, total, f'Step {done}')
+    return {'counted': total}
+
+
+@jobs.register('tests.one_long_step')
+def one_long_step(job, seconds):
+    claimed = Job.objects.get(pk=job.job.pk).heartbeat_at
+    time.sleep(seconds)
+    return {'heartbeat_advanced': Job.objects.get(pk=job.job.pk).heartbeat_at > claimed}
+
+
+@override_settings(JOBS_HEARTBEAT_SECONDS=0.05)
+class JobHeartbeatTests(TransactionTestCase):
+    def test_worker_heartbeats_during_a_long_step(self):
+        job = jobs.enqueue('tests.one_long_step', {'seconds': 0.3})
+
+        jobs.run_pending('test')
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'succeeded')
+        self.assertEqual(job.result, {'heartbeat_advanced': True})
+
+
+@override_settings(JOBS_MAX_ATTEMPTS=3, JOBS_RETRY_DELAY_SECONDS=30, JOBS_STALE_SECONDS=600)
+class JobQueueTests(TestCase):
+    def run_due(self, at=None):
+        with mock.patch('django.utils.timezone.now', return_value=at or timezone.now()):
+            return jobs.run_pending('test')
+
+    def test_runs_job_and_records_progress(self):
+        job = jobs.enqueue('tests.count_to', {'total': 3})
+
+        self.assertEqual(jobs.run_pending('test'), 1)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'succeeded')
+        self.assertEqual((job.progress_done, job.progress_total, job.progress_percent), (3, 3, 100))
+        self.assertEqual(job.result, {'counted': 3})
+        self.assertEqual(job.attempts, 1)
+
+    def test_failures_retry_with_backoff_then_fail(self):
+        retried = jobs.enqueue('tests.count_to', {'total': 1, 'fail_times': 1})
+        failing = jobs.enqueue('tests.count_to', {'total': 1, 'fail_times': 5})
+        now = timezone.now()
+
+        self.assertEqual(self.run_due(now), 2)
+        failing.refresh_from_db()
+        self.assertEqual((failing.status, failing.attempts), ('queued', 1))
+        self.assertEqual(failing.run_after, now + timedelta(seconds=30))
+        # Not due yet
+        self.assertEqual(self.run_due(now + timedelta(seconds=10)), 0)
+
+        self.run_due(now + timedelta(seconds=31))
+        self.run_due(now + timedelta(seconds=200))
+
+        retried.refresh_from_db()
+        failing.refresh_from_db()
+        self.assertEqual((retried.status, retried.attempts), ('succeeded', 2))
+        self.assertEqual((failing.status, failing.attempts), ('failed', 3))
+        self.assertIn('Upstream unavailable', failing.error)
+
+    def test_a_job_is_claimed_once(self):
+        jobs.enqueue('tests.count_to', {'total': 1})
+
+        self.assertIsNotNone(jobs.claim_next('worker-1'))
+        self.assertIsNone(jobs.claim_next('worker-2'))
+
+    def test_stale_running_jobs_are_requeued(self):
+        job = jobs.enqueue('tests.count_to', {'total': 1})
+        jobs.claim_next('worker-1')
+
+        self.assertEqual(jobs.requeue_stale(timezone.now() + timedelta(seconds=300)), 0)
+        self.assertEqual(jobs.requeue_stale(timezone.now() + timedelta(seconds=601)), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('queued', 1))
+
+    def test_a_job_that_keeps_killing_its_worker_fails(self):
+        job = jobs.enqueue('tests.count_to', {'total': 1})
+
+        now = timezone.now()
+        for _ in range(3):
+            now += timedelta(seconds=601)
+            with mock.patch('django.utils.timezone.now', return_value=now):
+                self.assertIsNotNone(jobs.claim_next('worker-1'))
+            self.assertEqual(jobs.requeue_stale(now + timedelta(seconds=601)), 1)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 3))
+        self.assertIsNone(jobs.claim_next('worker-1'))
+
+    def test_a_requeued_run_does_not_overwrite_the_new_attempt(self):
+        jobs.enqueue('tests.count_to', {'total': 1})
+        now = timezone.now()
+        stale_run = jobs.claim_next('worker-1')
+        jobs.requeue_stale(now + timedelta(seconds=601))
+        with mock.patch('django.utils.timezone.now', return_value=now + timedelta(seconds=602)):
+            current_run = jobs.claim_next('worker-2')
+
+        with self.assertLogs('apps.core.jobs', 'WARNING') as logs:
+            jobs.run_job(stale_run)
+
+        self.assertIn('outcome discarded', logs.output[0])
+        job = Job.objects.get(pk=stale_run.pk)
+        self.assertEqual((job.status, job.worker, job.attempts, job.result), ('running', 'worker-2', 1, {}))
+
+        jobs.run_job(current_run)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.result), ('succeeded', 2, {'counted': 1}))
+
+    def test_unknown_job_names_are_rejected(self):
+        with self.assertRaises(ValueError):
+            jobs.enqueue('tests.missing')
+
+    def test_run_jobs_once(self):
+        jobs.enqueue('tests.count_to', {'total': 2})
+        out = StringIO()
+
+        call_command('run_jobs', '--once', stdout=out)
+
+        self.assertIn('Ran 1 job(s).', out.getvalue())
+
+
+@override_settings(
+    STRIPE_SECRET_KEY='',
+    STORAGES={'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}},
+)
+class ProductSyncJobTests(TestCase):
+    def test_admin_action_enqueues_and_shows_progress(self):
+        admin_user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'pw')
+        products = [
+            Product.objects.create(name=f'Hoodie {index}', description='', price=45, fulfillment_type='local')
+            for index in range(3)
+        ]
+        self.client.force_login(admin_user)
+
+        response = self.client.post('/django-admin/payments/product/', {
+            'action': 'sync_to_stripe', '_selected_action': [product.pk for product in products],
+        })
+
+        job = Job.objects.get()
+        self.assertRedirects(response, f'/django-admin/core/job/{job.pk}/progress/')
+        self.assertEqual((job.name, job.progress_total, job.created_by), ('payments.sync_to_stripe', 3, admin_user))
+        self.assertContains(self.client.get(response['Location']), 'Waiting for a worker')
+
+        with mock.patch.object(Product, '_sync_to_stripe'):
+            jobs.run_pending('test')
+
+        job.refresh_from_db()
+        self.assertEqual(job.result, {'synced': 3, 'skipped': 0, 'errors': []})
+        self.assertContains(self.client.get(response['Location']), 'Synced 3.')
+
+
+@override_settings(WHITENOISE_USE_FINDERS=True, WHITENOISE_AUTOREFRESH=True)
+class ASGIStaticFilesTests(SimpleTestCase):
+    """WhiteNoise's file responses under the deployed ASGI handler"""
+
+    def test_static_files_are_served(self):
+        path = finders.find('admin/css/base.css')
+
+        with warnings.catch_warnings():
+            # Django warns when it has to read a sync iterator into a list
+            warnings.filterwarnings('error', message='StreamingHttpResponse must consume')
+            response = asgi_get('/static/admin/css/base.css')
+
+        self.assertEqual(response['status'], 200)
+        self.assertTrue(response['headers']['content-type'].startswith('text/css'))
+        with open(path, 'rb') as f:
+            self.assertEqual(b''.join(response['body']), f.read())
+
+
+@override_settings(NEWSLETTER_SEND_RATE=0, NEWSLETTER_FROM_EMAIL='news@example.com')
+class NewsletterSendTests(QueryBudgetMixin, TestCase):
+    """Campaigns go out in batches over one SMTP connection each and resume where they stopped."""
+
+    # Per batch: read the batch, then savepoint, insert deliveries, update
+    # the campaign, release; plus marking it sending, the final empty read
+    # and marking it sent
+    @staticmethod
+    def send_budget(batches):
+        return 5 * batches + 3
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.subscribers = NewsletterSubscriber.objects.bulk_create([
+            NewsletterSubscriber(email=f'fan{index}@example.com', first_name=f'Fan{index}')
+            for index in range(7)
+        ])
+        NewsletterSubscriber.objects.bulk_create([
+            NewsletterSubscriber(email='gone@example.com', status='unsubscribed'),
+            NewsletterSubscriber(email='no-news@example.com', subscribe_news=False),
+        ])
+
+    def setUp(self):
+        self.campaign = NewsletterCampaign.objects.create(
+            subject='Spring tryouts', audience='news',
+            body_text='Hi {{ first_name }}, tryouts are open at {{ site_url }}.',
+            body_html='<p>Hi {{ first_name }}</p>',
+        )
+        self.smtp = self.enterContext(LocalSMTPServer(reject={'fan3@example.com'}))
+        self.enterContext(override_settings(**self.smtp.settings))
+
+    def test_sends_batches_over_one_connection_each(self):
+        with self.assertQueryBudget(self.send_budget(3), 'send_campaign'):
+            send_campaign(self.campaign, batch_size=3)
+
+        self.assertEqual(self.smtp.connections, 3)
+        self.assertEqual(
+            self.smtp.recipients,
+            [subscriber.email for subscriber in self.subscribers if subscriber.email != 'fan3@example.com'],
+        )
+        sender, _, message = self.smtp.messages[0]
+        self.assertEqual(sender, 'news@example.com')
+        self.assertEqual(message['Subject'], 'Spring tryouts')
+        self.assertIn('List-Unsubscribe', message)
+        text, html = message.get_payload()
+        self.assertIn('Hi Fan0, tryouts are open', text.get_payload())
+        self.assertEqual(html.get_content_type(), 'text/html')
+
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.status, 'sent')
+        self.assertEqual((self.campaign.sent_count, self.campaign.failed_count), (6, 1))
+        failed = NewsletterDelivery.objects.get(status='failed')
+        self.assertEqual(failed.email, 'fan3@example.com')
+        self.assertIn('No such user', failed.error)
+
+    def test_resumes_an_interrupted_campaign(self):
+        send_campaign(self.campaign, batch_size=4, max_batches=1)
+
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.status, 'sending')
+        self.assertEqual(self.campaign.last_subscriber_id, self.subscribers[3].pk)
+        self.assertEqual(NewsletterDelivery.objects.count(), 4)
+
+        out = StringIO()
+        call_command('send_newsletter', self.campaign.pk, '--batch-size', '4', stdout=out)
+
+        self.assertIn('to 3 subscriber(s) (resuming)', out.getvalue())
+        self.assertIn('Done: 6 sent, 1 failed.', out.getvalue())
+        # Everyone once, nobody twice
+        self.assertEqual(sorted(self.smtp.recipients), sorted(set(self.smtp.recipients)))
+        self.assertEqual(NewsletterDelivery.objects.filter(campaign=self.campaign).count(), 7)
+
+    def test_throttles_to_the_configured_rate(self):
+        started = time.monotonic()
+
+        send_campaign(self.campaign, batch_size=3, rate=50)
+
+        # 7 messages at 50/s: six intervals of 20ms after the first
+        self.assertGreaterEqual(time.monotonic() - started, 0.12)
+
+    @override_settings(BACKEND_URL='http://testserver')
+    def test_messages_carry_an_unsubscribe_link(self):
+        # The default body ends with the link
+        campaign = NewsletterCampaign.objects.create(subject='Camp dates', audience='news')
+        send_campaign(campaign, batch_size=10)
+
+        _, _, message = self.smtp.messages[0]
+        text = message.get_payload(decode=True).decode()
+        self.assertTrue(text.startswith('Hi Fan0,'))
+        url = text.rsplit('Unsubscribe: ', 1)[1].strip()
+        self.assertTrue(url.startswith('http://testserver/api/newsletter/unsubscribe/?token='))
+        self.assertTrue(' '.join(message['List-Unsubscribe'].split()).startswith(f'<{url}>, <mailto:'))
+        self.assertEqual(message['List-Unsubscribe-Post'], 'List-Unsubscribe=One-Click')
+
+        link = urlsplit(url)
+        path = f'{link.path}?{link.query}'
+        # Opening the link (or a scanner fetching it) only asks to confirm
+        response = self.client.get(path)
+        self.assertContains(response, 'Stop sending newsletters to fan0@example.com?')
+        self.assertContains(response, '<form method="post">')
+        self.subscribers[0].refresh_from_db()
+        self.assertEqual(self.subscribers[0].status, 'active')
+
+        # A mail client's one-click POST, or the page's button
+        response = self.client.post(path, {'List-Unsubscribe': 'One-Click'})
+        self.assertContains(response, 'fan0@example.com is unsubscribed.')
+        self.subscribers[0].refresh_from_db()
+        self.assertEqual(self.subscribers[0].status, 'unsubscribed')
+        self.assertEqual(NewsletterSubscriber.objects.get(pk=self.subscribers[1].pk).status, 'active')
+
+    def test_forged_unsubscribe_links_are_refused(self):
+        token = f'{self.subscribers[0].pk}:forged'
+        response = self.client.post(f'/api/newsletter/unsubscribe/?token={token}')
+
+        self.assertContains(response, "This unsubscribe link isn't valid.", status_code=400)
+        self.subscribers[0].refresh_from_db()
+        self.assertEqual(self.subscribers[0].status, 'active')
+
+    def test_dry_run_counts_recipients(self):
+        out = StringIO()
+
+        call_command('send_newsletter', self.campaign.pk, '--dry-run', stdout=out)
+
+        self.assertIn('Would send "Spring tryouts" to 7 subscriber(s).', out.getvalue())
+        self.assertEqual(self.smtp.connections, 0)
+
+    @override_settings(
+        STORAGES={'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}},
+    )
+    def test_admin_action_sends_as_a_job(self):
+        admin_user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.force_login(admin_user)
+        post = {'action': 'send_campaigns', '_selected_action': [self.campaign.pk]}
+
+        response = self.client.post('/django-admin/core/newslettercampaign/', post)
+        # A campaign already queued isn't queued again
+        self.client.post('/django-admin/core/newslettercampaign/', post)
+
+        job = Job.objects.get()
+        self.assertRedirects(response, f'/django-admin/core/job/{job.pk}/progress/')
+        jobs.run_pending('test')
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'succeeded')
+        self.assertEqual(job.result, {'sent': 6, 'failed': 1})
+        self.assertEqual((job.progress_done, job.progress_total), (7, 7))
+
+
+def instagram_post(number, hour, caption=''):
+    return {
+        'id': f'ig-{number}',
+        'caption': caption or f'Post {number}',
+        'media_type': 'IMAGE',
+        'media_url': f'https://cdn.example.com/{number}.jpg',
+        'permalink': f'https://instagram.com/p/{number}/',
+        'timestamp': f'2025-06-01T{hour:02d}:00:00+0000',
+    }
+
+
+@override_settings(INSTAGRAM_ACCESS_TOKEN='token', INSTAGRAM_BUSINESS_ACCOUNT_ID='1234')
+class SyncInstagramTests(TestCase):
+    """sync_instagram against canned Graph API pages, newest first"""
+
+    def setUp(self):
+        self.pages = {}
+        self.fetch = self.enterContext(
+            mock.patch.object(SyncInstagramCommand, 'fetch_page', autospec=True, side_effect=self.serve_page)
+        )
+
+    def serve_page(self, command, session, url, params=None):
+        return self.pages[url]
+
+    def publish(self, *pages):
+        """Serve the pages in order, each linking to the next"""
+        urls = [f'{SyncInstagramCommand.GRAPH_API_BASE}/1234/media', *(f'next-{n}' for n in range(1, len(pages)))]
+        for index, posts in enumerate(pages):
+            paging = {'next': urls[index + 1]} if index + 1 < len(pages) else {}
+            self.pages[urls[index]] = {'data': posts, 'paging': paging}
+
+    def sync(self, *args):
+        out = StringIO()
+        call_command('sync_instagram', *args, stdout=out)
+        return out.getvalue()
+
+    def test_follows_next_links(self):
+        self.publish(
+            [instagram_post(4, 12), instagram_post(3, 11)],
+            [instagram_post(2, 10), instagram_post(1, 9)],
+        )
+
+        output = self.sync()
+
+        self.assertEqual(self.fetch.call_count, 2)
+        # The next link carries the query string itself
+        self.assertIsNone(self.fetch.call_args_list[1].args[3])
+        self.assertEqual(
+            list(InstagramPost.objects.values_list('instagram_id', flat=True)), ['ig-4', 'ig-3', 'ig-2', 'ig-1']
+        )
+        self.assertIn('Created: 4, Updated: 0, Unchanged: 0', output)
+
+    def test_limit_stops_paging(self):
+        self.publish([instagram_post(4, 12), instagram_post(3, 11)], [instagram_post(2, 10)])
+
+        self.sync('--limit', '2')
+
+        self.assertEqual(self.fetch.call_count, 1)
+        self.assertEqual(InstagramPost.objects.count(), 2)
+
+    def test_stops_at_known_posts_and_upserts_changes(self):
+        self.publish([instagram_post(2, 10), instagram_post(1, 9)])
+        self.sync()
+
+        self.publish(
+            [instagram_post(4, 12), instagram_post(3, 11)],
+            # ig-2 was edited on Instagram; ig-1 is older than the cursor
+            [instagram_post(2, 10, caption='Edited'), instagram_post(1, 9)],
+            [instagram_post(0, 8)],
+        )
+        output = self.sync()
+
+        self.assertEqual(self.fetch.call_count, 3)  # 1 for the first sync, 2 for this one
+        self.assertIn('Created: 2, Updated: 1, Unchanged: 0', output)
+        self.assertEqual(InstagramPost.objects.get(instagram_id='ig-2').caption, 'Edited')
+        self.assertFalse(InstagramPost.objects.filter(instagram_id='ig-0').exists())
+
+        # Only the post at the cursor is compared again
+        self.publish([instagram_post(4, 12), instagram_post(3, 11)])
+        self.assertIn('Created: 0, Updated: 0, Unchanged: 1', self.sync())
+
+    def test_posts_without_a_timestamp_are_skipped(self):
+        untimed = instagram_post(9, 0)
+        del untimed['timestamp']
+        self.publish([untimed, instagram_post(2, 10)], [instagram_post(1, 9)])
+
+        output = self.sync()
+
+        self.assertIn('Skipped 1 posts without a timestamp.', output)
+        self.assertFalse(InstagramPost.objects.filter(instagram_id='ig-9').exists())
+        # The cursor is still the newest real post, so the next sync picks up
+        # posts published since
+        self.publish([instagram_post(3, 11), instagram_post(2, 10)])
+        self.sync()
+        self.assertTrue(InstagramPost.objects.filter(instagram_id='ig-3').exists())
+
+
+
+class SeedDataTests(TestCase):
+    """seed_data --scale writes one generated dataset per database"""
+
+    def seed(self, *args):
+        call_command('seed_data', *args, stdout=StringIO())
+
+    def test_a_second_scaled_run_is_refused(self):
+        self.seed('--scale', '1', '--seed', '7')
+        users = get_user_model().objects.count()
+        events = Event.objects.count()
+        registrations = EventRegistration.objects.count()
+
+        with self.assertRaisesMessage(CommandError, 'already has a generated dataset'):
+            self.seed('--scale', '1', '--seed', '7')
+
+        self.assertEqual(get_user_model().objects.count(), users)
+        self.assertEqual(Event.objects.count(), events)
+        self.assertEqual(EventRegistration.objects.count(), registrations)
+
+    def test_sample_data_can_be_reseeded(self):
+        self.seed()
+        self.seed()
+
+        self.assertFalse(Event.objects.filter(slug__startswith='bench-').exists())
@@ -3,8 +3,11 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
+from django.conf import settings
+from django.shortcuts import render
 from django.utils import timezone
 from .models import Coach, InstagramPost, NewsletterSubscriber
+from .newsletter import read_unsubscribe_token
 from .serializers import (
     CoachSerializer,
     InstagramPostSerializer,
@@ -125,7 +128,7 @@ def newsletter_subscribe(request):
     )
 
 
-@api_view(['POST'])
+@api_view(['GET', 'POST'])
 @permission_classes([AllowAny])
 def newsletter_unsubscribe(request):
     """
@@ -135,7 +138,20 @@ def newsletter_unsubscribe(request):
     {
         "email": "user@example.com"
     }
+
+    GET /api/newsletter/unsubscribe/?token=...
+    The signed link in each newsletter. Shows a confirmation page and
+    changes nothing, since mail scanners and link prefetchers open every
+    link; its button POSTs back to the same URL.
+
+    POST /api/newsletter/unsubscribe/?token=...
+    Unsubscribes; also what mail clients send for one-click unsubscribe
+    (RFC 8058).
     """
+    token = request.query_params.get('token')
+    if token:
+        return _unsubscribe_with_token(request, token)
+
     email = request.data.get('email', '').lower().strip()
 
     if not email:
@@ -151,3 +167,20 @@ def newsletter_unsubscribe(request):
     except NewsletterSubscriber.DoesNotExist:
         # Don't reveal if email exists or not
         return Response({'message': 'Successfully unsubscribed'})
+
+
+def _unsubscribe_with_token(request, token):
+    """Confirmation page for an unsubscribe link (GET), or unsubscribe (POST)"""
+    subscriber_id = read_unsubscribe_token(token)
+    subscriber = None
+    if subscriber_id is not None:
+        subscriber = NewsletterSubscriber.objects.filter(pk=subscriber_id).first()
+
+    context = {**settings.EMAIL_CONTEXT, 'valid': subscriber is not None}
+    if subscriber is None:
+        return render(request, 'core/newsletter_unsubscribe.html', context, status=status.HTTP_400_BAD_REQUEST)
+
+    if request.method == 'POST' and subscriber.status != 'unsubscribed':
+        subscriber.unsubscribe()
+    context.update(email=subscriber.email, unsubscribed=subscriber.status == 'unsubscribed')
+    return render(request, 'core/newsletter_unsubscribe.html', context)
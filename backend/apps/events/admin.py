@@ -1,5 +1,6 @@
 from django.contrib import admin
 from django.contrib import messages
+from django.db.models import Count
 from django.utils.html import format_html
 from django.utils import timezone
 from .models import Event, CalendarSource
@@ -38,9 +39,13 @@ class CalendarSourceAdmin(admin.ModelAdmin):
         return 'Never'
     last_synced_display.short_description = 'Last Synced'
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(event_total=Count('events'))
+
     def event_count(self, obj):
-        return obj.events.count()
+        return obj.event_total
     event_count.short_description = 'Events'
+    event_count.admin_order_field = 'event_total'
 
     def sync_status(self, obj):
         if obj.sync_error:
@@ -94,8 +99,9 @@ class EventAdmin(admin.ModelAdmin):
     search_fields = ['title', 'description', 'location']
     prepopulated_fields = {'slug': ('title',)}
     date_hierarchy = 'start_datetime'
-    readonly_fields = ['created_at', 'updated_at', 'external_uid', 'calendar_source']
+    readonly_fields = ['created_at', 'updated_at', 'external_uid', 'recurrence_id', 'calendar_source']
     actions = ['mark_locally_modified', 'clear_local_modifications']
+    list_select_related = ['calendar_source']
 
     fieldsets = (
         (None, {
@@ -116,7 +122,7 @@ class EventAdmin(admin.ModelAdmin):
             'fields': ('is_public',)
         }),
         ('Calendar Sync', {
-            'fields': ('calendar_source', 'external_uid', 'is_locally_modified'),
+            'fields': ('calendar_source', 'external_uid', 'recurrence_id', 'is_locally_modified'),
             'classes': ('collapse',),
             'description': 'Events synced from external calendars. Enable "locally modified" to prevent overwriting your changes.'
         }),
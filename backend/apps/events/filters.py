@@ -0,0 +1,112 @@
+"""
+Distance filtering for events ("events near me").
+
+?near=<lat>,<lng>&radius_km=<km> keeps events within the radius, nearest
+first. Candidates are pruned with a latitude/longitude range that the
+(latitude, longitude) index can answer, then the exact great-circle
+distance is computed in SQL for the survivors only.
+"""
+
+import math
+from decimal import Decimal
+
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import ASin, Cast, Cos, Power, Radians, Sin, Sqrt
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE_LATITUDE = 111.045
+DEFAULT_RADIUS_KM = 25.0
+MAX_RADIUS_KM = 500.0
+
+
+def parse_near(value: str) -> tuple:
+    """'40.74,-74.03' -> (40.74, -74.03), or ValidationError."""
+    try:
+        latitude, longitude = (float(part) for part in value.split(','))
+    except ValueError:
+        raise ValidationError({'near': 'Expected "latitude,longitude", e.g. near=40.7449,-74.0324.'})
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValidationError({'near': 'Latitude must be within ±90 and longitude within ±180.'})
+    return latitude, longitude
+
+
+def parse_radius(value) -> float:
+    if value in (None, ''):
+        return DEFAULT_RADIUS_KM
+    try:
+        radius = float(value)
+    except ValueError:
+        raise ValidationError({'radius_km': 'Expected a number of kilometers.'})
+    if not 0 < radius <= MAX_RADIUS_KM:
+        raise ValidationError({'radius_km': f'Must be greater than 0 and at most {MAX_RADIUS_KM:g}.'})
+    return radius
+
+
+def bounding_box(latitude: float, longitude: float, radius_km: float) -> dict:
+    """
+    Range lookups for the box enclosing the circle.
+
+    The longitude range is dropped near the poles or when the box would
+    cross the antimeridian; the latitude range and the exact distance still
+    apply.
+    """
+    lat_delta = radius_km / KM_PER_DEGREE_LATITUDE
+    lookups = {
+        'latitude__range': (
+            Decimal(f'{max(-90.0, latitude - lat_delta):.6f}'),
+            Decimal(f'{min(90.0, latitude + lat_delta):.6f}'),
+        ),
+    }
+
+    cos_lat = math.cos(math.radians(latitude))
+    if cos_lat > 0.01:
+        lng_delta = radius_km / (KM_PER_DEGREE_LATITUDE * cos_lat)
+        if -180 <= longitude - lng_delta and longitude + lng_delta <= 180:
+            lookups['longitude__range'] = (
+                Decimal(f'{longitude - lng_delta:.6f}'),
+                Decimal(f'{longitude + lng_delta:.6f}'),
+            )
+    return lookups
+
+
+def haversine_km(latitude: float, longitude: float):
+    """Great-circle distance in km from a point to each row's coordinates."""
+    row_lat = Radians(Cast('latitude', FloatField()))
+    row_lng = Radians(Cast('longitude', FloatField()))
+    origin_lat = math.radians(latitude)
+    origin_lng = math.radians(longitude)
+
+    a = (
+        Power(Sin((row_lat - Value(origin_lat)) / 2), 2)
+        + Value(math.cos(origin_lat)) * Cos(row_lat) * Power(Sin((row_lng - Value(origin_lng)) / 2), 2)
+    )
+    return Value(2 * EARTH_RADIUS_KM) * ASin(Sqrt(a))
+
+
+class NearFilter(BaseFilterBackend):
+    """
+    Filter by distance from ?near=lat,lng within ?radius_km (default 25).
+
+    Annotates distance_km and orders by it, unless the request asks for an
+    explicit ?ordering. Must come after OrderingFilter in filter_backends.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        near = request.query_params.get('near')
+        if not near:
+            return queryset
+
+        latitude, longitude = parse_near(near)
+        radius_km = parse_radius(request.query_params.get('radius_km'))
+
+        queryset = (
+            queryset
+            .filter(**bounding_box(latitude, longitude, radius_km))
+            .annotate(distance_km=haversine_km(latitude, longitude))
+            .filter(distance_km__lte=radius_km)
+        )
+        if not request.query_params.get('ordering'):
+            queryset = queryset.order_by(F('distance_km').asc(), 'start_datetime')
+        return queryset
@@ -133,6 +133,7 @@ class Command(BaseCommand):
         created = stats.get('created', 0)
         updated = stats.get('updated', 0)
         skipped = stats.get('skipped', 0)
+        deleted = stats.get('deleted', 0)
         errors = stats.get('errors', [])
 
         if created:
@@ -141,6 +142,8 @@ class Command(BaseCommand):
             self.stdout.write(f"{prefix}  Updated: {self.style.SUCCESS(str(updated))}")
         if skipped:
             self.stdout.write(f"{prefix}  Skipped (locally modified): {skipped}")
+        if deleted:
+            self.stdout.write(f"{prefix}  Deleted (dropped from recurring series): {deleted}")
 
         if errors:
             self.stdout.write(f"{prefix}  Errors: {self.style.ERROR(str(len(errors)))}")
@@ -149,5 +152,5 @@ class Command(BaseCommand):
             if len(errors) > 5:
                 self.stdout.write(f"{prefix}    ... and {len(errors) - 5} more")
 
-        if not created and not updated and not skipped and not errors:
+        if not created and not updated and not skipped and not deleted and not errors:
             self.stdout.write(f"{prefix}  No changes")
@@ -0,0 +1,40 @@
+# Generated by Django 5.0.1 on 2026-10-19 03:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0004_event_lat_lng_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='recurrence_id',
+            field=models.CharField(blank=True, default='', help_text="Original UTC start of a recurring event's occurrence (blank for single events)", max_length=20),
+        ),
+        migrations.AlterUniqueTogether(
+            name='event',
+            unique_together={('calendar_source', 'external_uid', 'recurrence_id')},
+        ),
+        migrations.CreateModel(
+            name='CalendarSeries',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('external_uid', models.CharField(max_length=255)),
+                ('fingerprint', models.CharField(help_text='Hash of the rule and details; a change re-expands the series', max_length=64)),
+                ('expanded_until', models.DateTimeField(help_text='Occurrences starting up to this time have been created')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='series', to='events.calendarsource')),
+            ],
+            options={
+                'verbose_name': 'Calendar Series',
+                'verbose_name_plural': 'Calendar Series',
+                'unique_together': {('source', 'external_uid')},
+            },
+        ),
+    ]
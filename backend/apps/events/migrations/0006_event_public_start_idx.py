@@ -0,0 +1,19 @@
+# Generated by Django 5.0.1 on 2026-10-19 03:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0005_calendar_recurrence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['is_public', 'start_datetime'], name='event_public_start_idx'),
+        ),
+    ]
@@ -66,6 +66,39 @@ class CalendarSource(models.Model):
         return f"{self.name} ({status})"
 
 
+class CalendarSeries(models.Model):
+    """
+    A recurring (RRULE) event from a calendar source.
+
+    Tracks how far its occurrences have been materialized as Events, so each
+    sync only expands the part of the series that entered the window.
+    """
+
+    source = models.ForeignKey(
+        CalendarSource,
+        on_delete=models.CASCADE,
+        related_name='series'
+    )
+    external_uid = models.CharField(max_length=255)
+    fingerprint = models.CharField(
+        max_length=64,
+        help_text="Hash of the rule and details; a change re-expands the series"
+    )
+    expanded_until = models.DateTimeField(
+        help_text="Occurrences starting up to this time have been created"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Calendar Series"
+        verbose_name_plural = "Calendar Series"
+        unique_together = ['source', 'external_uid']
+
+    def __str__(self):
+        return f"{self.external_uid} ({self.source.name})"
+
+
 class Event(models.Model):
     """Event model with enhanced registration features"""
 
@@ -145,6 +178,12 @@ class Event(models.Model):
         related_name='events',
         help_text="Source calendar this event was synced from"
     )
+    recurrence_id = models.CharField(
+        max_length=20,
+        blank=True,
+        default='',
+        help_text="Original UTC start of a recurring event's occurrence (blank for single events)"
+    )
     is_locally_modified = models.BooleanField(
         default=False,
         help_text="If true, sync will not overwrite local changes"
@@ -155,7 +194,13 @@ class Event(models.Model):
         indexes = [
             models.Index(fields=['event_type', 'start_datetime']),
             models.Index(fields=['registration_open', 'start_datetime']),
+            # Public date-range queries (list, calendar)
+            models.Index(fields=['is_public', 'start_datetime'], name='event_public_start_idx'),
+            # Bounding-box prefilter for ?near= distance queries
+            models.Index(fields=['latitude', 'longitude'], name='event_lat_lng_idx'),
         ]
+        # One row per synced event or recurring occurrence
+        unique_together = ['calendar_source', 'external_uid', 'recurrence_id']
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -170,7 +215,10 @@ class Event(models.Model):
         """Calculate remaining spots"""
         if not self.max_participants:
             return None
-        registered = self.registrations.filter(payment_status='completed').count()
+        # Querysets may annotate the count (see EventViewSet) to avoid a query per event
+        registered = getattr(self, 'completed_registrations', None)
+        if registered is None:
+            registered = self.registrations.filter(payment_status='completed').count()
         return max(0, self.max_participants - registered)
 
     @property
@@ -8,6 +8,7 @@ class EventSerializer(serializers.ModelSerializer):
     spots_remaining = serializers.ReadOnlyField()
     is_full = serializers.ReadOnlyField()
     is_registration_open = serializers.ReadOnlyField()
+    distance_km = serializers.SerializerMethodField()
 
     class Meta:
         model = Event
@@ -34,5 +35,49 @@ class EventSerializer(serializers.ModelSerializer):
             'spots_remaining',
             'is_full',
             'is_registration_open',
+            'distance_km',
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+
+    def get_distance_km(self, obj):
+        """Distance from ?near=, only present on distance-filtered lists"""
+        distance = getattr(obj, 'distance_km', None)
+        return round(distance, 2) if distance is not None else None
+
+
+class CalendarEventSerializer(serializers.ModelSerializer):
+    """Compact event for calendar cells (EventViewSet.calendar)"""
+
+    spots_remaining = serializers.ReadOnlyField()
+    is_full = serializers.ReadOnlyField()
+    is_registration_open = serializers.ReadOnlyField()
+    registration_status = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Event
+        fields = [
+            'id',
+            'title',
+            'slug',
+            'event_type',
+            'start_datetime',
+            'end_datetime',
+            'location',
+            'requires_payment',
+            'price',
+            'spots_remaining',
+            'is_full',
+            'is_registration_open',
+            'registration_status',
+        ]
+
+    def get_registration_status(self, obj):
+        """
+        The requesting user's registration: 'registered' (paid), 'pending'
+        or None. Read from the my_completed/my_pending annotations.
+        """
+        if getattr(obj, 'my_completed', 0):
+            return 'registered'
+        if getattr(obj, 'my_pending', 0):
+            return 'pending'
+        return None
@@ -6,17 +6,33 @@ Supports any iCal-compatible calendar:
 - Apple Calendar (shared calendar URL)
 - Outlook Calendar (ICS export URL)
 - Any other iCal feed
+
+Recurring events (RRULE/RDATE/EXDATE) are materialized as one Event per
+occurrence, keyed by (external_uid, recurrence_id), only up to
+CALENDAR_RECURRENCE_WINDOW_DAYS ahead. Each CalendarSeries remembers how far
+it has been expanded, so a nightly sync of an unchanged series only writes
+the occurrences that entered the window since the last run. A series whose
+rule or details changed is re-expanded over the whole window and
+reconciled. Modified occurrences (VEVENTs with a RECURRENCE-ID) are synced
+like single events under their occurrence's key.
 """
 
+import hashlib
 import logging
-from datetime import datetime, timedelta
+from datetime import date, datetime, time, timedelta
 from typing import Optional
+from zoneinfo import ZoneInfo
+
 import requests
+from dateutil.rrule import rruleset, rrulestr
+from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 from django.utils.text import slugify
 from icalendar import Calendar
+from icalendar.prop import vRecur
 
-from ..models import CalendarSource, Event
+from ..models import CalendarSeries, CalendarSource, Event
 
 logger = logging.getLogger(__name__)
 
@@ -57,6 +73,93 @@ def parse_ical_datetime(dt_value) -> Optional[datetime]:
     return dt
 
 
+def format_recurrence_id(dt: datetime) -> str:
+    """
+    Occurrence key: the original start in UTC, e.g. 20250107T220000Z.
+
+    Sorts chronologically, so occurrences in a date range can be selected
+    with a string range on the indexed column.
+    """
+    return dt.astimezone(ZoneInfo('UTC')).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _aware(value) -> datetime:
+    """
+    A DATE, floating or zoned iCal value as an aware datetime.
+
+    pytz zones (as returned by icalendar) are swapped for zoneinfo, so
+    recurrence expansion keeps the wall-clock time across DST changes.
+    """
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, time.min)
+    if timezone.is_naive(value):
+        return timezone.make_aware(value)
+    zone = getattr(value.tzinfo, 'zone', None)
+    if zone:
+        return value.replace(tzinfo=ZoneInfo(zone))
+    return value
+
+
+def _date_values(component, name: str) -> list:
+    """All datetimes of a possibly repeated EXDATE/RDATE property."""
+    values = component.get(name)
+    if values is None:
+        return []
+    if not isinstance(values, list):
+        values = [values]
+    return [_aware(entry.dt) for value in values for entry in value.dts]
+
+
+def build_recurrence(component) -> Optional[rruleset]:
+    """The VEVENT's RRULE/RDATE/EXDATE as a rruleset, or None if it doesn't recur."""
+    rules = component.get('rrule')
+    rdates = _date_values(component, 'rdate')
+    if rules is None and not rdates:
+        return None
+
+    dtstart = _aware(component.get('dtstart').dt)
+    recurrence = rruleset()
+    for rule in (rules if isinstance(rules, list) else [rules] if rules is not None else []):
+        # UNTIL is applied separately: dateutil requires it to match
+        # DTSTART's awareness, which floating and DATE values don't
+        parts = vRecur({key: value for key, value in rule.items() if key != 'UNTIL'})
+        expanded = rrulestr(f"RRULE:{parts.to_ical().decode()}", dtstart=dtstart)
+        if rule.get('UNTIL'):
+            until = rule['UNTIL'][0]
+            if isinstance(until, date) and not isinstance(until, datetime):
+                until = datetime.combine(until, time.max)
+            expanded = expanded.replace(until=_aware(until))
+        recurrence.rrule(expanded)
+    for rdate in rdates:
+        recurrence.rdate(rdate)
+    for exdate in _date_values(component, 'exdate'):
+        recurrence.exdate(exdate)
+    return recurrence
+
+
+def _ical_text(component, name: str) -> str:
+    value = component.get(name)
+    if value is None:
+        return ''
+    values = value if isinstance(value, list) else [value]
+    return ','.join(item.to_ical().decode() for item in values)
+
+
+def series_fingerprint(component) -> str:
+    """Hash of everything that shapes a series' occurrences."""
+    parts = [
+        _ical_text(component, name)
+        for name in ('dtstart', 'dtend', 'duration', 'rrule', 'summary', 'description', 'location')
+    ]
+    for name in ('rdate', 'exdate'):
+        parts.extend(format_recurrence_id(value) for value in _date_values(component, name))
+    return hashlib.sha256('\x1f'.join(parts).encode()).hexdigest()
+
+
+def get_recurrence_window() -> timedelta:
+    return timedelta(days=getattr(settings, 'CALENDAR_RECURRENCE_WINDOW_DAYS', 90))
+
+
 def generate_unique_slug(title: str, event_id: Optional[int] = None) -> str:
     """Generate a unique slug for an event"""
     base_slug = slugify(title)[:180]  # Leave room for suffix
@@ -78,6 +181,149 @@ def generate_unique_slug(title: str, event_id: Optional[int] = None) -> str:
         counter += 1
 
 
+def unique_occurrence_slugs(title: str, starts: list) -> list:
+    """
+    Slugs for a batch of occurrences: title plus local start date, with a
+    numeric suffix only where that is already taken. One query, plus one
+    per collision.
+    """
+    base_slug = slugify(title)[:180] or 'event'
+    candidates = [f"{base_slug}-{timezone.localtime(start):%Y-%m-%d}" for start in starts]
+    taken = set(Event.objects.filter(slug__in=candidates).values_list('slug', flat=True))
+
+    slugs = []
+    for candidate in candidates:
+        slug = candidate
+        if slug in taken:
+            taken.update(Event.objects.filter(slug__startswith=candidate).values_list('slug', flat=True))
+            counter = 2
+            while slug in taken:
+                slug = f"{candidate}-{counter}"
+                counter += 1
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+def event_duration(component) -> timedelta:
+    """DTEND - DTSTART, or DURATION, defaulting to one hour."""
+    start = _aware(component.get('dtstart').dt)
+    if component.get('dtend') is not None:
+        return _aware(component.get('dtend').dt) - start
+    if component.get('duration') is not None:
+        return component.get('duration').dt
+    return timedelta(hours=1)
+
+
+def sync_series(
+    source: CalendarSource,
+    component,
+    series: Optional[CalendarSeries],
+    overridden: set,
+    now: datetime,
+    stats: dict,
+) -> None:
+    """
+    Materialize a recurring VEVENT's occurrences within the window.
+
+    An unchanged series is only expanded from where the last sync stopped
+    to the new end of the window. A new or changed series is expanded from
+    30 days ago, and its existing occurrences in that range are updated, or
+    deleted when the series no longer produces them (e.g. a new EXDATE).
+    Locally modified occurrences and occurrences with registrations are
+    never deleted. Occurrences in `overridden` have their own VEVENT and
+    are synced by it.
+    """
+    uid = str(component.get('uid'))
+    window_end = now + get_recurrence_window()
+    fingerprint = series_fingerprint(component)
+    changed = series is None or series.fingerprint != fingerprint
+
+    if not changed and series.expanded_until >= window_end:
+        return
+
+    range_start = now - timedelta(days=30) if changed else series.expanded_until
+    duration = event_duration(component)
+    occurrences = {}
+    for start in build_recurrence(component).between(range_start, window_end, inc=True):
+        key = format_recurrence_id(start)
+        if key not in overridden:
+            occurrences[key] = start
+
+    existing = Event.objects.filter(
+        calendar_source=source,
+        external_uid=uid,
+        recurrence_id__gte=format_recurrence_id(range_start),
+        recurrence_id__lte=format_recurrence_id(window_end),
+    )
+    if changed:
+        # Also replaces the row created before the event became recurring
+        existing = existing | Event.objects.filter(calendar_source=source, external_uid=uid, recurrence_id='')
+    existing = {event.recurrence_id: event for event in existing}
+
+    summary = str(component.get('summary', '')) or 'Untitled Event'
+    description = str(component.get('description', '')) or ''
+    location = str(component.get('location', '')) or ''
+
+    new_keys = [key for key in occurrences if key not in existing]
+    slugs = unique_occurrence_slugs(summary, [occurrences[key] for key in new_keys])
+    to_create = [
+        Event(
+            title=summary,
+            slug=slug,
+            description=description,
+            location=location,
+            start_datetime=occurrences[key],
+            end_datetime=occurrences[key] + duration,
+            event_type=source.default_event_type,
+            is_public=source.auto_publish,
+            external_uid=uid,
+            recurrence_id=key,
+            calendar_source=source,
+            registration_open=False,  # Default to closed, admin enables
+        )
+        for key, slug in zip(new_keys, slugs)
+    ]
+
+    to_update, stale_ids = [], []
+    if changed:
+        for key, event in existing.items():
+            if key in overridden:
+                continue
+            if event.is_locally_modified:
+                stats['skipped'] += 1
+            elif key in occurrences:
+                event.title = summary
+                event.description = description
+                event.location = location
+                event.start_datetime = occurrences[key]
+                event.end_datetime = occurrences[key] + duration
+                event.updated_at = now
+                to_update.append(event)
+            else:
+                stale_ids.append(event.pk)
+
+    with transaction.atomic():
+        Event.objects.bulk_create(to_create, batch_size=500)
+        if to_update:
+            Event.objects.bulk_update(
+                to_update,
+                ['title', 'description', 'location', 'start_datetime', 'end_datetime', 'updated_at'],
+                batch_size=500,
+            )
+        if stale_ids:
+            _, deleted = Event.objects.filter(pk__in=stale_ids, registrations__isnull=True).delete()
+            stats['deleted'] += deleted.get(Event._meta.label, 0)
+        CalendarSeries.objects.update_or_create(
+            source=source,
+            external_uid=uid,
+            defaults={'fingerprint': fingerprint, 'expanded_until': window_end},
+        )
+
+    stats['created'] += len(to_create)
+    stats['updated'] += len(to_update)
+
+
 def sync_calendar_source(source: CalendarSource) -> dict:
     """
     Sync events from a single calendar source.
@@ -86,6 +332,7 @@ def sync_calendar_source(source: CalendarSource) -> dict:
         - created: number of new events created
         - updated: number of existing events updated
         - skipped: number of locally-modified events skipped
+        - deleted: number of occurrences dropped from recurring series
         - errors: list of error messages
     """
     stats = {
@@ -106,14 +353,23 @@ def sync_calendar_source(source: CalendarSource) -> dict:
         except Exception as e:
             raise CalendarSyncError(f"Failed to parse calendar: {str(e)}")
 
+        now = timezone.now()
+        components = [component for component in cal.walk() if component.name == 'VEVENT']
+
+        # Occurrences replaced by their own VEVENT (RECURRENCE-ID), per series
+        overridden = {}
+        for component in components:
+            if component.get('recurrence-id') is not None:
+                overridden.setdefault(str(component.get('uid', '')), set()).add(
+                    format_recurrence_id(_aware(component.get('recurrence-id').dt))
+                )
+        series_by_uid = {series.external_uid: series for series in source.series.all()}
+
         # Track which external UIDs we've seen (for cleanup)
         seen_uids = set()
 
         # Process each event
-        for component in cal.walk():
-            if component.name != 'VEVENT':
-                continue
-
+        for component in components:
             try:
                 # Extract iCal UID
                 uid = str(component.get('uid', ''))
@@ -123,6 +379,12 @@ def sync_calendar_source(source: CalendarSource) -> dict:
 
                 seen_uids.add(uid)
 
+                recurrence_id = component.get('recurrence-id')
+                if recurrence_id is None and (component.get('rrule') is not None or component.get('rdate') is not None):
+                    sync_series(source, component, series_by_uid.get(uid), overridden.get(uid, set()), now, stats)
+                    continue
+                recurrence_id = format_recurrence_id(_aware(recurrence_id.dt)) if recurrence_id is not None else ''
+
                 # Extract event data
                 summary = str(component.get('summary', '')) or 'Untitled Event'
                 description = str(component.get('description', '')) or ''
@@ -140,12 +402,17 @@ def sync_calendar_source(source: CalendarSource) -> dict:
                     end_dt = start_dt + timedelta(hours=1)
 
                 # Skip past events (more than 30 days ago)
-                if start_dt < timezone.now() - timedelta(days=30):
+                if start_dt < now - timedelta(days=30):
+                    continue
+
+                # Modified occurrences are materialized within the same window as their series
+                if recurrence_id and start_dt > now + get_recurrence_window():
                     continue
 
                 # Find existing event by external UID
                 existing_event = Event.objects.filter(
                     external_uid=uid,
+                    recurrence_id=recurrence_id,
                     calendar_source=source
                 ).first()
 
@@ -175,6 +442,7 @@ def sync_calendar_source(source: CalendarSource) -> dict:
                         event_type=source.default_event_type,
                         is_public=source.auto_publish,
                         external_uid=uid,
+                        recurrence_id=recurrence_id,
                         calendar_source=source,
                         registration_open=False,  # Default to closed, admin enables
                     )
@@ -196,7 +464,7 @@ def sync_calendar_source(source: CalendarSource) -> dict:
         logger.info(
             f"Calendar sync completed for '{source.name}': "
             f"{stats['created']} created, {stats['updated']} updated, "
-            f"{stats['skipped']} skipped"
+            f"{stats['skipped']} skipped, {stats['deleted']} deleted"
         )
 
     except CalendarSyncError as e:
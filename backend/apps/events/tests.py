@@ -1,3 +1,339 @@
-from django.test import TestCase
+from datetime import datetime, time, timedelta
+from unittest import mock
+from zoneinfo import ZoneInfo
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.core.testing import QueryBudgetMixin
+from apps.registrations.models import EventRegistration
+from .models import CalendarSeries, CalendarSource, Event
+from .services import sync_calendar_source
+
+
+class EventQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Capacity fields are annotated, not counted per event."""
+
+    LIST_BUDGET = 2  # count, events with registration counts
+    DETAIL_BUDGET = 1
+
+    @classmethod
+    def setUpTestData(cls):
+        user = get_user_model().objects.create_user('parent', 'parent@example.com', 'pw')
+        start = timezone.now() + timedelta(days=7)
+        cls.events = [
+            Event.objects.create(
+                title=f'Tryout {index}', description='', event_type='tryout',
+                start_datetime=start + timedelta(days=index), end_datetime=start + timedelta(days=index, hours=2),
+                location='Gym', max_participants=3,
+            )
+            for index in range(5)
+        ]
+        for index in range(3):
+            EventRegistration.objects.create(
+                event=cls.events[0], user=user, participant_first_name='Player', participant_last_name=str(index),
+                participant_email=f'player{index}@example.com', participant_age=12, emergency_contact_name='Parent', emergency_contact_phone='555-0100',
+                payment_status='completed',
+            )
+
+    def setUp(self):
+        self.client = APIClient(HTTP_HOST='localhost')
+
+    def test_event_list(self):
+        with self.assertQueryBudget(self.LIST_BUDGET, 'EventViewSet.list'):
+            response = self.client.get('/api/events/')
+
+        self.assertEqual(response.status_code, 200)
+        first = response.data['results'][0]
+        self.assertEqual(first['spots_remaining'], 0)
+        self.assertTrue(first['is_full'])
+        self.assertFalse(first['is_registration_open'])
+
+    def test_event_detail(self):
+        with self.assertQueryBudget(self.DETAIL_BUDGET, 'EventViewSet.retrieve'):
+            response = self.client.get(f'/api/events/{self.events[1].slug}/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['spots_remaining'], 3)
+
+
+class EventNearFilterTests(TestCase):
+    """?near= keeps events within the radius, nearest first."""
+
+    @classmethod
+    def setUpTestData(cls):
+        start = timezone.now() + timedelta(days=7)
+        places = {
+            'hoboken': ('40.744900', '-74.032400'),
+            'newark': ('40.735700', '-74.172400'),       # ~12 km from Hoboken
+            'philadelphia': ('39.952600', '-75.165200'),  # ~130 km
+            'unmapped': (None, None),
+        }
+        for index, (slug, (latitude, longitude)) in enumerate(places.items()):
+            Event.objects.create(
+                title=slug.title(), slug=slug, description='', event_type='practice',
+                start_datetime=start + timedelta(days=index), end_datetime=start + timedelta(days=index, hours=2),
+                location=slug.title(), latitude=latitude, longitude=longitude,
+            )
+
+    def setUp(self):
+        self.client = APIClient(HTTP_HOST='localhost')
+
+    def slugs(self, response):
+        return [event['slug'] for event in response.data['results']]
+
+    def test_orders_by_distance_within_radius(self):
+        response = self.client.get('/api/events/', {'near': '40.7357,-74.1724', 'radius_km': 20})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.slugs(response), ['newark', 'hoboken'])
+        self.assertEqual(response.data['results'][0]['distance_km'], 0)
+        self.assertAlmostEqual(response.data['results'][1]['distance_km'], 11.8, delta=0.3)
+
+    def test_default_radius(self):
+        response = self.client.get('/api/events/', {'near': '40.7449,-74.0324'})
+
+        self.assertEqual(self.slugs(response), ['hoboken', 'newark'])
+
+    def test_large_radius(self):
+        response = self.client.get('/api/events/', {'near': '40.7449,-74.0324', 'radius_km': 200})
+
+        self.assertEqual(self.slugs(response), ['hoboken', 'newark', 'philadelphia'])
+
+    def test_invalid_parameters(self):
+        for params in ({'near': 'hoboken'}, {'near': '95,10'}, {'near': '40,-74', 'radius_km': 0},
+                       {'near': '40,-74', 'radius_km': 'far'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get('/api/events/', params).status_code, 400)
+
+    def test_without_near_has_no_distance(self):
+        response = self.client.get('/api/events/')
+
+        self.assertEqual(len(response.data['results']), 4)
+        self.assertIsNone(response.data['results'][0]['distance_km'])
+
+
+EASTERN = ZoneInfo('America/New_York')
+
+
+@override_settings(CALENDAR_RECURRENCE_WINDOW_DAYS=30)
+class RecurringCalendarSyncTests(TestCase):
+    """Weekly practice starting a week ago, 17:00 Eastern."""
+
+    def setUp(self):
+        self.source = CalendarSource.objects.create(name='Master', ical_url='https://example.com/cal.ics')
+        self.first = datetime.combine(timezone.localdate() - timedelta(days=7), time(17), tzinfo=EASTERN)
+
+    def week(self, number):
+        return self.first + timedelta(weeks=number)
+
+    def ical(self, exdates=(), summary='Practice', override=True):
+        def stamp(value):
+            return value.strftime('%Y%m%dT%H%M%S')
+
+        lines = [
+            'BEGIN:VCALENDAR', 'VERSION:2.0', 'BEGIN:VEVENT', 'UID:practice@example.com',
+            f'DTSTART;TZID=America/New_York:{stamp(self.first)}',
+            f'DTEND;TZID=America/New_York:{stamp(self.first + timedelta(minutes=90))}',
+            f'RRULE:FREQ=WEEKLY;BYDAY={self.first.strftime("%a")[:2].upper()}',
+            f'SUMMARY:{summary}',
+        ]
+        if exdates:
+            lines.append('EXDATE;TZID=America/New_York:' + ','.join(stamp(self.week(n)) for n in exdates))
+        lines.append('END:VEVENT')
+        if override:
+            lines += [
+                'BEGIN:VEVENT', 'UID:practice@example.com',
+                f'RECURRENCE-ID;TZID=America/New_York:{stamp(self.week(3))}',
+                f'DTSTART;TZID=America/New_York:{stamp(self.week(3) + timedelta(hours=1))}',
+                f'DTEND;TZID=America/New_York:{stamp(self.week(3) + timedelta(hours=2))}',
+                'SUMMARY:Practice (moved)', 'END:VEVENT',
+            ]
+        lines.append('END:VCALENDAR')
+        return '\r\n'.join(lines)
+
+    def sync(self, ical):
+        with mock.patch('apps.events.services.calendar_sync.fetch_ical_feed', return_value=ical):
+            stats = sync_calendar_source(self.source)
+        self.assertEqual(stats['errors'], [])
+        return stats
+
+    def starts(self):
+        return list(self.source.events.order_by('start_datetime').values_list('start_datetime', flat=True))
+
+    def test_expands_within_window(self):
+        stats = self.sync(self.ical(exdates=[2]))
+
+        # Weeks 0-5 fall inside now + 30 days; week 2 is excluded and week 3 moved
+        self.assertEqual(stats['created'], 5)
+        self.assertEqual(self.starts(), [
+            self.week(0), self.week(1), self.week(3) + timedelta(hours=1), self.week(4), self.week(5),
+        ])
+        for start in self.starts():
+            self.assertIn(start.astimezone(EASTERN).hour, (17, 18))
+        moved = self.source.events.get(title='Practice (moved)')
+        self.assertEqual(moved.recurrence_id, self.week(3).astimezone(ZoneInfo('UTC')).strftime('%Y%m%dT%H%M%SZ'))
+        self.assertGreaterEqual(CalendarSeries.objects.get().expanded_until, self.week(5))
+
+    def test_unchanged_series_only_adds_new_occurrences(self):
+        self.sync(self.ical())
+
+        self.assertEqual(self.sync(self.ical())['created'], 0)
+
+        with override_settings(CALENDAR_RECURRENCE_WINDOW_DAYS=37):
+            stats = self.sync(self.ical())
+        self.assertEqual((stats['created'], stats['updated']), (1, 1))  # week 6; the moved occurrence re-syncs
+        self.assertEqual(self.starts()[-1], self.week(6))
+
+    def test_new_exdate_removes_occurrence(self):
+        self.sync(self.ical())
+
+        stats = self.sync(self.ical(exdates=[1]))
+
+        self.assertEqual(stats['deleted'], 1)
+        self.assertNotIn(self.week(1), self.starts())
+
+    def test_changed_series_keeps_local_edits(self):
+        self.sync(self.ical())
+        Event.objects.filter(start_datetime=self.week(1)).update(title='Film session', is_locally_modified=True)
+
+        stats = self.sync(self.ical(summary='Team practice'))
+
+        self.assertEqual(stats['skipped'], 1)
+        titles = set(self.source.events.values_list('title', flat=True))
+        self.assertEqual(titles, {'Film session', 'Team practice', 'Practice (moved)'})
+
+
+class EventCalendarTests(QueryBudgetMixin, TestCase):
+    """Events grouped by day for a month or week, with ETag revalidation."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user('parent', 'parent@example.com', 'pw')
+
+        def event(slug, day, hour=18, **fields):
+            start = timezone.make_aware(datetime(2025, 3, day, hour))
+            return Event.objects.create(
+                title=slug.title(), slug=slug, description='', event_type='practice', location='Gym',
+                start_datetime=start, end_datetime=start + timedelta(hours=2), **fields,
+            )
+
+        cls.practice = event('practice', 4, max_participants=2)
+        cls.late = event('late-game', 4, hour=23)  # 23:00 Eastern is the next day in UTC
+        cls.camp = event('camp', 12)
+        event('private', 12, is_public=False)
+        Event.objects.create(
+            title='April', slug='april', description='', event_type='camp', location='Gym',
+            start_datetime=timezone.make_aware(datetime(2025, 4, 1, 9)),
+            end_datetime=timezone.make_aware(datetime(2025, 4, 1, 11)),
+        )
+        for index, payment_status in enumerate(['completed', 'pending']):
+            EventRegistration.objects.create(
+                event=cls.practice, user=cls.user, participant_first_name='Kid', participant_last_name=str(index),
+                participant_email=f'kid{index}@example.com', participant_age=12, emergency_contact_name='Parent',
+                emergency_contact_phone='555-0100', payment_status=payment_status,
+            )
+
+    def setUp(self):
+        self.client = APIClient(HTTP_HOST='localhost')
+        self.url = '/api/events/calendar/'
+
+    def day(self, response, date_string):
+        return next(day for day in response.data['days'] if str(day['date']) == date_string)
+
+    def test_month(self):
+        with self.assertQueryBudget(2, 'EventViewSet.calendar'):  # ETag aggregate, events
+            response = self.client.get(self.url, {'month': '2025-03'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['days']), 31)
+        march_4 = self.day(response, '2025-03-04')['events']
+        self.assertEqual([event['slug'] for event in march_4], ['practice', 'late-game'])
+        self.assertEqual(march_4[0]['spots_remaining'], 1)
+        self.assertIsNone(march_4[0]['registration_status'])
+        self.assertEqual([event['slug'] for event in self.day(response, '2025-03-12')['events']], ['camp'])
+
+    def test_week_starts_on_sunday(self):
+        response = self.client.get(self.url, {'week': '2025-03-12', 'event_type': 'practice'})
+
+        self.assertEqual((str(response.data['start']), str(response.data['end'])), ('2025-03-09', '2025-03-15'))
+        self.assertEqual([event['slug'] for day in response.data['days'] for event in day['events']], ['camp'])
+
+    def test_registration_status_for_user(self):
+        self.client.force_authenticate(self.user)
+
+        response = self.client.get(self.url, {'month': '2025-03'})
+
+        march_4 = self.day(response, '2025-03-04')['events']
+        self.assertEqual(march_4[0]['registration_status'], 'registered')
+        self.assertEqual(march_4[0]['spots_remaining'], 1)
+        self.assertIsNone(march_4[1]['registration_status'])
+
+    def test_etag_revalidation(self):
+        etag = self.client.get(self.url, {'month': '2025-03'})['ETag']
+
+        with self.assertQueryBudget(1, 'EventViewSet.calendar (304)'):
+            response = self.client.get(self.url, {'month': '2025-03'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        EventRegistration.objects.filter(event=self.practice, payment_status='pending').update(
+            payment_status='completed', updated_at=timezone.now() + timedelta(seconds=1),
+        )
+        response = self.client.get(self.url, {'month': '2025-03'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_invalid_month(self):
+        self.assertEqual(self.client.get(self.url, {'month': 'March'}).status_code, 400)
+
+    def test_ranges_past_the_last_date_are_rejected(self):
+        for params in ({'month': '9999-12'}, {'week': '9999-12-31'}, {'week': '0001-01-01'}):
+            with self.subTest(**params):
+                response = self.client.get(self.url, params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(next(iter(params)), response.data)
+
+
+@override_settings(STORAGES={'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}})
+class AdminChangelistQueryTests(QueryBudgetMixin, TestCase):
+    """Changelist columns are annotated or joined, not queried per row."""
+
+    # session, user, filtered count, total count, page, calendar source filter
+    # choices; the event list's date hierarchy adds two
+    CHANGELIST_BUDGET = 6
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'pw')
+        start = timezone.now() + timedelta(days=1)
+        sources = [
+            CalendarSource.objects.create(name=f'Calendar {index}', ical_url=f'https://example.com/{index}.ics')
+            for index in range(10)
+        ]
+        Event.objects.bulk_create([
+            Event(
+                title=f'Practice {index}', slug=f'practice-{index}', description='', event_type='practice',
+                start_datetime=start + timedelta(hours=index), end_datetime=start + timedelta(hours=index + 1),
+                location='Gym', calendar_source=sources[index % 10], external_uid=f'uid-{index}',
+            )
+            for index in range(50)
+        ])
+
+    def setUp(self):
+        self.client.force_login(self.admin_user)
+
+    def test_event_changelist(self):
+        with self.assertQueryBudget(self.CHANGELIST_BUDGET + 2, 'EventAdmin changelist'):
+            response = self.client.get('/django-admin/events/event/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Calendar 3')
+
+    def test_calendar_source_changelist(self):
+        with self.assertQueryBudget(self.CHANGELIST_BUDGET, 'CalendarSourceAdmin changelist'):
+            response = self.client.get('/django-admin/events/calendarsource/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({source.event_total for source in response.context['cl'].result_list}, {5})
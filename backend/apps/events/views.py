@@ -1,7 +1,50 @@
-from rest_framework import viewsets, filters
+import hashlib
+from datetime import date, datetime, time, timedelta
+
+from rest_framework import viewsets, filters, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from .filters import NearFilter
 from .models import Event
-from .serializers import EventSerializer
+from .serializers import CalendarEventSerializer, EventSerializer
+
+
+# Registration count behind spots_remaining/is_full, annotated instead of counted per event
+COMPLETED_REGISTRATIONS = Count('registrations', filter=Q(registrations__payment_status='completed'))
+
+
+def calendar_range(params) -> tuple:
+    """
+    (view, first day, day after the last) for ?month=YYYY-MM or
+    ?week=YYYY-MM-DD (the Sunday-Saturday week containing that day).
+    Defaults to the current month.
+    """
+    if params.get('week'):
+        try:
+            day = date.fromisoformat(params['week'])
+            start = day - timedelta(days=(day.weekday() + 1) % 7)
+            return 'week', start, start + timedelta(days=7)
+        except (ValueError, OverflowError):
+            # OverflowError: a week running past the first or last day there is
+            raise ValidationError({'week': 'Expected a date, e.g. week=2025-03-12.'})
+
+    month = params.get('month')
+    try:
+        if month:
+            start = datetime.strptime(month, '%Y-%m').date()
+        else:
+            start = timezone.localdate().replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1)
+    except (ValueError, OverflowError):
+        # OverflowError: month=9999-12 ends past the last day there is
+        raise ValidationError({'month': 'Expected a month, e.g. month=2025-03.'})
+    return 'month', start, end
 
 
 class EventViewSet(viewsets.ReadOnlyModelViewSet):
@@ -9,13 +52,76 @@ class EventViewSet(viewsets.ReadOnlyModelViewSet):
     API endpoint for events.
 
     List all events or retrieve a single event.
-    Supports filtering by event_type and searching by title/description.
+    Supports filtering by event_type, searching by title/description and
+    distance filtering with ?near=lat,lng&radius_km= (nearest first).
     """
-    queryset = Event.objects.filter(is_public=True)
+    queryset = Event.objects.filter(is_public=True).annotate(
+        completed_registrations=COMPLETED_REGISTRATIONS,
+    )
     serializer_class = EventSerializer
     lookup_field = 'slug'
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter, NearFilter]
     filterset_fields = ['event_type', 'registration_open']
     search_fields = ['title', 'description', 'location']
     ordering_fields = ['start_datetime', 'created_at', 'price']
     ordering = ['start_datetime']
+
+    @action(detail=False, methods=['get'])
+    def calendar(self, request):
+        """
+        Public events grouped by day for a month (?month=YYYY-MM) or week
+        (?week=YYYY-MM-DD). Accepts the list filters, e.g. ?event_type=.
+
+        One range query on (is_public, start_datetime) loads the events with
+        their registration counts and the user's own registration status.
+        The ETag covers the range's latest event and registration changes,
+        so If-None-Match revalidation costs one aggregate query.
+        """
+        view, first_day, end_day = calendar_range(request.query_params)
+        start = timezone.make_aware(datetime.combine(first_day, time.min))
+        end = timezone.make_aware(datetime.combine(end_day, time.min))
+
+        events = self.filter_queryset(Event.objects.filter(is_public=True)).filter(
+            start_datetime__gte=start, start_datetime__lt=end,
+        )
+
+        versions = events.order_by().aggregate(
+            event_count=Count('pk', distinct=True),
+            event_updated=Max('updated_at'),
+            registration_count=Count('registrations'),
+            registration_updated=Max('registrations__updated_at'),
+        )
+        user_id = request.user.pk if request.user.is_authenticated else None
+        signature = f"{request.get_full_path()}:{user_id}:{sorted(versions.items())}"
+        etag = '"%s"' % hashlib.md5(signature.encode()).hexdigest()
+
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match and etag in parse_etags(if_none_match):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+            patch_vary_headers(response, ['Authorization'])
+            return response
+
+        annotations = {'completed_registrations': COMPLETED_REGISTRATIONS}
+        if user_id:
+            mine = Q(registrations__user_id=user_id)
+            annotations['my_completed'] = Count(
+                'registrations', filter=mine & Q(registrations__payment_status='completed')
+            )
+            annotations['my_pending'] = Count(
+                'registrations', filter=mine & Q(registrations__payment_status='pending')
+            )
+        events = events.annotate(**annotations)
+
+        days = {first_day + timedelta(days=offset): [] for offset in range((end_day - first_day).days)}
+        events = list(events.order_by('start_datetime'))
+        for event, data in zip(events, CalendarEventSerializer(events, many=True).data):
+            days[timezone.localdate(event.start_datetime)].append(data)
+
+        response = Response({
+            'view': view,
+            'start': first_day,
+            'end': end_day - timedelta(days=1),
+            'days': [{'date': day, 'events': day_events} for day, day_events in days.items()],
+        }, headers={'ETag': etag})
+        patch_vary_headers(response, ['Authorization'])
+        return response
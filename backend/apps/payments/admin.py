@@ -1,10 +1,53 @@
+from decimal import Decimal
 from django.contrib import admin
+from django.http import HttpResponseRedirect
+from django.urls import reverse
 from django.utils.html import format_html
 from django import forms
 from django.db import models
 from django.forms.models import BaseInlineFormSet
-from .models import SubscriptionPlan, Subscription, Payment, Product, ProductImage, ProductVariant, Order, OrderItem, Bag, BagItem
+from .models import SubscriptionPlan, Subscription, Payment, Product, ProductImage, ProductVariant, Order, OrderItem, Bag, BagItem, PrintifyWebhookEvent, PrintifyOrderSync, StockReservation
 from django.core.exceptions import ValidationError
+from django.db.models import Case, Count, DecimalField, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, NullIf
+from apps.core.jobs import enqueue
+
+
+def count_of(queryset, field: str):
+    """
+    Per-row count of related rows as a correlated subquery.
+
+    Unlike Count() over a join, several of these don't multiply each other's
+    rows, and the changelist's pagination COUNT drops them.
+    """
+    counts = (
+        queryset.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(count=Count('pk'))
+        .values('count')
+    )
+    return Coalesce(Subquery(counts), 0)
+
+
+def bag_item_unit_price():
+    """BagItem.unit_price as a SQL expression, for a BagItem queryset"""
+    variant_price = ProductVariant.objects.filter(
+        product=OuterRef('product'),
+        size=Coalesce(OuterRef('selected_size'), Value('')),
+        color=Coalesce(OuterRef('selected_color'), Value('')),
+        is_enabled=True,
+    ).values('price')[:1]
+
+    no_selection = (
+        (Q(selected_size__isnull=True) | Q(selected_size=''))
+        & (Q(selected_color__isnull=True) | Q(selected_color=''))
+    )
+    return Case(
+        When(no_selection, then=F('product__price')),
+        # A variant without its own price falls back to the product's
+        default=Coalesce(NullIf(Subquery(variant_price), Value(Decimal('0'))), F('product__price')),
+    )
 
 
 class MultipleFileInput(forms.ClearableFileInput):
@@ -309,21 +352,31 @@ class ProductAdmin(admin.ModelAdmin):
     stock_display.short_description = "Stock"
     stock_display.admin_order_field = "stock_quantity"
 
+    def get_queryset(self, request):
+        # Counts for the changelist columns, computed by the page query itself
+        return super().get_queryset(request).annotate(
+            variant_total=count_of(ProductVariant.objects.all(), 'product'),
+            variant_enabled=count_of(ProductVariant.objects.filter(is_enabled=True), 'product'),
+            image_total=count_of(ProductImage.objects.all(), 'product'),
+        )
+
     def image_count(self, obj):
-        count = obj.images.count()
+        count = obj.image_total
         return count if count > 0 else '-'
     image_count.short_description = "Images"
+    image_count.admin_order_field = "image_total"
 
     def variant_count(self, obj):
         """Display variant count with enabled/total breakdown"""
-        enabled = obj.variants.filter(is_enabled=True).count()
-        total = obj.variants.count()
+        enabled = obj.variant_enabled
+        total = obj.variant_total
         if total == 0:
             return '-'
         if enabled == total:
             return format_html('<span style="color: #059669;">{}</span>', total)
         return format_html('<span>{}/{}</span>', enabled, total)
     variant_count.short_description = "Variants"
+    variant_count.admin_order_field = "variant_total"
 
     def stripe_status(self, obj):
         """Display Stripe sync status"""
@@ -336,69 +389,21 @@ class ProductAdmin(admin.ModelAdmin):
         return format_html('<span style="color: #9ca3af;">—</span>')
     stripe_status.short_description = "Stripe"
 
+    def _enqueue_sync(self, request, queryset, job_name):
+        """Queue a sync job for the selected products and show its progress"""
+        product_ids = list(queryset.values_list('pk', flat=True))
+        job = enqueue(job_name, {'product_ids': product_ids}, created_by=request.user, total=len(product_ids))
+        return HttpResponseRedirect(reverse('admin:core_job_progress', args=[job.pk]))
+
     @admin.action(description="Sync selected products to Stripe")
     def sync_to_stripe(self, request, queryset):
-        """Manually sync selected products to Stripe"""
-        synced = 0
-        skipped = 0
-        errors = []
-
-        for product in queryset:
-            if product.is_pod:
-                skipped += 1
-                continue
-            try:
-                product._sync_to_stripe()
-                product.save(update_fields=['stripe_product_id', 'stripe_price_id'])
-                synced += 1
-            except Exception as e:
-                errors.append(f"{product.name}: {str(e)[:50]}")
-
-        if synced:
-            self.message_user(request, f"Synced {synced} product(s) to Stripe")
-        if skipped:
-            self.message_user(request, f"Skipped {skipped} POD product(s)", level='warning')
-        if errors:
-            self.message_user(request, f"Errors: {'; '.join(errors[:3])}", level='error')
+        """Sync selected products to Stripe in the background"""
+        return self._enqueue_sync(request, queryset, 'payments.sync_to_stripe')
 
     @admin.action(description="Sync variants from Printify")
     def sync_variants_from_printify(self, request, queryset):
-        """Admin action to sync variants from Printify for selected POD products"""
-        from .services import sync_product_variants
-
-        synced = 0
-        skipped = 0
-        errors = []
-
-        for product in queryset:
-            if not product.is_pod:
-                skipped += 1
-                continue
-            if not product.printify_product_id:
-                errors.append(f"{product.name}: No Printify product ID")
-                continue
-
-            stats = sync_product_variants(product)
-            if stats['errors']:
-                errors.extend([f"{product.name}: {e}" for e in stats['errors']])
-            else:
-                synced += 1
-
-        # Build result message
-        messages = []
-        if synced:
-            messages.append(f"Synced variants for {synced} product(s)")
-        if skipped:
-            messages.append(f"Skipped {skipped} non-POD product(s)")
-        if errors:
-            messages.append(f"Errors: {'; '.join(errors[:3])}")  # Show first 3 errors
-
-        if synced and not errors:
-            self.message_user(request, ". ".join(messages))
-        elif errors:
-            self.message_user(request, ". ".join(messages), level='warning')
-        else:
-            self.message_user(request, "No POD products with Printify IDs to sync", level='warning')
+        """Sync variants from Printify for selected POD products in the background"""
+        return self._enqueue_sync(request, queryset, 'payments.sync_printify_variants')
 
     def save_model(self, request, obj, form, change):
         """Save the product first, then handle bulk image uploads"""
@@ -451,9 +456,56 @@ class BagAdmin(admin.ModelAdmin):
     search_fields = ['user__email', 'session_key']
     readonly_fields = ['created_at', 'updated_at', 'item_count', 'subtotal']
     inlines = [BagItemInline]
+    list_select_related = ['user']
+
+    def get_queryset(self, request):
+        # Totals for the changelist columns, computed by the page query itself
+        lines = BagItem.objects.filter(bag=OuterRef('pk')).order_by().values('bag')
+        item_totals = lines.annotate(total=Sum('quantity')).values('total')
+        subtotals = lines.annotate(
+            total=Sum(F('quantity') * bag_item_unit_price(), output_field=DecimalField(max_digits=10, decimal_places=2))
+        ).values('total')
+        return super().get_queryset(request).annotate(
+            item_total=Coalesce(Subquery(item_totals), 0),
+            subtotal_amount=Coalesce(Subquery(subtotals), Value(0), output_field=DecimalField(max_digits=10, decimal_places=2)),
+        )
+
+    def item_count(self, obj):
+        return obj.item_total
+    item_count.short_description = "Item count"
+    item_count.admin_order_field = "item_total"
+
+    def subtotal(self, obj):
+        return obj.subtotal_amount
+    subtotal.short_description = "Subtotal"
+    subtotal.admin_order_field = "subtotal_amount"
 
     def session_key_short(self, obj):
         if obj.session_key:
             return f"{obj.session_key[:8]}..."
         return "-"
     session_key_short.short_description = "Session Key"
+
+
+@admin.register(PrintifyWebhookEvent)
+class PrintifyWebhookEventAdmin(admin.ModelAdmin):
+    list_display = ['event_type', 'resource_id', 'status', 'attempts', 'received_at', 'next_attempt_at', 'processed_at']
+    list_filter = ['status', 'event_type']
+    search_fields = ['resource_id']
+    readonly_fields = ['event_type', 'resource_id', 'payload', 'received_at', 'next_attempt_at', 'processed_at', 'error']
+    date_hierarchy = 'received_at'
+
+
+@admin.register(PrintifyOrderSync)
+class PrintifyOrderSyncAdmin(admin.ModelAdmin):
+    list_display = ['shop_id', 'last_synced_at', 'last_sync_count', 'sync_error']
+    readonly_fields = ['created_at', 'updated_at']
+
+
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    list_display = ['product', 'quantity', 'status', 'stripe_session_id', 'expires_at', 'created_at']
+    list_filter = ['status']
+    search_fields = ['product__name', 'stripe_session_id', 'hold_id']
+    readonly_fields = ['hold_id', 'product', 'quantity', 'stripe_session_id', 'created_at', 'updated_at']
+    list_select_related = ['product']
@@ -5,3 +5,6 @@ class PaymentsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     # Use full dotted path so Django can discover the app correctly
     name = "apps.payments"
+
+    def ready(self):
+        import apps.payments.signals  # noqa
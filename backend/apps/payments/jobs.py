@@ -0,0 +1,59 @@
+"""
+Background jobs for the product admin's sync actions.
+
+Both make a blocking API call per product, too slow to run inside an admin
+request for more than a handful of products. Per-product failures are
+collected in the job's result; anything else fails the attempt and the job
+is retried (syncing again is harmless).
+"""
+
+from apps.core.jobs import register
+from .models import Product
+from .services import sync_product_variants
+
+
+@register('payments.sync_to_stripe')
+def sync_to_stripe(job, product_ids):
+    """Create or update the Stripe product and price of each local product"""
+    products = list(Product.objects.filter(pk__in=product_ids).order_by('name'))
+    synced = 0
+    skipped = 0
+    errors = []
+
+    for done, product in enumerate(products, 1):
+        if product.is_pod:
+            skipped += 1
+        else:
+            try:
+                product._sync_to_stripe()
+                product.save(update_fields=['stripe_product_id', 'stripe_price_id'])
+                synced += 1
+            except Exception as e:
+                errors.append(f"{product.name}: {str(e)[:100]}")
+        job.progress(done, len(products), product.name)
+
+    return {'synced': synced, 'skipped': skipped, 'errors': errors}
+
+
+@register('payments.sync_printify_variants')
+def sync_printify_variants(job, product_ids):
+    """Sync variants and images of each POD product from Printify"""
+    products = list(Product.objects.filter(pk__in=product_ids).order_by('name'))
+    synced = 0
+    skipped = 0
+    errors = []
+
+    for done, product in enumerate(products, 1):
+        if not product.is_pod:
+            skipped += 1
+        elif not product.printify_product_id:
+            errors.append(f"{product.name}: No Printify product ID")
+        else:
+            stats = sync_product_variants(product)
+            if stats['errors']:
+                errors.extend(f"{product.name}: {error}" for error in stats['errors'])
+            else:
+                synced += 1
+        job.progress(done, len(products), product.name)
+
+    return {'synced': synced, 'skipped': skipped, 'errors': errors}
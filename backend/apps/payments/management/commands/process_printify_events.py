@@ -0,0 +1,85 @@
+"""
+Management command to process queued Printify product webhooks.
+
+The Printify webhook only records product:publish:started and product:deleted
+events. This worker waits until a product has had no new events for the
+debounce window, then syncs it once using its latest event.
+
+Usage:
+    # Process everything that is ready and exit (e.g. from cron)
+    python manage.py process_printify_events
+
+    # Run continuously, polling every 10 seconds
+    python manage.py process_printify_events --loop --interval 10
+
+    # Override the debounce window (default: PRINTIFY_WEBHOOK_DEBOUNCE_SECONDS)
+    python manage.py process_printify_events --debounce 0
+"""
+
+import time
+from django.core.management.base import BaseCommand
+from apps.payments.services import process_product_events
+
+
+class Command(BaseCommand):
+    help = 'Process queued Printify product webhook events'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for new events instead of exiting after one pass',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=10,
+            help='Seconds between passes with --loop (default: 10)',
+        )
+        parser.add_argument(
+            '--debounce',
+            type=int,
+            default=None,
+            help='Seconds a product must be quiet before it is synced',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=100,
+            help='Maximum number of products to sync per pass (default: 100)',
+        )
+
+    def handle(self, *args, **options):
+        if not options['loop']:
+            self.run_pass(options)
+            return
+
+        self.stdout.write(f"Polling for Printify events every {options['interval']}s (Ctrl+C to stop)...")
+        try:
+            while True:
+                stats = self.run_pass(options, quiet=True)
+                # Keep draining without sleeping while a full batch was handled
+                if stats['products'] < options['limit']:
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Stopped.')
+
+    def run_pass(self, options, quiet=False) -> dict:
+        stats = process_product_events(
+            debounce_seconds=options['debounce'],
+            limit=options['limit'],
+        )
+
+        if not stats['products']:
+            if not quiet:
+                self.stdout.write(self.style.WARNING('No Printify events ready to process.'))
+            return stats
+
+        message = (
+            f"Products: {stats['products']}, Synced: {stats['synced']}, "
+            f"Deactivated: {stats['deactivated']}, Superseded events: {stats['superseded']}"
+        )
+        self.stdout.write(self.style.SUCCESS(message))
+        if stats['failed']:
+            self.stdout.write(self.style.ERROR(f"Failed permanently: {stats['failed']}"))
+        return stats
@@ -0,0 +1,70 @@
+"""
+Management command to reconcile order status with Printify.
+
+Pages through Printify's order list for each status that changes a local
+order (in production, fulfilled, canceled) and applies missed status and
+tracking updates. Meant to run on a schedule, e.g. every 30 minutes:
+
+    */30 * * * * python manage.py reconcile_printify_orders
+
+Usage:
+    # Apply Printify orders with activity since the last run
+    python manage.py reconcile_printify_orders
+
+    # Ignore the checkpoint and re-check every open order
+    python manage.py reconcile_printify_orders --full
+
+    # Show what would change without saving
+    python manage.py reconcile_printify_orders --dry-run
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from apps.payments.services import reconcile_orders, PrintifyError
+
+
+class Command(BaseCommand):
+    help = 'Reconcile local order status and tracking with Printify'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Ignore the last checkpoint and re-check all open orders',
+        )
+        parser.add_argument(
+            '--page-size',
+            type=int,
+            default=10,
+            help='Orders requested per Printify page (default: 10, the API maximum)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show changes without saving them',
+        )
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Dry run - not saving to database.'))
+
+        try:
+            stats = reconcile_orders(
+                full=options['full'],
+                dry_run=options['dry_run'],
+                page_size=options['page_size'],
+            )
+        except PrintifyError as e:
+            raise CommandError(f'Printify reconciliation failed: {e}')
+
+        if stats['since']:
+            self.stdout.write(f"Checked Printify activity since {stats['since'].isoformat()}")
+
+        for order_number, new_status in stats['changes'].items():
+            self.stdout.write(f'  {order_number} -> {new_status}')
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Reconciliation complete! Pages: {stats['pages']}, Orders seen: {stats['seen']}, "
+                f"Matched: {stats['matched']}, Updated: {stats['updated']}"
+            )
+        )
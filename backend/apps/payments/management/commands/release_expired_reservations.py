@@ -0,0 +1,28 @@
+"""
+Management command to release expired stock reservations.
+
+Checkouts hold stock for local products until Stripe reports the checkout
+completed or expired. This sweeper returns the stock of holds whose checkout
+expired without a webhook reaching us. Run it on a schedule, e.g.:
+
+    */10 * * * * python manage.py release_expired_reservations
+
+Usage:
+    python manage.py release_expired_reservations
+"""
+
+from django.core.management.base import BaseCommand
+from apps.payments.services import release_expired_holds
+
+
+class Command(BaseCommand):
+    help = 'Return stock held by expired checkouts'
+
+    def handle(self, *args, **options):
+        released = release_expired_holds()
+
+        if not released:
+            self.stdout.write('No expired stock reservations.')
+            return
+
+        self.stdout.write(self.style.SUCCESS(f'Released {released} expired stock reservations.'))
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.1 on 2026-10-19 02:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0017_add_handoff_tracking'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrintifyWebhookEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(max_length=50)),
+                ('resource_id', models.CharField(help_text='Printify product ID the event refers to', max_length=100)),
+                ('payload', models.JSONField(blank=True, default=dict)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processed', 'Processed'), ('superseded', 'Superseded'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Printify Webhook Event',
+                'verbose_name_plural': 'Printify Webhook Events',
+                'ordering': ['received_at'],
+                'indexes': [models.Index(fields=['status', 'received_at'], name='payments_pr_status_a6cf02_idx'), models.Index(fields=['resource_id', 'status'], name='payments_pr_resourc_7e2788_idx')],
+            },
+        ),
+    ]
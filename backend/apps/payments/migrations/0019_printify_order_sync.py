@@ -0,0 +1,35 @@
+# Generated by Django 5.0.1 on 2026-10-19 02:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0018_printify_webhook_event'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrintifyOrderSync',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shop_id', models.CharField(max_length=100, unique=True)),
+                ('last_synced_at', models.DateTimeField(blank=True, help_text='Start time of the last successful reconciliation', null=True)),
+                ('last_sync_count', models.IntegerField(default=0, help_text='Number of orders updated by the last reconciliation')),
+                ('sync_error', models.TextField(blank=True, help_text='Last reconciliation error message (if any)')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Printify Order Sync',
+                'verbose_name_plural': 'Printify Order Sync',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['printify_order_id'], name='payments_or_printif_b0bc63_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.1 on 2026-10-19 03:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0020_stock_reservation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(fields=['fulfillment_type', 'handoff_status', 'order'], name='orderitem_handoff_queue_idx'),
+        ),
+    ]
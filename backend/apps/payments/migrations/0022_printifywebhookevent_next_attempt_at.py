@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-19 04:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0021_orderitem_handoff_queue_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='printifywebhookevent',
+            name='next_attempt_at',
+            field=models.DateTimeField(blank=True, help_text='Not processed before this time (claimed by a worker, or waiting to retry)', null=True),
+        ),
+    ]
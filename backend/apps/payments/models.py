@@ -389,12 +389,13 @@ class Product(models.Model):
     @property
     def primary_image_url(self):
         """Get the primary image URL (from carousel images or legacy image_url)"""
-        primary = self.images.filter(is_primary=True).first()
+        # One pass over images.all() so prefetched images need no query
+        images = list(self.images.all())
+        primary = next((image for image in images if image.is_primary), None)
         if primary:
             return primary.url  # Uses the url property which handles both upload and URL
-        first_image = self.images.first()
-        if first_image:
-            return first_image.url
+        if images:
+            return images[0].url
         return self.image_url or None
 
 
@@ -651,6 +652,7 @@ class Order(models.Model):
         indexes = [
             models.Index(fields=['user', 'status']),
             models.Index(fields=['order_number']),
+            models.Index(fields=['printify_order_id']),
         ]
 
     def save(self, *args, **kwargs):
@@ -728,6 +730,13 @@ class OrderItem(models.Model):
 
     class Meta:
         ordering = ['id']
+        indexes = [
+            # Handoff queue: local items by handoff status, joined to their order
+            models.Index(
+                fields=['fulfillment_type', 'handoff_status', 'order'],
+                name='orderitem_handoff_queue_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.quantity}x {self.product_name}"
@@ -883,11 +892,13 @@ class BagItem(models.Model):
         """Get the correct price for this item (variant price or base product price)"""
         # Look up variant by size/color if selected
         if self.selected_size or self.selected_color:
-            variant = self.product.variants.filter(
-                size=self.selected_size or '',
-                color=self.selected_color or '',
-                is_enabled=True
-            ).first()
+            # Matched in Python so prefetched product variants need no query
+            variant = next((
+                v for v in self.product.variants.all()
+                if v.size == (self.selected_size or '')
+                and v.color == (self.selected_color or '')
+                and v.is_enabled
+            ), None)
             if variant and variant.price:
                 return variant.price
         # Fall back to product base price
@@ -909,3 +920,121 @@ class BagItem(models.Model):
         # Update bag's updated_at timestamp
         super().save(*args, **kwargs)
         Bag.objects.filter(pk=self.bag_id).update(updated_at=timezone.now())
+
+
+class StockReservation(models.Model):
+    """
+    Stock held for a local product while its Stripe checkout is open.
+
+    The stock is decremented when the hold is placed. The hold is committed
+    when the checkout completes, or released (stock returned) when the
+    checkout expires. One checkout has one hold_id, shared by a reservation
+    row per product.
+    """
+
+    STATUS_CHOICES = [
+        ('held', 'Held'),
+        ('committed', 'Committed'),
+        ('released', 'Released'),
+    ]
+
+    hold_id = models.UUIDField(db_index=True)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reservations')
+    quantity = models.PositiveIntegerField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='held')
+    stripe_session_id = models.CharField(max_length=255, blank=True)
+
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Stock Reservation'
+        verbose_name_plural = 'Stock Reservations'
+        indexes = [
+            models.Index(fields=['status', 'expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product.name} ({self.status})"
+
+
+class PrintifyWebhookEvent(models.Model):
+    """
+    Printify product webhook recorded for background processing.
+
+    The webhook view only stores the event; `process_printify_events` later
+    collapses repeated events for the same product and syncs it once.
+    """
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processed', 'Processed'),
+        ('superseded', 'Superseded'),
+        ('failed', 'Failed'),
+    ]
+
+    event_type = models.CharField(max_length=50)
+    resource_id = models.CharField(
+        max_length=100,
+        help_text="Printify product ID the event refers to"
+    )
+    payload = models.JSONField(default=dict, blank=True)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Not processed before this time (claimed by a worker, or waiting to retry)"
+    )
+
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['received_at']
+        verbose_name = 'Printify Webhook Event'
+        verbose_name_plural = 'Printify Webhook Events'
+        indexes = [
+            models.Index(fields=['status', 'received_at']),
+            models.Index(fields=['resource_id', 'status']),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} {self.resource_id} ({self.status})"
+
+
+class PrintifyOrderSync(models.Model):
+    """
+    Checkpoint for the Printify order-status reconciler.
+
+    `reconcile_printify_orders` only applies Printify orders with activity
+    after `last_synced_at`, then advances it when the run succeeds.
+    """
+
+    shop_id = models.CharField(max_length=100, unique=True)
+    last_synced_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Start time of the last successful reconciliation"
+    )
+    last_sync_count = models.IntegerField(
+        default=0,
+        help_text="Number of orders updated by the last reconciliation"
+    )
+    sync_error = models.TextField(
+        blank=True,
+        help_text="Last reconciliation error message (if any)"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Printify Order Sync'
+        verbose_name_plural = 'Printify Order Sync'
+
+    def __str__(self):
+        return f"Printify order sync for shop {self.shop_id}"
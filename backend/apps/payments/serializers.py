@@ -1,6 +1,11 @@
 from rest_framework import serializers
 from .models import Product, ProductImage, ProductVariant, SubscriptionPlan, Bag, BagItem, Order, OrderItem
 
+# Relations the serializers below read through .all(); prefetch them to
+# avoid a query per product / order item
+PRODUCT_PREFETCH = ['images', 'variants']
+ORDER_PREFETCH = ['items__product__images']
+
 
 class ProductImageSerializer(serializers.ModelSerializer):
     """Serializer for ProductImage model"""
@@ -56,7 +61,13 @@ class ProductVariantSerializer(serializers.ModelSerializer):
 
 
 class ProductSerializer(serializers.ModelSerializer):
-    """Serializer for Product model with fulfillment type support"""
+    """
+    Serializer for Product model with fulfillment type support.
+
+    Variants and images are read through .all(), so querysets should
+    prefetch PRODUCT_PREFETCH to serialize any number of products in a
+    constant number of queries.
+    """
 
     in_stock = serializers.ReadOnlyField()
     is_pod = serializers.ReadOnlyField()
@@ -70,36 +81,31 @@ class ProductSerializer(serializers.ModelSerializer):
     available_sizes = serializers.SerializerMethodField()
     available_colors = serializers.SerializerMethodField()
 
+    def _available_variants(self, obj):
+        """Enabled and available variants, in the model's sort order"""
+        return [v for v in obj.variants.all() if v.is_enabled and v.is_available]
+
     def get_variants(self, obj):
         """Serialize enabled and available variants"""
-        variants = obj.variants.filter(is_enabled=True, is_available=True)
-        return ProductVariantSerializer(variants, many=True).data
+        return ProductVariantSerializer(self._available_variants(obj), many=True).data
 
     def get_available_sizes(self, obj):
         """Get unique available sizes for this product"""
-        sizes = obj.variants.filter(
-            is_enabled=True, is_available=True
-        ).exclude(size='').values_list('size', flat=True).distinct()
         # Preserve order from sort_order rather than alphabetical
-        ordered_sizes = obj.variants.filter(
-            is_enabled=True, is_available=True, size__in=sizes
-        ).order_by('sort_order').values_list('size', flat=True)
+        ordered_sizes = [v.size for v in self._available_variants(obj) if v.size]
         # Remove duplicates while preserving order
         seen = set()
         return [s for s in ordered_sizes if not (s in seen or seen.add(s))]
 
     def get_available_colors(self, obj):
         """Get unique available colors with hex codes"""
-        colors = obj.variants.filter(
-            is_enabled=True, is_available=True
-        ).exclude(color='').values('color', 'color_hex')
         # Deduplicate by color name (keep first occurrence)
         seen = set()
         unique_colors = []
-        for c in colors:
-            if c['color'] not in seen:
-                seen.add(c['color'])
-                unique_colors.append({'name': c['color'], 'hex': c['color_hex']})
+        for v in self._available_variants(obj):
+            if v.color and v.color not in seen:
+                seen.add(v.color)
+                unique_colors.append({'name': v.color, 'hex': v.color_hex})
         return unique_colors
 
     def get_images(self, obj):
@@ -115,8 +121,9 @@ class ProductSerializer(serializers.ModelSerializer):
     def get_primary_image_url(self, obj):
         """Get the primary image URL with absolute URL for uploaded files"""
         request = self.context.get('request')
-        primary = obj.images.filter(is_primary=True).first()
-        image_obj = primary or obj.images.first()
+        images = list(obj.images.all())
+        primary = next((image for image in images if image.is_primary), None)
+        image_obj = primary or (images[0] if images else None)
 
         if image_obj:
             if image_obj.image:
@@ -334,7 +341,7 @@ class OrderItemSerializer(serializers.ModelSerializer):
 
 
 class OrderSerializer(serializers.ModelSerializer):
-    """Serializer for Order model with tracking support"""
+    """Serializer for Order model with tracking support (prefetch ORDER_PREFETCH)"""
 
     items = OrderItemSerializer(many=True, read_only=True)
     status_display = serializers.SerializerMethodField()
@@ -388,11 +395,11 @@ class OrderSerializer(serializers.ModelSerializer):
 
     def get_has_pod_items(self, obj):
         """Check if order contains POD items"""
-        return obj.items.filter(product__fulfillment_type='pod').exists()
+        return any(item.product and item.product.is_pod for item in obj.items.all())
 
     def get_has_local_items(self, obj):
         """Check if order contains local delivery items"""
-        return obj.items.filter(product__fulfillment_type='local').exists()
+        return any(item.product and item.product.is_local for item in obj.items.all())
 
 
 class HandoffItemSerializer(serializers.ModelSerializer):
@@ -441,3 +448,14 @@ class HandoffUpdateSerializer(serializers.Serializer):
         allow_blank=True,
         help_text="Optional notes about the handoff"
     )
+
+
+class HandoffBulkUpdateSerializer(HandoffUpdateSerializer):
+    """Serializer for updating the handoff status of many items at once"""
+
+    item_ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        min_length=1,
+        max_length=500,
+        help_text="IDs of the local order items to update"
+    )
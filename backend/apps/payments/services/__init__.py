@@ -1,6 +1,10 @@
 # Payments services
 from .printify_client import PrintifyClient, PrintifyError, get_printify_client
 from .printify_sync import sync_product_variants, sync_all_pod_variants
+from .printify_events import record_product_event, process_product_events
+from .printify_orders import reconcile_orders
+from .inventory import InsufficientStock, reserve_stock, release_hold, release_expired_holds
+from .handoffs import publish_handoff
 
 __all__ = [
     'PrintifyClient',
@@ -8,4 +12,12 @@ __all__ = [
     'get_printify_client',
     'sync_product_variants',
     'sync_all_pod_variants',
+    'record_product_event',
+    'process_product_events',
+    'reconcile_orders',
+    'InsufficientStock',
+    'reserve_stock',
+    'release_hold',
+    'release_expired_holds',
+    'publish_handoff',
 ]
@@ -0,0 +1,20 @@
+"""
+Live updates for local-delivery handoffs.
+
+Status changes are pushed to the staff handoff screens and to the
+customer's dashboard (see apps/core/live.py).
+"""
+
+from apps.core.live import HANDOFFS_TOPIC, guardian_topic, publish
+from ..models import OrderItem
+
+
+def publish_handoff(item: OrderItem) -> None:
+    """Push an item's handoff status; expects item.order to be loaded."""
+    publish('handoff', [HANDOFFS_TOPIC, guardian_topic(item.order.user_id)], {
+        'id': item.pk,
+        'order_number': item.order.order_number,
+        'product_name': item.product_name,
+        'handoff_status': item.handoff_status,
+        'handoff_completed_at': item.handoff_completed_at,
+    })
@@ -0,0 +1,195 @@
+"""
+Inventory Reservation Service
+
+Local products with managed inventory are reserved when a Stripe checkout is
+created, so two shoppers can never pay for the same last item.
+
+Reserving is a single conditional UPDATE per product:
+
+    UPDATE product SET stock_quantity = stock_quantity - n
+    WHERE id = ... AND stock_quantity >= n
+
+which the database applies atomically, so concurrent checkouts cannot
+oversell or lose updates. The hold is then:
+- committed by the checkout.session.completed webhook
+- released (stock returned) by checkout.session.expired, or by the
+  `release_expired_reservations` sweeper once it has expired
+"""
+
+import logging
+import uuid
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Iterable, Optional
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from ..models import Product, StockReservation
+
+logger = logging.getLogger(__name__)
+
+# Stripe may deliver checkout.session.completed shortly after the session's
+# expires_at, so holds outlive their checkout by this much before sweeping.
+EXPIRY_GRACE = timedelta(minutes=5)
+
+
+class InsufficientStock(Exception):
+    """Raised when a product does not have enough stock to reserve"""
+
+    def __init__(self, product: Product, requested: int, available: int):
+        self.product = product
+        self.requested = requested
+        self.available = available
+        super().__init__(f'Only {available} of {product.name} available')
+
+
+def get_reservation_ttl() -> timedelta:
+    """How long a checkout may hold stock (Stripe sessions last at least 30 minutes)."""
+    minutes = getattr(settings, 'STOCK_RESERVATION_MINUTES', 30)
+    return timedelta(minutes=max(30, minutes))
+
+
+def reserve_stock(items: Iterable[tuple], ttl: Optional[timedelta] = None) -> Optional[uuid.UUID]:
+    """
+    Hold stock for (product, quantity) pairs.
+
+    Products without managed inventory are ignored. Either every product is
+    reserved or none is: if one is short, the whole reservation rolls back.
+
+    Returns:
+        The hold_id to store with the checkout, or None if nothing was held
+
+    Raises:
+        InsufficientStock: If a product does not have enough stock
+    """
+    quantities = OrderedDict()
+    products = {}
+    for product, quantity in items:
+        if not product.manage_inventory:
+            continue
+        products[product.pk] = product
+        quantities[product.pk] = quantities.get(product.pk, 0) + quantity
+
+    if not quantities:
+        return None
+
+    hold_id = uuid.uuid4()
+    expires_at = timezone.now() + (ttl or get_reservation_ttl()) + EXPIRY_GRACE
+
+    with transaction.atomic():
+        # Lock rows in a consistent order so concurrent multi-item checkouts
+        # cannot deadlock each other
+        for product_id in sorted(quantities):
+            quantity = quantities[product_id]
+            reserved = Product.objects.filter(
+                pk=product_id,
+                stock_quantity__gte=quantity,
+            ).update(stock_quantity=F('stock_quantity') - quantity)
+
+            if not reserved:
+                available = Product.objects.filter(pk=product_id).values_list(
+                    'stock_quantity', flat=True
+                ).first() or 0
+                raise InsufficientStock(products[product_id], quantity, max(0, available))
+
+        StockReservation.objects.bulk_create([
+            StockReservation(
+                hold_id=hold_id,
+                product_id=product_id,
+                quantity=quantity,
+                expires_at=expires_at,
+            )
+            for product_id, quantity in quantities.items()
+        ])
+
+    return hold_id
+
+
+def attach_checkout_session(hold_id, session_id: str) -> None:
+    """Record the Stripe checkout session a hold belongs to."""
+    if hold_id:
+        StockReservation.objects.filter(hold_id=hold_id).update(stripe_session_id=session_id)
+
+
+def commit_hold(hold_id) -> int:
+    """
+    Mark a paid checkout's hold as committed. Returns the rows committed.
+
+    If the sweeper already released the hold (the webhook arrived very late),
+    the stock is taken again, floored at zero, since the customer has paid.
+    """
+    committed = StockReservation.objects.filter(
+        hold_id=hold_id, status='held'
+    ).update(status='committed', updated_at=timezone.now())
+
+    for reservation in StockReservation.objects.filter(hold_id=hold_id, status='released'):
+        updated = StockReservation.objects.filter(
+            pk=reservation.pk, status='released'
+        ).update(status='committed', updated_at=timezone.now())
+        if not updated:
+            continue
+
+        committed += 1
+        logger.warning(
+            f"Committing released stock hold {hold_id} for product {reservation.product_id}"
+        )
+        consume_stock({reservation.product_id: reservation.quantity})
+
+    return committed
+
+
+def release_hold(hold_id) -> int:
+    """Return a hold's stock to its products. Returns the rows released."""
+    return _release(StockReservation.objects.filter(hold_id=hold_id, status='held'))
+
+
+def release_expired_holds(now=None) -> int:
+    """Release every hold past its expiry. Returns the rows released."""
+    now = now or timezone.now()
+    return _release(StockReservation.objects.filter(status='held', expires_at__lt=now))
+
+
+def _release(reservations) -> int:
+    released = 0
+    for reservation in reservations.only('id', 'product_id', 'quantity'):
+        with transaction.atomic():
+            # Flip the status first; only the caller that wins the flip
+            # returns the stock, so a hold is never released twice
+            updated = StockReservation.objects.filter(
+                pk=reservation.pk, status='held'
+            ).update(status='released', updated_at=timezone.now())
+            if not updated:
+                continue
+
+            Product.objects.filter(pk=reservation.product_id).update(
+                stock_quantity=F('stock_quantity') + reservation.quantity
+            )
+        released += 1
+
+    return released
+
+
+def consume_stock(quantities: dict) -> int:
+    """
+    Decrement stock without a hold, never going below zero.
+
+    Args:
+        quantities: product_id -> quantity to take
+
+    Returns:
+        Number of products updated (a single UPDATE for all of them)
+    """
+    quantities = {pk: qty for pk, qty in quantities.items() if qty}
+    if not quantities:
+        return 0
+
+    taken = Case(
+        *[When(pk=pk, then=Value(qty)) for pk, qty in quantities.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    return Product.objects.filter(pk__in=quantities.keys()).update(
+        stock_quantity=Greatest(F('stock_quantity') - taken, Value(0))
+    )
@@ -209,22 +209,42 @@ class PrintifyClient:
         """
         return self._request("GET", f"/orders/{order_id}.json")
 
-    def list_orders(self, status: Optional[str] = None, limit: int = 10) -> dict:
+    def list_orders(self, status: Optional[str] = None, limit: int = 10, page: int = 1) -> dict:
         """
-        List orders from the shop.
+        List orders from the shop, newest first.
 
         Args:
             status: Filter by status (on-hold, pending, fulfilled, canceled)
-            limit: Number of orders to return
+            limit: Number of orders per page (Printify allows at most 10)
+            page: Page number, starting at 1
 
         Returns:
-            List of orders
+            Paginated response with 'data', 'current_page' and 'last_page'
         """
-        params = {"limit": limit}
+        params = {"limit": limit, "page": page}
         if status:
             params["status"] = status
         return self._request("GET", "/orders.json", params=params)
 
+    def iter_order_pages(self, status: Optional[str] = None, limit: int = 10):
+        """
+        Yield pages of orders (lists of order dicts), following pagination.
+
+        Stops at the last page reported by Printify. Callers can stop early
+        by breaking out of the loop; later pages are not requested.
+        """
+        page = 1
+        while True:
+            result = self.list_orders(status=status, limit=limit, page=page)
+            orders = result.get('data', [])
+            if orders:
+                yield orders
+
+            last_page = result.get('last_page') or page
+            if not orders or page >= last_page:
+                return
+            page += 1
+
     def send_to_production(self, order_id: str) -> dict:
         """
         Send an order to production (starts fulfillment).
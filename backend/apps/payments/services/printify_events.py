@@ -0,0 +1,185 @@
+"""
+Printify Product Event Queue
+
+Product webhooks (product:publish:started, product:deleted) are recorded as
+PrintifyWebhookEvent rows and processed later by the
+`process_printify_events` command instead of inside the webhook request.
+
+Bulk-publishing many designs makes Printify fire a burst of webhooks, often
+several per product. The worker waits until a product has been quiet for the
+debounce window, keeps only its latest event, fetches the product from
+Printify once and hands that payload to the variant and image sync.
+
+Several workers (a cron pass overlapping a --loop worker) may run at once.
+A product's latest event is claimed with a conditional UPDATE that moves
+its next_attempt_at forward by CLAIM_SECONDS, so only one worker syncs it;
+if that worker dies the claim lapses and a later pass takes it over. A
+failed sync is retried after RETRY_DELAY_SECONDS, doubling per attempt.
+"""
+
+import logging
+from django.conf import settings
+from django.db.models import F, Max, Q
+from django.utils import timezone
+from datetime import timedelta
+from typing import Optional
+from ..models import Product, PrintifyWebhookEvent
+from .printify_client import get_printify_client, PrintifyError
+from .printify_sync import sync_product_variants, upsert_product_from_printify
+
+logger = logging.getLogger(__name__)
+
+PRODUCT_EVENT_TYPES = ('product:publish:started', 'product:deleted')
+
+# Failed syncs are retried on later passes up to this many times
+MAX_ATTEMPTS = 5
+
+# Seconds before the first retry of a failed sync; doubles with each attempt
+RETRY_DELAY_SECONDS = 60
+
+# Seconds a worker has to sync a claimed product before others may take it over
+CLAIM_SECONDS = 300
+
+
+def record_product_event(event_type: str, resource: dict) -> PrintifyWebhookEvent:
+    """Store a product webhook for the background worker."""
+    return PrintifyWebhookEvent.objects.create(
+        event_type=event_type,
+        resource_id=str(resource.get('id', '')),
+        payload=resource,
+    )
+
+
+def process_product_events(debounce_seconds: Optional[int] = None, limit: int = 100) -> dict:
+    """
+    Process pending product events whose debounce window has elapsed.
+
+    Each product is handled once per pass using its most recent event; older
+    pending events for the same product are marked superseded. Products
+    claimed by another worker or waiting to retry are skipped.
+
+    Args:
+        debounce_seconds: Quiet period required since a product's last event
+            (defaults to settings.PRINTIFY_WEBHOOK_DEBOUNCE_SECONDS)
+        limit: Maximum number of products to handle in this pass
+
+    Returns:
+        dict with 'products', 'synced', 'deactivated', 'superseded', 'failed' counts
+    """
+    if debounce_seconds is None:
+        debounce_seconds = getattr(settings, 'PRINTIFY_WEBHOOK_DEBOUNCE_SECONDS', 30)
+
+    stats = {'products': 0, 'synced': 0, 'deactivated': 0, 'superseded': 0, 'failed': 0}
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=debounce_seconds)
+
+    ready = (
+        PrintifyWebhookEvent.objects
+        .filter(status='pending', event_type__in=PRODUCT_EVENT_TYPES)
+        .values('resource_id')
+        .annotate(last_received=Max('received_at'), latest_id=Max('id'), retry_at=Max('next_attempt_at'))
+        .filter(Q(retry_at__isnull=True) | Q(retry_at__lte=now), last_received__lte=cutoff)
+        .order_by('last_received')[:limit]
+    )
+
+    client = get_printify_client()
+
+    for group in ready:
+        if not claim_event(group['latest_id']):
+            continue
+        stats['products'] += 1
+        latest = PrintifyWebhookEvent.objects.get(pk=group['latest_id'])
+
+        superseded = PrintifyWebhookEvent.objects.filter(
+            resource_id=group['resource_id'],
+            status='pending',
+            id__lt=latest.id,
+        ).update(status='superseded', processed_at=timezone.now())
+        stats['superseded'] += superseded
+
+        try:
+            if latest.event_type == 'product:deleted':
+                deactivate_product(latest.resource_id)
+                stats['deactivated'] += 1
+            else:
+                sync_published_product(client, latest.resource_id)
+                stats['synced'] += 1
+        except Exception as e:
+            latest.error = str(e)
+            if latest.attempts >= MAX_ATTEMPTS:
+                latest.status = 'failed'
+                latest.processed_at = timezone.now()
+                latest.next_attempt_at = None
+                stats['failed'] += 1
+            else:
+                delay = RETRY_DELAY_SECONDS * 2 ** (latest.attempts - 1)
+                latest.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+            latest.save(update_fields=['error', 'status', 'processed_at', 'next_attempt_at'])
+            logger.error(
+                f"Error processing Printify event for product {latest.resource_id} "
+                f"(attempt {latest.attempts}): {e}",
+                exc_info=not isinstance(e, PrintifyError),
+            )
+            continue
+
+        latest.status = 'processed'
+        latest.processed_at = timezone.now()
+        latest.next_attempt_at = None
+        latest.error = ''
+        latest.save(update_fields=['status', 'processed_at', 'next_attempt_at', 'error'])
+
+    if stats['products']:
+        logger.info(
+            f"Processed Printify events for {stats['products']} products: "
+            f"{stats['synced']} synced, {stats['deactivated']} deactivated, "
+            f"{stats['superseded']} superseded, {stats['failed']} failed"
+        )
+
+    return stats
+
+
+def claim_event(event_id: int) -> bool:
+    """
+    Claim a pending event for this worker, counting the attempt.
+
+    False if another worker holds it or it is waiting to be retried.
+    """
+    now = timezone.now()
+    return bool(
+        PrintifyWebhookEvent.objects
+        .filter(Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now), pk=event_id, status='pending')
+        .update(next_attempt_at=now + timedelta(seconds=CLAIM_SECONDS), attempts=F('attempts') + 1)
+    )
+
+
+def sync_published_product(client, printify_product_id: str) -> Product:
+    """Fetch a published product once and sync product, variants and images."""
+    if not client.is_configured:
+        raise PrintifyError("Printify API not configured - cannot auto-sync product")
+
+    printify_data = client.get_product(printify_product_id)
+    product, created = upsert_product_from_printify(printify_product_id, printify_data)
+
+    action = "Created" if created else "Updated"
+    logger.info(f"{action} product '{product.name}' from Printify webhook")
+
+    sync_stats = sync_product_variants(product, printify_data=printify_data)
+    if sync_stats['errors']:
+        raise PrintifyError('; '.join(sync_stats['errors']))
+
+    return product
+
+
+def deactivate_product(printify_product_id: str) -> None:
+    """Mark a product deleted in Printify as inactive."""
+    # save() rather than QuerySet.update() so Product.save() and post_save
+    # receivers see the change, as they do for every other product edit
+    products = list(Product.objects.filter(printify_product_id=printify_product_id))
+    if not products:
+        logger.debug(f"Product not found for deleted Printify ID: {printify_product_id}")
+        return
+
+    for product in products:
+        product.is_active = False
+        product.save(update_fields=['is_active', 'updated_at'])
+        logger.info(f"Deactivated product '{product.name}' (deleted in Printify)")
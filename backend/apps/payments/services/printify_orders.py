@@ -0,0 +1,197 @@
+"""
+Printify Order Reconciliation Service
+
+Order status normally changes when a Printify order webhook arrives. This
+service catches up on missed webhooks by paging through Printify's order list
+per status, matching each page to local orders with a single query and
+writing the changes with one bulk_update per page.
+
+Only Printify orders with activity since the last checkpoint (see
+PrintifyOrderSync) are applied, so scheduled runs stay cheap.
+"""
+
+import logging
+from datetime import datetime, timezone as dt_timezone
+from typing import Optional
+from django.db.models import Min
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from ..models import Order, PrintifyOrderSync
+from .printify_client import get_printify_client, PrintifyError
+
+logger = logging.getLogger(__name__)
+
+# Printify order status -> local Order status
+STATUS_MAP = {
+    'sending-to-production': 'processing',
+    'in-production': 'processing',
+    'partially-fulfilled': 'shipped',
+    'fulfilled': 'shipped',
+    'canceled': 'canceled',
+}
+
+# Local statuses the reconciler may still move forward
+OPEN_STATUSES = ['paid', 'processing', 'shipped']
+
+# Forward-only ordering, so a stale listing never moves an order backwards
+STATUS_RANK = {'paid': 0, 'processing': 1, 'shipped': 2, 'delivered': 3}
+
+UPDATE_FIELDS = ['status', 'tracking_number', 'tracking_url', 'updated_at']
+
+
+def _parse_timestamp(value) -> Optional[datetime]:
+    if not value:
+        return None
+    parsed = parse_datetime(str(value))
+    if parsed and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, dt_timezone.utc)
+    return parsed
+
+
+def last_activity(printify_order: dict) -> Optional[datetime]:
+    """Most recent timestamp found on a Printify order or its shipments."""
+    timestamps = [
+        printify_order.get(field)
+        for field in ('updated_at', 'fulfilled_at', 'sent_to_production_at', 'created_at')
+    ]
+    for shipment in printify_order.get('shipments') or []:
+        timestamps.append(shipment.get('delivered_at'))
+        timestamps.append(shipment.get('shipped_at'))
+
+    parsed = [ts for ts in map(_parse_timestamp, timestamps) if ts]
+    return max(parsed) if parsed else None
+
+
+def target_status(printify_order: dict) -> Optional[str]:
+    """Local status implied by a Printify order, or None for no change."""
+    status = STATUS_MAP.get(printify_order.get('status'))
+    if status == 'shipped':
+        shipments = printify_order.get('shipments') or []
+        if shipments and all(s.get('delivered_at') for s in shipments):
+            return 'delivered'
+    return status
+
+
+def apply_printify_order(order: Order, printify_order: dict) -> bool:
+    """
+    Copy status and tracking from a Printify order onto a local order.
+
+    Returns True if the order changed (it is not saved).
+    """
+    changed = False
+    new_status = target_status(printify_order)
+
+    if new_status == 'canceled':
+        if order.status in OPEN_STATUSES:
+            order.status = 'canceled'
+            changed = True
+    elif new_status and STATUS_RANK.get(new_status, -1) > STATUS_RANK.get(order.status, 99):
+        order.status = new_status
+        changed = True
+
+    shipments = printify_order.get('shipments') or []
+    if shipments and order.status != 'canceled':
+        shipment = shipments[0]
+        tracking_number = shipment.get('number') or shipment.get('tracking_number') or ''
+        tracking_url = shipment.get('url') or shipment.get('tracking_url') or ''
+        if tracking_number and (tracking_number, tracking_url) != (order.tracking_number, order.tracking_url):
+            order.tracking_number = tracking_number
+            order.tracking_url = tracking_url
+            changed = True
+
+    return changed
+
+
+def reconcile_orders(full: bool = False, dry_run: bool = False, page_size: int = 10) -> dict:
+    """
+    Reconcile local order status with Printify.
+
+    Args:
+        full: Ignore the checkpoint and apply every matching Printify order
+        dry_run: Compute changes without saving them or the checkpoint
+        page_size: Orders requested per Printify page
+
+    Returns:
+        dict with 'pages', 'seen', 'matched', 'updated', 'changes' (order
+        number -> new status) and 'since'
+    """
+    client = get_printify_client()
+    if not client.is_configured:
+        raise PrintifyError("Printify API not configured. Set PRINTIFY_API_KEY and PRINTIFY_SHOP_ID.")
+
+    checkpoint, _ = PrintifyOrderSync.objects.get_or_create(shop_id=client.shop_id)
+    since = None if full else checkpoint.last_synced_at
+    started_at = timezone.now()
+
+    stats = {'pages': 0, 'seen': 0, 'matched': 0, 'updated': 0, 'changes': {}, 'since': since}
+
+    # Printify orders are created after their local order, so nothing listed
+    # before the oldest open local order can match one.
+    open_orders = Order.objects.filter(status__in=OPEN_STATUSES).exclude(printify_order_id='')
+    floor = open_orders.aggregate(oldest=Min('created_at'))['oldest']
+    if floor is None:
+        return _finish(checkpoint, started_at, stats, dry_run)
+
+    try:
+        for printify_status in STATUS_MAP:
+            for page in client.iter_order_pages(status=printify_status, limit=page_size):
+                stats['pages'] += 1
+                stats['seen'] += len(page)
+
+                candidates = {}
+                for printify_order in page:
+                    activity = last_activity(printify_order)
+                    if since and activity and activity < since:
+                        continue
+                    candidates[printify_order['id']] = printify_order
+
+                if candidates:
+                    _apply_page(candidates, stats, dry_run)
+
+                # Pages are newest first; stop once past the oldest open order
+                created = [_parse_timestamp(o.get('created_at')) for o in page]
+                created = [ts for ts in created if ts]
+                if created and min(created) < floor:
+                    break
+    except PrintifyError as e:
+        if not dry_run:
+            checkpoint.sync_error = str(e)
+            checkpoint.save(update_fields=['sync_error', 'updated_at'])
+        raise
+
+    return _finish(checkpoint, started_at, stats, dry_run)
+
+
+def _apply_page(candidates: dict, stats: dict, dry_run: bool) -> None:
+    """Match one page of Printify orders and bulk-update the changed ones."""
+    orders = Order.objects.filter(
+        printify_order_id__in=candidates.keys(),
+        status__in=OPEN_STATUSES,
+    ).only('id', 'order_number', 'printify_order_id', *UPDATE_FIELDS)
+
+    now = timezone.now()
+    changed = []
+    for order in orders:
+        stats['matched'] += 1
+        if apply_printify_order(order, candidates[order.printify_order_id]):
+            order.updated_at = now
+            changed.append(order)
+            stats['changes'][order.order_number] = order.status
+
+    if changed and not dry_run:
+        Order.objects.bulk_update(changed, UPDATE_FIELDS)
+    stats['updated'] += len(changed)
+
+
+def _finish(checkpoint: PrintifyOrderSync, started_at: datetime, stats: dict, dry_run: bool) -> dict:
+    if not dry_run:
+        checkpoint.last_synced_at = started_at
+        checkpoint.last_sync_count = stats['updated']
+        checkpoint.sync_error = ''
+        checkpoint.save()
+
+    logger.info(
+        f"Printify order reconciliation: {stats['seen']} orders over {stats['pages']} pages, "
+        f"{stats['matched']} matched, {stats['updated']} updated"
+    )
+    return stats
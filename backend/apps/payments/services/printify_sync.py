@@ -4,9 +4,12 @@ Printify Variant Sync Service
 Syncs product variants from Printify API to local ProductVariant records.
 """
 
+import html
 import logging
+import re
 from typing import Optional
 from django.utils import timezone
+from django.utils.text import slugify
 from ..models import Product, ProductVariant, ProductImage
 from .printify_client import get_printify_client, PrintifyError
 
@@ -227,12 +230,96 @@ def sync_product_images(product: Product, printify_data: dict) -> dict:
     return stats
 
 
-def sync_product_variants(product: Product) -> dict:
+def detect_category_from_tags(tags: list) -> str:
+    """
+    Detect product category from Printify tags.
+    Maps Printify's tag system to our categories.
+    """
+    tags_lower = [t.lower() for t in tags]
+    tags_str = ' '.join(tags_lower)
+
+    # Map Printify tags to our categories (check most specific first)
+    if 'hoodies' in tags_lower or 'hoodie' in tags_str:
+        return 'hoodie'
+    if 't-shirts' in tags_lower or 'tee' in tags_str:
+        return 'tee'
+    if 'long sleeve' in tags_str:
+        return 'longsleeve'
+    if 'sweater' in tags_str or 'sweatshirt' in tags_str:
+        return 'sweater'
+    if 'tank tops' in tags_lower or 'jersey' in tags_str:
+        return 'jersey'
+    if 'shorts' in tags_lower:
+        return 'shorts'
+    if 'hats' in tags_lower or 'caps' in tags_lower or 'hat' in tags_str or 'beanie' in tags_str:
+        return 'hat'
+    if 'bags' in tags_lower or 'backpack' in tags_str:
+        return 'bag'
+
+    # Default fallback
+    return 'apparel'
+
+
+def upsert_product_from_printify(printify_product_id: str, printify_data: dict) -> tuple:
+    """
+    Create or update a POD Product from Printify product data.
+
+    Args:
+        printify_product_id: Printify product ID
+        printify_data: Full product data from Printify API
+
+    Returns:
+        tuple: (Product instance, created boolean)
+    """
+    title = printify_data.get('title', f'Product {printify_product_id}')
+    description = printify_data.get('description', '')
+
+    # Clean HTML tags and decode entities from description
+    if description:
+        description = re.sub(r'<[^>]+>', '', description)
+        description = html.unescape(description)  # Decode &#39; → '
+
+    # Generate unique slug
+    base_slug = slugify(title)
+    slug = base_slug
+    counter = 1
+    while Product.objects.filter(slug=slug).exclude(printify_product_id=printify_product_id).exists():
+        slug = f"{base_slug}-{counter}"
+        counter += 1
+
+    # Get base price from first enabled variant (Printify prices are in cents)
+    base_price = 0
+    for v in printify_data.get('variants', []):
+        if v.get('is_enabled') and v.get('price'):
+            base_price = v['price'] / 100
+            break
+
+    # Detect category from Printify tags
+    category = detect_category_from_tags(printify_data.get('tags', []))
+
+    return Product.objects.update_or_create(
+        printify_product_id=printify_product_id,
+        defaults={
+            'name': title,
+            'slug': slug,
+            'description': description,
+            'price': base_price,
+            'fulfillment_type': 'pod',
+            'manage_inventory': False,  # POD products are always in stock
+            'is_active': True,
+            'category': category,
+        }
+    )
+
+
+def sync_product_variants(product: Product, printify_data: Optional[dict] = None) -> dict:
     """
     Sync variants for a single product from Printify.
 
     Args:
         product: Product instance with printify_product_id set
+        printify_data: Product data already fetched from Printify. When
+            omitted, the product is fetched from the API.
 
     Returns:
         dict with sync statistics: created, updated, disabled, errors
@@ -251,14 +338,16 @@ def sync_product_variants(product: Product) -> dict:
         stats['errors'].append(f"Product '{product.name}' is not a POD product")
         return stats
 
-    client = get_printify_client()
-    if not client.is_configured:
-        stats['errors'].append("Printify API not configured (missing API key or shop ID)")
-        return stats
+    if printify_data is None:
+        client = get_printify_client()
+        if not client.is_configured:
+            stats['errors'].append("Printify API not configured (missing API key or shop ID)")
+            return stats
 
     try:
-        # Fetch product data from Printify
-        printify_data = client.get_product(product.printify_product_id)
+        # Fetch product data from Printify unless the caller already has it
+        if printify_data is None:
+            printify_data = client.get_product(product.printify_product_id)
 
         variants = printify_data.get('variants', [])
         product_options = printify_data.get('options', [])
@@ -0,0 +1,15 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import OrderItem
+from .services.handoffs import publish_handoff
+
+
+@receiver(post_save, sender=OrderItem)
+def publish_handoff_change(sender, instance, created, update_fields=None, **kwargs):
+    """Push handoff status changes of local items to live-update subscribers"""
+    if created or instance.fulfillment_type != 'local':
+        return
+    if update_fields is not None and 'handoff_status' not in update_fields:
+        return
+    publish_handoff(instance)
@@ -1,3 +1,621 @@
-from django.test import TestCase
+import json
+import threading
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models.signals import post_save
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.core.testing import QueryBudgetMixin
+from .models import Bag, BagItem, Order, OrderItem, Payment, PrintifyOrderSync, PrintifyWebhookEvent, Product, ProductImage, ProductVariant, StockReservation
+from .services.printify_client import PrintifyClient, PrintifyError
+from .services.printify_events import claim_event, process_product_events, record_product_event
+from .services.printify_orders import reconcile_orders
+from .views import _complete_delivered_orders
+from .services.inventory import (
+    InsufficientStock,
+    commit_hold,
+    release_expired_holds,
+    release_hold,
+    reserve_stock,
+)
+
+
+def make_local_product(name, stock):
+    return Product.objects.create(
+        name=name,
+        description='Limited run',
+        price=45,
+        fulfillment_type='local',
+        manage_inventory=True,
+        stock_quantity=stock,
+    )
+
+
+@override_settings(STRIPE_SECRET_KEY='')
+class StockReservationTests(TestCase):
+    def setUp(self):
+        self.hoodie = make_local_product('Drop Hoodie', 5)
+        self.tee = make_local_product('Drop Tee', 1)
+
+    def stock(self, product):
+        product.refresh_from_db(fields=['stock_quantity'])
+        return product.stock_quantity
+
+    def test_reserve_decrements_stock(self):
+        hold_id = reserve_stock([(self.hoodie, 2), (self.hoodie, 1), (self.tee, 1)])
+
+        self.assertEqual(self.stock(self.hoodie), 2)
+        self.assertEqual(self.stock(self.tee), 0)
+        self.assertEqual(StockReservation.objects.filter(hold_id=hold_id, status='held').count(), 2)
+
+    def test_reserve_is_all_or_nothing(self):
+        with self.assertRaises(InsufficientStock) as ctx:
+            reserve_stock([(self.hoodie, 2), (self.tee, 2)])
+
+        self.assertEqual(ctx.exception.available, 1)
+        self.assertEqual(self.stock(self.hoodie), 5)
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_unmanaged_products_are_not_held(self):
+        pod = Product.objects.create(name='POD Tee', description='', price=30, fulfillment_type='pod')
+
+        self.assertIsNone(reserve_stock([(pod, 3)]))
+
+    def test_release_returns_stock_once(self):
+        hold_id = reserve_stock([(self.hoodie, 3)])
+
+        self.assertEqual(release_hold(hold_id), 1)
+        self.assertEqual(release_hold(hold_id), 0)
+        self.assertEqual(self.stock(self.hoodie), 5)
+
+    def test_commit_keeps_stock_taken(self):
+        hold_id = reserve_stock([(self.hoodie, 3)])
+
+        self.assertEqual(commit_hold(hold_id), 1)
+        self.assertEqual(release_hold(hold_id), 0)
+        self.assertEqual(self.stock(self.hoodie), 2)
+
+    def test_commit_after_release_takes_stock_again(self):
+        hold_id = reserve_stock([(self.tee, 1)])
+        release_hold(hold_id)
+
+        commit_hold(hold_id)
+
+        self.assertEqual(self.stock(self.tee), 0)
+        self.assertEqual(StockReservation.objects.get(hold_id=hold_id).status, 'committed')
+
+    def test_sweeper_releases_only_expired_holds(self):
+        expired = reserve_stock([(self.hoodie, 2)])
+        active = reserve_stock([(self.hoodie, 1)])
+        StockReservation.objects.filter(hold_id=expired).update(
+            expires_at=timezone.now() - timedelta(minutes=1)
+        )
+
+        self.assertEqual(release_expired_holds(), 1)
+        self.assertEqual(self.stock(self.hoodie), 4)
+        self.assertEqual(StockReservation.objects.get(hold_id=active).status, 'held')
+
+
+@override_settings(STRIPE_SECRET_KEY='')
+@skipUnlessDBFeature('test_db_allows_multiple_connections')
+class StockReservationConcurrencyTests(TransactionTestCase):
+    """Many checkouts racing for one SKU must never oversell it."""
+
+    STOCK = 10
+    THREADS = 40
+
+    def test_concurrent_reservations_do_not_oversell(self):
+        product = make_local_product('Last Call Hoodie', self.STOCK)
+        barrier = threading.Barrier(self.THREADS)
+        results = []
+        lock = threading.Lock()
+
+        def checkout():
+            try:
+                barrier.wait()
+                try:
+                    reserve_stock([(product, 1)])
+                    outcome = 'reserved'
+                except InsufficientStock:
+                    outcome = 'sold_out'
+                with lock:
+                    results.append(outcome)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=checkout) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        product.refresh_from_db()
+        self.assertEqual(len(results), self.THREADS)
+        self.assertEqual(results.count('reserved'), self.STOCK)
+        self.assertEqual(product.stock_quantity, 0)
+        self.assertEqual(StockReservation.objects.filter(product=product).count(), self.STOCK)
+
+
+def make_pod_product(name, featured=False):
+    product = Product.objects.create(
+        name=name, description='', price=35, fulfillment_type='pod', featured=featured,
+    )
+    for index, size in enumerate(['S', 'M', 'L']):
+        ProductVariant.objects.create(
+            product=product, title=f'{size} / Black', size=size, color='Black',
+            color_hex='#000000', price=35, sort_order=index,
+        )
+    ProductImage.objects.create(product=product, image_url='https://example.com/a.png', is_primary=True)
+    ProductImage.objects.create(product=product, image_url='https://example.com/b.png')
+    return product
+
+
+@override_settings(STRIPE_SECRET_KEY='')
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Query counts must not grow with the number of products or bag items."""
+
+    PRODUCT_LIST_BUDGET = 4  # count, products, images, variants
+    PRODUCT_DETAIL_BUDGET = 3
+    BAG_BUDGET = 4  # bag, items + products, images, variants
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = [make_pod_product(f'Tee {index}', featured=index < 2) for index in range(6)]
+
+    def setUp(self):
+        self.client = APIClient(HTTP_HOST='localhost')
+
+    def test_product_list(self):
+        with self.assertQueryBudget(self.PRODUCT_LIST_BUDGET, 'ProductViewSet.list'):
+            response = self.client.get('/api/payments/products/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 6)
+        self.assertEqual(response.data['results'][0]['available_sizes'], ['S', 'M', 'L'])
+        self.assertEqual(response.data['results'][0]['primary_image_url'], 'https://example.com/a.png')
+
+    def test_product_list_fill_to(self):
+        with self.assertQueryBudget(self.PRODUCT_LIST_BUDGET + 2, 'ProductViewSet.list fill_to'):
+            response = self.client.get('/api/payments/products/?featured=true&fill_to=4')
+
+        self.assertEqual(len(response.data['results']), 4)
+
+    def test_product_detail(self):
+        with self.assertQueryBudget(self.PRODUCT_DETAIL_BUDGET, 'ProductViewSet.retrieve'):
+            response = self.client.get(f'/api/payments/products/{self.products[0].slug}/')
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_bag(self):
+        user = get_user_model().objects.create_user('shopper', 'shopper@example.com', 'pw')
+        bag = Bag.objects.create(user=user)
+        for product in self.products[:4]:
+            BagItem.objects.create(bag=bag, product=product, quantity=2, selected_size='M', selected_color='Black')
+        self.client.force_authenticate(user)
+
+        with self.assertQueryBudget(self.BAG_BUDGET, 'BagAPIView.get'):
+            response = self.client.get('/api/payments/bag/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['item_count'], 8)
+        self.assertEqual(len(response.data['items']), 4)
+
+
+@override_settings(
+    STRIPE_SECRET_KEY='',
+    STORAGES={'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}},
+)
+class AdminChangelistQueryTests(QueryBudgetMixin, TestCase):
+    """Changelist columns are annotated, not queried per row."""
+
+    # session, user, filtered count, total count, page (+ select_related user for bags)
+    CHANGELIST_BUDGET = 5
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'pw')
+        cls.products = [make_pod_product(f'Tee {index}') for index in range(30)]
+        ProductVariant.objects.filter(product=cls.products[0], size='S').update(is_enabled=False)
+        ProductVariant.objects.filter(product=cls.products[1], size='L').update(price=0)
+
+        for index in range(30):
+            shopper = get_user_model().objects.create_user(f'shopper{index}', f'shopper{index}@example.com', 'pw')
+            bag = Bag.objects.create(user=shopper)
+            BagItem.objects.create(bag=bag, product=cls.products[index], quantity=2, selected_size='M',
+                                   selected_color='Black')
+            BagItem.objects.create(bag=bag, product=cls.products[1], quantity=1, selected_size='L',
+                                   selected_color='Black')
+            BagItem.objects.create(bag=bag, product=cls.products[2], quantity=1)
+        ProductVariant.objects.filter(product=cls.products[0], size='M').update(price=40)
+
+    def setUp(self):
+        self.client.force_login(self.admin_user)
+
+    def changelist(self, url, label):
+        with self.assertQueryBudget(self.CHANGELIST_BUDGET, label):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return list(response.context['cl'].result_list)
+
+    def test_product_changelist(self):
+        products = self.changelist('/django-admin/payments/product/', 'ProductAdmin changelist')
+
+        self.assertEqual(len(products), 30)
+        counts = {product.pk: (product.variant_enabled, product.variant_total, product.image_total)
+                  for product in products}
+        self.assertEqual(counts[self.products[0].pk], (2, 3, 2))
+        self.assertEqual(counts[self.products[5].pk], (3, 3, 2))
+
+    def test_bag_changelist(self):
+        bags = self.changelist('/django-admin/payments/bag/', 'BagAdmin changelist')
+
+        self.assertEqual(len(bags), 30)
+        for bag in bags:
+            # Annotations agree with the model's Python totals
+            self.assertEqual(bag.item_total, bag.item_count)
+            self.assertEqual(bag.subtotal_amount, bag.subtotal)
+        self.assertIn(80 + 35 + 35, {bag.subtotal_amount for bag in bags})
+
+
+class PrintifyEventQueueTests(TestCase):
+    """Product webhooks are claimed by one worker and retried with backoff."""
+
+    def setUp(self):
+        self.product = Product.objects.create(
+            name='Team Tee', description='', price=30, fulfillment_type='pod', printify_product_id='pf-1',
+        )
+
+    def record(self, event_type, product_id='pf-1', seconds_ago=60):
+        event = record_product_event(event_type, {'id': product_id})
+        PrintifyWebhookEvent.objects.filter(pk=event.pk).update(
+            received_at=timezone.now() - timedelta(seconds=seconds_ago)
+        )
+        return event
+
+    def process(self, at=None):
+        with mock.patch('django.utils.timezone.now', return_value=at or timezone.now()):
+            return process_product_events(debounce_seconds=30)
+
+    def test_latest_event_is_processed_and_older_ones_superseded(self):
+        older = self.record('product:publish:started', seconds_ago=90)
+        latest = self.record('product:deleted')
+        # Still inside its debounce window
+        self.record('product:deleted', product_id='pf-2', seconds_ago=5)
+
+        stats = self.process()
+
+        self.assertEqual((stats['products'], stats['deactivated'], stats['superseded']), (1, 1, 1))
+        older.refresh_from_db()
+        latest.refresh_from_db()
+        self.assertEqual((older.status, latest.status, latest.attempts), ('superseded', 'processed', 1))
+        self.product.refresh_from_db()
+        self.assertFalse(self.product.is_active)
+
+    def test_deactivation_saves_the_product(self):
+        self.record('product:deleted')
+        receiver = mock.Mock()
+        post_save.connect(receiver, sender=Product)
+        self.addCleanup(post_save.disconnect, receiver, sender=Product)
+
+        self.process()
+
+        receiver.assert_called_once()
+        self.assertEqual(receiver.call_args.kwargs['update_fields'], {'is_active', 'updated_at'})
+        self.product.refresh_from_db()
+        self.assertFalse(self.product.is_active)
+
+    def test_claimed_events_are_skipped_until_the_claim_lapses(self):
+        event = self.record('product:deleted')
+        # Another worker is syncing this product
+        self.assertTrue(claim_event(event.pk))
+        self.assertFalse(claim_event(event.pk))
+
+        self.assertEqual(self.process()['products'], 0)
+        # That worker died; its claim lapses and the event is taken over
+        self.assertEqual(self.process(timezone.now() + timedelta(seconds=301))['products'], 1)
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts), ('processed', 2))
+
+    @mock.patch('apps.payments.services.printify_events.sync_published_product',
+                side_effect=PrintifyError('Printify unavailable'))
+    def test_failed_syncs_back_off_then_fail(self, sync):
+        event = self.record('product:publish:started')
+        now = timezone.now()
+
+        self.process(now)
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts), ('pending', 1))
+        self.assertEqual(event.next_attempt_at, now + timedelta(seconds=60))
+        self.assertEqual(self.process(now + timedelta(seconds=59))['products'], 0)
+
+        # Each retry waits twice as long: 60, 120, 240, 480 seconds
+        for elapsed in (60, 180, 420, 900):
+            self.assertEqual(self.process(now + timedelta(seconds=elapsed))['products'], 1)
+
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts, event.next_attempt_at), ('failed', 5, None))
+        self.assertIn('Printify unavailable', event.error)
+        self.assertEqual(sync.call_count, 5)
+
+
+class HandoffTests(TestCase):
+    """Marking local items handed off, one at a time or in bulk."""
+
+    url = '/api/payments/handoffs/bulk/'
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.staff = User.objects.create_user('door', 'door@example.com', 'pw', is_staff=True)
+        cls.coach = User.objects.create_user('coach', 'coach@example.com', 'pw', is_staff=True)
+        cls.parent = User.objects.create_user('parent', 'parent@example.com', 'pw')
+        cls.hoodie = make_local_product('Team Hoodie', 10)
+        cls.tee = Product.objects.create(name='Team Tee', description='', price=30, fulfillment_type='pod')
+
+        def order(order_status, *products):
+            order = Order.objects.create(
+                user=cls.parent, status=order_status, subtotal=75, total=75, shipping_name='Guardian',
+                shipping_email='guardian@example.com', shipping_address_line1='1 Main St',
+                shipping_city='Newark', shipping_state='NJ', shipping_zip='07102',
+            )
+            items = [
+                OrderItem.objects.create(
+                    order=order, product=product, product_name=product.name, product_price=product.price,
+                    fulfillment_type=product.fulfillment_type, quantity=1,
+                )
+                for product in products
+            ]
+            return order, items
+
+        # Local items only; local and POD, POD not shipped yet; local and POD, shipped
+        cls.local_order, cls.local_items = order('paid', cls.hoodie, cls.hoodie)
+        cls.mixed_order, cls.mixed_items = order('paid', cls.hoodie, cls.tee)
+        cls.shipped_order, cls.shipped_items = order('shipped', cls.hoodie, cls.tee)
+
+    def setUp(self):
+        self.client = APIClient(HTTP_HOST='localhost')
+        self.client.force_authenticate(self.staff)
+
+    def bulk(self, items, handoff_status, **data):
+        return self.client.post(self.url, {
+            'item_ids': [item if isinstance(item, int) else item.pk for item in items],
+            'status': handoff_status,
+            **data,
+        }, format='json')
+
+    def test_bulk_delivery_completes_fulfilled_orders(self):
+        earlier = timezone.now() - timedelta(days=1)
+        handed_off = self.local_items[0]
+        OrderItem.objects.filter(pk=handed_off.pk).update(
+            handoff_status='delivered', handoff_completed_at=earlier, handoff_completed_by=self.coach,
+        )
+        items = [handed_off, self.local_items[1], self.mixed_items[0], self.shipped_items[0]]
+
+        response = self.bulk(items + [0], 'delivered', notes='Practice 1/18')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], 4)
+        self.assertEqual(response.data['not_found'], [0])
+        self.assertEqual(
+            sorted(response.data['completed_orders']),
+            sorted([self.local_order.order_number, self.shipped_order.order_number]),
+        )
+        handed_off.refresh_from_db()
+        self.assertEqual((handed_off.handoff_completed_at, handed_off.handoff_completed_by), (earlier, self.coach))
+        self.assertEqual(handed_off.handoff_notes, 'Practice 1/18')
+        self.local_items[1].refresh_from_db()
+        self.assertEqual(self.local_items[1].handoff_completed_by, self.staff)
+        self.assertEqual(
+            dict(Order.objects.values_list('pk', 'status')),
+            {self.local_order.pk: 'delivered', self.mixed_order.pk: 'paid', self.shipped_order.pk: 'delivered'},
+        )
+
+    def test_moving_back_clears_completion(self):
+        self.bulk(self.mixed_items[:1], 'delivered')
+
+        response = self.bulk(self.mixed_items[:1], 'ready')
+
+        self.assertEqual(response.status_code, 200)
+        item = OrderItem.objects.get(pk=self.mixed_items[0].pk)
+        self.assertEqual(
+            (item.handoff_status, item.handoff_completed_at, item.handoff_completed_by), ('ready', None, None)
+        )
+
+    def test_staff_only(self):
+        self.client.force_authenticate(self.parent)
+        self.assertEqual(self.bulk(self.local_items, 'delivered').status_code, 403)
+        self.assertFalse(OrderItem.objects.filter(handoff_status='delivered').exists())
+
+    def test_complete_delivered_orders_checks_every_order_at_once(self):
+        OrderItem.objects.filter(fulfillment_type='local').update(handoff_status='delivered')
+        Order.objects.filter(pk=self.shipped_order.pk).update(status='canceled')
+        order_ids = [self.local_order.pk, self.mixed_order.pk, self.shipped_order.pk]
+
+        # One aggregate query, one UPDATE
+        with self.assertNumQueries(2):
+            completed = _complete_delivered_orders(order_ids)
+
+        self.assertEqual(completed, [self.local_order.order_number])
+        self.assertEqual(
+            dict(Order.objects.values_list('pk', 'status')),
+            {self.local_order.pk: 'delivered', self.mixed_order.pk: 'paid', self.shipped_order.pk: 'canceled'},
+        )
+
+
+class PrintifyOrderReconcileTests(TestCase):
+    """reconcile_orders against a Printify client serving canned order pages."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.parent = get_user_model().objects.create_user('parent', 'parent@example.com', 'pw')
+        cls.orders = {
+            printify_id: Order.objects.create(
+                user=cls.parent, status=order_status, printify_order_id=printify_id, subtotal=30, total=30,
+                shipping_name='Guardian', shipping_email='guardian@example.com',
+                shipping_address_line1='1 Main St', shipping_city='Newark', shipping_state='NJ',
+                shipping_zip='07102',
+            )
+            for printify_id, order_status in (('pf-paid', 'paid'), ('pf-shipped', 'shipped'), ('pf-open', 'paid'))
+        }
+
+    def setUp(self):
+        self.now = timezone.now()
+        # status -> list of pages (lists of Printify orders), newest first
+        self.pages = {}
+        self.client = PrintifyClient(api_key='test-key', shop_id='shop-1')
+        self.list_orders = self.enterContext(
+            mock.patch.object(self.client, 'list_orders', side_effect=self.serve_page)
+        )
+        self.enterContext(
+            mock.patch('apps.payments.services.printify_orders.get_printify_client', return_value=self.client)
+        )
+
+    def serve_page(self, status=None, limit=10, page=1):
+        pages = self.pages.get(status, [])
+        return {'data': pages[page - 1] if page <= len(pages) else [], 'current_page': page,
+                'last_page': max(len(pages), 1)}
+
+    def printify_order(self, printify_id, minutes_ago=0, **fields):
+        at = (self.now - timedelta(minutes=minutes_ago)).isoformat()
+        return {'id': printify_id, 'created_at': at, 'updated_at': at, **fields}
+
+    def status_of(self, printify_id):
+        return Order.objects.get(printify_order_id=printify_id).status
+
+    def test_stale_listings_never_move_an_order_backwards(self):
+        shipment = {'number': '1Z999', 'url': 'https://track.example.com/1Z999', 'shipped_at': self.now.isoformat()}
+        self.pages['in-production'] = [[
+            self.printify_order('pf-paid', status='in-production'),
+            # Already shipped locally; the listing is behind
+            self.printify_order('pf-shipped', status='in-production', shipments=[shipment]),
+        ]]
+
+        stats = reconcile_orders()
+
+        self.assertEqual(stats['changes'], {
+            self.orders['pf-paid'].order_number: 'processing',
+            self.orders['pf-shipped'].order_number: 'shipped',
+        })
+        self.assertEqual(self.status_of('pf-paid'), 'processing')
+        shipped = Order.objects.get(printify_order_id='pf-shipped')
+        self.assertEqual((shipped.status, shipped.tracking_number), ('shipped', '1Z999'))
+
+    def test_partial_page_ends_the_listing(self):
+        # Three orders, fewer than a full page; only one is ours
+        self.pages['fulfilled'] = [[
+            self.printify_order('pf-open', status='fulfilled'),
+            self.printify_order('pf-elsewhere-1'),
+            self.printify_order('pf-elsewhere-2'),
+        ]]
+
+        stats = reconcile_orders(page_size=10)
+
+        self.assertEqual((stats['pages'], stats['seen'], stats['matched'], stats['updated']), (1, 3, 1, 1))
+        self.assertEqual(self.status_of('pf-open'), 'shipped')
+        fulfilled_calls = [call for call in self.list_orders.call_args_list if call.kwargs['status'] == 'fulfilled']
+        self.assertEqual([call.kwargs['page'] for call in fulfilled_calls], [1])
+        self.assertIsNotNone(PrintifyOrderSync.objects.get(shop_id='shop-1').last_synced_at)
+
+    def test_paging_stops_past_the_oldest_open_order(self):
+        self.pages['canceled'] = [
+            [self.printify_order('pf-new')],
+            [self.printify_order('pf-old', minutes_ago=60 * 24)],
+            [self.printify_order('pf-older', minutes_ago=60 * 48)],
+        ]
+
+        reconcile_orders(page_size=1)
+
+        canceled_calls = [call for call in self.list_orders.call_args_list if call.kwargs['status'] == 'canceled']
+        self.assertEqual([call.kwargs['page'] for call in canceled_calls], [1, 2])
+
+    def test_full_ignores_the_checkpoint(self):
+        PrintifyOrderSync.objects.create(shop_id='shop-1', last_synced_at=self.now + timedelta(minutes=1))
+        self.pages['sending-to-production'] = [[self.printify_order('pf-paid', status='sending-to-production')]]
+
+        incremental = reconcile_orders()
+        self.assertEqual((incremental['seen'], incremental['updated']), (1, 0))
+        self.assertEqual(self.status_of('pf-paid'), 'paid')
+
+        full = reconcile_orders(full=True)
+        self.assertIsNone(full['since'])
+        self.assertEqual(full['updated'], 1)
+        self.assertEqual(self.status_of('pf-paid'), 'processing')
+
+
+@override_settings(STRIPE_WEBHOOK_SECRET='whsec_test')
+class StripeWebhookTests(QueryBudgetMixin, TestCase):
+    """checkout.session.completed for a bag checkout"""
+
+    # payment, bag items with their products, savepoint pair, order, one
+    # insert for every item, one stock UPDATE, bag item delete; however
+    # many items the bag holds
+    WEBHOOK_BUDGET = 8
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.parent = get_user_model().objects.create_user('parent', 'parent@example.com', 'pw')
+        cls.bag = Bag.objects.create(user=cls.parent)
+        cls.items = [
+            BagItem.objects.create(
+                bag=cls.bag, quantity=1,
+                product=Product.objects.create(
+                    name=f'Team Tee {index}', description='', price=30, fulfillment_type='pod',
+                ),
+            )
+            for index in range(4)
+        ]
+        cls.items.append(BagItem.objects.create(
+            bag=cls.bag, quantity=2,
+            product=Product.objects.create(name='Team Hoodie', description='', price=45, fulfillment_type='local'),
+        ))
+
+    def post_completed(self):
+        event = {
+            'type': 'checkout.session.completed',
+            'data': {'object': {
+                'id': 'cs_test_bag', 'payment_intent': 'pi_bag', 'currency': 'usd',
+                'amount_subtotal': 21000, 'amount_total': 21000, 'total_details': {},
+                'customer_details': {'email': 'parent@example.com', 'name': 'Parent'},
+                'metadata': {
+                    'user_id': str(self.parent.pk), 'bag_id': str(self.bag.pk),
+                    'item_ids': ','.join(str(item.pk) for item in self.items),
+                },
+            }},
+        }
+        with mock.patch('stripe.Webhook.construct_event', return_value=event):
+            return APIClient(HTTP_HOST='localhost').post(
+                '/api/payments/webhook/stripe/', json.dumps(event), content_type='application/json',
+                HTTP_STRIPE_SIGNATURE='t=1,v1=x',
+            )
+
+    @mock.patch('apps.payments.views._submit_printify_order')
+    def test_order_is_created_within_a_fixed_query_budget(self, submit):
+        with self.assertQueryBudget(self.WEBHOOK_BUDGET, 'stripe_webhook'):
+            response = self.post_completed()
+
+        self.assertEqual(response.status_code, 200)
+        order = Order.objects.get(stripe_session_id='cs_test_bag')
+        self.assertEqual((order.status, order.total, order.items.count()), ('paid', 210, 5))
+        self.assertTrue(Payment.objects.filter(stripe_payment_intent_id='pi_bag').exists())
+        self.assertFalse(BagItem.objects.filter(bag=self.bag).exists())
+
+    @mock.patch('apps.payments.views._submit_printify_order')
+    def test_printify_is_called_only_after_commit(self, submit):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.post_completed()
+            submit.assert_not_called()
+
+        self.assertTrue(callbacks)
+        submit.assert_not_called()
+        for callback in callbacks:
+            callback()
+
+        submit.assert_called_once()
+        order, pod_items = submit.call_args.args
+        self.assertEqual(order.stripe_session_id, 'cs_test_bag')
+        self.assertEqual(sorted(item.product_name for item in pod_items), [f'Team Tee {index}' for index in range(4)])
@@ -17,6 +17,7 @@ from .views import (
     calculate_shipping,
     HandoffListView,
     HandoffUpdateView,
+    HandoffBulkUpdateView,
     PrintifyPublishView,
     PrintifyUnpublishView,
     PrintifyProductsView,
@@ -47,6 +48,7 @@ urlpatterns = [
     path('orders/<str:order_number>/', get_order, name='order-detail'),
     # Handoff management (staff only)
     path('handoffs/', HandoffListView.as_view(), name='handoff-list'),
+    path('handoffs/bulk/', HandoffBulkUpdateView.as_view(), name='handoff-bulk-update'),
     path('handoffs/<int:item_id>/', HandoffUpdateView.as_view(), name='handoff-update'),
     # Printify admin (superuser only)
     path('admin/printify/products/', PrintifyProductsView.as_view(), name='printify-products'),
@@ -3,16 +3,31 @@ from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework.pagination import PageNumberPagination
 from django_filters.rest_framework import DjangoFilterBackend
 from django.conf import settings
 from django.views.decorators.csrf import csrf_exempt
 from django.http import HttpResponse
 from django.db import transaction
+from django.db.models import Count, Prefetch, Q, prefetch_related_objects
 import stripe
 import uuid
+from decimal import Decimal
 
 from .models import Product, SubscriptionPlan, Payment, Bag, BagItem, Order, OrderItem
 from .services.printify_client import get_printify_client, PrintifyError
+from .services.printify_events import PRODUCT_EVENT_TYPES, record_product_event
+from .services.printify_sync import sync_product_variants, upsert_product_from_printify
+from .services.handoffs import publish_handoff
+from .services.inventory import (
+    InsufficientStock,
+    attach_checkout_session,
+    commit_hold,
+    consume_stock,
+    get_reservation_ttl,
+    release_hold,
+    reserve_stock,
+)
 import logging
 
 logger = logging.getLogger(__name__)
@@ -27,6 +42,9 @@ from .serializers import (
     OrderSerializer,
     HandoffItemSerializer,
     HandoffUpdateSerializer,
+    HandoffBulkUpdateSerializer,
+    PRODUCT_PREFETCH,
+    ORDER_PREFETCH,
 )
 
 # Initialize Stripe
@@ -54,7 +72,7 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
                with random non-featured products if there aren't enough
                featured products. Useful for homepage displays.
     """
-    queryset = Product.objects.filter(is_active=True)
+    queryset = Product.objects.filter(is_active=True).prefetch_related(*PRODUCT_PREFETCH)
     serializer_class = ProductSerializer
     lookup_field = 'slug'
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -80,7 +98,7 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
             if fill_to and fill_to > 0:
                 # Get featured products
                 featured_products = list(
-                    Product.objects.filter(is_active=True, featured=True)
+                    self.get_queryset().filter(featured=True)
                 )
                 featured_count = len(featured_products)
 
@@ -91,7 +109,7 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
 
                     # Get random non-featured products (excluding already-featured ones)
                     random_products = list(
-                        Product.objects.filter(is_active=True, featured=False)
+                        self.get_queryset().filter(featured=False)
                         .exclude(id__in=featured_ids)
                         .order_by('?')[:needed]
                     )
@@ -148,39 +166,54 @@ def create_product_checkout(request):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        # Check stock
-        if product.stock_quantity < quantity:
+        # Hold stock until the checkout completes or expires
+        try:
+            hold_id = reserve_stock([(product, quantity)])
+        except InsufficientStock:
             return Response(
                 {'error': 'Insufficient stock'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        session_params = {}
+        if hold_id:
+            session_params['expires_at'] = int((timezone.now() + get_reservation_ttl()).timestamp())
+
         # Create Stripe checkout session
         # Note: payment_method_types is omitted to use Dashboard-configured methods
-        checkout_session = stripe.checkout.Session.create(
-            line_items=[{
-                'price_data': {
-                    'currency': 'usd',
-                    'unit_amount': int(product.price * 100),  # Convert to cents
-                    'product_data': {
-                        'name': product.name,
-                        'description': product.description,
-                        # Prefer primary image (supports Printify variant images)
-                        'images': [product.primary_image_url] if product.primary_image_url else [],
+        try:
+            checkout_session = stripe.checkout.Session.create(
+                line_items=[{
+                    'price_data': {
+                        'currency': 'usd',
+                        'unit_amount': int(product.price * 100),  # Convert to cents
+                        'product_data': {
+                            'name': product.name,
+                            'description': product.description,
+                            # Prefer primary image (supports Printify variant images)
+                            'images': [product.primary_image_url] if product.primary_image_url else [],
+                        },
                     },
+                    'quantity': quantity,
+                }],
+                mode='payment',
+                success_url=success_url,
+                cancel_url=cancel_url,
+                client_reference_id=f"product_{product.id}",
+                metadata={
+                    'product_id': product.id,
+                    'user_id': request.user.id if request.user.is_authenticated else None,
+                    'quantity': quantity,
+                    'reservation_id': str(hold_id) if hold_id else None,
                 },
-                'quantity': quantity,
-            }],
-            mode='payment',
-            success_url=success_url,
-            cancel_url=cancel_url,
-            client_reference_id=f"product_{product.id}",
-            metadata={
-                'product_id': product.id,
-                'user_id': request.user.id if request.user.is_authenticated else None,
-                'quantity': quantity,
-            }
-        )
+                **session_params,
+            )
+        except Exception:
+            if hold_id:
+                release_hold(hold_id)
+            raise
+
+        attach_checkout_session(hold_id, checkout_session.id)
 
         return Response({
             'session_id': checkout_session.id,
@@ -328,6 +361,11 @@ def stripe_webhook(request):
             payment_method=session.get('payment_method_types', ['card'])[0],
         )
 
+        # Stock for local products was held at checkout; make it permanent
+        reservation_id = metadata.get('reservation_id')
+        if reservation_id:
+            commit_hold(reservation_id)
+
         # Get bag items being purchased
         item_ids_str = metadata.get('item_ids', '')
         bag_id = metadata.get('bag_id')
@@ -338,8 +376,10 @@ def stripe_webhook(request):
             item_ids = [int(id) for id in item_ids_str.split(',') if id]
             if item_ids:
                 try:
-                    bag_items = BagItem.objects.filter(id__in=item_ids, bag_id=bag_id).select_related('product')
-                    if bag_items.exists() and user_id:
+                    bag_items = list(
+                        BagItem.objects.filter(id__in=item_ids, bag_id=bag_id).select_related('product')
+                    )
+                    if bag_items and user_id:
                         # Get shipping details from Stripe session
                         shipping = session.get('shipping_details', {})
                         shipping_address = shipping.get('address', {}) if shipping else {}
@@ -366,10 +406,9 @@ def stripe_webhook(request):
                                 shipping_country=shipping_address.get('country', 'US'),
                             )
 
-                            # Create OrderItems from bag items
-                            pod_items = []
-                            for bag_item in bag_items:
-                                order_item = OrderItem.objects.create(
+                            # Create all OrderItems from bag items in one query
+                            order_items = OrderItem.objects.bulk_create([
+                                OrderItem(
                                     order=order,
                                     product=bag_item.product,
                                     product_name=bag_item.product.name,
@@ -379,21 +418,29 @@ def stripe_webhook(request):
                                     quantity=bag_item.quantity,
                                     fulfillment_type=bag_item.product.fulfillment_type,
                                 )
-
-                                # Track POD items for Printify submission
-                                if bag_item.product.is_pod:
-                                    pod_items.append(order_item)
-
-                                # Update stock for local products
-                                if bag_item.product.manage_inventory:
-                                    bag_item.product.stock_quantity = max(
-                                        0, bag_item.product.stock_quantity - bag_item.quantity
-                                    )
-                                    bag_item.product.save()
-
-                            # Submit POD items to Printify (if any)
+                                for bag_item in bag_items
+                            ])
+
+                            # Track POD items for Printify submission
+                            pod_items = [item for item in order_items if item.product.is_pod]
+
+                            # Checkouts created before stock holds existed still
+                            # need their stock taken here (one UPDATE for all SKUs)
+                            if not reservation_id:
+                                quantities = {}
+                                for bag_item in bag_items:
+                                    if bag_item.product.manage_inventory:
+                                        quantities[bag_item.product_id] = (
+                                            quantities.get(bag_item.product_id, 0) + bag_item.quantity
+                                        )
+                                consume_stock(quantities)
+
+                            # Submit POD items to Printify once the order is committed,
+                            # so the API round-trip does not hold the transaction open
                             if pod_items:
-                                _submit_printify_order(order, pod_items)
+                                transaction.on_commit(
+                                    lambda: _submit_printify_order(order, pod_items)
+                                )
 
                             logger.info(f"Order {order.order_number} created with {len(bag_items)} items ({len(pod_items)} POD)")
 
@@ -414,7 +461,18 @@ def stripe_webhook(request):
         # Handle event registration payments
         if metadata.get('type') == 'event_registration':
             registration_id = metadata.get('registration_id')
-            if registration_id:
+            registration_ids = [int(id) for id in (metadata.get('registration_ids') or '').split(',') if id]
+            if registration_ids:
+                # Roster checkout: one payment covers every registration
+                from apps.registrations.models import EventRegistration
+                amount_total = Decimal(session.get('amount_total') or 0) / 100
+                EventRegistration.objects.filter(id__in=registration_ids).update(
+                    payment_status='completed',
+                    stripe_payment_intent_id=session.get('payment_intent', ''),
+                    amount_paid=(amount_total / len(registration_ids)).quantize(Decimal('0.01')),
+                    updated_at=timezone.now(),
+                )
+            elif registration_id:
                 from apps.registrations.models import EventRegistration
                 try:
                     registration = EventRegistration.objects.get(id=registration_id)
@@ -425,6 +483,22 @@ def stripe_webhook(request):
                 except EventRegistration.DoesNotExist:
                     pass  # Log this in production
 
+    # Abandoned checkout: return held stock and roster spots right away
+    elif event['type'] == 'checkout.session.expired':
+        session = event['data']['object']
+        metadata = session.get('metadata') or {}
+        reservation_id = metadata.get('reservation_id')
+        if reservation_id:
+            released = release_hold(reservation_id)
+            logger.info(f"Checkout {session.get('id')} expired, released {released} stock holds")
+        registration_ids = [int(id) for id in (metadata.get('registration_ids') or '').split(',') if id]
+        if registration_ids:
+            from apps.registrations.models import EventRegistration
+            released, _ = EventRegistration.objects.filter(
+                id__in=registration_ids, payment_status='pending'
+            ).delete()
+            logger.info(f"Checkout {session.get('id')} expired, released {released} roster registrations")
+
     return HttpResponse(status=200)
 
 
@@ -437,6 +511,9 @@ def _submit_printify_order(order: Order, pod_items: list):
 
     In development (PRINTIFY_DRY_RUN=true), generates mock order IDs without
     calling the actual Printify API.
+
+    Called from transaction.on_commit in stripe_webhook, so the order and its
+    items are already saved when the API request is made.
     """
     import uuid
 
@@ -444,12 +521,12 @@ def _submit_printify_order(order: Order, pod_items: list):
     if getattr(settings, 'PRINTIFY_DRY_RUN', False):
         mock_order_id = f"mock-{uuid.uuid4().hex[:12]}"
         order.printify_order_id = mock_order_id
-        order.save()
+        order.save(update_fields=['printify_order_id', 'updated_at'])
 
         # Generate mock line item IDs for each POD item
         for i, item in enumerate(pod_items):
             item.printify_line_item_id = f"mock-line-{i+1}"
-            item.save()
+        OrderItem.objects.bulk_update(pod_items, ['printify_line_item_id'])
 
         logger.info(f"[DRY RUN] Mock Printify order created: {mock_order_id} for {order.order_number}")
         return mock_order_id
@@ -501,14 +578,16 @@ def _submit_printify_order(order: Order, pod_items: list):
 
         # Save Printify order ID
         order.printify_order_id = printify_response.get('id', '')
-        order.save()
+        order.save(update_fields=['printify_order_id', 'updated_at'])
 
-        # Update individual order items with Printify line item IDs
+        # Update order items with Printify line item IDs in one query
         printify_line_items = printify_response.get('line_items', [])
-        for i, item in enumerate(pod_items):
-            if i < len(printify_line_items):
-                item.printify_line_item_id = printify_line_items[i].get('id', '')
-                item.save()
+        matched_items = []
+        for item, line_item in zip(pod_items, printify_line_items):
+            item.printify_line_item_id = line_item.get('id', '')
+            matched_items.append(item)
+        if matched_items:
+            OrderItem.objects.bulk_update(matched_items, ['printify_line_item_id'])
 
         logger.info(f"Printify order created: {order.printify_order_id} for {order.order_number}")
 
@@ -520,6 +599,17 @@ def _submit_printify_order(order: Order, pod_items: list):
         logger.error(f"Unexpected error submitting to Printify for {order.order_number}: {e}")
 
 
+def serialize_bag(bag) -> dict:
+    """Serialize a bag with its items' products, images and variants prefetched"""
+    prefetch_related_objects([bag], Prefetch(
+        'items',
+        queryset=BagItem.objects.select_related('product').prefetch_related(
+            *[f'product__{lookup}' for lookup in PRODUCT_PREFETCH]
+        ),
+    ))
+    return BagSerializer(bag).data
+
+
 def get_or_create_bag(request):
     """Helper to get or create a bag for the current user/session"""
     if request.user.is_authenticated:
@@ -548,8 +638,7 @@ class BagAPIView(APIView):
     def get(self, request):
         """Get current bag"""
         bag = get_or_create_bag(request)
-        serializer = BagSerializer(bag)
-        response_data = serializer.data
+        response_data = serialize_bag(bag)
 
         # Include session key for guest users
         if not request.user.is_authenticated:
@@ -585,8 +674,7 @@ class BagAPIView(APIView):
             bag_item.save()
 
         # Return updated bag
-        bag_serializer = BagSerializer(bag)
-        response_data = bag_serializer.data
+        response_data = serialize_bag(bag)
         if not request.user.is_authenticated:
             response_data['session_key'] = bag.session_key
 
@@ -639,8 +727,7 @@ class BagItemAPIView(APIView):
             bag_item.save()
 
         # Return updated bag
-        bag_serializer = BagSerializer(bag)
-        response_data = bag_serializer.data
+        response_data = serialize_bag(bag)
         if not request.user.is_authenticated:
             response_data['session_key'] = bag.session_key
 
@@ -657,8 +744,7 @@ class BagItemAPIView(APIView):
             pass  # Item already removed, that's fine
 
         # Return updated bag
-        bag_serializer = BagSerializer(bag)
-        response_data = bag_serializer.data
+        response_data = serialize_bag(bag)
         if not request.user.is_authenticated:
             response_data['session_key'] = bag.session_key
 
@@ -744,6 +830,7 @@ def bag_checkout(request):
         # Build line items from bag
         line_items = []
         checkout_item_ids = []  # Track which items are being checked out
+        checkout_items = []
         for item in bag_items:
             if not item.is_available:
                 return Response(
@@ -751,14 +838,6 @@ def bag_checkout(request):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # Check stock
-            if item.product.manage_inventory:
-                if item.quantity > item.product.stock_quantity:
-                    return Response(
-                        {'error': f'Only {item.product.stock_quantity} of {item.product.name} available'},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-
             # Build product name with variant info
             product_name = item.product.name
             variant_parts = []
@@ -784,25 +863,48 @@ def bag_checkout(request):
                 'quantity': item.quantity,
             })
             checkout_item_ids.append(item.id)
+            checkout_items.append(item)
+
+        # Hold stock for local products until the checkout completes or expires
+        try:
+            hold_id = reserve_stock((item.product, item.quantity) for item in checkout_items)
+        except InsufficientStock as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        session_params = {}
+        if hold_id:
+            session_params['expires_at'] = int((timezone.now() + get_reservation_ttl()).timestamp())
 
         # Create Stripe checkout session
         # Note: payment_method_types is omitted to use Dashboard-configured methods
         # (Google Pay, Apple Pay, PayPal, etc. - see documentation/STRIPE_PAYMENT_METHODS.md)
-        checkout_session = stripe.checkout.Session.create(
-            line_items=line_items,
-            mode='payment',
-            success_url=success_url,
-            cancel_url=cancel_url,
-            shipping_address_collection={
-                'allowed_countries': ['US'],
-            },
-            metadata={
-                'bag_id': bag.id,
-                'user_id': request.user.id if request.user.is_authenticated else None,
-                'session_key': bag.session_key if not request.user.is_authenticated else None,
-                'item_ids': ','.join(map(str, checkout_item_ids)),  # Store checked-out item IDs
-            }
-        )
+        try:
+            checkout_session = stripe.checkout.Session.create(
+                line_items=line_items,
+                mode='payment',
+                success_url=success_url,
+                cancel_url=cancel_url,
+                shipping_address_collection={
+                    'allowed_countries': ['US'],
+                },
+                metadata={
+                    'bag_id': bag.id,
+                    'user_id': request.user.id if request.user.is_authenticated else None,
+                    'session_key': bag.session_key if not request.user.is_authenticated else None,
+                    'item_ids': ','.join(map(str, checkout_item_ids)),  # Store checked-out item IDs
+                    'reservation_id': str(hold_id) if hold_id else None,
+                },
+                **session_params,
+            )
+        except Exception:
+            if hold_id:
+                release_hold(hold_id)
+            raise
+
+        attach_checkout_session(hold_id, checkout_session.id)
 
         return Response({
             'session_id': checkout_session.id,
@@ -917,7 +1019,7 @@ def merge_bag(request):
     except Bag.DoesNotExist:
         # No guest bag to merge, just return user's bag
         user_bag, _ = Bag.objects.get_or_create(user=request.user)
-        return Response(BagSerializer(user_bag).data)
+        return Response(serialize_bag(user_bag))
 
     # Get or create user bag
     user_bag, _ = Bag.objects.get_or_create(user=request.user)
@@ -926,7 +1028,7 @@ def merge_bag(request):
     with transaction.atomic():
         user_bag.merge_from_guest_bag(guest_bag)
 
-    return Response(BagSerializer(user_bag).data)
+    return Response(serialize_bag(user_bag))
 
 
 @api_view(['GET'])
@@ -937,7 +1039,7 @@ def get_user_orders(request):
 
     Returns a paginated list of orders with their items and tracking info.
     """
-    orders = Order.objects.filter(user=request.user).prefetch_related('items', 'items__product')
+    orders = Order.objects.filter(user=request.user).prefetch_related(*ORDER_PREFETCH)
     serializer = OrderSerializer(orders, many=True)
     return Response(serializer.data)
 
@@ -953,7 +1055,7 @@ def get_order(request, order_number):
     """
     try:
         # Look up order by order_number (case-insensitive)
-        order = Order.objects.prefetch_related('items', 'items__product').get(
+        order = Order.objects.prefetch_related(*ORDER_PREFETCH).get(
             order_number__iexact=order_number
         )
 
@@ -1104,6 +1206,10 @@ def printify_webhook(request):
     - product:publish:started - Product published, auto-create and sync
     - product:deleted - Product deleted, mark as inactive
 
+    Product events are only recorded here and return immediately. The
+    `process_printify_events` worker collapses repeated events per product
+    and syncs each product once (see services/printify_events.py).
+
     Configure webhook in Printify Dashboard:
     Settings → Webhooks → Add endpoint
     URL: https://api.njstarselite.com/api/payments/webhook/printify/
@@ -1111,9 +1217,6 @@ def printify_webhook(request):
     """
     import hashlib
     import hmac
-    from django.utils.text import slugify
-    from .services.printify_sync import sync_product_variants
-    from .services.printify_client import get_printify_client
 
     # Verify webhook signature (optional but recommended)
     # Note: Printify sends signature in X-Pfy-Signature header as hex-encoded HMAC-SHA256
@@ -1150,13 +1253,14 @@ def printify_webhook(request):
         logger.info(f"Printify webhook received: {event_type}")
 
         # ============================================================
-        # PRODUCT EVENTS - Auto-sync when products are published
+        # PRODUCT EVENTS - Queued for the debounced sync worker
         # ============================================================
-        if event_type == 'product:publish:started':
-            return _handle_product_publish(resource)
-
-        elif event_type == 'product:deleted':
-            return _handle_product_deleted(resource)
+        if event_type in PRODUCT_EVENT_TYPES:
+            if not resource.get('id'):
+                logger.warning("Product webhook missing product ID")
+                return HttpResponse(status=200)
+            record_product_event(event_type, resource)
+            return HttpResponse(status=200)
 
         # ============================================================
         # ORDER EVENTS - Update order status and tracking
@@ -1173,145 +1277,6 @@ def printify_webhook(request):
         return HttpResponse(status=500)
 
 
-def _detect_category_from_tags(tags: list) -> str:
-    """
-    Detect product category from Printify tags.
-    Maps Printify's tag system to our categories.
-    """
-    tags_lower = [t.lower() for t in tags]
-    tags_str = ' '.join(tags_lower)
-
-    # Map Printify tags to our categories (check most specific first)
-    if 'hoodies' in tags_lower or 'hoodie' in tags_str:
-        return 'hoodie'
-    if 't-shirts' in tags_lower or 'tee' in tags_str:
-        return 'tee'
-    if 'long sleeve' in tags_str:
-        return 'longsleeve'
-    if 'sweater' in tags_str or 'sweatshirt' in tags_str:
-        return 'sweater'
-    if 'tank tops' in tags_lower or 'jersey' in tags_str:
-        return 'jersey'
-    if 'shorts' in tags_lower:
-        return 'shorts'
-    if 'hats' in tags_lower or 'caps' in tags_lower or 'hat' in tags_str or 'beanie' in tags_str:
-        return 'hat'
-    if 'bags' in tags_lower or 'backpack' in tags_str:
-        return 'bag'
-
-    # Default fallback
-    return 'apparel'
-
-
-def _handle_product_publish(resource: dict):
-    """
-    Handle product:publish:started webhook - auto-create product and sync variants.
-
-    When a product is published in Printify, this:
-    1. Creates a new Product record (or updates existing)
-    2. Syncs all variants, prices, and images from Printify
-    """
-    import html
-    import re
-    from django.utils.text import slugify
-    from .services.printify_sync import sync_product_variants
-    from .services.printify_client import get_printify_client
-
-    printify_product_id = resource.get('id', '')
-    if not printify_product_id:
-        logger.warning("Product webhook missing product ID")
-        return HttpResponse(status=200)
-
-    logger.info(f"Auto-syncing published Printify product: {printify_product_id}")
-
-    try:
-        # Fetch full product data from Printify API
-        client = get_printify_client()
-        if not client.is_configured:
-            logger.error("Printify API not configured - cannot auto-sync product")
-            return HttpResponse(status=200)
-
-        printify_data = client.get_product(printify_product_id)
-
-        title = printify_data.get('title', f'Product {printify_product_id}')
-        description = printify_data.get('description', '')
-
-        # Clean HTML tags and decode entities from description
-        if description:
-            description = re.sub(r'<[^>]+>', '', description)
-            description = html.unescape(description)  # Decode &#39; → '
-
-        # Generate unique slug
-        base_slug = slugify(title)
-        slug = base_slug
-        counter = 1
-        while Product.objects.filter(slug=slug).exclude(printify_product_id=printify_product_id).exists():
-            slug = f"{base_slug}-{counter}"
-            counter += 1
-
-        # Get base price from first enabled variant (Printify prices are in cents)
-        variants = printify_data.get('variants', [])
-        base_price = 0
-        for v in variants:
-            if v.get('is_enabled') and v.get('price'):
-                base_price = v['price'] / 100
-                break
-
-        # Detect category from Printify tags
-        tags = printify_data.get('tags', [])
-        category = _detect_category_from_tags(tags)
-
-        # Create or update the product
-        product, created = Product.objects.update_or_create(
-            printify_product_id=printify_product_id,
-            defaults={
-                'name': title,
-                'slug': slug,
-                'description': description,
-                'price': base_price,
-                'fulfillment_type': 'pod',
-                'manage_inventory': False,  # POD products are always in stock
-                'is_active': True,
-                'category': category,
-            }
-        )
-
-        action = "Created" if created else "Updated"
-        logger.info(f"{action} product '{product.name}' from Printify webhook")
-
-        # Sync variants, prices, and images
-        sync_stats = sync_product_variants(product)
-
-        logger.info(
-            f"Product sync complete for '{product.name}': "
-            f"variants({sync_stats['created']}+/{sync_stats['updated']}~), "
-            f"images({sync_stats.get('images_created', 0)}+)"
-        )
-
-        return HttpResponse(status=200)
-
-    except Exception as e:
-        logger.error(f"Error auto-syncing Printify product {printify_product_id}: {e}", exc_info=True)
-        return HttpResponse(status=200)  # Return 200 to avoid Printify retries
-
-
-def _handle_product_deleted(resource: dict):
-    """Handle product:deleted webhook - mark product as inactive."""
-    printify_product_id = resource.get('id', '')
-    if not printify_product_id:
-        return HttpResponse(status=200)
-
-    try:
-        product = Product.objects.get(printify_product_id=printify_product_id)
-        product.is_active = False
-        product.save()
-        logger.info(f"Deactivated product '{product.name}' (deleted in Printify)")
-    except Product.DoesNotExist:
-        logger.debug(f"Product not found for deleted Printify ID: {printify_product_id}")
-
-    return HttpResponse(status=200)
-
-
 def _handle_order_event(event_type: str, resource: dict):
     """Handle order-related webhook events."""
     printify_order_id = resource.get('id', '')
@@ -1367,6 +1332,42 @@ def _handle_order_event(event_type: str, resource: dict):
 # HANDOFF MANAGEMENT (Local Product Delivery)
 # =============================================================================
 
+# Orders whose local items can still be handed off
+HANDOFF_ORDER_STATUSES = ['paid', 'processing', 'shipped']
+
+
+def _complete_delivered_orders(order_ids) -> list:
+    """
+    Mark orders delivered once every item has been fulfilled.
+
+    Checks all given orders with one aggregate query (local items still
+    awaiting handoff, POD items) and updates the complete ones with one
+    UPDATE. Returns the order numbers marked delivered.
+    """
+    local = Q(items__fulfillment_type='local')
+    candidates = Order.objects.filter(
+        pk__in=order_ids,
+        status__in=HANDOFF_ORDER_STATUSES,
+    ).annotate(
+        local_pending=Count('items', filter=local & ~Q(items__handoff_status='delivered')),
+        pod_items=Count('items', filter=Q(items__fulfillment_type='pod')),
+    ).values_list('pk', 'order_number', 'status', 'local_pending', 'pod_items')
+
+    # POD items count as fulfilled once Printify has shipped the order
+    complete = {
+        pk: order_number
+        for pk, order_number, order_status, local_pending, pod_items in candidates
+        if local_pending == 0 and (pod_items == 0 or order_status == 'shipped')
+    }
+
+    if complete:
+        Order.objects.filter(pk__in=complete).update(status='delivered', updated_at=timezone.now())
+        for order_number in complete.values():
+            logger.info(f"Order {order_number} fully delivered (all items handed off)")
+
+    return list(complete.values())
+
+
 class HandoffListView(APIView):
     """
     List local items pending handoff (staff only).
@@ -1374,6 +1375,8 @@ class HandoffListView(APIView):
     GET /api/payments/handoffs/?status=pending
     Query params:
         - status: pending (default), ready, delivered, all
+        - page: optional; when given the response is paginated
+          (PAGE_SIZE items, DRF's count/next/previous/results format)
     """
     permission_classes = [IsAuthenticated]
 
@@ -1389,9 +1392,10 @@ class HandoffListView(APIView):
         status_filter = request.query_params.get('status', 'pending')
 
         # Query local delivery items from paid orders
+        # (served by orderitem_handoff_queue_idx)
         items = OrderItem.objects.filter(
             fulfillment_type='local',
-            order__status__in=['paid', 'processing', 'shipped'],  # Active orders
+            order__status__in=HANDOFF_ORDER_STATUSES,  # Active orders
         )
 
         # Apply status filter
@@ -1399,7 +1403,13 @@ class HandoffListView(APIView):
             items = items.filter(handoff_status=status_filter)
 
         # Order by oldest first
-        items = items.select_related('order', 'handoff_completed_by').order_by('order__created_at')
+        items = items.select_related('order', 'handoff_completed_by').order_by('order__created_at', 'id')
+
+        # The deliveries page expects a plain list; paginate only on request
+        if 'page' in request.query_params:
+            paginator = PageNumberPagination()
+            page = paginator.paginate_queryset(items, request, view=self)
+            return paginator.get_paginated_response(HandoffItemSerializer(page, many=True).data)
 
         serializer = HandoffItemSerializer(items, many=True)
         return Response(serializer.data)
@@ -1451,34 +1461,81 @@ class HandoffUpdateView(APIView):
             item.handoff_completed_at = None
             item.handoff_completed_by = None
 
-        item.save()
+        item.save(update_fields=[
+            'handoff_status', 'handoff_notes', 'handoff_completed_at', 'handoff_completed_by',
+        ])
 
         # Check if all local items in order are delivered
-        self._update_order_status_if_complete(item.order)
+        if new_status == 'delivered':
+            _complete_delivered_orders([item.order_id])
 
         return Response(HandoffItemSerializer(item).data)
 
-    def _update_order_status_if_complete(self, order):
-        """Update order status to delivered if all items are fulfilled."""
-        local_items = order.items.filter(fulfillment_type='local')
-        pod_items = order.items.filter(fulfillment_type='pod')
 
-        # Check if all local items are delivered
-        all_local_delivered = all(
-            i.handoff_status == 'delivered' for i in local_items
-        ) if local_items.exists() else True
+class HandoffBulkUpdateView(APIView):
+    """
+    Update the handoff status of many local delivery items (staff only).
 
-        # Check if POD items are shipped/delivered (or none exist)
-        all_pod_fulfilled = (
-            not pod_items.exists() or
-            order.status in ['shipped', 'delivered']
-        )
+    POST /api/payments/handoffs/bulk/
+    Body: { "item_ids": [12, 13, 20], "status": "delivered", "notes": "Practice 1/18" }
 
-        # If everything is complete, mark order as delivered
-        if all_local_delivered and all_pod_fulfilled:
-            order.status = 'delivered'
-            order.save()
-            logger.info(f"Order {order.order_number} fully delivered (all items handed off)")
+    Notes are only overwritten when provided. Items already delivered keep
+    their completion time and staff member. Orders whose items are now all
+    fulfilled are marked delivered.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        # Require staff access
+        if not request.user.is_staff:
+            return Response(
+                {'error': 'Staff access required'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        serializer = HandoffBulkUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        item_ids = set(data['item_ids'])
+        items = OrderItem.objects.filter(pk__in=item_ids, fulfillment_type='local')
+
+        new_status = data['status']
+        fields = {'handoff_status': new_status}
+        if 'notes' in data:
+            fields['handoff_notes'] = data['notes']
+
+        if new_status != 'delivered':
+            # Reset completion fields if moving back to non-delivered status
+            fields['handoff_completed_at'] = None
+            fields['handoff_completed_by'] = None
+
+        with transaction.atomic():
+            order_ids = set(items.values_list('order_id', flat=True))
+            if new_status == 'delivered':
+                # Items already delivered keep when and by whom they were handed off
+                items.exclude(handoff_status='delivered').update(
+                    handoff_completed_at=timezone.now(),
+                    handoff_completed_by=request.user,
+                )
+            updated = items.update(**fields)
+            completed_orders = _complete_delivered_orders(order_ids) if new_status == 'delivered' else []
+
+        updated_items = OrderItem.objects.filter(
+            pk__in=item_ids, fulfillment_type='local'
+        ).select_related('order', 'handoff_completed_by').order_by('order__created_at', 'id')
+        items_data = HandoffItemSerializer(updated_items, many=True).data
+
+        # QuerySet.update() sends no post_save, so push the changes here
+        for item in updated_items:
+            publish_handoff(item)
+
+        return Response({
+            'updated': updated,
+            'not_found': sorted(item_ids - {item['id'] for item in items_data}),
+            'completed_orders': completed_orders,
+            'items': items_data,
+        })
 
 
 # =============================================================================
@@ -1648,8 +1705,6 @@ class PrintifySyncView(PrintifyAdminView):
     """
 
     def post(self, request):
-        from .services.printify_sync import sync_product_variants
-
         # Check superuser
         error = self._require_superuser(request)
         if error:
@@ -1670,53 +1725,10 @@ class PrintifySyncView(PrintifyAdminView):
             )
 
         try:
-            # Fetch product from Printify
+            # Fetch once and reuse the payload for the variant/image sync
             printify_data = client.get_product(product_id)
-
-            # Use the webhook handler logic to create/update the product
-            import html
-            import re
-            from django.utils.text import slugify
-
-            title = printify_data.get('title', f'Product {product_id}')
-            description = printify_data.get('description', '')
-
-            if description:
-                description = re.sub(r'<[^>]+>', '', description)
-                description = html.unescape(description)
-
-            base_slug = slugify(title)
-            slug = base_slug
-            counter = 1
-            while Product.objects.filter(slug=slug).exclude(printify_product_id=product_id).exists():
-                slug = f"{base_slug}-{counter}"
-                counter += 1
-
-            variants = printify_data.get('variants', [])
-            base_price = 0
-            for v in variants:
-                if v.get('is_enabled') and v.get('price'):
-                    base_price = v['price'] / 100
-                    break
-
-            tags = printify_data.get('tags', [])
-            category = _detect_category_from_tags(tags)
-
-            product, created = Product.objects.update_or_create(
-                printify_product_id=product_id,
-                defaults={
-                    'name': title,
-                    'slug': slug,
-                    'description': description,
-                    'price': base_price,
-                    'fulfillment_type': 'pod',
-                    'manage_inventory': False,
-                    'is_active': True,
-                    'category': category,
-                }
-            )
-
-            sync_stats = sync_product_variants(product)
+            product, created = upsert_product_from_printify(product_id, printify_data)
+            sync_stats = sync_product_variants(product, printify_data=printify_data)
 
             return Response({
                 'success': True,
@@ -0,0 +1,47 @@
+"""
+Management command to verify the dues ledger.
+
+Every DuesAccount balance must equal the signed sum of its transactions
+(charges and refunds add, payments and credits subtract). Accounts that
+drifted, e.g. from a balance edited by hand, are listed and the command
+exits with an error so scheduled runs can alert.
+
+Usage:
+    python manage.py check_dues_ledger
+    python manage.py check_dues_ledger --account 12 --account 15
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from apps.portal.models import DuesAccount
+from apps.portal.services import find_ledger_mismatches
+
+
+class Command(BaseCommand):
+    help = 'Verify each dues balance equals the sum of its transactions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--account',
+            type=int,
+            action='append',
+            help='Only check this DuesAccount ID (repeatable)',
+        )
+
+    def handle(self, *args, **options):
+        account_ids = options['account']
+        checked = DuesAccount.objects.filter(pk__in=account_ids).count() if account_ids else DuesAccount.objects.count()
+
+        mismatches = list(find_ledger_mismatches(account_ids))
+
+        for account in mismatches:
+            difference = account.balance - account.ledger_balance
+            self.stdout.write(
+                f'  Account {account.pk} ({account.player.full_name}): '
+                f'balance ${account.balance:.2f}, ledger ${account.ledger_balance:.2f}, '
+                f'difference ${difference:.2f}'
+            )
+
+        if mismatches:
+            raise CommandError(f'{len(mismatches)} of {checked} dues accounts do not match their ledger.')
+
+        self.stdout.write(self.style.SUCCESS(f'All {checked} dues accounts match their ledger.'))
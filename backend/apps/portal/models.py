@@ -271,34 +271,28 @@ class DuesAccount(models.Model):
         return f"{self.player.full_name} - ${self.balance}"
 
     def add_charge(self, amount, description, event_registration=None, created_by=None):
-        """Add a charge to the account"""
-        self.balance += amount
-        self.save()
-        return DuesTransaction.objects.create(
-            account=self,
-            transaction_type='charge',
-            amount=amount,
-            description=description,
-            balance_after=self.balance,
+        """Add a charge to the account (see apps/portal/services/dues.py)"""
+        from .services.dues import apply_transaction
+
+        dues_transaction = apply_transaction(
+            self.pk, 'charge', amount, description,
             event_registration=event_registration,
-            created_by=created_by
+            created_by=created_by,
         )
+        self.refresh_from_db(fields=['balance', 'updated_at'])
+        return dues_transaction
 
     def add_payment(self, amount, description, payment=None, created_by=None):
-        """Record a payment"""
-        self.balance -= amount
-        self.last_payment_date = timezone.now()
-        self.is_good_standing = self.balance <= 0
-        self.save()
-        return DuesTransaction.objects.create(
-            account=self,
-            transaction_type='payment',
-            amount=amount,
-            description=description,
-            balance_after=self.balance,
+        """Record a payment (see apps/portal/services/dues.py)"""
+        from .services.dues import apply_transaction
+
+        dues_transaction = apply_transaction(
+            self.pk, 'payment', amount, description,
             payment=payment,
-            created_by=created_by
+            created_by=created_by,
         )
+        self.refresh_from_db(fields=['balance', 'last_payment_date', 'is_good_standing', 'updated_at'])
+        return dues_transaction
 
 
 class DuesTransaction(models.Model):
@@ -1,3 +1,5 @@
+from decimal import Decimal
+
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.utils import timezone
@@ -7,6 +9,7 @@ from .models import (
     DuesAccount, DuesTransaction, SavedPaymentMethod,
     PromoCredit, EventCheckIn
 )
+from apps.events.models import Event
 from apps.registrations.models import EventRegistration
 from apps.payments.models import Order
 
@@ -290,3 +293,92 @@ class WaiverSignSerializer(serializers.Serializer):
     """Sign a waiver"""
     signer_name = serializers.CharField(max_length=200, required=True)
     acknowledged = serializers.BooleanField(required=True)
+
+
+class DuesAccountFilterSerializer(serializers.Serializer):
+    """Which players' dues accounts a staff bulk action applies to"""
+    event = serializers.IntegerField(required=False, help_text="Players registered for this event")
+    team = serializers.CharField(max_length=100, required=False)
+    age_group = serializers.RegexField(
+        r'^[Uu]\d{1,2}$',
+        required=False,
+        help_text="Age group such as U14 (players younger than 14)"
+    )
+    active_only = serializers.BooleanField(default=True)
+
+    def get_filter_kwargs(self):
+        data = self.validated_data
+        age_group = data.get('age_group')
+        return {
+            'event_id': data.get('event'),
+            'team_name': data.get('team'),
+            'under_age': int(age_group[1:]) if age_group else None,
+            'active_only': data['active_only'],
+        }
+
+
+class BulkChargeSerializer(DuesAccountFilterSerializer):
+    """Charge the same amount to every matching dues account"""
+    amount = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0.01'))
+    description = serializers.CharField(max_length=255)
+    dry_run = serializers.BooleanField(default=False)
+
+
+class DuesStatementSerializer(DuesAccountFilterSerializer):
+    """Filters for the dues statement download"""
+    since = serializers.DateField(required=False)
+    until = serializers.DateField(required=False)
+
+
+class ExportFilterSerializer(serializers.Serializer):
+    """
+    Filters for a staff export; which apply depends on the dataset, passed
+    in the serializer context
+    """
+    since = serializers.DateField(required=False)
+    until = serializers.DateField(required=False)
+    status = serializers.CharField(max_length=20, required=False)
+    event = serializers.IntegerField(required=False)
+
+    def validate_status(self, value):
+        statuses = self.context['dataset'].statuses
+        if value not in statuses:
+            raise serializers.ValidationError(
+                f"Must be one of: {', '.join(statuses)}." if statuses else "This export has no status."
+            )
+        return value
+
+    def validate_event(self, value):
+        if self.context['dataset'].event_field is None:
+            raise serializers.ValidationError("This export can't be filtered by event.")
+        return value
+
+    def validate(self, attrs):
+        if attrs.get('since') and attrs.get('until') and attrs['since'] > attrs['until']:
+            raise serializers.ValidationError({'until': "Must not be before since."})
+        return attrs
+
+
+class CheckInScanSerializer(serializers.Serializer):
+    """One queued scan from a door client"""
+    registration = serializers.IntegerField(required=False)
+    token = serializers.CharField(max_length=100, required=False)
+    action = serializers.ChoiceField(choices=['in', 'out'], default='in')
+    # Required: the timestamp is what makes a replayed scan recognizable
+    at = serializers.DateTimeField(help_text="When the scan happened on the client")
+
+    def validate(self, attrs):
+        if ('registration' in attrs) == ('token' in attrs):
+            raise serializers.ValidationError("Provide either a registration id or a scanned token.")
+        return attrs
+
+
+class BatchCheckInSerializer(serializers.Serializer):
+    """A batch of scans for one event"""
+    event = serializers.PrimaryKeyRelatedField(queryset=Event.objects.all())
+    scans = CheckInScanSerializer(many=True, allow_empty=False, max_length=500)
+
+
+class CheckInRosterSerializer(serializers.Serializer):
+    """Which event's roster to download"""
+    event = serializers.PrimaryKeyRelatedField(queryset=Event.objects.all())
@@ -0,0 +1,42 @@
+# Portal services
+from .check_in import (
+    apply_check_ins,
+    check_in_token,
+    iter_event_roster,
+    publish_check_in,
+    read_check_in_token,
+)
+from .dues import (
+    apply_transaction,
+    charge_accounts,
+    filter_dues_accounts,
+    find_ledger_mismatches,
+    iter_family_statements,
+)
+from .exports import (
+    DATASETS,
+    FORMATS,
+    NDJSON,
+    export_queryset,
+    iter_export_csv,
+    iter_export_records,
+)
+
+__all__ = [
+    'apply_check_ins',
+    'check_in_token',
+    'iter_event_roster',
+    'publish_check_in',
+    'read_check_in_token',
+    'apply_transaction',
+    'charge_accounts',
+    'filter_dues_accounts',
+    'find_ledger_mismatches',
+    'iter_family_statements',
+    'DATASETS',
+    'FORMATS',
+    'NDJSON',
+    'export_queryset',
+    'iter_export_csv',
+    'iter_export_records',
+]
@@ -0,0 +1,211 @@
+"""
+Check-In Service
+
+Batch check-in for staff scanning players in at the door, built for
+offline-first clients: the client queues scans with the time they happened
+and posts them whenever it has a connection, possibly more than once.
+
+Each scan carries the client's timestamp, and the latest timestamp wins.
+A scan that is already recorded (same action, same time) or older than the
+check-in's last change is reported and ignored, so replaying a batch, or
+batches arriving out of order, leaves the same result as applying every
+scan once in time order.
+
+A timestamp in the future (a door device whose clock runs fast) is
+clamped to the server's time, so it can't hold off the real scans that
+follow. A clamped time differs on every replay, so a clamped scan that
+matches the player's current state (checking in a player who is in) is
+reported as a duplicate rather than applied again.
+
+Every applied change is also pushed to live-update subscribers (the event's
+staff screens and the family's dashboard, see apps/core/live.py).
+
+QR codes hold a signed registration id (`check_in_token`), so a scanner
+can't be fed a made-up number, and the roster download lists every token
+for an event so clients can validate scans without a round trip.
+"""
+
+import logging
+from datetime import datetime
+from typing import Iterable, Optional
+from django.core import signing
+from django.db import transaction
+from django.utils import timezone
+from apps.core.live import event_topic, guardian_topic, publish
+from apps.registrations.models import EventRegistration
+from ..models import EventCheckIn
+
+logger = logging.getLogger(__name__)
+
+TOKEN_SALT = 'portal.check-in'
+
+CHECK_IN = 'in'
+CHECK_OUT = 'out'
+
+# Per-scan results
+APPLIED = 'applied'
+DUPLICATE = 'duplicate'
+STALE = 'stale'
+NOT_CHECKED_IN = 'not_checked_in'
+UNKNOWN = 'unknown'
+
+
+def check_in_token(registration_id: int) -> str:
+    """Signed QR payload for a registration, e.g. '1234:Kx3...'"""
+    return signing.Signer(salt=TOKEN_SALT).sign(str(registration_id))
+
+
+def read_check_in_token(token: str) -> Optional[int]:
+    """Registration id from a QR payload, or None if it isn't one of ours."""
+    try:
+        return int(signing.Signer(salt=TOKEN_SALT).unsign(token))
+    except (signing.BadSignature, ValueError):
+        return None
+
+
+def iter_event_roster(event):
+    """Compact roster rows for an event's registrations, one query."""
+    rows = (
+        EventRegistration.objects
+        .filter(event=event)
+        .order_by('participant_last_name', 'participant_first_name', 'pk')
+        .values_list(
+            'pk', 'participant_first_name', 'participant_last_name', 'payment_status',
+            'check_in__checked_in_at', 'check_in__checked_out_at',
+        )
+    )
+    for pk, first_name, last_name, payment_status, checked_in_at, checked_out_at in rows.iterator():
+        yield {
+            'id': pk,
+            'name': f"{first_name} {last_name}",
+            'token': check_in_token(pk),
+            'payment_status': payment_status,
+            'checked_in_at': checked_in_at,
+            'checked_out_at': checked_out_at,
+        }
+
+
+def publish_check_in(check_in: EventCheckIn, event_id: int, guardian_id: int) -> None:
+    """Push a check-in's state to the event's staff screens and the family."""
+    publish(
+        'check_out' if check_in.is_checked_out else 'check_in',
+        [event_topic(event_id), guardian_topic(guardian_id)],
+        {
+            'id': check_in.pk,
+            'registration': check_in.event_registration_id,
+            'event': event_id,
+            'checked_in_at': check_in.checked_in_at,
+            'checked_out_at': check_in.checked_out_at,
+            'is_checked_in': check_in.is_checked_in,
+        },
+    )
+
+
+def _last_change(check_in: EventCheckIn) -> Optional[datetime]:
+    return max(filter(None, [check_in.checked_in_at, check_in.checked_out_at]), default=None)
+
+
+def _apply_scan(check_in: EventCheckIn, action: str, at: datetime, user, clamped: bool = False) -> str:
+    """Apply one scan to a check-in in memory; returns the scan result."""
+    recorded_at = check_in.checked_in_at if action == CHECK_IN else check_in.checked_out_at
+    if recorded_at == at:
+        return DUPLICATE
+    if clamped and (check_in.is_checked_in if action == CHECK_IN else check_in.is_checked_out):
+        return DUPLICATE
+
+    last_change = _last_change(check_in)
+    if last_change is not None and at <= last_change:
+        return STALE
+
+    if action == CHECK_IN:
+        check_in.checked_in_at = at
+        check_in.checked_in_by = user
+        check_in.checked_out_at = None
+    else:
+        if check_in.checked_in_at is None:
+            return NOT_CHECKED_IN
+        check_in.checked_out_at = at
+    return APPLIED
+
+
+def apply_check_ins(event, scans: Iterable[dict], user=None) -> list:
+    """
+    Apply a batch of scans for one event in a single transaction.
+
+    Each scan is a dict with either `registration` (id) or `token` (QR
+    payload), an `action` ('in' or 'out') and the client timestamp `at`
+    (clamped to now). Scans are applied oldest first.
+
+    Returns:
+        One dict per scan, in the order given: the scan's registration id
+        (None for an unreadable token), its result and the check-in's state
+        after the whole batch
+    """
+    now = timezone.now()
+    scans = [
+        {**scan, 'at': min(scan['at'], now), 'clamped': scan['at'] > now, 'index': index}
+        for index, scan in enumerate(scans)
+    ]
+    for scan in scans:
+        if scan.get('registration') is None:
+            scan['registration'] = read_check_in_token(scan.get('token') or '')
+
+    requested = {scan['registration'] for scan in scans if scan['registration'] is not None}
+    guardians = dict(
+        EventRegistration.objects
+        .filter(event=event, pk__in=requested)
+        .values_list('pk', 'user_id')
+    )
+
+    results = [None] * len(scans)
+    with transaction.atomic():
+        # Create any missing rows first, tolerating a concurrent batch doing
+        # the same, then lock them all so batches for one event queue up
+        EventCheckIn.objects.bulk_create(
+            [EventCheckIn(event_registration_id=pk) for pk in guardians],
+            ignore_conflicts=True,
+        )
+        check_ins = {
+            check_in.event_registration_id: check_in
+            for check_in in (
+                EventCheckIn.objects
+                .select_for_update()
+                .filter(event_registration_id__in=guardians)
+            )
+        }
+
+        changed = {}
+        for scan in sorted(scans, key=lambda scan: (scan['at'], scan['index'])):
+            check_in = check_ins.get(scan['registration'])
+            if check_in is None:
+                result = UNKNOWN
+            else:
+                result = _apply_scan(check_in, scan['action'], scan['at'], user, scan['clamped'])
+                if result == APPLIED:
+                    changed[check_in.pk] = check_in
+            results[scan['index']] = (scan, check_in, result)
+
+        if changed:
+            EventCheckIn.objects.bulk_update(
+                changed.values(), ['checked_in_at', 'checked_in_by', 'checked_out_at']
+            )
+        for check_in in changed.values():
+            publish_check_in(check_in, event.pk, guardians[check_in.event_registration_id])
+
+    applied = sum(1 for _, _, result in results if result == APPLIED)
+    logger.info(
+        f"Batch check-in for event {event.pk}: {applied}/{len(scans)} scans applied "
+        f"by {getattr(user, 'username', None)}"
+    )
+
+    return [
+        {
+            'registration': scan['registration'],
+            'action': scan['action'],
+            'at': scan['at'],
+            'result': result,
+            'checked_in_at': check_in.checked_in_at if check_in else None,
+            'checked_out_at': check_in.checked_out_at if check_in else None,
+        }
+        for scan, check_in, result in results
+    ]
@@ -0,0 +1,364 @@
+"""
+Dues Ledger Service
+
+All balance changes for DuesAccount go through this module so the balance
+always equals the sum of the account's DuesTransactions.
+
+Balances are changed with a single `UPDATE ... SET balance = balance + x`
+(an F() expression) rather than read-modify-write in Python. The UPDATE
+locks the account row until the transaction commits, so the balance read
+back right after it is exactly the balance our change produced; that value
+is stored as the transaction's balance_after. Concurrent charges and
+payments therefore queue on the row lock instead of overwriting each other.
+"""
+
+import logging
+import time
+from datetime import date, datetime, timedelta
+from itertools import islice
+from decimal import Decimal
+from typing import Callable, Iterable, Iterator, Optional
+from django.db import transaction
+from django.db.models import Case, DecimalField, Exists, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from apps.registrations.models import EventRegistration
+from ..models import DuesAccount, DuesTransaction, GuardianRelationship
+
+logger = logging.getLogger(__name__)
+
+# Direction of each transaction type on the balance (positive = owes money)
+BALANCE_SIGNS = {
+    'charge': 1,
+    'refund': 1,
+    'payment': -1,
+    'credit': -1,
+}
+
+
+def apply_transaction(
+    account_id: int,
+    transaction_type: str,
+    amount,
+    description: str,
+    payment=None,
+    event_registration=None,
+    created_by=None,
+) -> DuesTransaction:
+    """
+    Apply one transaction to an account atomically.
+
+    Payments also update last_payment_date and recompute is_good_standing
+    in the same UPDATE.
+
+    Returns:
+        The created DuesTransaction
+    """
+    if transaction_type not in BALANCE_SIGNS:
+        raise ValueError(f"Unknown dues transaction type: {transaction_type}")
+
+    amount = Decimal(str(amount))
+    delta = amount * BALANCE_SIGNS[transaction_type]
+    now = timezone.now()
+
+    fields = {'balance': F('balance') + delta, 'updated_at': now}
+    if transaction_type == 'payment':
+        fields['last_payment_date'] = now
+        # Evaluated against the pre-update balance: new balance <= 0
+        fields['is_good_standing'] = Case(
+            When(balance__lte=-delta, then=Value(True)),
+            default=Value(False),
+        )
+
+    with transaction.atomic():
+        updated = DuesAccount.objects.filter(pk=account_id).update(**fields)
+        if not updated:
+            raise DuesAccount.DoesNotExist(f"Dues account {account_id} does not exist")
+
+        # The row is locked by the UPDATE until commit, so this is our balance
+        balance_after = DuesAccount.objects.filter(pk=account_id).values_list(
+            'balance', flat=True
+        ).get()
+
+        return DuesTransaction.objects.create(
+            account_id=account_id,
+            transaction_type=transaction_type,
+            amount=amount,
+            description=description,
+            balance_after=balance_after,
+            payment=payment,
+            event_registration=event_registration,
+            created_by=created_by,
+        )
+
+
+def charge_accounts(
+    account_ids: Iterable[int],
+    amount,
+    description: str,
+    event_registration=None,
+    created_by=None,
+    batch_size: int = 500,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> list:
+    """
+    Charge the same amount to many accounts in one transaction.
+
+    Each batch uses three queries regardless of its size: one UPDATE for all
+    balances, one SELECT of the resulting balances and one bulk INSERT of
+    the transactions. All batches commit together or not at all.
+
+    Args:
+        progress: Called as progress(done, total) after each batch
+
+    Returns:
+        List of created DuesTransactions
+    """
+    account_ids = sorted(set(account_ids))
+    if not account_ids:
+        return []
+
+    amount = Decimal(str(amount))
+    transactions = []
+
+    with transaction.atomic():
+        for start in range(0, len(account_ids), batch_size):
+            batch = account_ids[start:start + batch_size]
+
+            updated = DuesAccount.objects.filter(pk__in=batch).update(
+                balance=F('balance') + amount,
+                updated_at=timezone.now(),
+            )
+            if updated != len(batch):
+                # Roll back rather than charge only part of the team
+                raise DuesAccount.DoesNotExist(
+                    f"{len(batch) - updated} of {len(batch)} dues accounts do not exist"
+                )
+
+            balances = dict(
+                DuesAccount.objects.filter(pk__in=batch).values_list('pk', 'balance')
+            )
+
+            transactions.extend(DuesTransaction.objects.bulk_create([
+                DuesTransaction(
+                    account_id=account_id,
+                    transaction_type='charge',
+                    amount=amount,
+                    description=description,
+                    balance_after=balances[account_id],
+                    event_registration=event_registration,
+                    created_by=created_by,
+                )
+                for account_id in batch
+            ]))
+
+            if progress:
+                progress(len(transactions), len(account_ids))
+
+    logger.info(f"Charged ${amount} to {len(transactions)} dues accounts: {description}")
+    return transactions
+
+
+def filter_dues_accounts(
+    event_id: Optional[int] = None,
+    team_name: Optional[str] = None,
+    under_age: Optional[int] = None,
+    active_only: bool = True,
+):
+    """
+    Dues accounts of the players matching every given filter.
+
+    Args:
+        event_id: Players registered for this event (matched by name, like
+            the parent dashboard does)
+        team_name: Players on this team
+        under_age: Age group, e.g. 14 for U14 (younger than 14 today)
+        active_only: Only active players
+
+    Returns:
+        DuesAccount queryset; the filters compile to a single query
+    """
+    accounts = DuesAccount.objects.all()
+
+    if active_only:
+        accounts = accounts.filter(player__is_active=True)
+
+    if team_name:
+        accounts = accounts.filter(player__team_name__iexact=team_name)
+
+    if under_age:
+        today = timezone.now().date()
+        try:
+            cutoff = today.replace(year=today.year - under_age)
+        except ValueError:  # Feb 29
+            cutoff = date(today.year - under_age, 3, 1)
+        accounts = accounts.filter(player__date_of_birth__gt=cutoff)
+
+    if event_id:
+        registered = EventRegistration.objects.filter(
+            event_id=event_id,
+            participant_first_name=OuterRef('player__first_name'),
+            participant_last_name=OuterRef('player__last_name'),
+        ).exclude(payment_status='refunded')
+        accounts = accounts.filter(Exists(registered))
+
+    return accounts
+
+
+STATEMENT_HEADER = [
+    'family_email', 'family_name', 'player', 'date', 'type',
+    'description', 'amount', 'balance_after',
+]
+
+
+def _day_start(day: date) -> datetime:
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+
+
+def _balance_at(cutoff: datetime):
+    """An account's balance just before `cutoff`: the last balance_after, or 0."""
+    return Coalesce(
+        Subquery(
+            DuesTransaction.objects
+            .filter(account=OuterRef('pk'), created_at__lt=cutoff)
+            .order_by('-created_at', '-pk')
+            .values('balance_after')[:1]
+        ),
+        Value(Decimal('0')),
+        output_field=DecimalField(max_digits=10, decimal_places=2),
+    )
+
+
+def iter_family_statements(accounts, since=None, until=None, chunk_size: int = 2000) -> Iterator[list]:
+    """
+    Yield CSV rows of per-family dues statements.
+
+    Every selected account gets a statement, whether or not it had activity
+    in the date range (inclusive dates): an opening balance row, its
+    transactions in the range and a closing balance row. Each family (the
+    player's primary guardian) ends with a total of its players' closing
+    balances. Players without a primary guardian are listed last, under
+    "No primary guardian", rather than left out.
+
+    Accounts are read in chunks of `chunk_size` with their opening and
+    closing balances, plus one query for each chunk's transactions, so
+    memory stays bounded however many accounts there are.
+    """
+    today = timezone.localdate()
+    closing_day = until or today
+    primary = GuardianRelationship.objects.filter(player=OuterRef('player'), is_primary=True).order_by('pk')
+
+    rows = accounts.annotate(
+        family_email=Subquery(primary.values('guardian__email')[:1]),
+        family_first=Subquery(primary.values('guardian__first_name')[:1]),
+        family_last=Subquery(primary.values('guardian__last_name')[:1]),
+        opening=_balance_at(_day_start(since)) if since else Value(Decimal('0')),
+        closing=_balance_at(_day_start(until + timedelta(days=1))) if until else F('balance'),
+    ).order_by(
+        F('family_email').asc(nulls_last=True),
+        'player__last_name',
+        'player__first_name',
+        'pk',
+    ).values_list(
+        'pk', 'family_email', 'family_first', 'family_last',
+        'player__first_name', 'player__last_name', 'opening', 'closing',
+    )
+
+    transactions = DuesTransaction.objects.all()
+    if since:
+        transactions = transactions.filter(created_at__gte=_day_start(since))
+    if until:
+        transactions = transactions.filter(created_at__lt=_day_start(until + timedelta(days=1)))
+    transactions = transactions.order_by('account_id', 'created_at', 'pk').values_list(
+        'account_id', 'created_at', 'transaction_type', 'description', 'amount', 'balance_after',
+    )
+
+    started = time.monotonic()
+    families = unassigned = 0
+    family = None
+    family_name = ''
+    family_total = Decimal('0')
+
+    yield STATEMENT_HEADER
+
+    def total_row():
+        return [family, family_name, '', '', 'total', 'Family balance due', '', f'{family_total:.2f}']
+
+    accounts_read = rows.iterator(chunk_size=chunk_size)
+    while chunk := list(islice(accounts_read, chunk_size)):
+        activity = {}
+        for account_id, *row in transactions.filter(account_id__in=[row[0] for row in chunk]):
+            activity.setdefault(account_id, []).append(row)
+
+        for account_id, email, first, last, player_first, player_last, opening, closing in chunk:
+            email = email or ''
+            if email != family:
+                if family is not None:
+                    yield total_row()
+                family = email
+                family_name = f'{first} {last}'.strip() if email else 'No primary guardian'
+                family_total = Decimal('0')
+                families += 1
+            if not email:
+                unassigned += 1
+
+            player_name = f'{player_first} {player_last}'
+            yield [
+                family, family_name, player_name, since.isoformat() if since else '',
+                'opening', 'Opening balance', '', f'{opening:.2f}',
+            ]
+            for created_at, transaction_type, description, amount, balance_after in activity.get(account_id, []):
+                yield [
+                    family, family_name, player_name, timezone.localdate(created_at).isoformat(),
+                    transaction_type, description, f'{amount:.2f}', f'{balance_after:.2f}',
+                ]
+            yield [
+                family, family_name, player_name, closing_day.isoformat(),
+                'closing', 'Closing balance', '', f'{closing:.2f}',
+            ]
+            family_total += closing
+
+    if family is not None:
+        yield total_row()
+
+    if unassigned:
+        logger.warning(f"Dues statements: {unassigned} player(s) have no primary guardian")
+    elapsed = time.monotonic() - started
+    logger.info(f"Generated dues statements for {families} families in {elapsed:.1f}s")
+
+
+def ledger_balance_expression():
+    """Signed sum of an account's transactions, for annotating DuesAccounts."""
+    signed_amount = Case(
+        *[
+            When(transactions__transaction_type=transaction_type, then=F('transactions__amount') * sign)
+            for transaction_type, sign in BALANCE_SIGNS.items()
+        ],
+        default=Value(0),
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+    return Coalesce(
+        Sum(signed_amount),
+        Value(0),
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+
+
+def find_ledger_mismatches(account_ids: Optional[Iterable[int]] = None):
+    """
+    Accounts whose balance differs from the sum of their transactions.
+
+    Returns a queryset of DuesAccount annotated with `ledger_balance`,
+    computed in a single aggregate query.
+    """
+    accounts = DuesAccount.objects.all()
+    if account_ids is not None:
+        accounts = accounts.filter(pk__in=list(account_ids))
+
+    return (
+        accounts
+        .annotate(ledger_balance=ledger_balance_expression())
+        .filter(~Q(balance=F('ledger_balance')))
+        .select_related('player')
+        .order_by('pk')
+    )
@@ -0,0 +1,171 @@
+"""
+Export Service
+
+Staff downloads of whole tables (orders, event registrations, dues
+transactions, newsletter subscribers) as CSV or NDJSON.
+
+Each dataset is a flat `values_list` projection read in primary-key order
+through `.iterator(chunk_size=...)`, so rows go from the database cursor
+to the response without model instances or a list of the whole result,
+and memory stays flat however many rows match.
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Iterator, Optional
+from django.db.models import Model, QuerySet
+from django.utils import timezone
+from apps.core.models import NewsletterSubscriber
+from apps.payments.models import Order
+from apps.registrations.models import EventRegistration
+from ..models import DuesTransaction
+
+CSV = 'csv'
+NDJSON = 'ndjson'
+FORMATS = (CSV, NDJSON)
+
+
+@dataclass(frozen=True)
+class ExportDataset:
+    """A table staff can export, and the fields its filters apply to"""
+    model: type[Model]
+    # (column name, lookup) pairs
+    columns: tuple
+    date_field: str
+    status_field: Optional[str] = None
+    event_field: Optional[str] = None
+
+    @property
+    def header(self) -> list:
+        return [name for name, _ in self.columns]
+
+    @property
+    def statuses(self) -> list:
+        """Values the status filter accepts"""
+        if self.status_field is None:
+            return []
+        return [value for value, _ in self.model._meta.get_field(self.status_field).choices]
+
+
+DATASETS = {
+    'orders': ExportDataset(
+        Order,
+        columns=(
+            ('order_number', 'order_number'),
+            ('created_at', 'created_at'),
+            ('status', 'status'),
+            ('customer_email', 'user__email'),
+            ('shipping_name', 'shipping_name'),
+            ('shipping_email', 'shipping_email'),
+            ('shipping_city', 'shipping_city'),
+            ('shipping_state', 'shipping_state'),
+            ('shipping_country', 'shipping_country'),
+            ('subtotal', 'subtotal'),
+            ('shipping', 'shipping'),
+            ('tax', 'tax'),
+            ('total', 'total'),
+            ('tracking_number', 'tracking_number'),
+        ),
+        date_field='created_at',
+        status_field='status',
+    ),
+    'registrations': ExportDataset(
+        EventRegistration,
+        columns=(
+            ('id', 'pk'),
+            ('registered_at', 'registered_at'),
+            ('event_id', 'event_id'),
+            ('event', 'event__title'),
+            ('event_start', 'event__start_datetime'),
+            ('participant_first_name', 'participant_first_name'),
+            ('participant_last_name', 'participant_last_name'),
+            ('participant_age', 'participant_age'),
+            ('participant_email', 'participant_email'),
+            ('account_email', 'user__email'),
+            ('payment_status', 'payment_status'),
+            ('amount_paid', 'amount_paid'),
+        ),
+        date_field='registered_at',
+        status_field='payment_status',
+        event_field='event',
+    ),
+    'dues-transactions': ExportDataset(
+        DuesTransaction,
+        columns=(
+            ('id', 'pk'),
+            ('created_at', 'created_at'),
+            ('account_id', 'account_id'),
+            ('player_first_name', 'account__player__first_name'),
+            ('player_last_name', 'account__player__last_name'),
+            ('transaction_type', 'transaction_type'),
+            ('description', 'description'),
+            ('amount', 'amount'),
+            ('balance_after', 'balance_after'),
+            ('event_id', 'event_registration__event_id'),
+        ),
+        date_field='created_at',
+        status_field='transaction_type',
+        event_field='event_registration__event',
+    ),
+    'newsletter-subscribers': ExportDataset(
+        NewsletterSubscriber,
+        columns=(
+            ('email', 'email'),
+            ('first_name', 'first_name'),
+            ('status', 'status'),
+            ('subscribe_events', 'subscribe_events'),
+            ('subscribe_news', 'subscribe_news'),
+            ('subscribe_promotions', 'subscribe_promotions'),
+            ('source', 'source'),
+            ('subscribed_at', 'subscribed_at'),
+            ('unsubscribed_at', 'unsubscribed_at'),
+        ),
+        date_field='subscribed_at',
+        status_field='status',
+    ),
+}
+
+
+def _start_of_day(day: date) -> datetime:
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def export_queryset(dataset: ExportDataset, since: Optional[date] = None, until: Optional[date] = None,
+                    status: Optional[str] = None, event=None) -> QuerySet:
+    """
+    The dataset's rows as a values_list, filtered and in primary-key order.
+
+    Dates are inclusive, in the current time zone. They are applied as a
+    range on the date field rather than `__date`, so an index can serve them.
+    """
+    rows = dataset.model.objects.all()
+    if since:
+        rows = rows.filter(**{f'{dataset.date_field}__gte': _start_of_day(since)})
+    if until:
+        rows = rows.filter(**{f'{dataset.date_field}__lt': _start_of_day(until + timedelta(days=1))})
+    if status:
+        rows = rows.filter(**{dataset.status_field: status})
+    if event is not None:
+        rows = rows.filter(**{dataset.event_field: event})
+    return rows.order_by('pk').values_list(*(lookup for _, lookup in dataset.columns))
+
+
+def _csv_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if value is None:
+        return ''
+    return value
+
+
+def iter_export_csv(rows: QuerySet, header: list, chunk_size: int = 2000) -> Iterator[list]:
+    """Yield the header, then one CSV row per database row."""
+    yield header
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield [_csv_value(value) for value in row]
+
+
+def iter_export_records(rows: QuerySet, header: list, chunk_size: int = 2000) -> Iterator[dict]:
+    """Yield one dict per database row, for NDJSON."""
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield dict(zip(header, row))
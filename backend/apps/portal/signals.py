@@ -2,7 +2,8 @@ from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 
-from .models import UserProfile, Player, DuesAccount
+from .models import UserProfile, Player, DuesAccount, EventCheckIn
+from .services.check_in import publish_check_in
 
 User = get_user_model()
 
@@ -19,3 +20,12 @@ def create_dues_account(sender, instance, created, **kwargs):
     """Auto-create DuesAccount when a new Player is created"""
     if created:
         DuesAccount.objects.get_or_create(player=instance)
+
+
+@receiver(post_save, sender=EventCheckIn)
+def publish_check_in_change(sender, instance, **kwargs):
+    """Push check-ins and check-outs to live-update subscribers"""
+    if instance.checked_in_at is None:
+        return
+    registration = instance.event_registration
+    publish_check_in(instance, registration.event_id, registration.user_id)
@@ -0,0 +1,739 @@
+import csv
+import json
+import tracemalloc
+import warnings
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import AsyncClient, TestCase, override_settings, tag
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from apps.core.live import get_broker
+from apps.core.models import NewsletterSubscriber
+from apps.core.testing import QueryBudgetMixin, asgi_get
+from apps.events.models import Event
+from apps.payments.models import Order, OrderItem, Product, ProductImage
+from apps.registrations.models import EventRegistration
+from .models import DuesAccount, DuesTransaction, EventCheckIn, GuardianRelationship, Player
+from .services import apply_transaction, charge_accounts, find_ledger_mismatches
+
+
+@override_settings(STRIPE_SECRET_KEY='')
+class ParentDashboardQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """The dashboard costs the same however many children, events and orders a family has."""
+
+    # profile, children, balance, registrations, orders, order items,
+    # products, product images, promo credits, check-ins
+    DASHBOARD_BUDGET = 10
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.parent = get_user_model().objects.create_user('guardian', 'guardian@example.com', 'pw')
+        start = timezone.now() + timedelta(days=3)
+        events = [
+            Event.objects.create(
+                title=f'Practice {index}', description='', event_type='practice',
+                start_datetime=start + timedelta(days=index), end_datetime=start + timedelta(days=index, hours=2),
+                location='Gym',
+            )
+            for index in range(4)
+        ]
+
+        for index in range(3):
+            child = Player.objects.create(
+                first_name='Kid', last_name=f'Number{index}', date_of_birth=date(2012, 1, 1),
+                emergency_contact_name='Guardian', emergency_contact_phone='555-0100',
+            )
+            GuardianRelationship.objects.create(guardian=cls.parent, player=child, is_primary=True)
+            DuesAccount.objects.filter(player=child).update(balance=50)
+            for event in events:
+                registration = EventRegistration.objects.create(
+                    event=event, user=cls.parent, participant_first_name='Kid',
+                    participant_last_name=f'Number{index}', participant_email=f'kid{index}@example.com',
+                    participant_age=12,
+                    emergency_contact_name='Guardian', emergency_contact_phone='555-0100',
+                )
+            EventCheckIn.objects.create(event_registration=registration, checked_in_at=timezone.now())
+
+        product = Product.objects.create(name='Team Hoodie', description='', price=45, fulfillment_type='local')
+        ProductImage.objects.create(product=product, image_url='https://example.com/hoodie.png', is_primary=True)
+        for _ in range(3):
+            order = Order.objects.create(
+                user=cls.parent, status='paid', subtotal=45, total=45, shipping_name='Guardian',
+                shipping_email='guardian@example.com', shipping_address_line1='1 Main St',
+                shipping_city='Newark', shipping_state='NJ', shipping_zip='07102',
+            )
+            OrderItem.objects.create(
+                order=order, product=product, product_name=product.name, product_price=45,
+                fulfillment_type='local', quantity=2,
+            )
+
+    def test_parent_dashboard(self):
+        client = APIClient(HTTP_HOST='localhost')
+        client.force_authenticate(self.parent)
+
+        with self.assertQueryBudget(self.DASHBOARD_BUDGET, 'parent_dashboard'):
+            response = client.get('/api/portal/dashboard/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Decimal(response.data['total_balance']), 150)
+        self.assertEqual(len(response.data['children']), 3)
+        self.assertEqual(len(response.data['upcoming_events']), 10)
+        self.assertEqual(len(response.data['active_check_ins']), 3)
+        self.assertTrue(response.data['recent_orders'][0]['has_local_items'])
+        self.assertFalse(response.data['recent_orders'][0]['has_pod_items'])
+
+
+class BatchCheckInTests(QueryBudgetMixin, TestCase):
+    """Door scans apply in one transaction and replay without changing anything."""
+
+    # event, registrations, insert missing check-ins, lock check-ins, update,
+    # plus the transaction savepoint pair
+    BATCH_BUDGET = 7
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.staff = User.objects.create_user('door', 'door@example.com', 'pw', is_staff=True)
+        cls.parent = User.objects.create_user('parent', 'parent@example.com', 'pw')
+        start = timezone.now() + timedelta(days=1)
+        cls.event, cls.other_event = [
+            Event.objects.create(
+                title=title, description='', event_type='tournament', start_datetime=start,
+                end_datetime=start + timedelta(hours=8), location='Gym',
+            )
+            for title in ('Spring Classic', 'Summer Classic')
+        ]
+        cls.registrations = [
+            EventRegistration.objects.create(
+                event=cls.event, user=cls.parent, participant_first_name='Kid',
+                participant_last_name=f'Number{index}', participant_email=f'kid{index}@example.com',
+                participant_age=12, emergency_contact_name='Parent', emergency_contact_phone='555-0100',
+            )
+            for index in range(20)
+        ]
+        cls.elsewhere = EventRegistration.objects.create(
+            event=cls.other_event, user=cls.parent, participant_first_name='Kid',
+            participant_last_name='Elsewhere', participant_email='elsewhere@example.com',
+            participant_age=12, emergency_contact_name='Parent', emergency_contact_phone='555-0100',
+        )
+        EventCheckIn.objects.create(event_registration=cls.registrations[0])
+
+    def setUp(self):
+        self.client = APIClient(HTTP_HOST='localhost')
+        self.client.force_authenticate(self.staff)
+        self.at = timezone.now().replace(microsecond=0)
+
+    def post(self, scans, event=None):
+        return self.client.post('/api/portal/check-ins/batch/', {
+            'event': (event or self.event).pk, 'scans': scans,
+        }, format='json')
+
+    def test_batch_checks_in_by_id_and_token(self):
+        roster = self.client.get(f'/api/portal/check-ins/roster/?event={self.event.pk}')
+        tokens = {row['id']: row['token'] for row in roster.data['registrations']}
+        scans = [
+            {'token': tokens[registration.pk], 'action': 'in', 'at': self.at.isoformat()}
+            for registration in self.registrations[:10]
+        ]
+        scans += [
+            {'registration': registration.pk, 'at': self.at.isoformat()}
+            for registration in self.registrations[10:]
+        ]
+
+        with self.assertQueryBudget(self.BATCH_BUDGET, 'batch_check_in'):
+            response = self.post(scans)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({result['result'] for result in response.data['results']}, {'applied'})
+        self.assertEqual(
+            EventCheckIn.objects.filter(
+                event_registration__event=self.event, checked_in_at=self.at, checked_in_by=self.staff,
+            ).count(),
+            20,
+        )
+
+    def test_replayed_batch_changes_nothing(self):
+        registration = self.registrations[1]
+        scans = [
+            {'registration': registration.pk, 'action': 'in', 'at': (self.at - timedelta(hours=2)).isoformat()},
+            {'registration': registration.pk, 'action': 'out', 'at': self.at.isoformat()},
+        ]
+        first = self.post(scans)
+        self.assertEqual([result['result'] for result in first.data['results']], ['applied', 'applied'])
+
+        replay = self.post(scans)
+        self.assertEqual([result['result'] for result in replay.data['results']], ['duplicate', 'duplicate'])
+
+        check_in = EventCheckIn.objects.get(event_registration=registration)
+        self.assertEqual(check_in.checked_in_at, self.at - timedelta(hours=2))
+        self.assertEqual(check_in.checked_out_at, self.at)
+
+    def test_older_scans_arriving_late_are_ignored(self):
+        registration = self.registrations[2]
+        self.post([{'registration': registration.pk, 'action': 'out', 'at': self.at.isoformat()}])
+        self.assertEqual(EventCheckIn.objects.get(event_registration=registration).checked_out_at, None)
+
+        self.post([{'registration': registration.pk, 'action': 'in', 'at': self.at.isoformat()}])
+        late = self.post([
+            {'registration': registration.pk, 'action': 'in', 'at': (self.at - timedelta(minutes=5)).isoformat()},
+        ])
+
+        self.assertEqual(late.data['results'][0]['result'], 'stale')
+        self.assertEqual(EventCheckIn.objects.get(event_registration=registration).checked_in_at, self.at)
+
+    def test_unknown_scans_are_reported(self):
+        response = self.post([
+            {'token': f'{self.registrations[3].pk}:forged', 'at': self.at.isoformat()},
+            {'registration': self.elsewhere.pk, 'at': self.at.isoformat()},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['result'] for result in response.data['results']], ['unknown', 'unknown'])
+        self.assertFalse(EventCheckIn.objects.filter(event_registration=self.elsewhere).exists())
+
+    def test_scan_needs_registration_or_token(self):
+        response = self.post([{'action': 'in', 'at': self.at.isoformat()}])
+        self.assertEqual(response.status_code, 400)
+
+    def test_scan_needs_a_timestamp(self):
+        response = self.post([{'registration': self.registrations[0].pk, 'action': 'in'}])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(EventCheckIn.objects.exclude(checked_in_at=None).exists())
+
+    def test_future_scans_are_clamped_and_replay_as_duplicates(self):
+        registration = self.registrations[4]
+        future = timezone.now() + timedelta(hours=1)
+        scans = [{'registration': registration.pk, 'action': 'in', 'at': future.isoformat()}]
+
+        first = self.post(scans)
+        checked_in_at = EventCheckIn.objects.get(event_registration=registration).checked_in_at
+        replay = self.post(scans)
+        # A real scan right after isn't held off by the fast clock
+        out = self.post([
+            {'registration': registration.pk, 'action': 'out', 'at': (timezone.now() + timedelta(seconds=1)).isoformat()},
+        ])
+
+        self.assertEqual(first.data['results'][0]['result'], 'applied')
+        self.assertLess(checked_in_at, future)
+        self.assertEqual(replay.data['results'][0]['result'], 'duplicate')
+        self.assertEqual(out.data['results'][0]['result'], 'applied')
+        check_in = EventCheckIn.objects.get(event_registration=registration)
+        self.assertEqual(check_in.checked_in_at, checked_in_at)
+
+    def test_parents_cannot_check_in(self):
+        self.client.force_authenticate(self.parent)
+        response = self.post([{'registration': self.registrations[0].pk, 'at': self.at.isoformat()}])
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get(f'/api/portal/check-ins/roster/?event={self.event.pk}')
+        self.assertEqual(response.status_code, 403)
+
+
+def create_player(first_name, last_name, guardian=None, **fields):
+    """A player with a dues account, linked to the guardian (primary if first)."""
+    player = Player.objects.create(
+        first_name=first_name, last_name=last_name, date_of_birth=date(2012, 5, 1),
+        emergency_contact_name='Parent', emergency_contact_phone='555-0100', **fields,
+    )
+    if guardian is not None:
+        GuardianRelationship.objects.create(guardian=guardian, player=player)
+    # A signal opens the account with the player
+    return DuesAccount.objects.get(player=player)
+
+
+def backdate(dues_transaction, days):
+    DuesTransaction.objects.filter(pk=dues_transaction.pk).update(
+        created_at=timezone.now() - timedelta(days=days)
+    )
+
+
+class DuesBulkChargeTests(QueryBudgetMixin, TestCase):
+    """Bulk charges hit every matching account in one transaction, or none."""
+
+    # filter, then per batch: update, read balances, insert transactions;
+    # plus the savepoint pair
+    CHARGE_BUDGET = 6
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.staff = User.objects.create_user('office', 'office@example.com', 'pw', is_staff=True)
+        cls.parent = User.objects.create_user('parent', 'parent@example.com', 'pw')
+        cls.elite = [create_player(f'Elite{index}', 'Player', cls.parent, team_name='U14 Elite') for index in range(5)]
+        cls.other = create_player('Other', 'Player', cls.parent, team_name='U12 Select')
+        cls.retired = create_player('Retired', 'Player', cls.parent, team_name='U14 Elite', is_active=False)
+
+    def setUp(self):
+        self.client = APIClient(HTTP_HOST='localhost')
+        self.client.force_authenticate(self.staff)
+
+    def charge(self, **data):
+        return self.client.post('/api/portal/dues-accounts/bulk-charge/', {
+            'amount': '75.00', 'description': 'Holiday Classic fee', 'team': 'U14 Elite', **data,
+        }, format='json')
+
+    def test_dry_run_counts_without_charging(self):
+        response = self.charge(dry_run=True)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'dry_run': True, 'accounts': 5, 'total': '375.00'})
+        self.assertFalse(DuesTransaction.objects.exists())
+
+    def test_charges_matching_active_accounts(self):
+        self.elite[0].add_charge(Decimal('10.00'), 'Earlier fee')
+
+        with self.assertQueryBudget(self.CHARGE_BUDGET, 'bulk_charge'):
+            response = self.charge()
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['accounts'], response.data['total']), (5, '375.00'))
+        charges = DuesTransaction.objects.filter(description='Holiday Classic fee')
+        self.assertEqual(
+            set(charges.values_list('account_id', flat=True)), {account.pk for account in self.elite}
+        )
+        self.assertEqual(charges.get(account=self.elite[0]).balance_after, Decimal('85.00'))
+        self.assertEqual(charges.first().created_by, self.staff)
+        self.other.refresh_from_db()
+        self.retired.refresh_from_db()
+        self.assertEqual((self.other.balance, self.retired.balance), (0, 0))
+
+    def test_staff_only(self):
+        self.client.force_authenticate(self.parent)
+
+        self.assertEqual(self.charge().status_code, 403)
+        self.assertFalse(DuesTransaction.objects.exists())
+
+
+class DuesLedgerTests(TestCase):
+    """Every balance change is a transaction whose balance_after continues the ledger."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.parent = get_user_model().objects.create_user('parent', 'parent@example.com', 'pw')
+        cls.accounts = [create_player(f'Ledger{index}', 'Player', cls.parent) for index in range(3)]
+
+    def test_transactions_carry_the_running_balance(self):
+        account = self.accounts[0]
+        applied = [
+            apply_transaction(account.pk, 'charge', '100.00', 'Season dues'),
+            apply_transaction(account.pk, 'payment', Decimal('30'), 'Check #101'),
+            apply_transaction(account.pk, 'credit', 20, 'Volunteer credit'),
+            apply_transaction(account.pk, 'refund', '5.00', 'Overpayment returned'),
+        ]
+
+        self.assertEqual(
+            [dues_transaction.balance_after for dues_transaction in applied],
+            [Decimal('100.00'), Decimal('70.00'), Decimal('50.00'), Decimal('55.00')],
+        )
+        account.refresh_from_db()
+        self.assertEqual(account.balance, Decimal('55.00'))
+        self.assertIsNotNone(account.last_payment_date)
+
+    def test_payments_set_good_standing(self):
+        account = self.accounts[0]
+        account.add_charge(Decimal('80.00'), 'Season dues')
+
+        account.add_payment(Decimal('50.00'), 'Part payment')
+        self.assertFalse(account.is_good_standing)
+
+        account.add_payment(Decimal('30.00'), 'Balance')
+        self.assertTrue(account.is_good_standing)
+        self.assertEqual(account.balance, Decimal('0.00'))
+
+    def test_rejects_unknown_types_and_accounts(self):
+        with self.assertRaises(ValueError):
+            apply_transaction(self.accounts[0].pk, 'fee', '10.00', 'Unknown')
+        with self.assertRaises(DuesAccount.DoesNotExist):
+            apply_transaction(0, 'charge', '10.00', 'Missing account')
+        self.assertFalse(DuesTransaction.objects.exists())
+
+    def test_charge_accounts_rolls_back_when_an_account_is_missing(self):
+        ids = [account.pk for account in self.accounts]
+
+        # The first batch succeeds before the missing id is reached
+        with self.assertRaises(DuesAccount.DoesNotExist):
+            charge_accounts(ids + [max(ids) + 1000], '25.00', 'Tournament fee', batch_size=3)
+
+        self.assertFalse(DuesTransaction.objects.exists())
+        self.assertEqual(
+            set(DuesAccount.objects.filter(pk__in=ids).values_list('balance', flat=True)), {Decimal('0.00')}
+        )
+
+    def test_mismatched_balances_are_found_and_reported(self):
+        drifted, clean, _ = self.accounts
+        drifted.add_charge(Decimal('40.00'), 'Season dues')
+        clean.add_charge(Decimal('40.00'), 'Season dues')
+        # Edited by hand, bypassing the ledger
+        DuesAccount.objects.filter(pk=drifted.pk).update(balance=Decimal('25.00'))
+
+        mismatches = list(find_ledger_mismatches())
+        self.assertEqual([(account.pk, account.ledger_balance) for account in mismatches],
+                         [(drifted.pk, Decimal('40.00'))])
+
+        out = StringIO()
+        with self.assertRaisesMessage(CommandError, '1 of 3 dues accounts do not match their ledger.'):
+            call_command('check_dues_ledger', stdout=out)
+        self.assertIn(f'Account {drifted.pk} (Ledger0 Player)', out.getvalue())
+        self.assertIn('difference $-15.00', out.getvalue())
+
+        out = StringIO()
+        call_command('check_dues_ledger', '--account', str(clean.pk), stdout=out)
+        self.assertIn('All 1 dues accounts match their ledger.', out.getvalue())
+
+
+class DuesStatementTests(QueryBudgetMixin, TestCase):
+    """Statements cover every selected account, with opening and closing balances."""
+
+    # accounts of the chunk, their transactions
+    STATEMENT_BUDGET = 2
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.staff = User.objects.create_user('office', 'office@example.com', 'pw', is_staff=True)
+        cls.adams = User.objects.create_user(
+            'adams', 'adams@example.com', 'pw', first_name='Ann', last_name='Adams'
+        )
+        cls.baker = User.objects.create_user(
+            'baker', 'baker@example.com', 'pw', first_name='Bob', last_name='Baker'
+        )
+
+        # Charged before the range, paid within it, charged again after it
+        cls.active = create_player('Ava', 'Adams', cls.adams)
+        backdate(cls.active.add_charge(Decimal('100.00'), 'Season dues'), days=20)
+        backdate(cls.active.add_payment(Decimal('30.00'), 'Check'), days=5)
+        backdate(cls.active.add_charge(Decimal('5.00'), 'Late fee'), days=1)
+        # A balance but nothing in the range
+        cls.quiet = create_player('Zed', 'Adams', cls.adams)
+        backdate(cls.quiet.add_charge(Decimal('50.00'), 'Season dues'), days=20)
+        # A family with no transactions in the range at all
+        cls.baker_account = create_player('Ben', 'Baker', cls.baker)
+        backdate(cls.baker_account.add_charge(Decimal('40.00'), 'Season dues'), days=20)
+        # Nobody to send it to
+        cls.orphan = create_player('Olly', 'Orphan')
+        backdate(cls.orphan.add_charge(Decimal('10.00'), 'Season dues'), days=5)
+
+    def setUp(self):
+        self.client = APIClient(HTTP_HOST='localhost')
+        self.client.force_authenticate(self.staff)
+        self.today = timezone.localdate()
+
+    def statement(self, **params):
+        query = '&'.join(f'{key}={value}' for key, value in params.items())
+        response = self.client.get(f'/api/portal/dues-accounts/statements/?{query}')
+        self.assertEqual(response.status_code, 200)
+        content = b''.join(response.streaming_content).decode()
+        return [
+            (row['family_email'], row['player'], row['type'], row['amount'], row['balance_after'])
+            for row in csv.DictReader(content.splitlines())
+        ]
+
+    def test_every_account_with_opening_and_closing_balances(self):
+        since = self.today - timedelta(days=10)
+        until = self.today - timedelta(days=3)
+
+        with self.assertQueryBudget(self.STATEMENT_BUDGET, 'statements'):
+            rows = self.statement(since=since, until=until)
+
+        self.assertEqual(rows, [
+            ('adams@example.com', 'Ava Adams', 'opening', '', '100.00'),
+            ('adams@example.com', 'Ava Adams', 'payment', '30.00', '70.00'),
+            ('adams@example.com', 'Ava Adams', 'closing', '', '70.00'),
+            ('adams@example.com', 'Zed Adams', 'opening', '', '50.00'),
+            ('adams@example.com', 'Zed Adams', 'closing', '', '50.00'),
+            ('adams@example.com', '', 'total', '', '120.00'),
+            ('baker@example.com', 'Ben Baker', 'opening', '', '40.00'),
+            ('baker@example.com', 'Ben Baker', 'closing', '', '40.00'),
+            ('baker@example.com', '', 'total', '', '40.00'),
+            ('', 'Olly Orphan', 'opening', '', '0.00'),
+            ('', 'Olly Orphan', 'charge', '10.00', '10.00'),
+            ('', 'Olly Orphan', 'closing', '', '10.00'),
+            ('', '', 'total', '', '10.00'),
+        ])
+
+    def test_without_until_closes_on_the_current_balance(self):
+        rows = self.statement(since=self.today - timedelta(days=2))
+
+        ava = [row for row in rows if row[1] == 'Ava Adams']
+        self.assertEqual(ava, [
+            ('adams@example.com', 'Ava Adams', 'opening', '', '70.00'),
+            ('adams@example.com', 'Ava Adams', 'charge', '5.00', '75.00'),
+            ('adams@example.com', 'Ava Adams', 'closing', '', '75.00'),
+        ])
+        self.assertIn(('adams@example.com', '', 'total', '', '125.00'), rows)
+
+    def test_streams_under_asgi(self):
+        token = Token.objects.create(user=self.staff)
+        since = self.today - timedelta(days=10)
+
+        with warnings.catch_warnings():
+            # Django warns when it has to read a sync iterator into a list
+            warnings.filterwarnings('error', message='StreamingHttpResponse must consume')
+            response = asgi_get(
+                f'/api/portal/dues-accounts/statements/?since={since}',
+                {'Authorization': f'Token {token.key}'},
+            )
+
+        self.assertEqual(response['status'], 200)
+        self.assertEqual(response['headers']['content-type'], 'text/csv')
+        content = b''.join(response['body']).decode()
+        self.assertEqual(content, b''.join(
+            self.client.get(f'/api/portal/dues-accounts/statements/?since={since}').streaming_content
+        ).decode())
+        totals = [(row['family_email'], row['balance_after']) for row in csv.DictReader(content.splitlines())
+                  if row['type'] == 'total']
+        self.assertEqual(totals, [('adams@example.com', '125.00'), ('baker@example.com', '40.00'), ('', '10.00')])
+
+    def test_small_chunks_keep_families_together(self):
+        from .services import iter_family_statements
+
+        rows = list(iter_family_statements(DuesAccount.objects.all(), chunk_size=1))
+
+        totals = [(row[0], row[7]) for row in rows if row[4] == 'total']
+        self.assertEqual(
+            totals, [('adams@example.com', '125.00'), ('baker@example.com', '40.00'), ('', '10.00')]
+        )
+
+
+class StaffExportTests(QueryBudgetMixin, TestCase):
+    """Exports stream filtered rows from one query, in flat memory."""
+
+    # The export reads every row with one query
+    EXPORT_BUDGET = 1
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.staff = User.objects.create_user('office', 'office@example.com', 'pw', is_staff=True)
+        cls.parent = User.objects.create_user('parent', 'parent@example.com', 'pw')
+        start = timezone.now() + timedelta(days=1)
+        cls.event, cls.other_event = [
+            Event.objects.create(
+                title=title, description='', event_type='tournament', start_datetime=start,
+                end_datetime=start + timedelta(hours=8), location='Gym',
+            )
+            for title in ('Spring Classic', 'Summer Classic')
+        ]
+        for index, (event, payment_status) in enumerate([
+            (cls.event, 'completed'), (cls.event, 'pending'), (cls.event, 'completed'),
+            (cls.other_event, 'completed'),
+        ]):
+            EventRegistration.objects.create(
+                event=event, user=cls.parent, participant_first_name='Kid',
+                participant_last_name=f'Number{index}', participant_email=f'kid{index}@example.com',
+                participant_age=12, emergency_contact_name='Parent', emergency_contact_phone='555-0100',
+                payment_status=payment_status, amount_paid=Decimal('25.00'),
+            )
+
+        address = {
+            'shipping_name': 'Parent', 'shipping_email': 'parent@example.com',
+            'shipping_address_line1': '1 Main St', 'shipping_city': 'Hoboken',
+            'shipping_state': 'NJ', 'shipping_zip': '07030',
+        }
+        cls.orders = [
+            Order.objects.create(user=cls.parent, status=order_status, subtotal=20, total=20, **address)
+            for order_status in ('paid', 'paid', 'canceled')
+        ]
+        # created_at is set on insert; move the first order back a month
+        Order.objects.filter(pk=cls.orders[0].pk).update(created_at=timezone.now() - timedelta(days=30))
+
+    def setUp(self):
+        self.client = APIClient(HTTP_HOST='localhost')
+        self.client.force_authenticate(self.staff)
+
+    def download(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, getattr(response, 'data', None))
+        return b''.join(response.streaming_content).decode()
+
+    def test_registrations_csv_filtered_by_event_and_status(self):
+        with self.assertQueryBudget(self.EXPORT_BUDGET, 'registrations_export'):
+            content = self.download(
+                f'/api/portal/exports/registrations.csv?event={self.event.pk}&status=completed'
+            )
+
+        rows = list(csv.DictReader(content.splitlines()))
+        self.assertEqual([row['participant_last_name'] for row in rows], ['Number0', 'Number2'])
+        self.assertEqual(rows[0]['event'], 'Spring Classic')
+        self.assertEqual(rows[0]['amount_paid'], '25.00')
+        self.assertEqual(rows[0]['account_email'], 'parent@example.com')
+
+    def test_orders_ndjson_filtered_by_date(self):
+        today = timezone.localdate()
+        with self.assertQueryBudget(self.EXPORT_BUDGET, 'orders_export'):
+            content = self.download(f'/api/portal/exports/orders.ndjson?since={today}&until={today}&status=paid')
+
+        records = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([record['order_number'] for record in records], [self.orders[1].order_number])
+        self.assertEqual(records[0]['total'], '20.00')
+        self.assertAlmostEqual(
+            datetime.fromisoformat(records[0]['created_at']), self.orders[1].created_at, delta=timedelta(milliseconds=1)
+        )
+
+    def test_rejects_filters_the_dataset_lacks(self):
+        response = self.client.get('/api/portal/exports/orders.csv?status=completed')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('status', response.data)
+
+        response = self.client.get(f'/api/portal/exports/orders.csv?event={self.event.pk}')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('event', response.data)
+
+        response = self.client.get('/api/portal/exports/players.csv')
+        self.assertEqual(response.status_code, 404)
+
+    def test_staff_only(self):
+        self.client.force_authenticate(self.parent)
+
+        response = self.client.get('/api/portal/exports/newsletter-subscribers.csv')
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_streams_under_asgi(self):
+        token = Token.objects.create(user=self.staff)
+
+        with warnings.catch_warnings():
+            # Django warns when it has to read a sync iterator into a list
+            warnings.filterwarnings('error', message='StreamingHttpResponse must consume')
+            response = asgi_get(
+                f'/api/portal/exports/registrations.csv?event={self.event.pk}',
+                {'Authorization': f'Token {token.key}'},
+            )
+
+        self.assertEqual(response['status'], 200)
+        self.assertEqual(response['headers']['content-type'], 'text/csv')
+        rows = list(csv.DictReader(StringIO(b''.join(response['body']).decode())))
+        self.assertEqual([row['participant_last_name'] for row in rows], ['Number0', 'Number1', 'Number2'])
+
+    @tag('slow')
+    def test_million_rows_in_flat_memory(self):
+        # About two minutes on SQLite (served twice); skip with --exclude-tag slow
+        rows = 1_000_000
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                WITH RECURSIVE numbers(n) AS (
+                    SELECT 1 UNION ALL SELECT n + 1 FROM numbers WHERE n < {rows}
+                )
+                INSERT INTO {NewsletterSubscriber._meta.db_table}
+                    (email, first_name, status, subscribe_events, subscribe_news, subscribe_promotions,
+                     subscribed_at, source, created_at, updated_at)
+                SELECT 'fan' || n || '@example.com', 'Fan', 'active', TRUE, TRUE, FALSE,
+                       CURRENT_TIMESTAMP, 'website', CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+                FROM numbers
+            """)
+
+        url = '/api/portal/exports/newsletter-subscribers.csv'
+        token = Token.objects.create(user=self.staff)
+        served_by = {
+            'wsgi': lambda count: [count(chunk) for chunk in self.client.get(url).streaming_content],
+            'asgi': lambda count: asgi_get(url, {'Authorization': f'Token {token.key}'}, on_chunk=count),
+        }
+        for handler, serve in served_by.items():
+            with self.subTest(handler=handler):
+                lines = size = 0
+
+                def count(chunk):
+                    nonlocal lines, size
+                    lines += chunk.count(b'\n')
+                    size += len(chunk)
+
+                tracemalloc.start()
+                try:
+                    serve(count)
+                    _, peak = tracemalloc.get_traced_memory()
+                finally:
+                    tracemalloc.stop()
+
+                self.assertEqual(lines, rows + 1)
+                self.assertGreater(size, 50 * 1024 * 1024)
+                # A fixed ceiling, far below the size of the file or the rows
+                self.assertLess(peak, 8 * 1024 * 1024)
+
+
+@override_settings(LIVE_UPDATES_HEARTBEAT_SECONDS=1)
+class LiveUpdatesTests(TestCase):
+    """Check-in changes are pushed to the event's staff and the family's stream."""
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.staff = User.objects.create_user('door', 'door@example.com', 'pw', is_staff=True)
+        cls.parent = User.objects.create_user('parent', 'parent@example.com', 'pw')
+        start = timezone.now() + timedelta(days=1)
+        cls.event = Event.objects.create(
+            title='Spring Classic', description='', event_type='tournament', start_datetime=start,
+            end_datetime=start + timedelta(hours=8), location='Gym',
+        )
+        cls.registration = EventRegistration.objects.create(
+            event=cls.event, user=cls.parent, participant_first_name='Kid', participant_last_name='One',
+            participant_email='kid@example.com', participant_age=12,
+            emergency_contact_name='Parent', emergency_contact_phone='555-0100',
+        )
+
+    def setUp(self):
+        # A fresh in-memory broker for every test
+        self.enterContext(override_settings(LIVE_UPDATES_BROKER='apps.core.live.InMemoryBroker'))
+
+    def test_check_ins_are_published_on_commit(self):
+        client = APIClient(HTTP_HOST='localhost')
+        client.force_authenticate(self.staff)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            client.post('/api/portal/check-ins/batch/', {
+                'event': self.event.pk, 'scans': [{'registration': self.registration.pk, 'at': timezone.now()}],
+            }, format='json')
+
+        messages, _ = async_to_sync(get_broker().backlog)(0)
+        self.assertEqual([message.event for message in messages], ['check_in'])
+        self.assertEqual(set(messages[0].topics), {f'event:{self.event.pk}', f'guardian:{self.parent.pk}'})
+        self.assertEqual(messages[0].data['registration'], self.registration.pk)
+
+    async def read_frames(self, user, path, count, headers=None):
+        client = AsyncClient(HTTP_HOST='localhost')
+        await client.aforce_login(user)
+        response = await client.get(path, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        frames = []
+        async for chunk in response.streaming_content:
+            frames.append(chunk.decode())
+            if len(frames) == count:
+                break
+        await response.streaming_content.aclose()
+        return frames
+
+    async def test_parent_stream_resumes_from_last_event_id(self):
+        broker = get_broker()
+        broker.publish('check_in', (f'guardian:{self.parent.pk}',), {'registration': self.registration.pk})
+        broker.publish('check_in', (f'event:{self.event.pk}',), {'registration': 0})
+
+        frames = await self.read_frames(self.parent, '/api/portal/live/', 3, {'Last-Event-ID': '0'})
+
+        self.assertEqual(frames[0], 'retry: 3000\n\n')
+        self.assertIn(f'data: {{"registration": {self.registration.pk}}}', frames[1])
+        # The staff-only message is skipped; an idle stream gets heartbeats
+        self.assertTrue(frames[2].startswith('event: heartbeat\n'))
+
+    async def test_staff_must_choose_topics(self):
+        client = AsyncClient(HTTP_HOST='localhost')
+        await client.aforce_login(self.staff)
+        self.assertEqual((await client.get('/api/portal/live/')).status_code, 400)
+        self.assertEqual((await AsyncClient(HTTP_HOST='localhost').get('/api/portal/live/')).status_code, 401)
+
+    def test_streams_are_refused_under_wsgi(self):
+        client = APIClient(HTTP_HOST='localhost')
+        client.force_login(self.staff)
+
+        response = client.get('/api/portal/live/', {'handoffs': 1})
+
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('ASGI', response.json()['error'])
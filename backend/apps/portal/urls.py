@@ -1,10 +1,10 @@
-from django.urls import path, include
+from django.urls import path, re_path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     UserProfileViewSet, PlayerViewSet, DuesAccountViewSet,
     SavedPaymentMethodViewSet, PromoCreditViewSet, EventCheckInViewSet,
-    parent_dashboard, staff_dashboard, waiver_status, sign_waiver,
-    social_auth
+    parent_dashboard, staff_dashboard, staff_export, waiver_status, sign_waiver,
+    social_auth, live_updates
 )
 
 router = DefaultRouter()
@@ -19,6 +19,10 @@ urlpatterns = [
     path('', include(router.urls)),
     path('dashboard/', parent_dashboard, name='parent-dashboard'),
     path('dashboard/staff/', staff_dashboard, name='staff-dashboard'),
+    re_path(
+        r'^exports/(?P<dataset>[a-z-]+)\.(?P<file_format>csv|ndjson)$', staff_export, name='staff-export'
+    ),
+    path('live/', live_updates, name='live-updates'),
     path('waiver/status/', waiver_status, name='waiver-status'),
     path('waiver/sign/', sign_waiver, name='waiver-sign'),
     path('social-auth/', social_auth, name='social-auth'),
@@ -1,10 +1,17 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.exceptions import APIException, NotAuthenticated, NotFound, ValidationError
+from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from asgiref.sync import sync_to_async
 from django.utils import timezone
 from django.db.models import Sum, Q
 from django.shortcuts import redirect
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
 from django.conf import settings
 from allauth.account.models import EmailConfirmationHMAC, EmailConfirmation
 from rest_framework.authtoken.models import Token
@@ -20,14 +27,26 @@ from .serializers import (
     PlayerCreateSerializer, GuardianRelationshipSerializer,
     DuesAccountSerializer, DuesTransactionSerializer,
     SavedPaymentMethodSerializer, PromoCreditSerializer,
-    EventCheckInSerializer, WaiverStatusSerializer, WaiverSignSerializer
+    EventCheckInSerializer, WaiverStatusSerializer, WaiverSignSerializer,
+    BulkChargeSerializer, DuesStatementSerializer,
+    BatchCheckInSerializer, CheckInRosterSerializer, ExportFilterSerializer
 )
 from .permissions import IsParentOrStaff, IsStaffMember, IsOwnerOrStaff
 from apps.registrations.models import EventRegistration
 from apps.registrations.serializers import EventRegistrationListSerializer
 from apps.payments.models import Order
-from apps.payments.serializers import OrderSerializer
+from apps.payments.serializers import ORDER_PREFETCH, OrderSerializer
 from apps.events.models import Event
+from apps.core.live import HANDOFFS_TOPIC, event_topic, get_hub, guardian_topic, stream
+from apps.core.streaming import stream_csv, stream_ndjson
+from .services import (
+    DATASETS, NDJSON, apply_check_ins, charge_accounts, export_queryset, filter_dues_accounts,
+    iter_event_roster, iter_export_csv, iter_export_records, iter_family_statements
+)
+import logging
+import time
+
+logger = logging.getLogger(__name__)
 
 
 class UserProfileViewSet(viewsets.ModelViewSet):
@@ -137,6 +156,82 @@ class DuesAccountViewSet(viewsets.ReadOnlyModelViewSet):
         transactions = account.transactions.all()
         return Response(DuesTransactionSerializer(transactions, many=True).data)
 
+    @action(detail=False, methods=['post'], url_path='bulk-charge', permission_classes=[IsStaffMember])
+    def bulk_charge(self, request):
+        """
+        Charge a fee to every account matching a filter.
+
+        POST /api/portal/dues-accounts/bulk-charge/
+        Body: {"amount": "75.00", "description": "Holiday Classic fee",
+               "team": "U14 Elite", "age_group": "U14", "event": 12,
+               "active_only": true, "dry_run": false}
+        """
+        serializer = BulkChargeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        account_ids = list(
+            filter_dues_accounts(**serializer.get_filter_kwargs()).values_list('pk', flat=True)
+        )
+
+        if data['dry_run'] or not account_ids:
+            return Response({
+                'dry_run': data['dry_run'],
+                'accounts': len(account_ids),
+                'total': str(data['amount'] * len(account_ids)),
+            })
+
+        started = time.monotonic()
+
+        def report(done, total):
+            elapsed = time.monotonic() - started
+            logger.info(
+                f"Bulk dues charge: {done}/{total} accounts "
+                f"({done / elapsed if elapsed else done:.0f} accounts/s)"
+            )
+
+        try:
+            transactions = charge_accounts(
+                account_ids,
+                data['amount'],
+                data['description'],
+                created_by=request.user,
+                progress=report,
+            )
+        except DuesAccount.DoesNotExist as e:
+            # An account was deleted between selecting and charging
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+
+        elapsed = time.monotonic() - started
+        return Response({
+            'dry_run': False,
+            'accounts': len(transactions),
+            'total': str(data['amount'] * len(transactions)),
+            'elapsed_seconds': round(elapsed, 3),
+            'accounts_per_second': round(len(transactions) / elapsed) if elapsed else len(transactions),
+        }, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['get'], permission_classes=[IsStaffMember])
+    def statements(self, request):
+        """
+        Download per-family dues statements as CSV.
+
+        GET /api/portal/dues-accounts/statements/?team=U14%20Elite&since=2025-01-01
+
+        Accepts the same filters as bulk-charge, plus optional since/until
+        dates (inclusive) for the transactions. The file is streamed row by row.
+        """
+        serializer = DuesStatementSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+
+        accounts = filter_dues_accounts(**serializer.get_filter_kwargs())
+        rows = iter_family_statements(
+            accounts,
+            since=serializer.validated_data.get('since'),
+            until=serializer.validated_data.get('until'),
+        )
+        return stream_csv(rows, f"dues-statements-{timezone.now():%Y%m%d}.csv")
+
 
 class SavedPaymentMethodViewSet(viewsets.ModelViewSet):
     """
@@ -225,6 +320,46 @@ class EventCheckInViewSet(viewsets.ModelViewSet):
         check_in.check_out()
         return Response(EventCheckInSerializer(check_in).data)
 
+    @action(detail=False, methods=['post'], permission_classes=[IsStaffMember])
+    def batch(self, request):
+        """
+        Apply queued scans for one event (staff only).
+
+        POST /api/portal/check-ins/batch/
+        Body: {"event": 12, "scans": [
+                  {"token": "1234:Kx3...", "action": "in", "at": "2025-03-01T09:02:11-05:00"},
+                  {"registration": 1235, "action": "out", "at": "2025-03-01T11:40:00-05:00"}]}
+
+        Safe to replay: scans already applied, or older than a player's last
+        change, are reported and ignored.
+        """
+        serializer = BatchCheckInSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        results = apply_check_ins(
+            serializer.validated_data['event'],
+            serializer.validated_data['scans'],
+            user=request.user,
+        )
+        return Response({'results': results})
+
+    @action(detail=False, methods=['get'], permission_classes=[IsStaffMember])
+    def roster(self, request):
+        """
+        Compact roster of an event for validating scans offline (staff only).
+
+        GET /api/portal/check-ins/roster/?event=12
+        """
+        serializer = CheckInRosterSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+
+        event = serializer.validated_data['event']
+        return Response({
+            'event': event.pk,
+            'generated_at': timezone.now(),
+            'registrations': list(iter_event_roster(event)),
+        })
+
 
 # ==================== Dashboard Views ====================
 
@@ -239,41 +374,56 @@ def parent_dashboard(request):
     user = request.user
 
     # Get or create profile
-    profile, _ = UserProfile.objects.get_or_create(user=user)
+    profile, _ = UserProfile.objects.select_related('user').get_or_create(user=user)
 
     # Get children
-    children = Player.objects.filter(
+    children = list(Player.objects.filter(
         guardian_relationships__guardian=user
-    ).distinct()
+    ).distinct())
 
     # Calculate total balance across all children
     total_balance = DuesAccount.objects.filter(
         player__in=children
     ).aggregate(total=Sum('balance'))['total'] or 0
 
-    # Get upcoming events for all children
-    upcoming_events = []
+    # Registrations are matched to children by name; one query covers all of them
+    children_by_name = {}
     for child in children:
-        regs = EventRegistration.objects.filter(
-            participant_first_name=child.first_name,
-            participant_last_name=child.last_name,
-            event__start_datetime__gte=timezone.now()
-        ).select_related('event').order_by('event__start_datetime')[:5]
+        children_by_name.setdefault((child.first_name, child.last_name), []).append(child)
+    name_filter = Q(pk__in=[])
+    for first_name, last_name in children_by_name:
+        name_filter |= Q(participant_first_name=first_name, participant_last_name=last_name)
 
-        for reg in regs:
+    # Get upcoming events for all children (up to 5 per child, 10 in total)
+    upcoming_events = []
+    per_child = {}
+    regs = EventRegistration.objects.filter(
+        name_filter,
+        event__start_datetime__gte=timezone.now()
+    ).select_related('event').order_by('event__start_datetime', 'id')
+
+    for reg in regs:
+        for child in children_by_name[(reg.participant_first_name, reg.participant_last_name)]:
+            if per_child.get(child.pk, 0) >= 5:
+                continue
+            per_child[child.pk] = per_child.get(child.pk, 0) + 1
             upcoming_events.append({
                 'player_name': child.full_name,
                 'event_title': reg.event.title,
                 'event_date': reg.event.start_datetime,
                 'registration_id': reg.id,
             })
+        if len(upcoming_events) >= 10:
+            break
 
     # Sort all events by date
     upcoming_events.sort(key=lambda x: x['event_date'])
     upcoming_events = upcoming_events[:10]  # Limit to 10
 
     # Get recent orders
-    recent_orders = Order.objects.filter(user=user).order_by('-created_at')[:5]
+    recent_orders = Order.objects.filter(user=user).prefetch_related(
+        *ORDER_PREFETCH
+    ).order_by('-created_at')[:5]
 
     # Get promo credit total
     promo_total = PromoCredit.objects.filter(
@@ -282,18 +432,18 @@ def parent_dashboard(request):
 
     # Get active check-ins
     active_check_ins = []
-    for child in children:
-        check_ins = EventCheckIn.objects.filter(
-            event_registration__participant_first_name=child.first_name,
-            event_registration__participant_last_name=child.last_name,
-            checked_in_at__isnull=False,
-            checked_out_at__isnull=True
-        ).select_related('event_registration__event')
-
-        for ci in check_ins:
+    check_ins = EventCheckIn.objects.filter(
+        event_registration__in=EventRegistration.objects.filter(name_filter),
+        checked_in_at__isnull=False,
+        checked_out_at__isnull=True
+    ).select_related('event_registration__event')
+
+    for ci in check_ins:
+        reg = ci.event_registration
+        for child in children_by_name[(reg.participant_first_name, reg.participant_last_name)]:
             active_check_ins.append({
                 'player_name': child.full_name,
-                'event_title': ci.event_registration.event.title,
+                'event_title': reg.event.title,
                 'checked_in_at': ci.checked_in_at,
             })
 
@@ -317,8 +467,8 @@ def staff_dashboard(request):
 
     Includes parent dashboard data plus admin statistics.
     """
-    # Get parent dashboard data first
-    parent_response = parent_dashboard(request)
+    # Get parent dashboard data first (the DRF view wants the plain HttpRequest)
+    parent_response = parent_dashboard(request._request)
     data = parent_response.data.copy()
 
     # Add admin stats
@@ -353,6 +503,102 @@ def staff_dashboard(request):
     return Response(data)
 
 
+# ==================== Exports ====================
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsStaffMember])
+def staff_export(request, dataset, file_format):
+    """
+    Download a whole table as CSV or NDJSON, streamed row by row.
+
+    GET /api/portal/exports/orders.csv?since=2025-01-01&until=2025-03-31&status=paid
+    GET /api/portal/exports/registrations.ndjson?event=12&status=completed
+
+    Datasets: orders, registrations, dues-transactions, newsletter-subscribers.
+    All accept since/until dates (inclusive) and a status; registrations and
+    dues transactions also accept an event.
+    """
+    export = DATASETS.get(dataset)
+    if export is None:
+        raise NotFound(f"Unknown export: {dataset}")
+
+    serializer = ExportFilterSerializer(data=request.query_params, context={'dataset': export})
+    serializer.is_valid(raise_exception=True)
+
+    rows = export_queryset(export, **serializer.validated_data)
+    filename = f"{dataset}-{timezone.now():%Y%m%d}.{file_format}"
+    logger.info(f"Export of {dataset} as {file_format} by {request.user.username}: {serializer.validated_data}")
+    if file_format == NDJSON:
+        return stream_ndjson(iter_export_records(rows, export.header), filename)
+    return stream_csv(iter_export_csv(rows, export.header), filename)
+
+
+# ==================== Live Updates ====================
+
+def _live_update_topics(request) -> list:
+    """Authenticate like the API does and choose the topics to follow."""
+    drf_request = Request(
+        request,
+        authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES],
+    )
+    if not drf_request.user.is_authenticated:
+        raise NotAuthenticated()
+
+    if not IsStaffMember().has_permission(drf_request, None):
+        return [guardian_topic(drf_request.user.pk)]
+
+    try:
+        topics = [event_topic(int(event_id)) for event_id in request.GET.getlist('event')]
+    except ValueError:
+        raise ValidationError({'event': 'Expected event ids.'})
+    if request.GET.get('handoffs') in ('1', 'true'):
+        topics.append(HANDOFFS_TOPIC)
+    if not topics:
+        raise ValidationError('Choose events (?event=<id>) or handoffs=1 to follow.')
+    return topics
+
+
+@require_GET
+async def live_updates(request):
+    """
+    Stream check-in, check-out and handoff changes as Server-Sent Events.
+
+    GET /api/portal/live/?event=12&event=14&handoffs=1
+
+    Staff follow the given events and, with handoffs=1, the handoff queue;
+    parents receive the changes concerning their own family. EventSource
+    sends Last-Event-ID when it reconnects and missed changes are replayed.
+    Streams need the ASGI application (config.asgi); under WSGI each one
+    would hold a worker for as long as it stays open, so they are refused.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {'error': 'Live updates are only available when the site is served over ASGI (config.asgi).'},
+            status=503,
+        )
+
+    try:
+        topics = await sync_to_async(_live_update_topics)(request)
+    except APIException as e:
+        return JsonResponse({'error': e.detail}, status=e.status_code)
+
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID', ''))
+    except ValueError:
+        last_event_id = None
+
+    hub = get_hub()
+    subscription = await hub.subscribe(topics, last_event_id)
+    response = StreamingHttpResponse(
+        stream(subscription, hub, settings.LIVE_UPDATES_HEARTBEAT_SECONDS),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Tell nginx not to buffer the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 # ==================== Waiver Views ====================
 
 CURRENT_WAIVER_VERSION = "2024.1"
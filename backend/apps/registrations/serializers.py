@@ -2,6 +2,7 @@ from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from .models import EventRegistration
 from apps.events.models import Event
+from apps.portal.services.check_in import check_in_token
 
 User = get_user_model()
 
@@ -86,6 +87,43 @@ class EventRegistrationSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
+class RosterParticipantSerializer(serializers.ModelSerializer):
+    """One participant of a bulk roster registration"""
+
+    class Meta:
+        model = EventRegistration
+        fields = [
+            'participant_first_name',
+            'participant_last_name',
+            'participant_age',
+            'participant_email',
+            'participant_phone',
+            'emergency_contact_name',
+            'emergency_contact_phone',
+            'emergency_contact_relationship',
+            'medical_notes',
+        ]
+        # Uniqueness per (event, user, email) is checked by register_roster
+        validators = []
+
+
+class BulkRegistrationSerializer(serializers.Serializer):
+    """Register a roster for one event; paid events need checkout URLs"""
+
+    event_slug = serializers.CharField()
+    participants = RosterParticipantSerializer(many=True, allow_empty=False, max_length=50)
+    success_url = serializers.URLField(required=False)
+    cancel_url = serializers.URLField(required=False)
+
+    def validate_participants(self, value):
+        emails = [participant.get('participant_email', '') for participant in value]
+        if len(set(emails)) != len(emails):
+            raise serializers.ValidationError(
+                "Each participant needs a different email (at most one may be left blank)."
+            )
+        return value
+
+
 class EventRegistrationListSerializer(serializers.ModelSerializer):
     """Serializer for listing user's registrations"""
 
@@ -94,6 +132,7 @@ class EventRegistrationListSerializer(serializers.ModelSerializer):
     event_start_datetime = serializers.ReadOnlyField(source='event.start_datetime')
     event_location = serializers.ReadOnlyField(source='event.location')
     event_type = serializers.ReadOnlyField(source='event.event_type')
+    check_in_token = serializers.SerializerMethodField()
 
     class Meta:
         model = EventRegistration
@@ -109,4 +148,9 @@ class EventRegistrationListSerializer(serializers.ModelSerializer):
             'payment_status',
             'amount_paid',
             'registered_at',
+            'check_in_token',
         ]
+
+    def get_check_in_token(self, obj):
+        """QR payload staff scan at the door"""
+        return check_in_token(obj.pk)
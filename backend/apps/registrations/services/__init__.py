@@ -0,0 +1,7 @@
+# Registrations services
+from .roster import RegistrationUnavailable, register_roster
+
+__all__ = [
+    'RegistrationUnavailable',
+    'register_roster',
+]
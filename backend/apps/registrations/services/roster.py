@@ -0,0 +1,92 @@
+"""
+Roster Registration Service
+
+Registers a whole roster for one event in a single transaction. The event
+row is locked (SELECT ... FOR UPDATE) while capacity is checked and the
+registrations are inserted, so two coaches filling the last spots at the
+same time cannot overbook it: the second waits for the first to commit and
+then sees the updated count.
+
+Registrations for paid events are pending until their checkout completes,
+and they hold their spots meanwhile: the count includes pending
+registrations younger than the checkout's lifetime (STOCK_RESERVATION_MINUTES,
+like stock holds) plus a grace period for late webhooks. An abandoned
+checkout's registrations stop counting once it expires, and the
+checkout.session.expired webhook deletes them.
+"""
+
+import logging
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from apps.events.models import Event
+from apps.payments.services.inventory import EXPIRY_GRACE, get_reservation_ttl
+from ..models import EventRegistration
+
+logger = logging.getLogger(__name__)
+
+
+class RegistrationUnavailable(Exception):
+    """Raised when an event cannot take the requested registrations"""
+
+
+def register_roster(event_slug: str, user, participants: list) -> tuple:
+    """
+    Register participants for an event, all or none.
+
+    Args:
+        event_slug: Public event to register for
+        user: Account the registrations belong to
+        participants: Dicts of EventRegistration participant/emergency fields
+
+    Returns:
+        (event, created registrations). Registrations for paid events are
+        pending until their checkout completes; free ones are completed.
+
+    Raises:
+        RegistrationUnavailable: Event missing, closed, short of spots, or a
+            participant is already registered
+    """
+    with transaction.atomic():
+        try:
+            event = Event.objects.select_for_update().get(slug=event_slug, is_public=True)
+        except Event.DoesNotExist:
+            raise RegistrationUnavailable("Event not found or not available.")
+
+        # Read under the lock; spots_remaining uses this instead of counting again
+        held_since = timezone.now() - get_reservation_ttl() - EXPIRY_GRACE
+        event.completed_registrations = event.registrations.filter(
+            Q(payment_status='completed') | Q(payment_status='pending', registered_at__gte=held_since)
+        ).count()
+
+        if not event.is_registration_open:
+            raise RegistrationUnavailable("Registration is currently closed for this event.")
+        if event.spots_remaining is not None and len(participants) > event.spots_remaining:
+            raise RegistrationUnavailable(
+                f"Only {event.spots_remaining} spots left, {len(participants)} requested."
+            )
+
+        emails = [participant.get('participant_email', '') for participant in participants]
+        already = set(
+            EventRegistration.objects.filter(event=event, user=user, participant_email__in=emails)
+            .order_by().values_list('participant_email', flat=True)
+        )
+        if already:
+            raise RegistrationUnavailable(
+                f"Already registered: {', '.join(sorted(email or '(no email)' for email in already))}."
+            )
+
+        paid = bool(event.requires_payment and event.price)
+        registrations = EventRegistration.objects.bulk_create([
+            EventRegistration(
+                event=event,
+                user=user,
+                payment_status='pending' if paid else 'completed',
+                amount_paid=event.price if paid else 0,
+                **participant,
+            )
+            for participant in participants
+        ])
+
+    logger.info(f"Registered {len(registrations)} participants for {event.slug} (user {user.pk})")
+    return event, registrations
@@ -1,3 +1,202 @@
-from django.test import TestCase
+import json
+from datetime import timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.core.testing import QueryBudgetMixin
+from apps.events.models import Event
+from .models import EventRegistration
+
+
+def roster(size, start=0):
+    return [
+        {
+            'participant_first_name': 'Player',
+            'participant_last_name': str(index),
+            'participant_age': 14,
+            'participant_email': f'player{index}@example.com',
+            'emergency_contact_name': 'Coach',
+            'emergency_contact_phone': '555-0100',
+        }
+        for index in range(start, start + size)
+    ]
+
+
+@override_settings(STRIPE_SECRET_KEY='sk_test_roster')
+class BulkRegistrationTests(QueryBudgetMixin, TestCase):
+    """POST /api/events/registrations/bulk/"""
+
+    url = '/api/events/registrations/bulk/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.coach = get_user_model().objects.create_user('coach', 'coach@example.com', 'pw')
+        start = timezone.now() + timedelta(days=14)
+        cls.practice = Event.objects.create(
+            title='Open Gym', slug='open-gym', description='', event_type='open_gym', location='Gym',
+            start_datetime=start, end_datetime=start + timedelta(hours=2), max_participants=5,
+        )
+        cls.tournament = Event.objects.create(
+            title='Spring Classic', slug='spring-classic', description='', event_type='tournament',
+            location='Arena', start_datetime=start, end_datetime=start + timedelta(hours=8),
+            requires_payment=True, price=Decimal('40.00'),
+        )
+        cls.clinic = Event.objects.create(
+            title='Shooting Clinic', slug='shooting-clinic', description='', event_type='camp', location='Gym',
+            start_datetime=start, end_datetime=start + timedelta(hours=3), max_participants=5,
+            requires_payment=True, price=Decimal('25.00'),
+        )
+
+    def setUp(self):
+        self.client = APIClient(HTTP_HOST='localhost')
+        self.client.force_authenticate(self.coach)
+
+    def post(self, event, participants, **extra):
+        return self.client.post(self.url, {'event_slug': event.slug, 'participants': participants, **extra}, format='json')
+
+    def post_paid(self, event, participants):
+        return self.post(
+            event, participants, success_url='https://example.com/success', cancel_url='https://example.com/cancel',
+        )
+
+    def test_free_event_registers_roster(self):
+        # paid-event check (no checkout URLs), lock event, count, duplicate check, insert, savepoint pair
+        with self.assertQueryBudget(7, 'EventRegistrationViewSet.bulk'):
+            response = self.post(self.practice, roster(4))
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data['registrations']), 4)
+        self.assertEqual(
+            set(self.practice.registrations.values_list('payment_status', flat=True)), {'completed'}
+        )
+
+    def test_capacity_is_checked_for_the_whole_roster(self):
+        self.post(self.practice, roster(3))
+
+        response = self.post(self.practice, roster(3, start=3))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Only 2 spots left', response.data['error'])
+        self.assertEqual(self.practice.registrations.count(), 3)
+
+    def test_rejects_already_registered_and_duplicate_participants(self):
+        self.post(self.practice, roster(1))
+
+        self.assertEqual(self.post(self.practice, roster(2)).status_code, 400)
+        self.assertEqual(self.post(self.practice, roster(1, start=5) * 2).status_code, 400)
+        self.assertEqual(self.practice.registrations.count(), 1)
+
+    @mock.patch('stripe.checkout.Session.create')
+    def test_paid_event_creates_one_checkout(self, create_session):
+        create_session.return_value = SimpleNamespace(id='cs_test_roster', url='https://checkout.stripe.com/c/pay/x')
+
+        response = self.post(
+            self.tournament, roster(3),
+            success_url='https://example.com/success', cancel_url='https://example.com/cancel',
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['session_id'], 'cs_test_roster')
+        create_session.assert_called_once()
+        params = create_session.call_args.kwargs
+        self.assertEqual(params['line_items'][0]['quantity'], 3)
+        self.assertEqual(params['line_items'][0]['price_data']['unit_amount'], 4000)
+        ids = {registration['id'] for registration in response.data['registrations']}
+        self.assertEqual({int(id) for id in params['metadata']['registration_ids'].split(',')}, ids)
+        self.assertEqual(
+            set(self.tournament.registrations.values_list('payment_status', flat=True)), {'pending'}
+        )
+
+    def test_paid_event_requires_checkout_urls(self):
+        response = self.post(self.tournament, roster(2))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(self.tournament.registrations.exists())
+
+    @mock.patch('stripe.checkout.Session.create', side_effect=RuntimeError('Stripe is down'))
+    def test_failed_checkout_removes_registrations(self, create_session):
+        response = self.post(
+            self.tournament, roster(2),
+            success_url='https://example.com/success', cancel_url='https://example.com/cancel',
+        )
+
+        self.assertEqual(response.status_code, 500)
+        self.assertFalse(self.tournament.registrations.exists())
+
+    @override_settings(STRIPE_WEBHOOK_SECRET='whsec_test')
+    @mock.patch('stripe.checkout.Session.create')
+    def test_webhook_completes_every_registration(self, create_session):
+        create_session.return_value = SimpleNamespace(id='cs_test_roster', url='https://checkout.stripe.com/c/pay/x')
+        self.post(
+            self.tournament, roster(2),
+            success_url='https://example.com/success', cancel_url='https://example.com/cancel',
+        )
+        metadata = create_session.call_args.kwargs['metadata']
+        event = {
+            'type': 'checkout.session.completed',
+            'data': {'object': {
+                'id': 'cs_test_roster', 'payment_intent': 'pi_roster', 'amount_total': 8000, 'metadata': metadata,
+            }},
+        }
+
+        with mock.patch('stripe.Webhook.construct_event', return_value=event):
+            response = APIClient(HTTP_HOST='localhost').post(
+                '/api/payments/webhook/stripe/', json.dumps(event), content_type='application/json',
+                HTTP_STRIPE_SIGNATURE='t=1,v1=x',
+            )
+
+        self.assertEqual(response.status_code, 200)
+        paid = EventRegistration.objects.filter(event=self.tournament)
+        self.assertEqual(set(paid.values_list('payment_status', 'amount_paid', 'stripe_payment_intent_id')),
+                         {('completed', Decimal('40.00'), 'pi_roster')})
+
+    @mock.patch('stripe.checkout.Session.create')
+    def test_unpaid_rosters_hold_their_spots(self, create_session):
+        create_session.return_value = SimpleNamespace(id='cs_test_roster', url='https://checkout.stripe.com/c/pay/x')
+
+        # Two coaches fill a paid event before either has paid
+        first = self.post_paid(self.clinic, roster(3))
+        second = self.post_paid(self.clinic, roster(3, start=3))
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 400)
+        self.assertIn('Only 2 spots left', second.data['error'])
+        self.assertEqual(self.clinic.registrations.count(), 3)
+        expires_at = create_session.call_args.kwargs['expires_at']
+        self.assertAlmostEqual(expires_at, (timezone.now() + timedelta(minutes=30)).timestamp(), delta=60)
+
+    @mock.patch('stripe.checkout.Session.create')
+    def test_abandoned_checkouts_release_their_spots(self, create_session):
+        create_session.return_value = SimpleNamespace(id='cs_test_roster', url='https://checkout.stripe.com/c/pay/x')
+        self.post_paid(self.clinic, roster(3))
+        self.clinic.registrations.update(registered_at=timezone.now() - timedelta(minutes=40))
+
+        response = self.post_paid(self.clinic, roster(3, start=3))
+
+        self.assertEqual(response.status_code, 201)
+
+    @override_settings(STRIPE_WEBHOOK_SECRET='whsec_test')
+    @mock.patch('stripe.checkout.Session.create')
+    def test_expired_checkout_deletes_pending_registrations(self, create_session):
+        create_session.return_value = SimpleNamespace(id='cs_test_roster', url='https://checkout.stripe.com/c/pay/x')
+        self.post_paid(self.clinic, roster(3))
+        event = {
+            'type': 'checkout.session.expired',
+            'data': {'object': {'id': 'cs_test_roster', 'metadata': create_session.call_args.kwargs['metadata']}},
+        }
+
+        with mock.patch('stripe.Webhook.construct_event', return_value=event):
+            response = APIClient(HTTP_HOST='localhost').post(
+                '/api/payments/webhook/stripe/', json.dumps(event), content_type='application/json',
+                HTTP_STRIPE_SIGNATURE='t=1,v1=x',
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(self.clinic.registrations.exists())
+        self.assertEqual(self.post_paid(self.clinic, roster(5, start=3)).status_code, 201)
@@ -1,9 +1,23 @@
+import logging
+
+import stripe
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.conf import settings
 from django.http import HttpResponse
+from django.utils import timezone
+from apps.events.models import Event
+from apps.payments.services.inventory import get_reservation_ttl
 from .models import EventRegistration
-from .serializers import EventRegistrationSerializer, EventRegistrationListSerializer
+from .serializers import (
+    BulkRegistrationSerializer,
+    EventRegistrationSerializer,
+    EventRegistrationListSerializer,
+)
+from .services import RegistrationUnavailable, register_roster
+
+logger = logging.getLogger(__name__)
 
 
 class EventRegistrationViewSet(viewsets.ModelViewSet):
@@ -11,6 +25,7 @@ class EventRegistrationViewSet(viewsets.ModelViewSet):
     API endpoint for event registrations.
 
     - POST /api/events/registrations/ - Create a new registration
+    - POST /api/events/registrations/bulk/ - Register a roster for one event
     - GET /api/events/registrations/ - List user's registrations
     - GET /api/events/registrations/{id}/ - Get specific registration
     - DELETE /api/events/registrations/{id}/ - Cancel registration (if allowed)
@@ -42,6 +57,88 @@ class EventRegistrationViewSet(viewsets.ModelViewSet):
             status=status.HTTP_201_CREATED
         )
 
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Register a roster (up to 50 participants) for one event.
+
+        Capacity is checked once with the event row locked and the
+        registrations are inserted together. For paid events, pass
+        success_url and cancel_url: the response includes one Stripe
+        checkout session covering every participant, which holds their
+        spots until it expires.
+        """
+        serializer = BulkRegistrationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        if not (data.get('success_url') and data.get('cancel_url')):
+            paid = Event.objects.filter(
+                slug=data['event_slug'], requires_payment=True, price__gt=0
+            ).exists()
+            if paid:
+                return Response(
+                    {'error': 'success_url and cancel_url are required for paid events'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        try:
+            event, registrations = register_roster(data['event_slug'], request.user, data['participants'])
+        except RegistrationUnavailable as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        response_data = {
+            'registrations': EventRegistrationListSerializer(registrations, many=True).data,
+        }
+        if not (event.requires_payment and event.price):
+            return Response(response_data, status=status.HTTP_201_CREATED)
+
+        registration_ids = [registration.id for registration in registrations]
+        try:
+            checkout_session = self._create_roster_checkout(event, registration_ids, data)
+        except Exception as e:
+            # Without a checkout the roster can't be paid for; let the coach retry
+            EventRegistration.objects.filter(id__in=registration_ids).delete()
+            logger.exception(f"Roster checkout failed for {event.slug}")
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        response_data['session_id'] = checkout_session.id
+        response_data['url'] = checkout_session.url
+        return Response(response_data, status=status.HTTP_201_CREATED)
+
+    def _create_roster_checkout(self, event, registration_ids, data):
+        """One Stripe checkout session for every registration in the roster"""
+        if not settings.STRIPE_SECRET_KEY:
+            raise ValueError("Stripe is not configured")
+
+        stripe.api_key = settings.STRIPE_SECRET_KEY
+        return stripe.checkout.Session.create(
+            customer_email=self.request.user.email,
+            line_items=[{
+                'price_data': {
+                    'currency': 'usd',
+                    'unit_amount': int(event.price * 100),  # Convert to cents
+                    'product_data': {
+                        'name': f"{event.title} - Registration",
+                        'description': event.description or f"Registration for {event.title}",
+                    },
+                },
+                'quantity': len(registration_ids),
+            }],
+            mode='payment',
+            success_url=data['success_url'],
+            cancel_url=data['cancel_url'],
+            # The pending registrations hold their spots for this long (see register_roster)
+            expires_at=int((timezone.now() + get_reservation_ttl()).timestamp()),
+            client_reference_id=f"event_{event.id}_roster",
+            metadata={
+                'event_id': str(event.id),
+                'user_id': str(self.request.user.id),
+                'type': 'event_registration',
+                'registration_ids': ','.join(map(str, registration_ids)),
+            },
+        )
+
     def destroy(self, request, *args, **kwargs):
         """Cancel a registration (only if payment is pending or event allows)"""
         instance = self.get_object()
@@ -0,0 +1,19 @@
+"""
+Performance benchmarks for the Django API hot paths.
+
+Seeds a dedicated benchmark database with apps.core.datagen, then calls each
+endpoint through the full middleware stack and records p50/p95 latency and
+queries per call. Results are written to JSON so runs can be compared across
+commits.
+
+Usage (from backend/):
+    python -m benchmarks                          # small dataset, all scenarios
+    python -m benchmarks --preset large --keepdb  # 100k events, 10k products, 1M registrations
+    python -m benchmarks --only catalog_list,parent_dashboard --iterations 200
+    python -m benchmarks --preset large --keepdb --only events_list,events_near
+    python -m benchmarks --compare benchmark-results/previous.json
+
+External services are stubbed: Printify returns canned rates and orders,
+Stripe checkout sessions are faked and webhooks are signed locally with a
+recorded checkout.session.completed payload.
+"""
@@ -0,0 +1,113 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment, teardown_test_environment  # noqa: E402
+
+from apps.core.datagen import DataGenerator, Volumes  # noqa: E402
+from apps.events.models import Event  # noqa: E402
+from apps.registrations.models import EventRegistration  # noqa: E402
+
+from .harness import build_report, format_table, run_scenario, write_report  # noqa: E402
+from .scenarios import build_scenarios, external_service_stubs  # noqa: E402
+
+PRESETS = {
+    'small': Volumes(families=500, events=1000, registrations=10_000, products=200, orders=2000, bags=500),
+    'medium': Volumes(families=5000, events=10_000, registrations=100_000, products=2000, orders=20_000,
+                      bags=5000),
+    'large': Volumes(families=50_000, events=100_000, registrations=1_000_000, products=10_000,
+                     orders=200_000, bags=50_000),
+}
+RESULTS_DIR = Path(__file__).resolve().parent.parent / 'benchmark-results'
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Benchmark API hot paths')
+    parser.add_argument('--preset', choices=PRESETS, default='small', help='Dataset size')
+    for field in ('families', 'events', 'registrations', 'products', 'orders', 'bags'):
+        parser.add_argument(f'--{field}', type=int, help=f'Override the preset number of {field}')
+    parser.add_argument('--seed', type=int, default=0, help='Data generator seed')
+    parser.add_argument('--iterations', type=int, default=50, help='Timed calls per scenario')
+    parser.add_argument('--warmup', type=int, default=5, help='Untimed calls before timing')
+    parser.add_argument('--only', help='Comma-separated scenario names to run')
+    parser.add_argument('--output', type=Path, help='Results file (default: benchmark-results/<timestamp>.json)')
+    parser.add_argument('--compare', type=Path, help='Previous results file to compare against')
+    parser.add_argument('--keepdb', action='store_true',
+                        help='Keep the benchmark database and reuse its data when the volumes match')
+    return parser.parse_args()
+
+
+def seeded_volumes(volumes: Volumes) -> bool:
+    """Whether the database already holds a dataset of these volumes."""
+    return (
+        Event.objects.filter(slug__startswith='bench-').count() == volumes.events
+        and EventRegistration.objects.count() == volumes.registrations
+    )
+
+
+def main():
+    args = parse_args()
+
+    volumes = Volumes(**PRESETS[args.preset].as_dict())
+    for field in ('families', 'events', 'registrations', 'products', 'orders', 'bags'):
+        if getattr(args, field) is not None:
+            setattr(volumes, field, getattr(args, field))
+
+    scenario_names = set(args.only.split(',')) if args.only else None
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+
+    # Never touch the development database: benchmark against the test
+    # database, a file for SQLite so --keepdb can reuse it
+    if connection.vendor == 'sqlite':
+        test_settings = connection.settings_dict.setdefault('TEST', {})
+        if not test_settings.get('NAME'):
+            test_settings['NAME'] = str(Path(tempfile.gettempdir()) / 'njstars-benchmark.sqlite3')
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=args.keepdb, serialize=False)
+
+    try:
+        if args.keepdb and seeded_volumes(volumes):
+            print('Reusing seeded benchmark database')
+        else:
+            if args.keepdb:
+                call_command('flush', interactive=False, verbosity=0)
+            print(f'Seeding {args.preset} dataset: {volumes.as_dict()}')
+            started = time.perf_counter()
+            counts = DataGenerator(volumes, seed=args.seed, log=print).generate()
+            print(f'Seeded {sum(counts.values()):,} rows in {time.perf_counter() - started:.1f}s')
+
+        results = {}
+        with external_service_stubs():
+            for scenario in build_scenarios():
+                if scenario_names and scenario.name not in scenario_names:
+                    continue
+                print(f'Running {scenario.name}...', flush=True)
+                results[scenario.name] = run_scenario(scenario, args.iterations, args.warmup)
+
+        report = build_report(results, volumes.as_dict(), args.seed, args.iterations, args.warmup)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=args.keepdb)
+        teardown_test_environment()
+
+    output = args.output or RESULTS_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}.json"
+    write_report(report, output)
+    print()
+    print(format_table(report, baseline))
+    print(f'\nResults written to {output}')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""
+Timing harness: runs scenarios, collects latency and query counts, and
+writes/compares JSON results.
+"""
+
+import json
+import platform
+import statistics
+import subprocess
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Optional
+
+import django
+from django.db import connection
+
+from apps.core.query_stats import QueryRecorder
+
+
+@dataclass
+class Scenario:
+    """
+    One benchmarked call.
+
+    `call` is timed; `setup` and `teardown` run around every iteration
+    (untimed) for calls that consume or change data, e.g. a webhook that
+    turns a bag into an order.
+    """
+
+    name: str
+    call: Callable[[], object]
+    setup: Optional[Callable[[], None]] = None
+    teardown: Optional[Callable[[], None]] = None
+    expected_status: int = 200
+
+
+def percentile(values: list, pct: int) -> float:
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[pct - 1]
+
+
+def run_scenario(scenario: Scenario, iterations: int, warmup: int) -> dict:
+    """Run a scenario and summarize its latency and queries per call."""
+    latencies, query_counts, sql_times = [], [], []
+
+    for iteration in range(warmup + iterations):
+        if scenario.setup:
+            scenario.setup()
+
+        recorder = QueryRecorder()
+        with recorder.record():
+            start = time.perf_counter()
+            response = scenario.call()
+            elapsed = time.perf_counter() - start
+
+        if scenario.teardown:
+            scenario.teardown()
+
+        if response.status_code != scenario.expected_status:
+            body = getattr(response, 'content', b'')[:500]
+            raise AssertionError(
+                f'{scenario.name}: expected {scenario.expected_status}, got {response.status_code}: {body!r}'
+            )
+
+        if iteration >= warmup:
+            latencies.append(elapsed * 1000)
+            query_counts.append(recorder.count)
+            sql_times.append(recorder.total_ms)
+
+    return {
+        'iterations': iterations,
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'mean_ms': round(statistics.fmean(latencies), 3),
+        'min_ms': round(min(latencies), 3),
+        'max_ms': round(max(latencies), 3),
+        'queries_p50': percentile(query_counts, 50),
+        'queries_max': max(query_counts),
+        'sql_ms_p50': round(percentile(sql_times, 50), 3),
+    }
+
+
+def git_revision() -> dict:
+    """Current commit and whether the tree has uncommitted changes."""
+    def git(*args):
+        return subprocess.run(
+            ['git', *args], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+
+    try:
+        return {'commit': git('rev-parse', 'HEAD'), 'dirty': bool(git('status', '--porcelain'))}
+    except (OSError, subprocess.CalledProcessError):
+        return {'commit': None, 'dirty': None}
+
+
+def build_report(results: dict, volumes: dict, seed: int, iterations: int, warmup: int) -> dict:
+    return {
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'git': git_revision(),
+        'environment': {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+        },
+        'volumes': volumes,
+        'seed': seed,
+        'iterations': iterations,
+        'warmup': warmup,
+        'results': results,
+    }
+
+
+def write_report(report: dict, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2, sort_keys=True) + '\n')
+
+
+def format_table(report: dict, baseline: Optional[dict] = None) -> str:
+    """Results as a text table, with % change against a baseline report."""
+    previous = (baseline or {}).get('results', {})
+    width = 8 if baseline else 0
+
+    def change(name, field):
+        old = previous.get(name, {}).get(field)
+        new = report['results'][name][field]
+        if not old:
+            return ''
+        return f' ({(new - old) / old * 100:+.0f}%)'
+
+    lines = [
+        f"{'scenario':<22} {'p50 ms':>{8 + width}} {'p95 ms':>{8 + width}} "
+        f"{'queries':>{7 + width}} {'sql ms':>8}"
+    ]
+    for name, result in report['results'].items():
+        lines.append(
+            f"{name:<22} "
+            f"{result['p50_ms']:>8.2f}{change(name, 'p50_ms'):>{width}} "
+            f"{result['p95_ms']:>8.2f}{change(name, 'p95_ms'):>{width}} "
+            f"{result['queries_p50']:>7g}{change(name, 'queries_p50'):>{width}} "
+            f"{result['sql_ms_p50']:>8.2f}"
+        )
+    if baseline:
+        commit = (baseline.get('git') or {}).get('commit') or 'unknown'
+        lines.append(f"(changes against {commit[:10]})")
+    return '\n'.join(lines)
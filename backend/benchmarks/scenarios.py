@@ -0,0 +1,194 @@
+"""
+Benchmarked endpoints and the stubs for the external services they call.
+"""
+
+import hashlib
+import hmac
+import itertools
+import json
+import time
+import uuid
+from contextlib import ExitStack, contextmanager
+from datetime import timedelta
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from apps.core.datagen import User
+from apps.payments.models import Bag, BagItem, Product
+from apps.payments.services.inventory import release_expired_holds
+
+from .harness import Scenario
+
+FIXTURES = Path(__file__).resolve().parent / 'fixtures'
+WEBHOOK_SECRET = 'whsec_benchmark'
+
+
+class StubPrintifyClient:
+    """Printify client answering from memory, with no network round trip"""
+
+    is_configured = True
+    shop_id = 'bench-shop'
+
+    def calculate_shipping(self, line_items, address):
+        return {'standard': 450 + 150 * (sum(item['quantity'] for item in line_items) - 1), 'express': 1500}
+
+    def create_order(self, line_items, shipping_address, external_id=None, **kwargs):
+        return {
+            'id': f'bench-{uuid.uuid4().hex[:12]}',
+            'line_items': [{'id': f'line-{index}'} for index, _ in enumerate(line_items)],
+        }
+
+
+def create_checkout_session(**params):
+    """Stand-in for stripe.checkout.Session.create"""
+    session_id = f'cs_test_{uuid.uuid4().hex}'
+    return SimpleNamespace(id=session_id, url=f'https://checkout.stripe.com/c/pay/{session_id}')
+
+
+def sign_stripe_payload(payload: bytes, secret: str = WEBHOOK_SECRET) -> str:
+    """Stripe-Signature header for a payload, as Stripe computes it."""
+    timestamp = int(time.time())
+    signed = f'{timestamp}.'.encode() + payload
+    signature = hmac.new(secret.encode(), signed, hashlib.sha256).hexdigest()
+    return f't={timestamp},v1={signature}'
+
+
+@contextmanager
+def external_service_stubs():
+    """Stub Printify and Stripe network calls for the duration of a run."""
+    with ExitStack() as stack:
+        stack.enter_context(override_settings(
+            STRIPE_SECRET_KEY='sk_test_benchmark',
+            STRIPE_WEBHOOK_SECRET=WEBHOOK_SECRET,
+            PRINTIFY_DRY_RUN=False,
+            QUERY_STATS_ENABLED=False,
+            QUERY_STATS_SERVER_TIMING=False,
+        ))
+        stack.enter_context(mock.patch(
+            'apps.payments.views.get_printify_client', return_value=StubPrintifyClient()
+        ))
+        stack.enter_context(mock.patch(
+            'stripe.checkout.Session.create', side_effect=create_checkout_session
+        ))
+        yield
+
+
+def client_for(user) -> APIClient:
+    """API client authenticated with the user's token, like the frontend."""
+    token, _ = Token.objects.get_or_create(user=user)
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    return client
+
+
+def shopper(username: str, products: list) -> tuple:
+    """A user whose bag holds exactly the given products."""
+    user, _ = User.objects.get_or_create(username=username, defaults={'email': f'{username}@example.com'})
+    bag, _ = Bag.objects.get_or_create(user=user)
+    bag.items.all().delete()
+    BagItem.objects.bulk_create([
+        BagItem(bag=bag, product=product, quantity=1, selected_size='M', selected_color='Black')
+        for product in products
+    ])
+    return user, bag
+
+
+def build_scenarios() -> list:
+    """Scenarios against the seeded database."""
+    # The family with the most registered children, for a full dashboard
+    parent = (
+        User.objects.filter(username__startswith='family', event_registrations__isnull=False)
+        .order_by('pk').first()
+    )
+    staff = User.objects.get(username='bench-staff')
+    parent_client = client_for(parent)
+    staff_client = client_for(staff)
+    anonymous = APIClient()
+
+    product_slugs = itertools.cycle(
+        Product.objects.filter(is_active=True).order_by('pk').values_list('slug', flat=True)[:100]
+    )
+    pod = list(Product.objects.filter(fulfillment_type='pod', is_active=True).order_by('pk')[:3])
+    local = list(Product.objects.filter(fulfillment_type='local', is_active=True).order_by('pk')[:1])
+    Product.objects.filter(pk__in=[product.pk for product in local]).update(stock_quantity=1_000_000)
+
+    checkout_user, _ = shopper('bench-checkout', pod + local)
+    checkout_client = client_for(checkout_user)
+
+    bag_user, _ = shopper('bench-bag', pod + local)
+    bag_client = client_for(bag_user)
+    add_product = pod[0] if pod else local[0]
+
+    webhook_user, webhook_bag = shopper('bench-webhook', [])
+    payload_template = json.loads((FIXTURES / 'stripe_checkout_session_completed.json').read_text())
+    webhook = {}
+
+    def prepare_webhook():
+        webhook_bag.items.all().delete()
+        items = BagItem.objects.bulk_create([
+            BagItem(bag=webhook_bag, product=product, quantity=1, selected_size='M', selected_color='Black')
+            for product in pod + local
+        ])
+        event = json.loads(json.dumps(payload_template))
+        session = event['data']['object']
+        session['id'] = f'cs_test_{uuid.uuid4().hex}'
+        session['payment_intent'] = f'pi_test_{uuid.uuid4().hex}'
+        session['metadata'].update({
+            'bag_id': str(webhook_bag.pk),
+            'user_id': str(webhook_user.pk),
+            'item_ids': ','.join(str(item.pk) for item in items),
+        })
+        payload = json.dumps(event).encode()
+        webhook['payload'] = payload
+        webhook['signature'] = sign_stripe_payload(payload)
+
+    def release_holds():
+        release_expired_holds(now=timezone.now() + timedelta(days=365))
+
+    return [
+        Scenario('catalog_list', lambda: anonymous.get('/api/payments/products/')),
+        Scenario('product_detail', lambda: anonymous.get(f'/api/payments/products/{next(product_slugs)}/')),
+        Scenario('bag_get', lambda: bag_client.get('/api/payments/bag/')),
+        Scenario(
+            'bag_add',
+            lambda: bag_client.post('/api/payments/bag/', {
+                'product_id': add_product.pk, 'quantity': 1, 'selected_size': 'L', 'selected_color': 'Black',
+            }, format='json'),
+            expected_status=201,
+        ),
+        Scenario(
+            'bag_checkout_prep',
+            lambda: checkout_client.post('/api/payments/checkout/bag/', {
+                'success_url': 'https://example.com/success', 'cancel_url': 'https://example.com/cancel',
+            }, format='json'),
+            teardown=release_holds,
+        ),
+        Scenario(
+            'calculate_shipping',
+            lambda: bag_client.post('/api/payments/bag/shipping/', {
+                'address': {'country': 'US', 'state': 'NJ', 'zip': '07030'},
+            }, format='json'),
+        ),
+        Scenario('events_list', lambda: anonymous.get('/api/events/')),
+        Scenario('events_near', lambda: anonymous.get('/api/events/?near=40.7449,-74.0324&radius_km=5')),
+        Scenario('events_calendar', lambda: parent_client.get('/api/events/calendar/')),
+        Scenario('parent_dashboard', lambda: parent_client.get('/api/portal/dashboard/')),
+        Scenario('staff_dashboard', lambda: staff_client.get('/api/portal/dashboard/staff/')),
+        Scenario('calendar_ics', lambda: parent_client.get(reverse('event-registration-calendar-ics'))),
+        Scenario('handoff_list', lambda: staff_client.get('/api/payments/handoffs/?status=pending')),
+        Scenario(
+            'stripe_webhook',
+            lambda: anonymous.post(
+                '/api/payments/webhook/stripe/', webhook['payload'],
+                content_type='application/json', HTTP_STRIPE_SIGNATURE=webhook['signature'],
+            ),
+            setup=prepare_webhook,
+        ),
+    ]
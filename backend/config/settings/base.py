@@ -74,7 +74,10 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Above WhiteNoise, so static files stream under ASGI too
+    'apps.core.middleware.AsyncStreamingMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'apps.core.middleware.QueryStatsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -183,11 +186,42 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 WAGTAIL_SITE_NAME = 'NJ Stars Elite AAU'
 WAGTAILADMIN_BASE_URL = config('WAGTAIL_ADMIN_URL', default='http://localhost:8000')
 
+# Seconds a serialized Wagtail API v2 response is cached (see apps/cms/cache.py)
+WAGTAIL_API_CACHE_TIMEOUT = config('WAGTAIL_API_CACHE_TIMEOUT', default=300, cast=int)
+
+
+# Cache
+# Defaults to per-process memory. Point CACHE_BACKEND/CACHE_LOCATION at a shared
+# backend (database, Redis) when running several workers so cache invalidation
+# reaches every process.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='njstars'),
+    }
+}
+
+
+# Query instrumentation (see apps/core/middleware.py)
+# QUERY_STATS_ENABLED collects per-route query histograms into the cache
+# (`python manage.py query_stats`); QUERY_STATS_SERVER_TIMING adds a
+# Server-Timing header with each response's query count and SQL time.
+QUERY_STATS_ENABLED = config('QUERY_STATS_ENABLED', default=False, cast=bool)
+QUERY_STATS_SERVER_TIMING = config('QUERY_STATS_SERVER_TIMING', default=False, cast=bool)
+# Log a warning for requests running more queries than this (0 disables)
+QUERY_STATS_WARN_QUERIES = config('QUERY_STATS_WARN_QUERIES', default=50, cast=int)
+# Seconds between merges of a process's histograms into the cache
+QUERY_STATS_FLUSH_SECONDS = config('QUERY_STATS_FLUSH_SECONDS', default=10, cast=int)
+
+# Calendar sync: recurring events are materialized this many days ahead
+CALENDAR_RECURRENCE_WINDOW_DAYS = config('CALENDAR_RECURRENCE_WINDOW_DAYS', default=90, cast=int)
 
 # Stripe settings
 STRIPE_PUBLIC_KEY = config('STRIPE_PUBLIC_KEY', default='')
 STRIPE_SECRET_KEY = config('STRIPE_SECRET_KEY', default='')
 STRIPE_WEBHOOK_SECRET = config('STRIPE_WEBHOOK_SECRET', default='')
+# Minutes a checkout holds stock for local products (Stripe's minimum session lifetime is 30)
+STOCK_RESERVATION_MINUTES = config('STOCK_RESERVATION_MINUTES', default=30, cast=int)
 
 
 # Print-on-Demand (Printify Integration)
@@ -198,6 +232,8 @@ PRINTIFY_SHOP_ID = config('PRINTIFY_SHOP_ID', default='')
 PRINTIFY_WEBHOOK_SECRET = config('PRINTIFY_WEBHOOK_SECRET', default='')
 # Set to True in development to skip actual Printify API calls (generates mock order IDs)
 PRINTIFY_DRY_RUN = config('PRINTIFY_DRY_RUN', default=False, cast=bool)
+# Seconds a product must go without new webhooks before process_printify_events syncs it
+PRINTIFY_WEBHOOK_DEBOUNCE_SECONDS = config('PRINTIFY_WEBHOOK_DEBOUNCE_SECONDS', default=30, cast=int)
 
 
 # Instagram Graph API
@@ -334,3 +370,41 @@ EMAIL_CONTEXT = {
     'support_email': 'support@njstarselite.com',
     'site_url': FRONTEND_URL,
 }
+
+# Live updates over Server-Sent Events (see apps/core/live.py). The database
+# broker relays changes from every worker to the process serving the streams;
+# use apps.core.live.InMemoryBroker only when one process does both.
+LIVE_UPDATES_BROKER = config('LIVE_UPDATES_BROKER', default='apps.core.live.DatabaseBroker')
+# Seconds between database broker polls (one per streaming process)
+LIVE_UPDATES_POLL_SECONDS = config('LIVE_UPDATES_POLL_SECONDS', default=1.0, cast=float)
+# Seconds a gap in update ids holds back later updates, waiting for the
+# missing one to commit (longer than a publishing transaction takes)
+LIVE_UPDATES_SETTLE_SECONDS = config('LIVE_UPDATES_SETTLE_SECONDS', default=2.0, cast=float)
+# Seconds published updates stay available to reconnecting clients (older
+# rows are deleted by `python manage.py prune_live_updates` and the run_jobs worker)
+LIVE_UPDATES_RETENTION_SECONDS = config('LIVE_UPDATES_RETENTION_SECONDS', default=3600, cast=int)
+# Seconds between heartbeats on an idle stream
+LIVE_UPDATES_HEARTBEAT_SECONDS = config('LIVE_UPDATES_HEARTBEAT_SECONDS', default=15, cast=int)
+# Messages queued for a slow client before its stream is closed (it reconnects and resumes)
+LIVE_UPDATES_QUEUE_SIZE = config('LIVE_UPDATES_QUEUE_SIZE', default=100, cast=int)
+
+# Background jobs (see apps/core/jobs.py; run with `python manage.py run_jobs`)
+# Jobs each worker process runs at once
+JOBS_WORKER_CONCURRENCY = config('JOBS_WORKER_CONCURRENCY', default=2, cast=int)
+# Seconds an idle worker waits before checking the queue again
+JOBS_POLL_SECONDS = config('JOBS_POLL_SECONDS', default=2.0, cast=float)
+# Attempts before a failing job is marked failed; retries back off from JOBS_RETRY_DELAY_SECONDS
+JOBS_MAX_ATTEMPTS = config('JOBS_MAX_ATTEMPTS', default=3, cast=int)
+JOBS_RETRY_DELAY_SECONDS = config('JOBS_RETRY_DELAY_SECONDS', default=30, cast=int)
+# Seconds between heartbeats of a running job (sent by its worker whatever the job is doing)
+JOBS_HEARTBEAT_SECONDS = config('JOBS_HEARTBEAT_SECONDS', default=30, cast=float)
+# A running job without a heartbeat for this long is assumed dead and requeued (as a failed attempt)
+JOBS_STALE_SECONDS = config('JOBS_STALE_SECONDS', default=600, cast=int)
+
+# Newsletter campaigns (see apps/core/newsletter.py; send with `python manage.py send_newsletter`)
+# Sender address; DEFAULT_FROM_EMAIL when empty
+NEWSLETTER_FROM_EMAIL = config('NEWSLETTER_FROM_EMAIL', default='')
+# Recipients sent over each SMTP connection
+NEWSLETTER_BATCH_SIZE = config('NEWSLETTER_BATCH_SIZE', default=100, cast=int)
+# Messages per second, within the email provider's limits (0 = no limit)
+NEWSLETTER_SEND_RATE = config('NEWSLETTER_SEND_RATE', default=10.0, cast=float)
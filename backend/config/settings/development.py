@@ -43,6 +43,9 @@ EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=False, cast=bool)
 EMAIL_HOST_USER = ''
 EMAIL_HOST_PASSWORD = ''
 
+# Server-Timing query headers on every response (see apps/core/middleware.py)
+QUERY_STATS_SERVER_TIMING = config('QUERY_STATS_SERVER_TIMING', default=DEBUG, cast=bool)
+
 # Disable some security features for local development
 SECURE_SSL_REDIRECT = False
 SESSION_COOKIE_SECURE = False
@@ -9,12 +9,13 @@ from datetime import timedelta
 
 from app.core.database import get_db
 from app.core.auth import (
-    verify_password,
-    get_password_hash,
+    verify_password_async,
+    get_password_hash_async,
     create_access_token,
     verify_token,
 )
 from app.core.config import settings
+from app.core.user_cache import snapshot_user, user_cache, user_from_snapshot
 from app.models import User, UserRole, AuthProvider
 from app.schemas.auth import UserRegister, UserLogin, Token, UserResponse
 
@@ -27,7 +28,12 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/token
 def get_current_user(
     token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
 ) -> User:
-    """Get current authenticated user from JWT token"""
+    """
+    Get current authenticated user from JWT token
+
+    User records are cached briefly per (user id, token iat), so repeated
+    requests with the same token skip the users query.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -44,10 +50,16 @@ def get_current_user(
     if email is None or user_id is None:
         raise credentials_exception
 
+    cache_key = (user_id, payload.get("iat"))
+    cached = user_cache.get(cache_key)
+    if cached is not None and cached["email"] == email:
+        return user_from_snapshot(db, cached)
+
     user = db.query(User).filter(User.id == user_id, User.email == email).first()
     if user is None:
         raise credentials_exception
 
+    user_cache.set(cache_key, snapshot_user(user))
     return user
 
 
@@ -78,7 +90,7 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
         )
 
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash_async(user_data.password)
     new_user = User(
         email=user_data.email,
         hashed_password=hashed_password,
@@ -112,7 +124,7 @@ async def login(user_data: UserLogin, db: Session = Depends(get_db)):
         )
 
     # Verify password
-    if not verify_password(user_data.password, user.hashed_password):
+    if not await verify_password_async(user_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -147,7 +159,7 @@ async def login_for_access_token(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    if not verify_password(form_data.password, user.hashed_password):
+    if not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -4,12 +4,25 @@ Authentication utilities for JWT token generation and validation
 
 from datetime import datetime, timedelta
 from typing import Optional
+import anyio
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.core.config import settings
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt is deliberately slow (~250 ms). Async routes must run it in a worker
+# thread, and the limiter caps how many threads can be hashing at once.
+_hash_limiter: Optional[anyio.CapacityLimiter] = None
+
+
+def _get_hash_limiter() -> anyio.CapacityLimiter:
+    """Create the limiter lazily, inside the running event loop"""
+    global _hash_limiter
+    if _hash_limiter is None:
+        _hash_limiter = anyio.CapacityLimiter(settings.PASSWORD_HASH_CONCURRENCY)
+    return _hash_limiter
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a hash"""
@@ -21,6 +34,20 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password in the hashing thread pool without blocking the event loop"""
+    return await anyio.to_thread.run_sync(
+        verify_password, plain_password, hashed_password, limiter=_get_hash_limiter()
+    )
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password in the hashing thread pool without blocking the event loop"""
+    return await anyio.to_thread.run_sync(
+        get_password_hash, password, limiter=_get_hash_limiter()
+    )
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -30,7 +57,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
 
-    to_encode.update({"exp": expire})
+    # iat lets the current-user cache tell tokens for the same user apart
+    to_encode.update({"exp": expire, "iat": datetime.utcnow()})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
     return encoded_jwt
@@ -16,6 +16,9 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    PASSWORD_HASH_CONCURRENCY: int = 4  # Max bcrypt operations running at once
+    USER_CACHE_TTL_SECONDS: int = 30
+    USER_CACHE_MAXSIZE: int = 1024
 
     # Stripe
     STRIPE_SECRET_KEY: str = ""
@@ -0,0 +1,117 @@
+"""
+Authenticated request throughput benchmark
+
+Measures GET /api/v1/auth/me throughput with the current-user cache enabled
+and disabled, plus concurrent login latency with bcrypt in the thread pool.
+
+Usage (from backend_fastapi/):
+    python -m benchmarks.auth_throughput
+    python -m benchmarks.auth_throughput --requests 2000 --logins 20
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.main import app
+from app.core.auth import get_password_hash
+from app.core.config import settings
+from app.core.database import Base, get_db
+from app.core.user_cache import user_cache
+from app.models import User, UserRole, AuthProvider
+
+engine = create_engine(
+    "sqlite:///:memory:",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def override_get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def setup_user() -> None:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.add(User(
+        email="bench@test.com",
+        hashed_password=get_password_hash("benchpass123"),
+        full_name="Bench User",
+        role=UserRole.PARENT,
+        provider=AuthProvider.CREDENTIALS,
+    ))
+    db.commit()
+    db.close()
+
+
+async def login(client: httpx.AsyncClient) -> float:
+    start = time.perf_counter()
+    response = await client.post(
+        f"{settings.API_V1_STR}/auth/login",
+        json={"email": "bench@test.com", "password": "benchpass123"},
+    )
+    response.raise_for_status()
+    return time.perf_counter() - start
+
+
+async def authenticated_requests(client: httpx.AsyncClient, token: str, count: int) -> float:
+    headers = {"Authorization": f"Bearer {token}"}
+    start = time.perf_counter()
+    for _ in range(count):
+        response = await client.get(f"{settings.API_V1_STR}/auth/me", headers=headers)
+        response.raise_for_status()
+    return count / (time.perf_counter() - start)
+
+
+async def run(requests: int, logins: int) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Concurrent logins: bcrypt runs in the thread pool, so the event loop
+        # keeps serving while hashes are verified
+        latencies = await asyncio.gather(*(login(client) for _ in range(logins)))
+        print(f"Logins: {logins} concurrent, "
+              f"p50 {statistics.median(latencies) * 1000:.0f} ms, "
+              f"max {max(latencies) * 1000:.0f} ms")
+
+        response = await client.post(
+            f"{settings.API_V1_STR}/auth/login",
+            json={"email": "bench@test.com", "password": "benchpass123"},
+        )
+        token = response.json()["access_token"]
+
+        user_cache.ttl = 0  # every lookup misses
+        uncached = await authenticated_requests(client, token, requests)
+
+        user_cache.ttl = settings.USER_CACHE_TTL_SECONDS
+        user_cache.clear()
+        cached = await authenticated_requests(client, token, requests)
+
+    print(f"GET /auth/me without user cache: {uncached:,.0f} req/s")
+    print(f"GET /auth/me with user cache:    {cached:,.0f} req/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--logins", type=int, default=10)
+    args = parser.parse_args()
+
+    app.dependency_overrides[get_db] = override_get_db
+    setup_user()
+    asyncio.run(run(args.requests, args.logins))
+
+
+if __name__ == "__main__":
+    main()
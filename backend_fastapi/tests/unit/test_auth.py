@@ -0,0 +1,117 @@
+"""
+Unit tests for password hashing helpers and the current-user cache
+"""
+
+import pytest
+from unittest.mock import patch
+from sqlalchemy.orm import Session
+from app.core.auth import (
+    create_access_token,
+    get_password_hash_async,
+    verify_password_async,
+    verify_token,
+)
+from app.core.user_cache import UserCache, user_cache
+from app.api.routes.auth import get_current_user
+from app.models import User
+
+
+@pytest.mark.unit
+class TestPasswordHashing:
+    """Tests for thread-pooled bcrypt helpers"""
+
+    async def test_hash_and_verify(self):
+        """Test async hashing round-trips through verification"""
+        hashed = await get_password_hash_async("testpass123")
+
+        assert await verify_password_async("testpass123", hashed)
+        assert not await verify_password_async("wrongpass", hashed)
+
+    def test_access_token_has_iat(self):
+        """Test tokens carry an issued-at claim"""
+        token = create_access_token({"sub": "a@test.com", "user_id": 1})
+        payload = verify_token(token)
+
+        assert "iat" in payload
+
+
+@pytest.mark.unit
+class TestUserCache:
+    """Tests for the TTL LRU user cache"""
+
+    def test_get_and_set(self):
+        """Test storing and reading an entry"""
+        cache = UserCache(maxsize=10, ttl=60)
+        cache.set((1, 100), {"id": 1})
+
+        assert cache.get((1, 100)) == {"id": 1}
+        assert cache.get((1, 200)) is None
+
+    def test_entries_expire(self):
+        """Test entries are dropped after the TTL"""
+        cache = UserCache(maxsize=10, ttl=30)
+        with patch("app.core.user_cache.time.monotonic", return_value=1000):
+            cache.set((1, 100), {"id": 1})
+        with patch("app.core.user_cache.time.monotonic", return_value=1031):
+            assert cache.get((1, 100)) is None
+        assert len(cache) == 0
+
+    def test_least_recently_used_is_evicted(self):
+        """Test the LRU entry is evicted when full"""
+        cache = UserCache(maxsize=2, ttl=60)
+        cache.set((1, 1), {"id": 1})
+        cache.set((2, 1), {"id": 2})
+        cache.get((1, 1))
+        cache.set((3, 1), {"id": 3})
+
+        assert cache.get((2, 1)) is None
+        assert cache.get((1, 1)) == {"id": 1}
+        assert cache.get((3, 1)) == {"id": 3}
+
+    def test_invalidate_user(self):
+        """Test invalidating a user drops all of their tokens"""
+        cache = UserCache(maxsize=10, ttl=60)
+        cache.set((1, 100), {"id": 1})
+        cache.set((1, 200), {"id": 1})
+        cache.set((2, 100), {"id": 2})
+        cache.invalidate_user(1)
+
+        assert cache.get((1, 100)) is None
+        assert cache.get((1, 200)) is None
+        assert cache.get((2, 100)) == {"id": 2}
+
+
+@pytest.mark.unit
+class TestGetCurrentUser:
+    """Tests for the cached get_current_user dependency"""
+
+    def setup_method(self):
+        user_cache.clear()
+
+    def _token(self, user: User) -> str:
+        return create_access_token(
+            {"sub": user.email, "user_id": user.id, "role": user.role.value}
+        )
+
+    def test_second_lookup_is_cached(self, db: Session, parent_user: User):
+        """Test repeated requests with the same token skip the query"""
+        token = self._token(parent_user)
+        get_current_user(token, db)
+
+        with patch.object(db, "query") as query:
+            user = get_current_user(token, db)
+
+        query.assert_not_called()
+        assert user.id == parent_user.id
+        assert user.email == parent_user.email
+
+    def test_update_invalidates_cache(self, db: Session, parent_user: User):
+        """Test changing the user evicts the cached record"""
+        token = self._token(parent_user)
+        get_current_user(token, db)
+
+        parent_user.full_name = "Renamed Parent"
+        db.commit()
+
+        assert len(user_cache) == 0
+        assert get_current_user(token, db).full_name == "Renamed Parent"